@@ -0,0 +1,49 @@
+"""add portfolio_snapshots table
+
+Revision ID: c41d7e2a9f10
+Revises: 8ab48f210080
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e2a9f10'
+down_revision: Union[str, None] = '8ab48f210080'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'portfolio_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False, comment='평가 기준일'),
+        sa.Column('market_type', sa.String(length=20), nullable=False, comment='DOMESTIC/OVERSEAS'),
+        sa.Column('market_value_krw', sa.DECIMAL(precision=18, scale=2), nullable=False, comment='평가금액 (원화)'),
+        sa.Column('cost_basis_krw', sa.DECIMAL(precision=18, scale=2), nullable=False, comment='보유 원가 (원화)'),
+        sa.Column('net_cash_flow_krw', sa.DECIMAL(precision=18, scale=2), nullable=False, comment='당일 순투입액 (매수 - 매도, 원화)'),
+        sa.Column('realized_gain_krw', sa.DECIMAL(precision=18, scale=2), nullable=False, comment='당일 실현손익 (원화)'),
+        sa.Column('position_count', sa.Integer(), nullable=False, comment='보유 종목 수'),
+        sa.Column('exchange_rate', sa.DECIMAL(precision=10, scale=4), nullable=False, comment='평가 환율 (USD/KRW, 국내=1.0)'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'snapshot_date', 'market_type', name='unique_user_date_market'),
+        mysql_charset='utf8mb4',
+        mysql_engine='InnoDB'
+    )
+    op.create_index(op.f('ix_portfolio_snapshots_id'), 'portfolio_snapshots', ['id'], unique=False)
+    op.create_index('idx_snapshot_date', 'portfolio_snapshots', ['snapshot_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_snapshot_date', table_name='portfolio_snapshots')
+    op.drop_index(op.f('ix_portfolio_snapshots_id'), table_name='portfolio_snapshots')
+    op.drop_table('portfolio_snapshots')
@@ -0,0 +1,51 @@
+"""add realized_pnl_monthly table
+
+Revision ID: d7a3b5e1c802
+Revises: c41d7e2a9f10
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3b5e1c802'
+down_revision: Union[str, None] = 'c41d7e2a9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'realized_pnl_monthly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('year_month', sa.String(length=7), nullable=False, comment='매도 연월 (YYYY-MM)'),
+        sa.Column('broker_id', sa.Integer(), nullable=False),
+        sa.Column('market_type', sa.String(length=20), nullable=False, comment='DOMESTIC/OVERSEAS'),
+        sa.Column('currency', sa.String(length=3), nullable=False, comment='거래 통화'),
+        sa.Column('sell_count', sa.Integer(), nullable=False, comment='매도 건수'),
+        sa.Column('quantity', sa.Integer(), nullable=False, comment='매도 수량'),
+        sa.Column('proceeds', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='매도 순수익 (수수료/세금 차감, 거래 통화)'),
+        sa.Column('cost_basis', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='매도 원가 (평균단가 × 수량, 거래 통화)'),
+        sa.Column('realized_profit', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='실현손익 (거래 통화)'),
+        sa.Column('realized_profit_krw', sa.DECIMAL(precision=18, scale=2), nullable=False, comment='실현손익 (매도 당시 환율 원화)'),
+        sa.Column('commission', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='수수료 합계'),
+        sa.Column('transaction_tax', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='거래세 합계'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['broker_id'], ['brokers.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'year_month', 'broker_id', 'market_type', 'currency', name='unique_user_month_broker_market_currency'),
+        mysql_charset='utf8mb4',
+        mysql_engine='InnoDB'
+    )
+    op.create_index(op.f('ix_realized_pnl_monthly_id'), 'realized_pnl_monthly', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_realized_pnl_monthly_id'), table_name='realized_pnl_monthly')
+    op.drop_table('realized_pnl_monthly')
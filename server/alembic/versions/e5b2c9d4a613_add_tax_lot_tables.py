@@ -0,0 +1,90 @@
+"""add tax_lots and tax_lot_disposals tables
+
+Revision ID: e5b2c9d4a613
+Revises: d7a3b5e1c802
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c9d4a613'
+down_revision: Union[str, None] = 'd7a3b5e1c802'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'tax_lots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('stock_id', sa.Integer(), nullable=False),
+        sa.Column('broker_id', sa.Integer(), nullable=False),
+        sa.Column('buy_transaction_id', sa.Integer(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(timezone=True), nullable=False, comment='취득일시 (매수 거래일시)'),
+        sa.Column('quantity', sa.Integer(), nullable=False, comment='매수 수량'),
+        sa.Column('remaining_quantity', sa.Integer(), nullable=False, comment='미소진 수량'),
+        sa.Column('unit_cost', sa.DECIMAL(precision=15, scale=6), nullable=False, comment='주당 취득원가 (수수료 포함, 거래 통화)'),
+        sa.Column('exchange_rate', sa.DECIMAL(precision=10, scale=4), nullable=False, comment='취득 당시 환율 (국내주식=1.0)'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+        sa.ForeignKeyConstraint(['broker_id'], ['brokers.id'], ),
+        sa.ForeignKeyConstraint(['buy_transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('buy_transaction_id'),
+        mysql_charset='utf8mb4',
+        mysql_engine='InnoDB'
+    )
+    op.create_index(op.f('ix_tax_lots_id'), 'tax_lots', ['id'], unique=False)
+    op.create_index('idx_lot_user_stock_broker_acquired', 'tax_lots', ['user_id', 'stock_id', 'broker_id', 'acquired_at'], unique=False)
+    op.create_index('idx_lot_user_remaining', 'tax_lots', ['user_id', 'remaining_quantity'], unique=False)
+
+    op.create_table(
+        'tax_lot_disposals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('stock_id', sa.Integer(), nullable=False),
+        sa.Column('broker_id', sa.Integer(), nullable=False),
+        sa.Column('buy_transaction_id', sa.Integer(), nullable=False),
+        sa.Column('sell_transaction_id', sa.Integer(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(timezone=True), nullable=False, comment='취득일시'),
+        sa.Column('disposed_at', sa.DateTime(timezone=True), nullable=False, comment='처분일시 (매도 거래일시)'),
+        sa.Column('quantity', sa.Integer(), nullable=False, comment='처분 수량'),
+        sa.Column('cost_basis', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='취득원가 (수수료 포함, 거래 통화)'),
+        sa.Column('proceeds', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='매도 순수익 (수수료/세금 차감, 거래 통화)'),
+        sa.Column('realized_profit', sa.DECIMAL(precision=18, scale=4), nullable=False, comment='실현손익 (거래 통화)'),
+        sa.Column('buy_exchange_rate', sa.DECIMAL(precision=10, scale=4), nullable=False, comment='취득 당시 환율'),
+        sa.Column('sell_exchange_rate', sa.DECIMAL(precision=10, scale=4), nullable=False, comment='처분 당시 환율'),
+        sa.Column('realized_profit_krw', sa.DECIMAL(precision=18, scale=2), nullable=False, comment='실현손익 (원화, 취득/처분 당시 환율)'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+        sa.ForeignKeyConstraint(['broker_id'], ['brokers.id'], ),
+        sa.ForeignKeyConstraint(['buy_transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sell_transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sell_transaction_id', 'buy_transaction_id', name='unique_disposal_sell_buy'),
+        mysql_charset='utf8mb4',
+        mysql_engine='InnoDB'
+    )
+    op.create_index(op.f('ix_tax_lot_disposals_id'), 'tax_lot_disposals', ['id'], unique=False)
+    op.create_index('idx_disposal_user_date', 'tax_lot_disposals', ['user_id', 'disposed_at'], unique=False)
+    op.create_index('idx_disposal_user_stock_broker_date', 'tax_lot_disposals', ['user_id', 'stock_id', 'broker_id', 'disposed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_disposal_user_stock_broker_date', table_name='tax_lot_disposals')
+    op.drop_index('idx_disposal_user_date', table_name='tax_lot_disposals')
+    op.drop_index(op.f('ix_tax_lot_disposals_id'), table_name='tax_lot_disposals')
+    op.drop_table('tax_lot_disposals')
+    op.drop_index('idx_lot_user_remaining', table_name='tax_lots')
+    op.drop_index('idx_lot_user_stock_broker_acquired', table_name='tax_lots')
+    op.drop_index(op.f('ix_tax_lots_id'), table_name='tax_lots')
+    op.drop_table('tax_lots')
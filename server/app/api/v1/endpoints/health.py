@@ -5,6 +5,8 @@ from sqlalchemy import text
 
 from ....config.database import get_async_session
 from ....config.settings import get_settings
+from ....external.kis_api import kis_api_service
+from ....external.kis_websocket import realtime_quote_service
 
 router = APIRouter()
 settings = get_settings()
@@ -59,4 +61,16 @@ async def database_health_check(session: AsyncSession = Depends(get_async_sessio
           "database": settings.mysql_database
         }
       }
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/kis")
+async def kis_api_health_check():
+  """KIS API 상태 (호출 스케줄러 대기열/대기 시간, 요청 합치기, 실시간 시세 현황)"""
+  return JSONResponse(
+    content={
+      "success": True,
+      **kis_api_service.get_stats(),
+      "realtime": realtime_quote_service.get_stats()
+    }
+  )
@@ -1,22 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
 from app.config.database import get_async_session
 from app.crud.holding_crud import holding_crud
+from app.crud.realized_pnl_crud import realized_pnl_crud
 from app.models.user import User
 from app.schemas.common_schemas import ( 
-  CompletePortfolioResponse, RealizedProfitListResponse, PortfolioOverviewResponse, PortfolioStocksResponse, PortfolioStockItem
+  CompletePortfolioResponse, RealizedProfitListResponse, PortfolioOverviewResponse, PortfolioStocksResponse, PortfolioStockItem,
+  PortfolioHistoryResponse, PortfolioRiskResponse, MarketType, SortOrder,
+  RealizedProfitSummaryResponse, SummaryPeriod, TaxLotListResponse, TaxLotDisposalListResponse,
+  RebalanceSimulateRequest, RebalanceSimulateResponse
 )
+from app.core.constants import RISK_MAX_WINDOW_DAYS
 from app.core.dependencies import get_current_user
 from app.services.portfolio_service import portfolio_service
+from app.services.portfolio_stream_service import PortfolioStream
+from app.services.portfolio_snapshot_service import portfolio_snapshot_service
+from app.services.portfolio_risk_service import portfolio_risk_service
+from app.services.rebalance_service import rebalance_service
+from app.services.tax_lot_service import tax_lot_service
+from app.utils.etag import etag_matches
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=CompletePortfolioResponse)
 async def get_complete_portfolio(
+  request: Request,
+  response: Response,
   current_user: User = Depends(get_current_user)
 ):
   """
@@ -25,12 +39,17 @@ async def get_complete_portfolio(
   - 실시간 현재가 + 손익 계산
   - 국내/해외 요약 카드
   - 환율 정보
+  - ETag 지원: If-None-Match(W/, 쉼표 목록, * 포함)가 일치하면 304 (보유/시세/환율 변동 없음)
   """
   try:
     logger.info(f"포트폴리오 조회 요청: user_id={current_user.id}")
     
-    portfolio_data = await portfolio_service.get_complete_portfolio(current_user.id)
+    portfolio_data, etag = await portfolio_service.get_complete_portfolio_with_etag(current_user.id)
     
+    if etag_matches(request.headers.get("if-none-match"), etag):
+      return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
     logger.info(f"포트폴리오 조회 완료: user_id={current_user.id}")
     return portfolio_data
     
@@ -38,6 +57,74 @@ async def get_complete_portfolio(
     logger.error(f"포트폴리오 조회 중 오류: user_id={current_user.id}, error={str(e)}")
     raise HTTPException(status_code=500, detail="포트폴리오 정보를 불러올 수 없습니다.")
 
+@router.get("/stream")
+async def stream_portfolio(
+  current_user: User = Depends(get_current_user)
+):
+  """
+  실시간 포트폴리오 스트림 (Server-Sent Events)
+  - event: snapshot → 전체 포트폴리오 (GET /portfolio와 같은 형식, 보유 종목 변경 시 재전송)
+  - event: delta → 가격이 바뀐 종목 행(rows)과 합계(totals)
+  """
+  logger.info(f"포트폴리오 스트림 요청: user_id={current_user.id}")
+  
+  return StreamingResponse(
+    PortfolioStream(current_user.id).events(),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
+
+@router.get("/history", response_model=PortfolioHistoryResponse)
+async def get_portfolio_history(
+  start_date: date = Query(..., description="시작일 (YYYY-MM-DD)"),
+  end_date: date = Query(..., description="종료일 (YYYY-MM-DD)"),
+  market_type: Optional[MarketType] = Query(None, description="시장 구분 (미지정 시 국내+해외 합산)"),
+  current_user: User = Depends(get_current_user)
+):
+  """
+  일별 포트폴리오 NAV 시계열 (성과 차트용)
+  - 장 마감 후 작업이 기록한 스냅샷 범위 조회
+  """
+  if start_date > end_date:
+    raise HTTPException(status_code=400, detail="시작일이 종료일보다 늦습니다.")
+  
+  try:
+    history = await portfolio_snapshot_service.get_history(
+      current_user.id, start_date, end_date, market_type.value if market_type else None
+    )
+    return {
+      "success": True,
+      "data": history,
+      "total_count": len(history)
+    }
+    
+  except Exception as e:
+    logger.error(f"포트폴리오 NAV 조회 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="포트폴리오 기록을 불러올 수 없습니다.")
+
+@router.get("/risk", response_model=PortfolioRiskResponse)
+async def get_portfolio_risk(
+  days: int = Query(252, ge=20, le=RISK_MAX_WINDOW_DAYS, description="최근 거래일 수"),
+  rolling_window: int = Query(20, ge=5, le=126, description="이동 변동성 구간 (거래일)"),
+  current_user: User = Depends(get_current_user)
+):
+  """
+  포트폴리오 리스크 지표
+  - 현재 보유 수량 기준 일별 종가 수익률 (KRW 환산)
+  - 연율화 변동성, 샤프 비율, 최대 낙폭, 이동 변동성
+  - KOSPI / S&P500 대비 베타 (추종 ETF 종가 기준)
+  """
+  try:
+    risk = await portfolio_risk_service.get_portfolio_risk(current_user.id, days, rolling_window)
+    return {
+      "success": True,
+      "data": risk
+    }
+    
+  except Exception as e:
+    logger.error(f"포트폴리오 리스크 조회 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="포트폴리오 리스크 지표를 불러올 수 없습니다.")
+
 @router.get("/overview", response_model=PortfolioOverviewResponse)
 async def get_portfolio_overview(
   current_user: User = Depends(get_current_user),
@@ -114,25 +201,148 @@ async def get_stock_detail_by_brokers(
     logger.error(f"종목별 브로커 상세 조회 중 오류: {str(e)}")
     raise HTTPException(status_code=500, detail="종목별 상세 정보를 불러올 수 없습니다.")
   
+@router.get("/lots", response_model=TaxLotListResponse)
+async def get_tax_lots(
+  symbol: Optional[str] = Query(None, description="종목코드"),
+  include_closed: bool = Query(False, description="전량 소진된 로트 포함 여부"),
+  current_user: User = Depends(get_current_user)
+):
+  """
+  FIFO 매수 로트별 보유현황 및 미실현 손익
+  - 거래 생성 시 갱신되는 로트 테이블에서 조회 (거래 내역 재생 없음)
+  - 원화 손익은 현재 환율 평가액 - 취득 당시 환율 원가
+  """
+  try:
+    return await tax_lot_service.get_lots(current_user.id, symbol, include_closed)
+    
+  except Exception as e:
+    logger.error(f"로트 조회 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="로트 정보를 불러올 수 없습니다.")
+
+@router.get("/lots/realized", response_model=TaxLotDisposalListResponse)
+async def get_tax_lot_realized_profits(
+  symbol: Optional[str] = Query(None, description="종목코드"),
+  start_date: Optional[date] = Query(None, description="처분일 시작 (YYYY-MM-DD)"),
+  end_date: Optional[date] = Query(None, description="처분일 종료 (YYYY-MM-DD)"),
+  current_user: User = Depends(get_current_user)
+):
+  """
+  FIFO 로트별 실현손익 (해외주식 양도소득 계산용)
+  - 매도 거래마다 소진된 매수 로트, 취득/처분 당시 환율 기준 원화 손익
+  """
+  if start_date and end_date and start_date > end_date:
+    raise HTTPException(status_code=400, detail="시작일이 종료일보다 늦습니다.")
+  
+  try:
+    return await tax_lot_service.get_realized_lots(current_user.id, symbol, start_date, end_date)
+    
+  except Exception as e:
+    logger.error(f"로트별 실현손익 조회 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="로트별 실현손익을 불러올 수 없습니다.")
+
+@router.post("/rebalance/simulate", response_model=RebalanceSimulateResponse)
+async def simulate_rebalance(
+  request: RebalanceSimulateRequest,
+  current_user: User = Depends(get_current_user)
+):
+  """
+  리밸런싱 시뮬레이션 (주문은 생성하지 않음)
+  - 목표 비중(%)에 맞추기 위한 매수/매도 주문 수량
+  - 주문별 수수료/거래세(broker_id의 수수료 설정), 매도 실현손익
+  - 주문 후 종목별 비중과 남는 현금
+  """
+  targets = {}
+  for target in request.targets:
+    if target.symbol in targets:
+      raise HTTPException(status_code=400, detail=f"중복된 종목이 있습니다: {target.symbol}")
+    targets[target.symbol] = target.weight
+
+  try:
+    data = await rebalance_service.simulate(
+      current_user.id,
+      targets,
+      broker_id=request.broker_id,
+      cash_krw=request.cash_krw,
+      liquidate_unlisted=request.liquidate_unlisted
+    )
+    return {"success": True, "data": data}
+
+  except ValueError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except HTTPException:
+    raise
+  except Exception as e:
+    logger.error(f"리밸런싱 시뮬레이션 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="리밸런싱 시뮬레이션 중 오류가 발생했습니다.")
+
+@router.get("/realized-profits/summary", response_model=RealizedProfitSummaryResponse)
+async def get_realized_profit_summary(
+  period: SummaryPeriod = Query(SummaryPeriod.MONTHLY, description="집계 단위"),
+  year: Optional[int] = Query(None, ge=1900, le=2999, description="연도 (미지정 시 전체)"),
+  market_type: Optional[MarketType] = Query(None, description="시장 구분"),
+  broker_id: Optional[int] = Query(None, description="증권사 ID"),
+  current_user: User = Depends(get_current_user),
+  db: AsyncSession = Depends(get_async_session)
+):
+  """
+  월별/연도별 실현손익 집계 (증권사 × 시장 × 통화)
+  - 매도 시 갱신되는 월별 집계 테이블에서 조회 (거래 건수와 무관)
+  """
+  try:
+    summary = await realized_pnl_crud.get_summary(
+      db, current_user.id, period.value, year, market_type.value if market_type else None, broker_id
+    )
+    return {
+      "success": True,
+      "data": summary,
+      "total_realized_profit_krw": sum(item["realized_profit_krw"] for item in summary),
+      "total_count": len(summary)
+    }
+    
+  except Exception as e:
+    logger.error(f"실현손익 집계 조회 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="실현손익 집계를 불러올 수 없습니다.")
+
 @router.get("/realized-profits", response_model=RealizedProfitListResponse)
 async def get_realized_profits(
+  market_type: Optional[MarketType] = Query(None, description="시장 구분"),
+  broker_id: Optional[int] = Query(None, description="증권사 ID"),
+  symbol: Optional[str] = Query(None, description="종목코드"),
+  start_date: Optional[date] = Query(None, description="매도일 시작 (YYYY-MM-DD)"),
+  end_date: Optional[date] = Query(None, description="매도일 종료 (YYYY-MM-DD)"),
+  sort_order: SortOrder = Query(SortOrder.DESC, description="매도일 정렬 방향"),
+  cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+  limit: int = Query(50, ge=1, le=500, description="페이지 크기"),
   current_user: User = Depends(get_current_user)
 ):
   """
-  실현손익 내역 조회 (클라이언트 필터링 방식)
-  - 모든 실현손익 데이터를 한번에 조회하여 클라이언트에서 필터링
-  - metadata 포함 (환율, 종목목록, 증권사목록)
+  실현손익 내역 조회 (서버 필터링 + 키셋 페이지네이션)
+  - 시장/증권사/종목/기간 필터
+  - 매도일시 기준 정렬, next_cursor로 다음 페이지 조회
+  - metadata(종목목록, 증권사목록)는 첫 페이지에서만 포함
   """
+  if start_date and end_date and start_date > end_date:
+    raise HTTPException(status_code=400, detail="시작일이 종료일보다 늦습니다.")
+  
   try:
-    logger.info(f"실현손익 조회 요청: user_id={current_user.id}")
+    logger.info(f"실현손익 조회 요청: user_id={current_user.id}, cursor={cursor is not None}, limit={limit}")
     
-    # Portfolio Service를 통한 실현손익 조회 (모든 데이터)
-    result = await portfolio_service.get_realized_profits(current_user.id)
-    
-    logger.info(f"실현손익 API 조회 완료: user_id={current_user.id}, 건수={len(result['data']['transactions'])}")
+    result = await portfolio_service.get_realized_profits(
+      current_user.id,
+      market_type=market_type.value if market_type else None,
+      broker_id=broker_id,
+      stock_symbol=symbol,
+      start_date=start_date,
+      end_date=end_date,
+      sort_order=sort_order.value,
+      cursor=cursor,
+      limit=limit
+    )
     
     return result
     
+  except ValueError as e:
+    raise HTTPException(status_code=400, detail=str(e))
   except Exception as e:
     logger.error(f"실현손익 API 조회 중 오류: user_id={current_user.id}, error={str(e)}")
-    raise HTTPException(status_code=500, detail="실현손익 정보를 불러올 수 없습니다.")
\ No newline at end of file
+    raise HTTPException(status_code=500, detail="실현손익 정보를 불러올 수 없습니다.")
@@ -13,7 +13,7 @@ from app.schemas.common_schemas import (
   VolatilityAnalysisRequest, VolatilityStockResult, VolatilityAnalysisResponse, 
   PatternPeriod
 )
-from app.external.kis_api import kis_api_service
+from app.external.kis_api import kis_api_service, KIS_PRIORITY_INTERACTIVE
 from app.crud.strategy_crud import strategy_crud
 
 logger = logging.getLogger(__name__)
@@ -224,7 +224,8 @@ async def get_stock_chart_data(
       symbol=symbol,
       start_date=start_date.replace("-", ""),
       end_date=end_date.replace("-", ""),
-      market_type=market_type
+      market_type=market_type,
+      priority=KIS_PRIORITY_INTERACTIVE  # 사용자가 보고 있는 차트
     )
     
     chart_data = chart_result.get("chart_data", [])
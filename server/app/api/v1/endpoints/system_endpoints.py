@@ -7,6 +7,7 @@ import logging
 from app.config.database import get_async_session
 from app.crud.broker_crud import broker_crud
 from app.crud.fee_tax_crud import fee_tax_crud
+from app.services.fee_schedule_service import fee_schedule_service
 from app.models.user import User
 from app.schemas.common_schemas import BrokerResponse, CommissionRateResponse
 from app.core.dependencies import get_current_user
@@ -36,20 +37,16 @@ async def get_commission_rate(
   broker_id: int,
   market_type: str,
   transaction_type: str,
-  current_user: User = Depends(get_current_user),
-  db: AsyncSession = Depends(get_async_session)
+  current_user: User = Depends(get_current_user)
 ):
   """
-  증권사별 수수료율 조회 (개선된 CRUD 사용)
+  증권사별 수수료율 조회 (메모리 수수료 설정, DB 조회 없음)
   """
   try:
-    fee_info = await fee_tax_crud.get_broker_fee_info(
-      db, broker_id, market_type, transaction_type
-    )
+    fee_info = await fee_tax_crud.get_broker_fee_info(broker_id, market_type, transaction_type)
     
-    # 브로커 정보 조회
-    broker = await broker_crud.get_broker_by_id(db, broker_id)
-    broker_name = broker.display_name if broker else "알 수 없는 증권사"
+    # 브로커 정보 (수수료 설정과 함께 메모리에 적재된 표시명)
+    broker_name = fee_schedule_service.broker_name(broker_id) or "알 수 없는 증권사"
     
     if not fee_info:
       logger.info(f"수수료율 기본값 적용: user_id={current_user.id}, broker_id={broker_id}")
@@ -77,11 +74,10 @@ async def calculate_fees(
   transaction_type: str,
   price: float = Query(..., gt=0, description="주당 가격"),
   quantity: int = Query(..., gt=0, description="거래 수량"),
-  current_user: User = Depends(get_current_user),
-  db: AsyncSession = Depends(get_async_session)
+  current_user: User = Depends(get_current_user)
 ):
   """
-  수수료 계산 (개선된 CRUD 사용)
+  수수료 계산 (메모리 수수료 설정, DB 조회 없음)
   """
   try:
     # Decimal 변환
@@ -89,7 +85,6 @@ async def calculate_fees(
     
     # 총 수수료 계산
     fee_result = await fee_tax_crud.calculate_total_fees(
-      db=db,
       broker_id=broker_id,
       market_type=market_type,
       transaction_type=transaction_type,
@@ -97,9 +92,8 @@ async def calculate_fees(
       quantity=quantity
     )
     
-    # 브로커 정보 조회
-    broker = await broker_crud.get_broker_by_id(db, broker_id)
-    broker_name = broker.display_name if broker else "알 수 없는 증권사"
+    # 브로커 정보 (수수료 설정과 함께 메모리에 적재된 표시명)
+    broker_name = fee_schedule_service.broker_name(broker_id) or "알 수 없는 증권사"
     
     result = {
       "success": True,
@@ -132,26 +126,25 @@ async def calculate_fees(
 @router.get("/commission/schedule/{broker_id}")
 async def get_fee_schedule(
   broker_id: int,
-  current_user: User = Depends(get_current_user),
-  db: AsyncSession = Depends(get_async_session)
+  current_user: User = Depends(get_current_user)
 ):
   """
-  증권사별 전체 수수료 체계 조회 (새로운 기능)
+  증권사별 전체 수수료 체계 조회 (메모리 수수료 설정, DB 조회 없음)
   """
   try:
+    # 수수료 체계 조회
+    fee_schedule = await fee_tax_crud.get_fee_schedule(broker_id)
+    
     # 브로커 존재 확인
-    broker = await broker_crud.get_broker_by_id(db, broker_id)
-    if not broker:
+    broker_name = fee_schedule_service.broker_name(broker_id)
+    if not broker_name:
       raise HTTPException(status_code=404, detail="존재하지 않는 증권사입니다.")
     
-    # 수수료 체계 조회
-    fee_schedule = await fee_tax_crud.get_fee_schedule(db, broker_id)
-    
     result = {
       "success": True,
       "data": {
         "broker_id": broker_id,
-        "broker_name": broker.display_name,
+        "broker_name": broker_name,
         "fee_schedule": fee_schedule
       }
     }
@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, File, Form, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+import json
 import logging
 from decimal import Decimal
+from typing import AsyncIterator, Optional
 
-from app.config.database import get_async_session
+from app.config.database import AsyncSessionLocal, end_read_transaction, get_async_session
 from app.crud.transaction_crud import transaction_crud
 from app.crud.broker_crud import broker_crud
 from app.crud.fee_tax_crud import fee_tax_crud
+from app.external.exchange_rate_api import exchange_rate_service
+from app.external.kis_websocket import realtime_quote_service
 from app.models.user import User
 from app.schemas.common_schemas import (
-  TransactionCreateRequest, TransactionResponse, TransactionHistoryResponse, TransactionHistoryItem
+  TransactionCreateRequest, TransactionResponse, TransactionHistoryResponse, TransactionHistoryItem,
+  TradeImportResponse, TransactionBatchRequest, TransactionBatchResponse
 )
 from app.core.dependencies import get_current_user
+from app.services.trade_import_service import trade_import_service, TradeImportError
+from app.services.order_batch_service import order_batch_service, OrderBatchError
+from app.utils.keyset import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -34,7 +43,6 @@ async def create_order(
     # 수수료 계산
     if request.commission is None or request.transaction_tax is None:
       fee_result = await fee_tax_crud.calculate_total_fees(
-        db=db,
         broker_id=request.broker_id,
         market_type=request.market_type,
         transaction_type=request.transaction_type,
@@ -49,19 +57,27 @@ async def create_order(
 
     # 환율 자동 계산
     if request.market_type == 'OVERSEAS':
-      # 거래 날짜의 환율 조회
-      transaction_date_str = request.transaction_date.strftime('%Y%m%d')
-      try:
-        from app.external.exchange_rate_api import exchange_rate_service
-        exchange_data = await exchange_rate_service.get_usd_krw_rate(transaction_date_str)
-        actual_exchange_rate = Decimal(str(exchange_data["currency"]["exchange_rate"]))
-        logger.info(f"거래 날짜 {transaction_date_str} USD/KRW 환율: {actual_exchange_rate}")
-      except Exception as e:
-        logger.warning(f"환율 조회 실패, 기본값 사용: {str(e)}")
+      # 거래 날짜의 종목 통화 환율 조회 (일괄 주문/가져오기와 같은 경로, 휴일은 직전 고시 환율, JPY는 1엔당)
+      transaction_day = request.transaction_date.date()
+      rates = await exchange_rate_service.get_daily_rates({transaction_day}, {stock.currency})
+      rate = rates[transaction_day].get(stock.currency)
+      if rate is not None:
+        actual_exchange_rate = Decimal(str(rate))
+        logger.info(f"거래 날짜 {transaction_day} {stock.currency}/KRW 환율: {actual_exchange_rate}")
+      elif stock.currency == 'USD':
+        logger.warning(f"환율 조회 실패, 기본값 사용: {transaction_day} USD")
         actual_exchange_rate = Decimal('1400.0')  # fallback
+      else:
+        raise HTTPException(
+          status_code=400,
+          detail=f"{transaction_day} {stock.currency} 환율을 찾을 수 없습니다."
+        )
     else:
       actual_exchange_rate = Decimal('1.0')  # 국내주식
     
+    # 조회로 열린 읽기 트랜잭션을 닫음 (스냅샷이 보유 잠금 대기 이전으로 고정되지 않도록, 대기 중 커넥션 반환)
+    await end_read_transaction(db)
+    
     # 거래 생성 (Holdings 자동 업데이트)
     new_transaction = await transaction_crud.create_transaction(
       db=db,
@@ -78,6 +94,9 @@ async def create_order(
       notes=request.notes
     )
     
+    # 보유 종목이 바뀌었을 수 있으므로 실시간 시세 구독 목록 갱신 요청
+    realtime_quote_service.request_resync()
+    
     broker = await broker_crud.get_broker_by_id(db, request.broker_id)
     
     return TransactionResponse(
@@ -105,50 +124,131 @@ async def create_order(
     logger.error(f"거래 생성 중 오류: {str(e)}")
     raise HTTPException(status_code=500, detail="거래 생성 중 오류가 발생했습니다.")
 
+@router.post("/orders", response_model=TransactionBatchResponse)
+async def create_orders(
+  request: TransactionBatchRequest,
+  current_user: User = Depends(get_current_user),
+  db: AsyncSession = Depends(get_async_session)
+):
+  """
+  매수/매도 일괄 주문 (하나의 DB 트랜잭션)
+  - 주문 하나라도 실패하면 전체 취소 (주문 번호별 오류 목록 반환)
+  - 수수료는 증권사 수수료 설정, 해외주식 환율은 거래일 고시 환율로 계산
+  - 응답은 요청 순서대로 생성된 거래
+  """
+  try:
+    logger.info(f"일괄 주문 요청: user_id={current_user.id}, 주문={len(request.orders)}")
+    
+    result = await order_batch_service.execute(db, current_user.id, request.orders)
+    
+    # 보유 종목이 바뀌었을 수 있으므로 실시간 시세 구독 목록 갱신 요청
+    realtime_quote_service.request_resync()
+    
+    return result
+    
+  except OrderBatchError as e:
+    raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
+  except Exception as e:
+    logger.error(f"일괄 주문 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="일괄 주문 중 오류가 발생했습니다.")
+
+@router.post("/import", response_model=TradeImportResponse)
+async def import_trades(
+  broker_id: int = Form(..., description="증권사 ID"),
+  file: UploadFile = File(..., description="거래 내역 파일 (CSV/XLSX)"),
+  current_user: User = Depends(get_current_user),
+  db: AsyncSession = Depends(get_async_session)
+):
+  """
+  증권사 거래 내역 일괄 가져오기 (CSV/XLSX)
+  - 필수 컬럼: transaction_date, symbol, transaction_type, quantity, price (한글 헤더 가능)
+  - 수수료/거래세/환율이 비어 있으면 증권사 수수료 설정과 거래일 환율로 계산
+  - 한 행이라도 오류가 있으면 전체 취소
+  """
+  try:
+    logger.info(f"거래 내역 가져오기 요청: user_id={current_user.id}, broker_id={broker_id}, 파일={file.filename}")
+    
+    result = await trade_import_service.import_statement(
+      db, current_user.id, broker_id, file.filename, file.file
+    )
+    
+    # 보유 종목이 바뀌었을 수 있으므로 실시간 시세 구독 목록 갱신 요청
+    realtime_quote_service.request_resync()
+    return result
+    
+  except TradeImportError as e:
+    raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
+  except ValueError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  except Exception as e:
+    logger.error(f"거래 내역 가져오기 중 오류: user_id={current_user.id}, error={str(e)}")
+    raise HTTPException(status_code=500, detail="거래 내역 가져오기 중 오류가 발생했습니다.")
+
 @router.get("/history", response_model=TransactionHistoryResponse)
 async def get_trading_history(
-  limit: int = Query(100, ge=1, le=500, description="최대 결과 수"),
-  offset: int = Query(0, ge=0, description="페이지 오프셋"),
+  cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+  limit: int = Query(100, ge=1, le=500, description="페이지 크기"),
+  stream: bool = Query(False, description="전체 거래를 NDJSON(application/x-ndjson)으로 스트리밍 (cursor/limit 무시)"),
   current_user: User = Depends(get_current_user),
   db: AsyncSession = Depends(get_async_session)
 ):
   """
   내 거래 내역 전체
+  - 거래일시(+id) 내림차순, next_cursor로 다음 페이지 조회 (키셋 페이지네이션)
+  - total_count는 전체 거래 수 (첫 페이지에만 계산, cursor가 있는 요청은 null)
+  - stream=true: 한 줄에 거래 하나씩 NDJSON으로 내보내기 (서버 측 커서, 전체 목록을 메모리에 올리지 않음)
+    - 마지막 줄은 종료 레코드: 정상 {"complete": true, "count": N}, 중간 오류 {"complete": false, "count": N, "error": "..."}
+    - 종료 레코드가 없거나 complete가 false면 잘린 내보내기
   """
-  try:
-    transactions = await transaction_crud.get_user_transactions(
-      db, current_user.id, limit, offset
+  if stream:
+    logger.info(f"거래 내역 스트리밍 요청: user_id={current_user.id}")
+    return StreamingResponse(
+      _stream_history_ndjson(current_user.id),
+      media_type="application/x-ndjson",
+      headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-
-    # transaction_crud.get_user_transactions는 List[Dict]를 반환하므로 직접 변환
-    transaction_list = []
-    for transaction in transactions:
-      transaction_item = TransactionHistoryItem(
-        id=transaction["id"],
-        stock_id=transaction["stock_id"],
-        broker_id=transaction["broker_id"],
-        transaction_type=transaction["transaction_type"],
-        quantity=transaction["quantity"],
-        price=float(transaction["price"]),
-        commission=float(transaction["commission"]),
-        transaction_tax=float(transaction["transaction_tax"]),
-        exchange_rate=float(transaction["exchange_rate"]),
-        transaction_date=transaction["transaction_date"],
-        notes=transaction["notes"],
-        created_at=transaction["created_at"],
-        stock_symbol=transaction["stock_symbol"],
-        company_name=transaction["company_name"],
-        broker_name=transaction["broker_name"]
-      )
-      transaction_list.append(transaction_item)
+  
+  try:
+    after = decode_cursor(cursor) if cursor else None
+  except ValueError as e:
+    raise HTTPException(status_code=400, detail=str(e))
+  
+  try:
+    # 다음 페이지 여부 확인을 위해 limit + 1건 조회
+    rows = await transaction_crud.get_user_transactions(db, current_user.id, limit + 1, after)
+    # 전체 건수는 첫 페이지에서만 (다음 페이지마다 COUNT로 전체 거래를 다시 세지 않음)
+    total_count = None if after else await transaction_crud.count_user_transactions(db, current_user.id)
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     
     return TransactionHistoryResponse(
       success=True,
-      data=transaction_list,
-      total_count=len(transaction_list)
+      data=[TransactionHistoryItem(**row) for row in rows],
+      total_count=total_count,
+      next_cursor=encode_cursor(rows[-1]["transaction_date"], rows[-1]["id"]) if has_more else None,
+      has_more=has_more
     )
     
   except Exception as e:
     logger.error(f"거래 내역 조회 중 오류: user_id={current_user.id}, error={str(e)}")
     raise HTTPException(status_code=500, detail="거래 내역 조회 중 오류가 발생했습니다.")
-  
+
+async def _stream_history_ndjson(user_id: int) -> AsyncIterator[str]:
+  """거래 내역 NDJSON 스트림 (요청 세션과 별도로 응답이 끝날 때까지 세션 유지, 마지막 줄은 종료 레코드)"""
+  count = 0
+  async with AsyncSessionLocal() as db:
+    try:
+      async for row in transaction_crud.stream_user_transactions(db, user_id):
+        line = TransactionHistoryItem(**row).model_dump_json() + "\n"
+        count += 1
+        yield line
+    except Exception as e:
+      # 이미 응답이 시작되어 상태 코드를 바꿀 수 없으므로 오류 종료 레코드로 잘림을 알림
+      logger.error(f"거래 내역 스트리밍 중 오류: user_id={user_id}, 전송={count}, error={str(e)}")
+      yield json.dumps(
+        {"complete": False, "count": count, "error": "거래 내역 내보내기 중 오류가 발생했습니다."}, ensure_ascii=False
+      ) + "\n"
+      return
+  logger.info(f"거래 내역 스트리밍 완료: user_id={user_id}, 건수={count}")
+  yield json.dumps({"complete": True, "count": count}) + "\n"
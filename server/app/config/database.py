@@ -53,6 +53,18 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:  # 수정
       await session.close()
 
 
+async def end_read_transaction(session: AsyncSession) -> None:
+  """
+  조회만 한 트랜잭션 종료 (REPEATABLE READ 스냅샷 해제, 커넥션 반환)
+
+  잠금을 기다리기 전에 호출한다. 반영되지 않은 변경이 있으면 대신 커밋하지 않고 RuntimeError.
+  """
+  if session.new or session.dirty or session.deleted:
+    raise RuntimeError("반영되지 않은 변경이 있는 세션은 읽기 트랜잭션을 종료할 수 없습니다")
+  if session.in_transaction():
+    await session.commit()
+
+
 # Dependency for sync database sessions (if needed)
 def get_sync_session():
   session = SessionLocal()
@@ -42,6 +42,68 @@ class Settings(BaseSettings):
     env="KIS_BASE_URL"
   )
 
+  # KIS API HTTP 커넥션 풀 설정 (서비스 수명 동안 재사용)
+  kis_http_max_connections: int = Field(default=20, env="KIS_HTTP_MAX_CONNECTIONS")
+  kis_http_max_keepalive_connections: int = Field(default=10, env="KIS_HTTP_MAX_KEEPALIVE_CONNECTIONS")
+  kis_http_keepalive_expiry: float = Field(default=30.0, env="KIS_HTTP_KEEPALIVE_EXPIRY")
+  kis_http_connect_timeout: float = Field(default=5.0, env="KIS_HTTP_CONNECT_TIMEOUT")
+  kis_http_read_timeout: float = Field(default=10.0, env="KIS_HTTP_READ_TIMEOUT")
+  kis_http_pool_timeout: float = Field(default=5.0, env="KIS_HTTP_POOL_TIMEOUT")
+  kis_http2: bool = Field(default=False, env="KIS_HTTP2")
+
+  # KIS 접근 토큰 메모리 캐시 (만료 N초 전에 미리 갱신)
+  kis_token_refresh_margin_seconds: int = Field(default=600, env="KIS_TOKEN_REFRESH_MARGIN_SECONDS")
+
+  # KIS 초당 호출 한도 (App Key 단위, 토큰 버킷)
+  kis_rate_limit_per_sec: float = Field(default=15.0, env="KIS_RATE_LIMIT_PER_SEC")
+  kis_rate_limit_burst: float = Field(default=15.0, env="KIS_RATE_LIMIT_BURST")
+
+  # KIS 시세 캐시 (장중 TTL, 장 마감 후에는 다음 개장까지 캐시)
+  kis_quote_ttl_open_seconds: float = Field(default=3.0, env="KIS_QUOTE_TTL_OPEN_SECONDS")
+  kis_quote_cache_max_entries: int = Field(default=20000, env="KIS_QUOTE_CACHE_MAX_ENTRIES")
+
+  # KIS 일봉 차트 페이지 조회 한도 (1페이지 약 100봉)
+  kis_chart_max_pages: int = Field(default=50, env="KIS_CHART_MAX_PAGES")
+
+  # KIS 실시간 시세 WebSocket (보유 종목 체결가 수신)
+  kis_ws_enabled: bool = Field(default=False, env="KIS_WS_ENABLED")
+  kis_ws_url: str = Field(default="ws://ops.koreainvestment.com:21000", env="KIS_WS_URL")
+  kis_ws_approval_key: Optional[str] = Field(default=None, env="KIS_WS_APPROVAL_KEY")  # 지정 시 발급 생략 (로컬 재생 서버용)
+  kis_ws_max_subscriptions: int = Field(default=41, env="KIS_WS_MAX_SUBSCRIPTIONS")
+  kis_ws_overseas_realtime: bool = Field(default=False, env="KIS_WS_OVERSEAS_REALTIME")  # False면 지연시세(D)
+  kis_ws_tick_max_age_seconds: float = Field(default=60.0, env="KIS_WS_TICK_MAX_AGE_SECONDS")
+  kis_ws_resync_interval_seconds: float = Field(default=60.0, env="KIS_WS_RESYNC_INTERVAL_SECONDS")
+  kis_ws_reconnect_delay_seconds: float = Field(default=5.0, env="KIS_WS_RECONNECT_DELAY_SECONDS")
+  kis_ws_record_path: Optional[str] = Field(default=None, env="KIS_WS_RECORD_PATH")  # 수신 프레임 기록 파일
+
+  # 포트폴리오 보유 종목 집계 캐시 (거래 생성 시 즉시 무효화, TTL은 외부 변경 대비)
+  portfolio_holdings_cache_ttl_seconds: float = Field(default=300.0, env="PORTFOLIO_HOLDINGS_CACHE_TTL_SECONDS")
+
+  # 포트폴리오 스트리밍 (실시간 체결이 없는 종목의 시세 재조회 및 keep-alive 주기)
+  portfolio_stream_refresh_seconds: float = Field(default=5.0, env="PORTFOLIO_STREAM_REFRESH_SECONDS")
+
+  # 일별 포트폴리오 NAV 스냅샷 (KST 기준 실행 시각, 종가 탐색 범위)
+  portfolio_snapshot_enabled: bool = Field(default=True, env="PORTFOLIO_SNAPSHOT_ENABLED")
+  portfolio_snapshot_run_time: str = Field(default="07:00", env="PORTFOLIO_SNAPSHOT_RUN_TIME")
+  portfolio_snapshot_price_lookback_days: int = Field(default=14, env="PORTFOLIO_SNAPSHOT_PRICE_LOOKBACK_DAYS")
+
+  # 포트폴리오 리스크 지표 (연 무위험 수익률, 종목 조합별 수익률 행렬 캐시 개수)
+  portfolio_risk_free_rate: float = Field(default=0.03, env="PORTFOLIO_RISK_FREE_RATE")
+  portfolio_risk_matrix_cache_size: int = Field(default=128, env="PORTFOLIO_RISK_MATRIX_CACHE_SIZE")
+
+  # 증권사 수수료 설정 메모리 스냅샷 갱신 주기 (초, 0이면 시작 시 1회만 로드)
+  fee_schedule_refresh_seconds: int = Field(default=3600, env="FEE_SCHEDULE_REFRESH_SECONDS")
+
+  # 거래 내역 일괄 가져오기 (파일당 최대 행 수)
+  trade_import_max_rows: int = Field(default=20000, env="TRADE_IMPORT_MAX_ROWS")
+
+  # 거래일별 환율 조회 (날짜 동시 조회 수, 휴일 환율 탐색 일수 - 주문/일괄 주문/가져오기/스냅샷 공통)
+  exchange_rate_fetch_concurrency: int = Field(default=4, env="EXCHANGE_RATE_FETCH_CONCURRENCY")
+  exchange_rate_lookback_days: int = Field(default=7, env="EXCHANGE_RATE_LOOKBACK_DAYS")
+
+  # 일괄 주문 (요청당 최대 주문 수)
+  order_batch_max_items: int = Field(default=200, env="ORDER_BATCH_MAX_ITEMS")
+
   # OPENAI API Configuration
   openai_api_key: str = Field(..., env="OPENAI_API_KEY")
 
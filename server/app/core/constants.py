@@ -219,6 +219,124 @@ EXCHANGE_CURRENCY_MAP = {
   "HSX": "VND",
 }
 
+# 거래소별 기본 정규장 시간 (현지 시간대, 개장, 폐장)
+# exchanges 테이블에 시간 정보가 없을 때 사용
+EXCHANGE_MARKET_HOURS = {
+  # 한국
+  "KOSPI": ("Asia/Seoul", "09:00:00", "15:30:00"),
+  "KOSDAQ": ("Asia/Seoul", "09:00:00", "15:30:00"),
+  
+  # 미국
+  "NYSE": ("America/New_York", "09:30:00", "16:00:00"),
+  "NASDAQ": ("America/New_York", "09:30:00", "16:00:00"),
+  "AMEX": ("America/New_York", "09:30:00", "16:00:00"),
+  
+  # 일본
+  "TSE": ("Asia/Tokyo", "09:00:00", "15:30:00"),
+  
+  # 홍콩
+  "HKS": ("Asia/Hong_Kong", "09:30:00", "16:00:00"),
+  
+  # 중국
+  "SHS": ("Asia/Shanghai", "09:30:00", "15:00:00"),
+  "SZS": ("Asia/Shanghai", "09:30:00", "15:00:00"),
+  
+  # 베트남
+  "HNX": ("Asia/Ho_Chi_Minh", "09:00:00", "15:00:00"),
+  "HSX": ("Asia/Ho_Chi_Minh", "09:00:00", "15:00:00"),
+}
+
+# 거래소별 거래일 달력 (같은 휴장일을 공유하는 거래소는 하나의 달력 사용)
+EXCHANGE_TRADING_CALENDAR = {
+  "KOSPI": "KRX",
+  "KOSDAQ": "KRX",
+  "NYSE": "US",
+  "NASDAQ": "US",
+  "AMEX": "US",
+  "TSE": "TSE",
+  "HKS": "HKS",
+  "SHS": "CN",
+  "SZS": "CN",
+  "HNX": "VN",
+  "HSX": "VN",
+}
+
+# 거래일 달력 학습용 기준 종목 (symbol, market_type, exchange_code)
+TRADING_CALENDAR_REFERENCE_SYMBOLS = {
+  "KRX": ("005930", "DOMESTIC", "KOSPI"),
+  "US": ("AAPL", "OVERSEAS", "NASDAQ"),
+  "TSE": ("7203", "OVERSEAS", "TSE"),
+  "HKS": ("00700", "OVERSEAS", "HKS"),
+  "CN": ("600519", "OVERSEAS", "SHS"),
+  "VN": ("VNM", "OVERSEAS", "HSX"),
+}
+
+# 포트폴리오 리스크 벤치마크 (지수 일봉 대신 추종 ETF 종가 사용: symbol, market_type, exchange_code)
+RISK_BENCHMARKS = {
+  "KOSPI": ("069500", "DOMESTIC", "KOSPI"),  # KODEX 200
+  "SP500": ("SPY", "OVERSEAS", "AMEX"),      # SPDR S&P 500
+}
+
+# 리스크 지표 연율화 기준 거래일 수 / 조회 가능한 최대 기간(거래일)
+RISK_TRADING_DAYS_PER_YEAR = 252
+RISK_MAX_WINDOW_DAYS = 504
+
+# 거래 내역 가져오기(CSV/XLSX) 헤더 별칭 (소문자/공백 제거 후 비교)
+TRADE_IMPORT_COLUMNS = {
+  "transaction_date": ("transaction_date", "date", "거래일시", "거래일", "체결일"),
+  "symbol": ("symbol", "ticker", "종목코드"),
+  "exchange_code": ("exchange_code", "exchange", "거래소"),
+  "transaction_type": ("transaction_type", "type", "side", "구분", "매매구분"),
+  "quantity": ("quantity", "qty", "수량"),
+  "price": ("price", "단가", "체결가"),
+  "commission": ("commission", "fee", "수수료"),
+  "transaction_tax": ("transaction_tax", "tax", "거래세", "세금"),
+  "exchange_rate": ("exchange_rate", "fx", "환율"),
+  "notes": ("notes", "memo", "메모"),
+}
+TRADE_IMPORT_REQUIRED_COLUMNS = ("transaction_date", "symbol", "transaction_type", "quantity", "price")
+
+# 거래 구분 표기 → BUY/SELL
+TRADE_IMPORT_TYPE_ALIASES = {
+  "BUY": "BUY", "B": "BUY", "매수": "BUY",
+  "SELL": "SELL", "S": "SELL", "매도": "SELL",
+}
+
+# KIS 해외주식 API 거래소 코드 매핑 (DB 거래소 코드 → KIS EXCD)
+KIS_OVERSEAS_EXCHANGE_CODE_MAP = {
+  # 미국
+  "NASDAQ": "NAS",
+  "NYSE": "NYS",
+  "AMEX": "AMS",
+  
+  # 일본
+  "TSE": "TSE",
+  
+  # 홍콩
+  "HKS": "HKS",
+  
+  # 중국
+  "SHS": "SHS",
+  "SZS": "SZS",
+  
+  # 베트남
+  "HNX": "HNX",
+  "HSX": "HSX",
+}
+
+# KIS 해외 거래소 코드별 통화 (해외 시세/실시간 체결 응답에는 통화가 없음)
+KIS_OVERSEAS_EXCHANGE_CURRENCY = {
+  "NAS": "USD",
+  "NYS": "USD",
+  "AMS": "USD",
+  "TSE": "JPY",
+  "HKS": "HKD",
+  "SHS": "CNY",
+  "SZS": "CNY",
+  "HNX": "VND",
+  "HSX": "VND",
+}
+
 # 통화별 표시 심볼
 CURRENCY_SYMBOLS = {
   "KRW": "₩",
@@ -242,6 +360,11 @@ EXIMBANK_CURRENCY_MAP = {
   "VND": "VND",
 }
 
+# 한국수출입은행 고시 단위 (기본 1, 예: JPY는 100엔당 원화)
+EXIMBANK_CURRENCY_UNITS = {
+  "JPY": 100,
+}
+
 # ===== 한국 증시 업종 코드 =====
 
 # 한국 지수 코드
@@ -1,51 +1,78 @@
 import logging
 from decimal import Decimal
-from typing import Dict, Any, Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from typing import Dict, Any, Mapping, Optional, Tuple
 
-from app.models.broker_fee import BrokerFee
+from app.services.fee_schedule_service import FeeRule, fee_schedule_service
 
 logger = logging.getLogger(__name__)
 
 class FeeTaxCRUD:
-  """수수료 계산 CRUD (개선된 버전)"""
+  """수수료 계산 (수수료 설정은 fee_schedule_service 메모리 스냅샷, DB 조회 없음)"""
   
   async def get_broker_fee_info(
     self,
-    db: AsyncSession,
     broker_id: int,
     market_type: str,
     transaction_type: str
-  ) -> Optional[BrokerFee]:
-    """증권사별 수수료 정보 조회"""
-    try:
-      result = await db.execute(
-        select(BrokerFee).filter(
-          and_(
-            BrokerFee.broker_id == broker_id,
-            BrokerFee.market_type == market_type,
-            BrokerFee.transaction_type == transaction_type,
-            BrokerFee.is_active == True
-          )
-        )
-      )
-      fee_info = result.scalar_one_or_none()
-      
-      if fee_info:
-        logger.info(f"수수료 정보 조회 완료: broker_id={broker_id}, market_type={market_type}, transaction_type={transaction_type}")
-      else:
-        logger.info(f"수수료 정보 없음, 기본값 사용: broker_id={broker_id}, market_type={market_type}, transaction_type={transaction_type}")
-      
-      return fee_info
-      
-    except Exception as e:
-      logger.error(f"수수료 정보 조회 실패: broker_id={broker_id}, market_type={market_type}, transaction_type={transaction_type}, error={str(e)}")
-      raise
+  ) -> Optional[FeeRule]:
+    """증권사별 수수료 정보 조회 (메모리 수수료 설정, 없으면 None → 기본값)"""
+    await fee_schedule_service.ensure_loaded()
+    fee_info = fee_schedule_service.get(broker_id, market_type, transaction_type)
+    
+    if not fee_info:
+      logger.debug(f"수수료 정보 없음, 기본값 사용: broker_id={broker_id}, market_type={market_type}, transaction_type={transaction_type}")
+    
+    return fee_info
+  
+  @staticmethod
+  def fee_rates(fee_info: Optional[FeeRule], market_type: str, transaction_type: str) -> Tuple[Decimal, Decimal]:
+    """(수수료율, 거래세율) - 증권사 설정이 없으면 기본 수수료율 0.015%, 거래세율 국내 0.23% / 해외 0% (매수는 거래세 없음)"""
+    commission_rate = fee_info.fee_rate if fee_info else Decimal('0.00015')
+    
+    if transaction_type.upper() != "SELL":
+      tax_rate = Decimal('0')
+    elif not fee_info:
+      tax_rate = Decimal('0.0023') if market_type == "DOMESTIC" else Decimal('0')
+    else:
+      tax_rate = fee_info.transaction_tax_rate if fee_info.transaction_tax_rate else Decimal('0')
+    
+    return commission_rate, tax_rate
+  
+  @staticmethod
+  def commission_for(fee_info: Optional[FeeRule], amount: Decimal) -> Decimal:
+    """수수료 (증권사 설정이 없으면 기본 0.015%, 최소/최대 수수료 적용)"""
+    commission = amount * (fee_info.fee_rate if fee_info else Decimal('0.00015'))
+    
+    if fee_info:
+      # 최소 수수료 적용
+      if hasattr(fee_info, 'min_commission') and fee_info.min_commission:
+        commission = max(commission, fee_info.min_commission)
+      
+      # 최대 수수료 적용
+      if hasattr(fee_info, 'max_commission') and fee_info.max_commission:
+        commission = min(commission, fee_info.max_commission)
+    
+    return commission.quantize(Decimal('0.01'))
+  
+  @classmethod
+  def tax_for(cls, fee_info: Optional[FeeRule], market_type: str, transaction_type: str, amount: Decimal) -> Decimal:
+    """거래세 (매도만)"""
+    if transaction_type.upper() != "SELL":
+      return Decimal('0')
+    
+    _, tax_rate = cls.fee_rates(fee_info, market_type, transaction_type)
+    return (amount * tax_rate).quantize(Decimal('0.01'))
+  
+  async def get_broker_fee_map(
+    self,
+    broker_id: int
+  ) -> Mapping[Tuple[str, str], FeeRule]:
+    """증권사의 활성 수수료 설정 전체 (시장, 거래구분) → FeeRule (메모리 수수료 설정)"""
+    await fee_schedule_service.ensure_loaded()
+    return fee_schedule_service.broker_rules(broker_id)
   
   async def calculate_commission(
     self,
-    db: AsyncSession,
     broker_id: int,
     market_type: str,
     transaction_type: str,
@@ -53,27 +80,11 @@ class FeeTaxCRUD:
   ) -> Decimal:
     """수수료 계산 (최소/최대 수수료 적용)"""
     try:
-      fee_info = await self.get_broker_fee_info(db, broker_id, market_type, transaction_type)
+      fee_info = await self.get_broker_fee_info(broker_id, market_type, transaction_type)
       
-      if not fee_info:
-        # 기본 수수료율 적용 (0.015%)
-        commission = amount * Decimal('0.00015')
-        logger.info(f"기본 수수료율 적용: amount={amount}, commission={commission}")
-      else:
-        # 증권사 수수료율 적용
-        commission = amount * fee_info.fee_rate
-        
-        # 최소 수수료 적용
-        if hasattr(fee_info, 'min_commission') and fee_info.min_commission:
-          commission = max(commission, fee_info.min_commission)
-        
-        # 최대 수수료 적용
-        if hasattr(fee_info, 'max_commission') and fee_info.max_commission:
-          commission = min(commission, fee_info.max_commission)
-        
-        logger.info(f"증권사 수수료율 적용: amount={amount}, rate={fee_info.fee_rate}, commission={commission}")
-      
-      return commission.quantize(Decimal('0.01'))
+      commission = self.commission_for(fee_info, amount)
+      logger.debug(f"수수료 계산: amount={amount}, rate={fee_info.fee_rate if fee_info else '기본'}, commission={commission}")
+      return commission
       
     except Exception as e:
       logger.error(f"수수료 계산 실패: broker_id={broker_id}, amount={amount}, error={str(e)}")
@@ -81,7 +92,6 @@ class FeeTaxCRUD:
   
   async def calculate_tax(
     self,
-    db: AsyncSession,
     broker_id: int,
     market_type: str,
     transaction_type: str,
@@ -90,21 +100,13 @@ class FeeTaxCRUD:
     """거래세 계산 (매도시에만 적용)"""
     try:
       if transaction_type.upper() != "SELL":
-        logger.info(f"매수 거래로 거래세 없음: transaction_type={transaction_type}")
         return Decimal('0')
       
-      fee_info = await self.get_broker_fee_info(db, broker_id, market_type, transaction_type)
-      
-      if not fee_info:
-        # 기본 거래세율 (국내: 0.23%, 해외: 0%)
-        tax_rate = Decimal('0.0023') if market_type == "DOMESTIC" else Decimal('0')
-        logger.info(f"기본 거래세율 적용: market_type={market_type}, rate={tax_rate}")
-      else:
-        tax_rate = fee_info.transaction_tax_rate if fee_info.transaction_tax_rate else Decimal('0')
-        logger.info(f"증권사 거래세율 적용: rate={tax_rate}")
+      fee_info = await self.get_broker_fee_info(broker_id, market_type, transaction_type)
       
-      tax = amount * tax_rate
-      return tax.quantize(Decimal('0.01'))
+      tax = self.tax_for(fee_info, market_type, transaction_type, amount)
+      logger.debug(f"거래세 계산: market_type={market_type}, amount={amount}, tax={tax}")
+      return tax
       
     except Exception as e:
       logger.error(f"거래세 계산 실패: broker_id={broker_id}, amount={amount}, error={str(e)}")
@@ -112,7 +114,6 @@ class FeeTaxCRUD:
   
   async def calculate_total_fees(
     self,
-    db: AsyncSession,
     broker_id: int,
     market_type: str,
     transaction_type: str,
@@ -129,14 +130,10 @@ class FeeTaxCRUD:
       
       amount = price * Decimal(str(quantity))
       
-      # 수수료와 거래세 병렬 계산 (하지만 같은 DB 세션이므로 순차 실행)
-      commission = await self.calculate_commission(
-        db, broker_id, market_type, transaction_type, amount
-      )
-      
-      tax = await self.calculate_tax(
-        db, broker_id, market_type, transaction_type, amount
-      )
+      # 수수료 설정 한 번 조회 (메모리) 후 수수료/거래세 계산
+      fee_info = await self.get_broker_fee_info(broker_id, market_type, transaction_type)
+      commission = self.commission_for(fee_info, amount)
+      tax = self.tax_for(fee_info, market_type, transaction_type, amount)
       
       total_fees = commission + tax
       
@@ -169,41 +166,26 @@ class FeeTaxCRUD:
   
   async def get_fee_schedule(
     self,
-    db: AsyncSession,
     broker_id: int
   ) -> Dict[str, Any]:
-    """증권사의 전체 수수료 체계 조회"""
-    try:
-      result = await db.execute(
-        select(BrokerFee).filter(
-          and_(
-            BrokerFee.broker_id == broker_id,
-            BrokerFee.is_active == True
-          )
-        ).order_by(BrokerFee.market_type, BrokerFee.transaction_type)
-      )
-      
-      fee_schedules = result.scalars().all()
-      
-      # 시장타입/거래타입별로 그룹화
-      schedule_dict = {}
-      for fee in fee_schedules:
-        key = f"{fee.market_type}_{fee.transaction_type}"
-        schedule_dict[key] = {
-          "market_type": fee.market_type,
-          "transaction_type": fee.transaction_type,
-          "fee_rate": float(fee.fee_rate),
-          "transaction_tax_rate": float(fee.transaction_tax_rate) if fee.transaction_tax_rate else 0.0,
-          "min_commission": float(fee.min_commission) if hasattr(fee, 'min_commission') and fee.min_commission else None,
-          "max_commission": float(fee.max_commission) if hasattr(fee, 'max_commission') and fee.max_commission else None
-        }
-      
-      logger.info(f"수수료 체계 조회 완료: broker_id={broker_id}, 항목 수={len(schedule_dict)}")
-      return schedule_dict
-      
-    except Exception as e:
-      logger.error(f"수수료 체계 조회 실패: broker_id={broker_id}, error={str(e)}")
-      raise
+    """증권사의 전체 수수료 체계 조회 (메모리 수수료 설정)"""
+    fee_map = await self.get_broker_fee_map(broker_id)
+    
+    # 시장타입/거래타입별로 그룹화
+    schedule_dict = {}
+    for (market_type, transaction_type), fee in sorted(fee_map.items()):
+      key = f"{market_type}_{transaction_type}"
+      schedule_dict[key] = {
+        "market_type": market_type,
+        "transaction_type": transaction_type,
+        "fee_rate": float(fee.fee_rate),
+        "transaction_tax_rate": float(fee.transaction_tax_rate) if fee.transaction_tax_rate else 0.0,
+        "min_commission": float(fee.min_commission) if fee.min_commission else None,
+        "max_commission": float(fee.max_commission) if fee.max_commission else None
+      }
+    
+    logger.info(f"수수료 체계 조회 완료: broker_id={broker_id}, 항목 수={len(schedule_dict)}")
+    return schedule_dict
 
 # 싱글톤 인스턴스
 fee_tax_crud = FeeTaxCRUD()
\ No newline at end of file
@@ -1,7 +1,8 @@
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, desc
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from datetime import datetime, date
 from decimal import Decimal
@@ -22,9 +23,15 @@ class HoldingCRUD(BaseCRUD[Holding]):
     db: AsyncSession,
     user_id: int,
     stock_id: int,
-    broker_id: int
+    broker_id: int,
+    for_update: bool = False
   ) -> Holding:
-    """사용자-종목-브로커 보유 정보 조회 또는 생성"""
+    """
+    사용자-종목-브로커 보유 정보 조회 또는 생성
+
+    for_update=True면 행 잠금(SELECT ... FOR UPDATE)으로 최신 값을 읽어, 같은 보유에 대한
+    다른 트랜잭션(다른 프로세스 포함)은 commit/rollback 때까지 기다린다.
+    """
     query = select(Holding).filter(
       and_(
         Holding.user_id == user_id,
@@ -32,10 +39,12 @@ class HoldingCRUD(BaseCRUD[Holding]):
         Holding.broker_id == broker_id
       )
     )
+    if for_update:
+      # 세션에 이미 올라온 객체도 잠금 시점의 값으로 덮어씀
+      query = query.with_for_update().execution_options(populate_existing=True)
+    error_msg = f"보유 정보 조회 실패: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}"
     
-    holding = await self._get_single_result(
-      db, query, f"보유 정보 조회 실패: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}"
-    )
+    holding = await self._get_single_result(db, query, error_msg)
     
     if not holding:
       # 새로운 보유 정보 생성 (초기값)
@@ -52,11 +61,34 @@ class HoldingCRUD(BaseCRUD[Holding]):
         last_transaction_date=datetime.now(),
         is_active=False
       )
-      db.add(holding)
-      await db.flush()
+      try:
+        async with db.begin_nested():
+          db.add(holding)
+      except IntegrityError:
+        # 동시에 다른 트랜잭션이 먼저 생성 → 그 행을 다시 조회 (for_update면 잠금 포함)
+        logger.info(f"보유 정보 동시 생성 감지, 재조회: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}")
+        holding = await self._get_single_result(db, query, error_msg)
     
     return holding
 
+  async def lock_holdings(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    keys: Iterable[Tuple[int, int]]
+  ) -> Dict[Tuple[int, int], Holding]:
+    """
+    (종목, 증권사) 보유 행을 정렬된 순서로 잠금 조회/생성 (잠그는 쪽끼리 교착 방지)
+
+    같은 트랜잭션의 일반 조회보다 먼저 호출해야 이후 조회가 잠금 이후의 스냅샷을 본다.
+    """
+    holdings = {}
+    for stock_id, broker_id in sorted(set(keys)):
+      holdings[(stock_id, broker_id)] = await self.get_or_create_holding(
+        db, user_id, stock_id, broker_id, for_update=True
+      )
+    return holdings
+
   async def update_holding_for_buy(
     self,
     holding: Holding,
@@ -189,6 +221,7 @@ class HoldingCRUD(BaseCRUD[Holding]):
         Stock.company_name_en,
         Stock.currency,
         Stock.country_code,
+        Stock.exchange_code,
         func.count(Holding.broker_id).label('broker_count'),
         func.sum(Holding.quantity).label('total_quantity'),
         func.sum(Holding.total_cost).label('total_investment'),
@@ -213,7 +246,8 @@ class HoldingCRUD(BaseCRUD[Holding]):
         Stock.company_name,
         Stock.company_name_en,
         Stock.currency,
-        Stock.country_code
+        Stock.country_code,
+        Stock.exchange_code
       )
       .order_by(desc(func.max(Holding.last_transaction_date)))
     )
@@ -232,6 +266,7 @@ class HoldingCRUD(BaseCRUD[Holding]):
         "company_name": row.company_name,
         "company_name_en": row.company_name_en or "",
         "currency": row.currency,
+        "exchange_code": row.exchange_code,
         "market_type": market_type,
         "broker_count": row.broker_count,
         "total_quantity": int(row.total_quantity),
@@ -248,6 +283,86 @@ class HoldingCRUD(BaseCRUD[Holding]):
     logger.info(f"종목별 포트폴리오 요약 조회 완료: user_id={user_id}, 종목 수={len(portfolio_summary)}")
     return portfolio_summary
 
+  async def get_held_symbols(self, db: AsyncSession) -> List[Dict[str, Any]]:
+    """전체 사용자가 보유 중인 종목 목록 (실시간 시세 구독 대상)"""
+    query = (
+      select(
+        Stock.symbol,
+        Stock.country_code,
+        Stock.exchange_code,
+        func.count(func.distinct(Holding.user_id)).label('holder_count')
+      )
+      .join(Stock, Holding.stock_id == Stock.id)
+      .filter(
+        and_(
+          Holding.is_active == True,
+          Holding.quantity > 0
+        )
+      )
+      .group_by(Stock.symbol, Stock.country_code, Stock.exchange_code)
+      .order_by(desc('holder_count'))
+    )
+    
+    result = await self._execute_query(db, query, "보유 종목 목록 조회 실패")
+    
+    return [
+      {
+        "symbol": row.symbol,
+        "market_type": "DOMESTIC" if row.country_code == "KR" else "OVERSEAS",
+        "exchange_code": row.exchange_code,
+        "holder_count": row.holder_count
+      }
+      for row in result
+    ]
+
+  async def get_all_positions(self, db: AsyncSession) -> List[Dict[str, Any]]:
+    """전체 사용자의 종목별 보유 집계 (모든 broker 합산, 일별 NAV 스냅샷용)"""
+    query = (
+      select(
+        Holding.user_id,
+        Holding.stock_id,
+        Stock.symbol.label('stock_symbol'),
+        Stock.country_code,
+        Stock.exchange_code,
+        Stock.currency,
+        func.sum(Holding.quantity).label('total_quantity'),
+        func.sum(Holding.total_cost).label('total_investment'),
+        func.sum(Holding.total_cost_krw).label('total_investment_krw')
+      )
+      .join(Stock, Holding.stock_id == Stock.id)
+      .filter(
+        and_(
+          Holding.is_active == True,
+          Holding.quantity > 0
+        )
+      )
+      .group_by(
+        Holding.user_id, Holding.stock_id, Stock.symbol, Stock.country_code, Stock.exchange_code, Stock.currency
+      )
+      .order_by(Holding.user_id)
+    )
+    
+    result = await self._execute_query(db, query, "전체 보유 집계 조회 실패")
+    
+    positions = []
+    for row in result:
+      total_quantity = int(row.total_quantity)
+      total_investment = float(row.total_investment)
+      positions.append({
+        "user_id": row.user_id,
+        "stock_id": row.stock_id,
+        "stock_symbol": row.stock_symbol,
+        "market_type": "DOMESTIC" if row.country_code == "KR" else "OVERSEAS",
+        "exchange_code": row.exchange_code,
+        "currency": row.currency,
+        "total_quantity": total_quantity,
+        "total_investment": total_investment,
+        "total_investment_krw": float(row.total_investment_krw),
+        "overall_average_cost": total_investment / total_quantity
+      })
+    
+    return positions
+
   async def get_stock_holdings_by_brokers(
     self,
     db: AsyncSession,
@@ -0,0 +1,129 @@
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import select, and_, or_, delete, func
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.portfolio_snapshot import PortfolioSnapshot
+from app.models.transaction import Transaction
+from app.crud.base_crud import BaseCRUD
+
+logger = logging.getLogger(__name__)
+
+class PortfolioSnapshotCRUD(BaseCRUD[PortfolioSnapshot]):
+  """PortfolioSnapshot(일별 NAV) 관련 CRUD 작업"""
+  
+  async def upsert_snapshots(self, db: AsyncSession, rows: List[Dict]) -> None:
+    """
+    스냅샷 일괄 저장 ((user_id, snapshot_date, market_type) 중복 시 갱신, commit은 호출자)
+    
+    Args:
+      rows: [{"user_id", "snapshot_date", "market_type", "market_value_krw", "cost_basis_krw",
+              "net_cash_flow_krw", "realized_gain_krw", "position_count", "exchange_rate"}]
+    """
+    if not rows:
+      return
+    
+    stmt = insert(PortfolioSnapshot).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+      market_value_krw=stmt.inserted.market_value_krw,
+      cost_basis_krw=stmt.inserted.cost_basis_krw,
+      net_cash_flow_krw=stmt.inserted.net_cash_flow_krw,
+      realized_gain_krw=stmt.inserted.realized_gain_krw,
+      position_count=stmt.inserted.position_count,
+      exchange_rate=stmt.inserted.exchange_rate,
+      updated_at=func.now()
+    )
+    
+    await self._execute_query(db, stmt, f"포트폴리오 스냅샷 저장 실패: {len(rows)}건")
+  
+  async def delete_user_snapshots(self, db: AsyncSession, user_id: int, start: date, end: date) -> None:
+    """재계산 구간의 기존 스냅샷 삭제 (commit은 호출자)"""
+    stmt = delete(PortfolioSnapshot).where(
+      and_(
+        PortfolioSnapshot.user_id == user_id,
+        PortfolioSnapshot.snapshot_date >= start,
+        PortfolioSnapshot.snapshot_date <= end
+      )
+    )
+    await self._execute_query(db, stmt, f"포트폴리오 스냅샷 삭제 실패: user_id={user_id}")
+  
+  async def get_user_snapshots(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    market_type: Optional[str] = None
+  ) -> List[PortfolioSnapshot]:
+    """기간별 스냅샷 (unique_user_date_market 인덱스 범위 조회)"""
+    query = (
+      select(PortfolioSnapshot)
+      .filter(
+        and_(
+          PortfolioSnapshot.user_id == user_id,
+          PortfolioSnapshot.snapshot_date >= start,
+          PortfolioSnapshot.snapshot_date <= end
+        )
+      )
+      .order_by(PortfolioSnapshot.snapshot_date, PortfolioSnapshot.market_type)
+    )
+    
+    if market_type:
+      query = query.filter(PortfolioSnapshot.market_type == market_type)
+    
+    return await self._get_multiple_results(
+      db, query, f"포트폴리오 스냅샷 조회 실패: user_id={user_id}"
+    )
+  
+  async def get_backdated_changes(self, db: AsyncSession, snapshot_date: date) -> Dict[int, Dict[str, Any]]:
+    """
+    마지막 스냅샷 작성 이후 등록된 과거 일자 거래가 있는 사용자
+    (스냅샷이 아직 없는 사용자는 기준일 이전 거래가 있으면 포함)
+    
+    Returns:
+      {user_id: {"from_date": 가장 이른 변경 거래일, "to_date": 마지막 스냅샷 일자 또는 기준일 전날}}
+    """
+    last = (
+      select(
+        PortfolioSnapshot.user_id,
+        func.max(PortfolioSnapshot.updated_at).label('last_updated'),
+        func.max(PortfolioSnapshot.snapshot_date).label('last_date')
+      )
+      .group_by(PortfolioSnapshot.user_id)
+      .subquery()
+    )
+    
+    trade_date = func.date(Transaction.transaction_date)
+    query = (
+      select(
+        Transaction.user_id,
+        func.min(trade_date).label('from_date'),
+        func.max(last.c.last_date).label('to_date')
+      )
+      .outerjoin(last, last.c.user_id == Transaction.user_id)
+      .filter(
+        or_(
+          and_(last.c.user_id.is_(None), trade_date < snapshot_date),
+          and_(
+            Transaction.created_at > last.c.last_updated,
+            trade_date <= last.c.last_date
+          )
+        )
+      )
+      .group_by(Transaction.user_id)
+    )
+    
+    rows = await self._get_mapped_results(db, query, "과거 일자 거래 조회 실패")
+    return {
+      row["user_id"]: {
+        "from_date": row["from_date"],
+        "to_date": row["to_date"] or snapshot_date - timedelta(days=1)
+      }
+      for row in rows
+    }
+
+# 싱글톤 인스턴스
+portfolio_snapshot_crud = PortfolioSnapshotCRUD()
@@ -0,0 +1,246 @@
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Any, Tuple
+
+from sqlalchemy import select, and_, delete, func, case, desc
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.realized_pnl_monthly import RealizedPnlMonthly
+from app.models.transaction import Transaction
+from app.models.stock import Stock
+from app.models.broker import Broker
+from app.crud.base_crud import BaseCRUD
+from app.utils.kst import to_naive_kst
+
+logger = logging.getLogger(__name__)
+
+# 집계 금액 컬럼 (증분 갱신 시 기존 값에 더함)
+ROLLUP_SUM_COLUMNS = (
+  "sell_count", "quantity", "proceeds", "cost_basis", "realized_profit", "realized_profit_krw",
+  "commission", "transaction_tax"
+)
+
+# 집계 부분 재작성 범위: (broker_id, market_type, currency)
+RollupScope = Tuple[int, str, str]
+
+# 종목 국가로 구분한 시장 (DOMESTIC / OVERSEAS)
+_MARKET_TYPE = case((Stock.country_code == 'KR', 'DOMESTIC'), else_='OVERSEAS')
+
+class RealizedPnlCRUD(BaseCRUD[RealizedPnlMonthly]):
+  """RealizedPnlMonthly(월별 실현손익 집계) 관련 CRUD 작업"""
+
+  async def add_sell(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    broker_id: int,
+    market_type: str,
+    currency: str,
+    transaction_date: datetime,
+    quantity: int,
+    proceeds: Decimal,
+    cost_basis: Decimal,
+    realized_profit: Decimal,
+    exchange_rate: Decimal,
+    commission: Decimal,
+    transaction_tax: Decimal
+  ) -> None:
+    """매도 한 건을 해당 월 집계에 더함 (행이 없으면 생성, commit은 호출자)"""
+    stmt = insert(RealizedPnlMonthly).values(
+      user_id=user_id,
+      year_month=transaction_date.strftime("%Y-%m"),
+      broker_id=broker_id,
+      market_type=market_type,
+      currency=currency,
+      sell_count=1,
+      quantity=quantity,
+      proceeds=proceeds,
+      cost_basis=cost_basis,
+      realized_profit=realized_profit,
+      realized_profit_krw=realized_profit * exchange_rate,
+      commission=commission,
+      transaction_tax=transaction_tax
+    )
+    stmt = stmt.on_duplicate_key_update(
+      updated_at=func.now(),
+      **{
+        column: getattr(RealizedPnlMonthly, column) + getattr(stmt.inserted, column)
+        for column in ROLLUP_SUM_COLUMNS
+      }
+    )
+
+    await self._execute_query(db, stmt, f"실현손익 집계 갱신 실패: user_id={user_id}")
+
+  async def rebuild(self, db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """
+    transactions의 매도 거래로 집계 재작성 (user_id 생략 시 전체, commit은 호출자)
+
+    Returns:
+      작성된 집계 행 수
+    """
+    delete_stmt = delete(RealizedPnlMonthly)
+    source = self._rollup_source()
+    if user_id is not None:
+      delete_stmt = delete_stmt.where(RealizedPnlMonthly.user_id == user_id)
+      source = source.filter(Transaction.user_id == user_id)
+
+    count = await self._replace(db, delete_stmt, source, f"user_id={user_id}")
+    logger.info(f"실현손익 집계 재작성: user_id={user_id}, {count}행")
+    return count
+
+  async def rebuild_scopes(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    scopes: Dict[RollupScope, datetime]
+  ) -> int:
+    """
+    (증권사, 시장, 통화)별로 시작 일시가 속한 월부터의 집계 행만 재작성 (소급 거래용, commit은 호출자)
+
+    같은 사용자의 다른 집계 행은 건드리지 않으므로 다른 보유의 주문(add_sell)과 겹치는 행이 적다.
+    범위는 정렬된 순서로 처리한다 (잠금 순서 고정).
+
+    Returns:
+      작성된 집계 행 수
+    """
+    count = 0
+    for (broker_id, market_type, currency), since in sorted(scopes.items()):
+      month_start = to_naive_kst(since).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+      since_month = month_start.strftime("%Y-%m")
+      delete_stmt = delete(RealizedPnlMonthly).where(
+        and_(
+          RealizedPnlMonthly.user_id == user_id,
+          RealizedPnlMonthly.broker_id == broker_id,
+          RealizedPnlMonthly.market_type == market_type,
+          RealizedPnlMonthly.currency == currency,
+          RealizedPnlMonthly.year_month >= since_month
+        )
+      )
+      source = self._rollup_source().filter(
+        and_(
+          Transaction.user_id == user_id,
+          Transaction.broker_id == broker_id,
+          _MARKET_TYPE == market_type,
+          Stock.currency == currency,
+          Transaction.transaction_date >= month_start
+        )
+      )
+      count += await self._replace(
+        db, delete_stmt, source,
+        f"user_id={user_id}, broker_id={broker_id}, {market_type}/{currency}, {since_month}~"
+      )
+
+    logger.info(f"실현손익 집계 부분 재작성: user_id={user_id}, 범위={len(scopes)}, {count}행")
+    return count
+
+  @staticmethod
+  def _rollup_source():
+    """매도 거래 → 집계 행 SELECT (user, 월, 증권사, 시장, 통화 단위)"""
+    year_month = func.date_format(Transaction.transaction_date, '%Y-%m')
+    fees = Transaction.commission + Transaction.transaction_tax
+
+    return (
+      select(
+        Transaction.user_id,
+        year_month,
+        Transaction.broker_id,
+        _MARKET_TYPE,
+        Stock.currency,
+        func.count(Transaction.id),
+        func.sum(Transaction.quantity),
+        func.sum(Transaction.quantity * Transaction.price - fees),
+        func.sum(Transaction.avg_cost_at_transaction * Transaction.quantity),
+        func.sum(Transaction.total_realized_profit),
+        func.sum(Transaction.total_realized_profit * func.coalesce(Transaction.exchange_rate, 1)),
+        func.sum(Transaction.commission),
+        func.sum(Transaction.transaction_tax)
+      )
+      .join(Stock, Transaction.stock_id == Stock.id)
+      .filter(
+        and_(
+          Transaction.transaction_type == 'SELL',
+          Transaction.total_realized_profit.isnot(None)
+        )
+      )
+      .group_by(Transaction.user_id, year_month, Transaction.broker_id, _MARKET_TYPE, Stock.currency)
+    )
+
+  async def _replace(self, db: AsyncSession, delete_stmt, source, label: str) -> int:
+    """집계 행 삭제 후 source로 다시 INSERT"""
+    await self._execute_query(db, delete_stmt, f"실현손익 집계 삭제 실패: {label}")
+
+    insert_stmt = insert(RealizedPnlMonthly).from_select(
+      ["user_id", "year_month", "broker_id", "market_type", "currency", *ROLLUP_SUM_COLUMNS],
+      source
+    )
+    result = await self._execute_query(db, insert_stmt, f"실현손익 집계 재작성 실패: {label}")
+    return result.rowcount
+
+  async def get_summary(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    period: str = "monthly",
+    year: Optional[int] = None,
+    market_type: Optional[str] = None,
+    broker_id: Optional[int] = None
+  ) -> List[Dict[str, Any]]:
+    """월별(YYYY-MM) 또는 연도별(YYYY) × 증권사 × 시장 × 통화 실현손익 (최근 기간부터)"""
+    period_key = (
+      RealizedPnlMonthly.year_month if period == "monthly" else func.left(RealizedPnlMonthly.year_month, 4)
+    ).label('period')
+
+    query = (
+      select(
+        period_key,
+        RealizedPnlMonthly.broker_id,
+        Broker.display_name.label('broker_name'),
+        RealizedPnlMonthly.market_type,
+        RealizedPnlMonthly.currency,
+        *[func.sum(getattr(RealizedPnlMonthly, column)).label(column) for column in ROLLUP_SUM_COLUMNS]
+      )
+      .join(Broker, RealizedPnlMonthly.broker_id == Broker.id)
+      .filter(RealizedPnlMonthly.user_id == user_id)
+      .group_by(
+        period_key, RealizedPnlMonthly.broker_id, Broker.display_name,
+        RealizedPnlMonthly.market_type, RealizedPnlMonthly.currency
+      )
+      .order_by(desc(period_key), Broker.display_name, RealizedPnlMonthly.market_type, RealizedPnlMonthly.currency)
+    )
+
+    if year is not None:
+      query = query.filter(
+        and_(
+          RealizedPnlMonthly.year_month >= f"{year:04d}-01",
+          RealizedPnlMonthly.year_month <= f"{year:04d}-12"
+        )
+      )
+    if market_type:
+      query = query.filter(RealizedPnlMonthly.market_type == market_type)
+    if broker_id:
+      query = query.filter(RealizedPnlMonthly.broker_id == broker_id)
+
+    rows = await self._get_mapped_results(db, query, f"실현손익 집계 조회 실패: user_id={user_id}")
+    return [
+      {
+        "period": row["period"],
+        "broker_id": row["broker_id"],
+        "broker_name": row["broker_name"],
+        "market_type": row["market_type"],
+        "currency": row["currency"],
+        "sell_count": int(row["sell_count"]),
+        "quantity": int(row["quantity"]),
+        "proceeds": float(row["proceeds"]),
+        "cost_basis": float(row["cost_basis"]),
+        "realized_profit": float(row["realized_profit"]),
+        "realized_profit_krw": float(row["realized_profit_krw"]),
+        "commission": float(row["commission"]),
+        "transaction_tax": float(row["transaction_tax"])
+      }
+      for row in rows
+    ]
+
+# 싱글톤 인스턴스
+realized_pnl_crud = RealizedPnlCRUD()
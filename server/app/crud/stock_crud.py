@@ -1,5 +1,5 @@
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, and_
 from sqlalchemy.orm import joinedload
@@ -120,5 +120,31 @@ class StockCRUD:
       logger.error(f"종목 조회 실패: stock_id={stock_id}, error={str(e)}")
       raise
 
+  async def get_stocks_by_symbols(
+    self,
+    db: AsyncSession,
+    symbols: List[str]
+  ) -> Dict[str, List[Stock]]:
+    """여러 심볼 일괄 조회 (심볼 → 거래소별 종목 목록)"""
+    if not symbols:
+      return {}
+    
+    query = select(Stock).filter(
+      and_(
+        Stock.symbol.in_(symbols),
+        Stock.is_active == True
+      )
+    )
+    
+    try:
+      result = await db.execute(query)
+      stock_map: Dict[str, List[Stock]] = {}
+      for stock in result.scalars():
+        stock_map.setdefault(stock.symbol, []).append(stock)
+      return stock_map
+    except Exception as e:
+      logger.error(f"종목 일괄 조회 실패: {len(symbols)}건, error={str(e)}")
+      raise
+
 # 싱글톤 인스턴스
 stock_crud = StockCRUD()
\ No newline at end of file
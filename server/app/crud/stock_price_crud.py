@@ -0,0 +1,96 @@
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, and_, func
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stock_price import StockPrice
+from app.crud.base_crud import BaseCRUD
+
+logger = logging.getLogger(__name__)
+
+class StockPriceCRUD(BaseCRUD[StockPrice]):
+  """StockPrice(일별 가격/거래일) 관련 CRUD 작업"""
+  
+  async def upsert_daily_prices(self, db: AsyncSession, rows: List[Dict]) -> None:
+    """
+    일별 가격 일괄 저장 (symbol, date 중복 시 갱신)
+    
+    Args:
+      rows: [{"symbol", "date", "close_price", "open_price", "high_price", "low_price", "volume", "is_trading_day"}]
+    """
+    if not rows:
+      return
+    
+    stmt = insert(StockPrice).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+      close_price=stmt.inserted.close_price,
+      open_price=stmt.inserted.open_price,
+      high_price=stmt.inserted.high_price,
+      low_price=stmt.inserted.low_price,
+      volume=stmt.inserted.volume,
+      is_trading_day=stmt.inserted.is_trading_day,
+      created_at=func.now()  # 마지막 학습 시각
+    )
+    
+    await self._execute_query(db, stmt, f"일별 가격 저장 실패: {len(rows)}건")
+    await db.commit()
+  
+  async def get_recent_trading_days(
+    self,
+    db: AsyncSession,
+    symbol: str,
+    since: date,
+    learned_after: datetime
+  ) -> List[date]:
+    """learned_after 이후 기록된 symbol의 거래일 목록 (since 이후, 오름차순)"""
+    query = (
+      select(StockPrice.date)
+      .filter(
+        and_(
+          StockPrice.symbol == symbol,
+          StockPrice.date >= since,
+          StockPrice.is_trading_day == True,
+          StockPrice.created_at >= learned_after
+        )
+      )
+      .order_by(StockPrice.date)
+    )
+    
+    result = await self._execute_query(db, query, f"거래일 조회 실패: symbol={symbol}")
+    return [row.date for row in result]
+
+  async def get_closes(
+    self,
+    db: AsyncSession,
+    symbols: List[str],
+    start: date,
+    end: date
+  ) -> Dict[str, List[Tuple[date, float]]]:
+    """종목별 거래일 종가 (start~end, 날짜 오름차순)"""
+    closes: Dict[str, List[Tuple[date, float]]] = {symbol: [] for symbol in symbols}
+    if not symbols:
+      return closes
+    
+    query = (
+      select(StockPrice.symbol, StockPrice.date, StockPrice.close_price)
+      .filter(
+        and_(
+          StockPrice.symbol.in_(symbols),
+          StockPrice.date >= start,
+          StockPrice.date <= end,
+          StockPrice.is_trading_day == True
+        )
+      )
+      .order_by(StockPrice.symbol, StockPrice.date)
+    )
+    
+    result = await self._execute_query(db, query, f"종가 조회 실패: {len(symbols)}종목")
+    for row in result:
+      closes[row.symbol].append((row.date, float(row.close_price)))
+    return closes
+
+# 싱글톤 인스턴스
+stock_price_crud = StockPriceCRUD()
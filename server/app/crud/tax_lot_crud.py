@@ -0,0 +1,245 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import select, and_, delete, update, func, bindparam, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tax_lot import TaxLot
+from app.models.tax_lot_disposal import TaxLotDisposal
+from app.models.transaction import Transaction
+from app.models.stock import Stock
+from app.models.broker import Broker
+from app.crud.base_crud import BaseCRUD
+
+logger = logging.getLogger(__name__)
+
+# 대량 INSERT 1회당 행 수
+LOT_INSERT_CHUNK_SIZE = 1000
+
+class TaxLotCRUD(BaseCRUD[TaxLot]):
+  """TaxLot(매수 로트) / TaxLotDisposal(로트 처분) 관련 CRUD 작업 (commit은 호출자)"""
+
+  # =========================
+  # ✍️ 로트 갱신
+  # =========================
+
+  async def get_open_lots(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    broker_id: int
+  ) -> List[Dict[str, Any]]:
+    """미소진 로트 (FIFO 순서: 취득일시, 매수 거래 id)"""
+    query = (
+      select(
+        TaxLot.buy_transaction_id,
+        TaxLot.acquired_at,
+        TaxLot.remaining_quantity,
+        TaxLot.unit_cost,
+        TaxLot.exchange_rate
+      )
+      .filter(
+        and_(
+          TaxLot.user_id == user_id,
+          TaxLot.stock_id == stock_id,
+          TaxLot.broker_id == broker_id,
+          TaxLot.remaining_quantity > 0
+        )
+      )
+      .order_by(TaxLot.acquired_at, TaxLot.buy_transaction_id)
+    )
+    return await self._get_mapped_results(
+      db, query, f"미소진 로트 조회 실패: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}"
+    )
+
+  async def get_last_activity(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    broker_id: int
+  ) -> Optional[datetime]:
+    """로트 장부에 반영된 마지막 거래일시 (취득/처분 중 늦은 쪽, 없으면 None)"""
+    lot_query = select(func.max(TaxLot.acquired_at)).filter(
+      and_(TaxLot.user_id == user_id, TaxLot.stock_id == stock_id, TaxLot.broker_id == broker_id)
+    )
+    disposal_query = select(func.max(TaxLotDisposal.disposed_at)).filter(
+      and_(
+        TaxLotDisposal.user_id == user_id,
+        TaxLotDisposal.stock_id == stock_id,
+        TaxLotDisposal.broker_id == broker_id
+      )
+    )
+    error_msg = f"로트 최종 거래일 조회 실패: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}"
+    last_acquired = (await self._execute_query(db, lot_query, error_msg)).scalar()
+    last_disposed = (await self._execute_query(db, disposal_query, error_msg)).scalar()
+    return max(filter(None, (last_acquired, last_disposed)), default=None)
+
+  async def insert_lots(self, db: AsyncSession, lots: List[Dict[str, Any]]) -> None:
+    """로트 대량 INSERT (executemany)"""
+    for i in range(0, len(lots), LOT_INSERT_CHUNK_SIZE):
+      await db.execute(TaxLot.__table__.insert(), lots[i:i + LOT_INSERT_CHUNK_SIZE])
+
+  async def insert_disposals(self, db: AsyncSession, disposals: List[Dict[str, Any]]) -> None:
+    """로트 처분 내역 대량 INSERT (executemany)"""
+    for i in range(0, len(disposals), LOT_INSERT_CHUNK_SIZE):
+      await db.execute(TaxLotDisposal.__table__.insert(), disposals[i:i + LOT_INSERT_CHUNK_SIZE])
+
+  async def update_remaining(self, db: AsyncSession, lots: List[Dict[str, Any]]) -> None:
+    """매도로 잔량이 바뀐 로트 일괄 UPDATE (executemany)"""
+    if not lots:
+      return
+    stmt = (
+      update(TaxLot.__table__)
+      .where(TaxLot.__table__.c.buy_transaction_id == bindparam("lot_id"))
+      .values(remaining_quantity=bindparam("remaining"), updated_at=func.now())
+    )
+    await db.execute(
+      stmt,
+      [{"lot_id": lot["buy_transaction_id"], "remaining": lot["remaining_quantity"]} for lot in lots]
+    )
+
+  async def delete_lots(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: Optional[int] = None,
+    broker_id: Optional[int] = None
+  ) -> None:
+    """사용자(또는 종목 × 증권사)의 로트/처분 내역 삭제"""
+    for model in (TaxLotDisposal, TaxLot):
+      stmt = delete(model).where(model.user_id == user_id)
+      if stock_id is not None:
+        stmt = stmt.where(model.stock_id == stock_id)
+      if broker_id is not None:
+        stmt = stmt.where(model.broker_id == broker_id)
+      await self._execute_query(db, stmt, f"로트 삭제 실패: user_id={user_id}, stock_id={stock_id}")
+
+  async def get_lot_transactions(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: Optional[int] = None,
+    broker_id: Optional[int] = None
+  ) -> List[Dict[str, Any]]:
+    """로트 재계산용 거래 목록 (거래일시, id 오름차순)"""
+    query = (
+      select(
+        Transaction.id,
+        Transaction.user_id,
+        Transaction.stock_id,
+        Transaction.broker_id,
+        Transaction.transaction_type,
+        Transaction.quantity,
+        Transaction.price,
+        Transaction.commission,
+        Transaction.transaction_tax,
+        Transaction.exchange_rate,
+        Transaction.transaction_date
+      )
+      .filter(Transaction.user_id == user_id)
+      .order_by(Transaction.transaction_date, Transaction.id)
+    )
+    if stock_id is not None:
+      query = query.filter(Transaction.stock_id == stock_id)
+    if broker_id is not None:
+      query = query.filter(Transaction.broker_id == broker_id)
+
+    return await self._get_mapped_results(db, query, f"로트 재계산용 거래 조회 실패: user_id={user_id}")
+
+  async def get_transaction_user_ids(self, db: AsyncSession) -> List[int]:
+    """거래가 있는 사용자 ID 목록"""
+    query = select(Transaction.user_id).distinct().order_by(Transaction.user_id)
+    result = await self._execute_query(db, query, "거래 사용자 목록 조회 실패")
+    return [row[0] for row in result]
+
+  # =========================
+  # 🔍 로트 조회
+  # =========================
+
+  async def get_user_lots(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_symbol: Optional[str] = None,
+    include_closed: bool = False
+  ) -> List[Dict[str, Any]]:
+    """사용자 로트 목록 (종목, 증권사, 취득일시 순)"""
+    query = (
+      select(
+        TaxLot.buy_transaction_id,
+        TaxLot.stock_id,
+        TaxLot.broker_id,
+        TaxLot.acquired_at,
+        TaxLot.quantity,
+        TaxLot.remaining_quantity,
+        TaxLot.unit_cost,
+        TaxLot.exchange_rate,
+        Stock.symbol.label('stock_symbol'),
+        Stock.company_name,
+        Stock.company_name_en,
+        Stock.country_code,
+        Stock.exchange_code,
+        Stock.currency,
+        Broker.display_name.label('broker_name')
+      )
+      .join(Stock, TaxLot.stock_id == Stock.id)
+      .join(Broker, TaxLot.broker_id == Broker.id)
+      .filter(TaxLot.user_id == user_id)
+      .order_by(Stock.symbol, Broker.display_name, TaxLot.acquired_at, TaxLot.buy_transaction_id)
+    )
+    if not include_closed:
+      query = query.filter(TaxLot.remaining_quantity > 0)
+    if stock_symbol:
+      query = query.filter(Stock.symbol == stock_symbol)
+
+    return await self._get_mapped_results(db, query, f"로트 목록 조회 실패: user_id={user_id}")
+
+  async def get_disposals(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_symbol: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+  ) -> List[Dict[str, Any]]:
+    """로트별 실현손익 (처분일시 내림차순)"""
+    query = (
+      select(
+        TaxLotDisposal.buy_transaction_id,
+        TaxLotDisposal.sell_transaction_id,
+        TaxLotDisposal.broker_id,
+        TaxLotDisposal.acquired_at,
+        TaxLotDisposal.disposed_at,
+        TaxLotDisposal.quantity,
+        TaxLotDisposal.cost_basis,
+        TaxLotDisposal.proceeds,
+        TaxLotDisposal.realized_profit,
+        TaxLotDisposal.buy_exchange_rate,
+        TaxLotDisposal.sell_exchange_rate,
+        TaxLotDisposal.realized_profit_krw,
+        Stock.symbol.label('stock_symbol'),
+        Stock.company_name,
+        Stock.company_name_en,
+        Stock.country_code,
+        Stock.currency,
+        Broker.display_name.label('broker_name')
+      )
+      .join(Stock, TaxLotDisposal.stock_id == Stock.id)
+      .join(Broker, TaxLotDisposal.broker_id == Broker.id)
+      .filter(TaxLotDisposal.user_id == user_id)
+      .order_by(desc(TaxLotDisposal.disposed_at), desc(TaxLotDisposal.sell_transaction_id), TaxLotDisposal.acquired_at)
+    )
+    if stock_symbol:
+      query = query.filter(Stock.symbol == stock_symbol)
+    if start_date:
+      query = query.filter(TaxLotDisposal.disposed_at >= start_date)
+    if end_date:
+      query = query.filter(TaxLotDisposal.disposed_at <= end_date)
+
+    return await self._get_mapped_results(db, query, f"로트 처분 내역 조회 실패: user_id={user_id}")
+
+# 싱글톤 인스턴스
+tax_lot_crud = TaxLotCRUD()
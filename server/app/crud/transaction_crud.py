@@ -1,7 +1,8 @@
 import logging
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
+from sqlalchemy import select, update, and_, or_, desc, func, case, bindparam
 from sqlalchemy.orm import joinedload
 from datetime import datetime
 from decimal import Decimal
@@ -11,10 +12,53 @@ from app.models.stock import Stock
 from app.models.broker import Broker
 from app.models.country import Country
 from app.crud.holding_crud import holding_crud
+from app.crud.realized_pnl_crud import realized_pnl_crud
 from app.models.holding import Holding
+from app.services.portfolio_cache import portfolio_cache
+from app.services.tax_lot_service import tax_lot_service
+from app.services.holding_replay_service import holding_replay_service
+from app.utils.keyed_lock import KeyedLock
 
 logger = logging.getLogger(__name__)
 
+# 거래 대량 INSERT 1회당 행 수
+BULK_INSERT_CHUNK_SIZE = 1000
+# 재계산 스트리밍 시 한 번에 가져오는 행 수
+REPLAY_FETCH_SIZE = 1000
+# 재계산 결과 일괄 UPDATE 1회당 거래 수
+REPLAY_UPDATE_CHUNK_SIZE = 500
+# 거래 내역 내보내기 스트리밍 시 한 번에 가져오는 행 수
+HISTORY_FETCH_SIZE = 1000
+# 재계산 시 다시 쓰는 매도 거래 컬럼
+SELL_RESULT_COLUMNS = ("avg_cost_at_transaction", "realized_profit_per_share", "total_realized_profit")
+
+# (사용자, 종목, 증권사) 단위 프로세스 내 거래 직렬화 잠금
+holding_locks = KeyedLock("holding")
+
+
+@lru_cache(maxsize=4)
+def _sell_results_update(size: int):
+  """
+  거래 size건용 CASE id WHEN ... UPDATE 문
+
+  값은 고정 이름 바인드로만 넘겨 같은 크기 청크는 문장 구성/컴파일을 한 번만 한다
+  (청크마다 리터럴 CASE를 새로 만들면 1만 건 재계산 시간의 대부분을 차지).
+  """
+  ids = [bindparam(f"id_{i}", type_=Transaction.id.type) for i in range(size)]
+  return (
+    update(Transaction)
+    .where(Transaction.id.in_(ids))
+    .values({
+      column: case(
+        {ids[i]: bindparam(f"{column}_{i}", type_=Transaction.__table__.c[column].type) for i in range(size)},
+        value=Transaction.id
+      )
+      for column in SELL_RESULT_COLUMNS
+    })
+    .execution_options(synchronize_session=False)
+  )
+
+
 class TransactionCRUD:
   """Transaction 관련 CRUD 작업"""
   
@@ -33,17 +77,50 @@ class TransactionCRUD:
     transaction_date: datetime,
     notes: Optional[str] = None
   ) -> Transaction:
-    """새 거래 생성 및 Holdings 테이블 업데이트"""
+    """
+    새 거래 생성 및 Holdings 테이블 업데이트
+
+    같은 (사용자, 종목, 증권사) 거래는 프로세스 안에서는 키 잠금으로 줄 세우고,
+    프로세스 간에는 holdings 행 잠금(SELECT ... FOR UPDATE)으로 직렬화한다.
+    다른 보유에 대한 거래는 서로 기다리지 않는다.
+
+    앞선 조회로 열린 읽기 트랜잭션은 호출자가 닫고 호출한다 (end_read_transaction).
+    """
+    async with holding_locks.hold((user_id, stock_id, broker_id)):
+      return await self._create_transaction_locked(
+        db, user_id, stock_id, broker_id, transaction_type, quantity, price,
+        commission, transaction_tax, exchange_rate, transaction_date, notes
+      )
+
+  async def _create_transaction_locked(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    broker_id: int,
+    transaction_type: str,
+    quantity: int,
+    price: Decimal,
+    commission: Decimal,
+    transaction_tax: Decimal,
+    exchange_rate: Decimal,
+    transaction_date: datetime,
+    notes: Optional[str]
+  ) -> Transaction:
+    """거래 생성 본체 (보유 키 잠금을 잡은 상태에서 호출)"""
     try:
-      # Holdings 정보를 먼저 가져와서 매도 시 평균단가 계산
-      holding = await holding_crud.get_or_create_holding(db, user_id, stock_id, broker_id)
+      # Holdings 행을 잠금 조회해서 매도 시 평균단가 계산 (commit까지 같은 보유의 다른 거래 대기)
+      holding = await holding_crud.get_or_create_holding(db, user_id, stock_id, broker_id, for_update=True)
 
       # 매도인 경우 실현손익 계산을 위한 추가 필드 설정
       avg_cost_at_transaction = None
       realized_profit_per_share = None
       total_realized_profit = None
 
-      if transaction_type == 'SELL':
+      # 같은 종목 × 증권사에 더 늦은 거래가 있으면 소급 거래 → 증분 대신 재계산
+      backdated = await self.has_later_transactions(db, user_id, stock_id, broker_id, transaction_date)
+
+      if transaction_type == 'SELL' and not backdated:
         if holding.quantity >= quantity:
           # 매도 시점의 평균단가 (이미 수수료 포함됨)
           avg_cost_at_transaction = holding.average_cost
@@ -81,7 +158,15 @@ class TransactionCRUD:
       await db.flush()
       
       # Holdings 테이블 업데이트
-      if transaction_type == 'BUY':
+      if backdated:
+        # 이후 매도 거래의 평균단가/실현손익과 보유 정보를 거래일시 순으로 다시 계산 (수량 부족 시 ValueError)
+        await holding_replay_service.replay(db, user_id, stock_id, broker_id, since=transaction_date, holding=holding)
+        # 월별 집계는 이 종목의 (증권사, 시장, 통화) 행 중 거래월 이후만 재작성
+        stock = await db.get(Stock, stock_id)
+        await realized_pnl_crud.rebuild_scopes(db, user_id, {
+          (broker_id, "DOMESTIC" if stock.country_code == "KR" else "OVERSEAS", stock.currency): transaction_date
+        })
+      elif transaction_type == 'BUY':
         await holding_crud.update_holding_for_buy(
           holding, quantity, price, commission, transaction_tax, transaction_date, exchange_rate
         )
@@ -90,9 +175,31 @@ class TransactionCRUD:
           holding, quantity, price, commission, transaction_tax, 
           transaction_date, exchange_rate
         )
+        
+        # 월별 실현손익 집계 증분 갱신 (같은 트랜잭션에서 커밋)
+        stock = await db.get(Stock, stock_id)
+        await realized_pnl_crud.add_sell(
+          db,
+          user_id=user_id,
+          broker_id=broker_id,
+          market_type="DOMESTIC" if stock.country_code == "KR" else "OVERSEAS",
+          currency=stock.currency,
+          transaction_date=transaction_date,
+          quantity=quantity,
+          proceeds=quantity * price - (commission + transaction_tax),
+          cost_basis=avg_cost_at_transaction * quantity,
+          realized_profit=total_realized_profit,
+          exchange_rate=exchange_rate,
+          commission=commission,
+          transaction_tax=transaction_tax
+        )
+      
+      # FIFO 로트 장부 갱신 (같은 트랜잭션에서 커밋)
+      await tax_lot_service.record_transaction(db, new_transaction)
       
       await db.commit()
       await db.refresh(new_transaction)
+      portfolio_cache.invalidate_holdings(user_id)
       
       logger.info(f"거래 생성 및 Holdings 업데이트 완료: transaction_id={new_transaction.id}")
       return new_transaction
@@ -102,6 +209,115 @@ class TransactionCRUD:
       logger.error(f"거래 생성 중 오류: user_id={user_id}, error={str(e)}")
       raise
 
+  async def bulk_insert_transactions(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """거래 대량 INSERT (executemany, 실현손익 컬럼은 보유 재계산에서 채움, commit은 호출자)"""
+    try:
+      for i in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        await db.execute(Transaction.__table__.insert(), rows[i:i + BULK_INSERT_CHUNK_SIZE])
+    except Exception as e:
+      logger.error(f"거래 대량 저장 중 오류: {len(rows)}건, error={str(e)}")
+      raise
+
+  async def has_later_transactions(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    broker_id: int,
+    transaction_date: datetime
+  ) -> bool:
+    """transaction_date보다 늦은 같은 종목 × 증권사 거래 존재 여부"""
+    query = select(
+      select(Transaction.id)
+      .filter(
+        and_(
+          Transaction.user_id == user_id,
+          Transaction.stock_id == stock_id,
+          Transaction.broker_id == broker_id,
+          Transaction.transaction_date > transaction_date
+        )
+      )
+      .exists()
+    )
+    
+    try:
+      result = await db.execute(query)
+      return bool(result.scalar())
+    except Exception as e:
+      logger.error(f"이후 거래 조회 중 오류: user_id={user_id}, stock_id={stock_id}, error={str(e)}")
+      raise
+
+  async def stream_position_transactions(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    broker_id: int
+  ) -> AsyncIterator[Dict[str, Any]]:
+    """종목 × 증권사 거래를 거래일시(+id) 순으로 스트리밍 (보유 재계산용)"""
+    query = (
+      select(
+        Transaction.id,
+        Transaction.transaction_type,
+        Transaction.quantity,
+        Transaction.price,
+        Transaction.commission,
+        Transaction.transaction_tax,
+        Transaction.exchange_rate,
+        Transaction.transaction_date,
+        Transaction.avg_cost_at_transaction,
+        Transaction.realized_profit_per_share,
+        Transaction.total_realized_profit
+      )
+      .filter(
+        and_(
+          Transaction.user_id == user_id,
+          Transaction.stock_id == stock_id,
+          Transaction.broker_id == broker_id
+        )
+      )
+      .order_by(Transaction.transaction_date, Transaction.id)
+      .execution_options(yield_per=REPLAY_FETCH_SIZE)
+    )
+    
+    try:
+      result = await db.stream(query)
+      async for row in result:
+        yield dict(row._mapping)
+    except Exception as e:
+      logger.error(f"재계산용 거래 스트리밍 중 오류: user_id={user_id}, stock_id={stock_id}, error={str(e)}")
+      raise
+
+  async def bulk_update_sell_results(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """재계산된 매도 평균단가/실현손익 일괄 UPDATE (CASE id WHEN ... 로 청크당 1회, commit은 호출자)"""
+    try:
+      for i in range(0, len(rows), REPLAY_UPDATE_CHUNK_SIZE):
+        chunk = rows[i:i + REPLAY_UPDATE_CHUNK_SIZE]
+        params = {}
+        for j, row in enumerate(chunk):
+          params[f"id_{j}"] = row["id"]
+          for column in SELL_RESULT_COLUMNS:
+            params[f"{column}_{j}"] = row[column]
+        await db.execute(_sell_results_update(len(chunk)), params)
+    except Exception as e:
+      logger.error(f"매도 재계산 결과 저장 중 오류: {len(rows)}건, error={str(e)}")
+      raise
+
+  async def get_position_keys(self, db: AsyncSession, user_id: int) -> List[Tuple[int, int]]:
+    """사용자가 거래한 (종목, 증권사) 목록"""
+    query = (
+      select(Transaction.stock_id, Transaction.broker_id)
+      .filter(Transaction.user_id == user_id)
+      .distinct()
+    )
+    
+    try:
+      result = await db.execute(query)
+      return [(row.stock_id, row.broker_id) for row in result]
+    except Exception as e:
+      logger.error(f"거래 종목 목록 조회 중 오류: user_id={user_id}, error={str(e)}")
+      raise
+
   async def get_user_portfolio_summary(
     self,
     db: AsyncSession,
@@ -171,14 +387,8 @@ class TransactionCRUD:
       logger.error(f"포트폴리오 요약 조회 중 오류: user_id={user_id}, error={str(e)}")
       raise
 
-  async def get_user_transactions(
-    self,
-    db: AsyncSession,
-    user_id: int,
-    limit: int = 100,
-    offset: int = 0
-  ) -> List[Dict[str, Any]]:
-    """사용자의 거래 목록 조회 (관련 데이터 포함)"""
+  def _user_history_query(self, user_id: int, after: Optional[Tuple[datetime, int]] = None):
+    """거래 내역 쿼리 - 거래일시(+id) 내림차순, after 이후 행 (idx_user_date 사용)"""
     query = (
       select(
         Transaction.id,
@@ -201,35 +411,30 @@ class TransactionCRUD:
       .join(Stock, Transaction.stock_id == Stock.id)
       .join(Broker, Transaction.broker_id == Broker.id)
       .filter(Transaction.user_id == user_id)
-      .order_by(desc(Transaction.transaction_date))
-      .limit(limit)
-      .offset(offset)
     )
     
+    if after:
+      after_date, after_id = after
+      query = query.filter(or_(
+        Transaction.transaction_date < after_date,
+        and_(Transaction.transaction_date == after_date, Transaction.id < after_id)
+      ))
+    
+    return query.order_by(desc(Transaction.transaction_date), desc(Transaction.id))
+
+  async def get_user_transactions(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None
+  ) -> List[Dict[str, Any]]:
+    """사용자의 거래 목록 조회 (관련 데이터 포함, (거래일시, id) 키셋 페이지네이션)"""
+    query = self._user_history_query(user_id, after).limit(limit)
+    
     try:
       result = await db.execute(query)
-      transactions = []
-      
-      for row in result:
-        transaction_dict = {
-          "id": row.id,
-          "user_id": row.user_id,
-          "broker_id": row.broker_id,
-          "stock_id": row.stock_id,
-          "transaction_type": row.transaction_type,
-          "quantity": row.quantity,
-          "price": row.price,
-          "commission": row.commission,
-          "transaction_tax": row.transaction_tax,
-          "exchange_rate": row.exchange_rate,
-          "transaction_date": row.transaction_date,
-          "notes": row.notes,
-          "created_at": row.created_at,
-          "stock_symbol": row.stock_symbol,
-          "company_name": row.company_name,
-          "broker_name": row.broker_name
-        }
-        transactions.append(transaction_dict)
+      transactions = [dict(row._mapping) for row in result]
       
       logger.info(f"사용자 거래 목록 조회 완료: user_id={user_id}, 결과 수={len(transactions)}")
       return transactions
@@ -238,6 +443,128 @@ class TransactionCRUD:
       logger.error(f"사용자 거래 목록 조회 중 오류: user_id={user_id}, error={str(e)}")
       raise
 
+  async def count_user_transactions(self, db: AsyncSession, user_id: int) -> int:
+    """사용자의 전체 거래 수"""
+    query = select(func.count(Transaction.id)).filter(Transaction.user_id == user_id)
+    
+    try:
+      result = await db.execute(query)
+      return result.scalar() or 0
+    except Exception as e:
+      logger.error(f"사용자 거래 수 조회 중 오류: user_id={user_id}, error={str(e)}")
+      raise
+
+  async def stream_user_transactions(
+    self,
+    db: AsyncSession,
+    user_id: int
+  ) -> AsyncIterator[Dict[str, Any]]:
+    """사용자의 전체 거래를 서버 측 커서로 스트리밍 (내보내기용, get_user_transactions와 같은 순서/형식)"""
+    query = self._user_history_query(user_id).execution_options(yield_per=HISTORY_FETCH_SIZE)
+    
+    try:
+      result = await db.stream(query)
+      async for row in result:
+        yield dict(row._mapping)
+    except Exception as e:
+      logger.error(f"사용자 거래 스트리밍 중 오류: user_id={user_id}, error={str(e)}")
+      raise
+
+  async def get_transactions_for_replay(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    until: datetime
+  ) -> List[Dict[str, Any]]:
+    """보유 재계산용 거래 목록 (until 이전, 거래일시 오름차순)"""
+    query = (
+      select(
+        Transaction.id,
+        Transaction.stock_id,
+        Transaction.broker_id,
+        Transaction.transaction_type,
+        Transaction.quantity,
+        Transaction.price,
+        Transaction.commission,
+        Transaction.transaction_tax,
+        Transaction.exchange_rate,
+        Transaction.transaction_date,
+        Stock.symbol.label('stock_symbol'),
+        Stock.country_code,
+        Stock.exchange_code,
+        Stock.currency
+      )
+      .join(Stock, Transaction.stock_id == Stock.id)
+      .filter(
+        and_(
+          Transaction.user_id == user_id,
+          Transaction.transaction_date < until
+        )
+      )
+      .order_by(Transaction.transaction_date, Transaction.id)
+    )
+    
+    try:
+      result = await db.execute(query)
+      return [dict(row._mapping) for row in result]
+    except Exception as e:
+      logger.error(f"재계산용 거래 조회 중 오류: user_id={user_id}, error={str(e)}")
+      raise
+
+  async def get_user_ids_with_transactions(self, db: AsyncSession) -> List[int]:
+    """거래 내역이 있는 사용자 ID 목록"""
+    query = select(Transaction.user_id).distinct().order_by(Transaction.user_id)
+    
+    try:
+      result = await db.execute(query)
+      return list(result.scalars().all())
+    except Exception as e:
+      logger.error(f"거래 사용자 목록 조회 중 오류: error={str(e)}")
+      raise
+
+  async def get_daily_flows(
+    self,
+    db: AsyncSession,
+    start: datetime,
+    end: datetime
+  ) -> List[Dict[str, Any]]:
+    """사용자/일자/국가별 매수·매도 금액과 실현손익 합계 (원화, start 이상 end 미만)"""
+    trade_date = func.date(Transaction.transaction_date)
+    gross = Transaction.quantity * Transaction.price
+    fees = Transaction.commission + Transaction.transaction_tax
+    
+    query = (
+      select(
+        Transaction.user_id,
+        trade_date.label('trade_date'),
+        Stock.country_code,
+        func.sum(case(
+          (Transaction.transaction_type == 'BUY', (gross + fees) * Transaction.exchange_rate), else_=0
+        )).label('buy_amount_krw'),
+        func.sum(case(
+          (Transaction.transaction_type == 'SELL', (gross - fees) * Transaction.exchange_rate), else_=0
+        )).label('sell_amount_krw'),
+        func.sum(
+          func.coalesce(Transaction.total_realized_profit, 0) * Transaction.exchange_rate
+        ).label('realized_gain_krw')
+      )
+      .join(Stock, Transaction.stock_id == Stock.id)
+      .filter(
+        and_(
+          Transaction.transaction_date >= start,
+          Transaction.transaction_date < end
+        )
+      )
+      .group_by(Transaction.user_id, trade_date, Stock.country_code)
+    )
+    
+    try:
+      result = await db.execute(query)
+      return [dict(row._mapping) for row in result]
+    except Exception as e:
+      logger.error(f"일별 거래 금액 집계 중 오류: start={start}, end={end}, error={str(e)}")
+      raise
+
   async def get_stock_by_symbol(
     self,
     db: AsyncSession,
@@ -320,9 +647,16 @@ class TransactionCRUD:
     broker_id: Optional[int] = None,
     stock_symbol: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None,
+    descending: bool = True,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None
   ) -> List[Dict[str, Any]]:
-    """실현손익 Raw 데이터 조회 (순수 DB 작업만)"""
+    """
+    실현손익 Raw 데이터 조회 (순수 DB 작업만)
+    
+    (transaction_date, id) 순서의 키셋 페이지네이션: after 이후 행을 limit개까지 (idx_user_date 사용)
+    """
     # 기본 쿼리 - 매도 거래만
     query = (
       select(
@@ -373,13 +707,32 @@ class TransactionCRUD:
     if end_date:
       query = query.filter(Transaction.transaction_date <= end_date)
     
-    query = query.order_by(desc(Transaction.transaction_date))
+    if after:
+      after_date, after_id = after
+      if descending:
+        query = query.filter(or_(
+          Transaction.transaction_date < after_date,
+          and_(Transaction.transaction_date == after_date, Transaction.id < after_id)
+        ))
+      else:
+        query = query.filter(or_(
+          Transaction.transaction_date > after_date,
+          and_(Transaction.transaction_date == after_date, Transaction.id > after_id)
+        ))
+    
+    if descending:
+      query = query.order_by(desc(Transaction.transaction_date), desc(Transaction.id))
+    else:
+      query = query.order_by(Transaction.transaction_date, Transaction.id)
+    
+    if limit:
+      query = query.limit(limit)
     
     try:
       result = await db.execute(query)
       results = [dict(row._mapping) for row in result]
       
-      logger.info(f"실현손익 Raw 데이터 조회 완료: user_id={user_id}, 결과 수={len(results)}")
+      logger.debug(f"실현손익 Raw 데이터 조회 완료: user_id={user_id}, 결과 수={len(results)}")
       return results
       
     except Exception as e:
@@ -434,13 +787,13 @@ class TransactionCRUD:
       stock_result = await db.execute(stock_query)
       broker_result = await db.execute(broker_query)
       
-      # 종목 목록 가공
+      # 종목 목록 가공 (실현손익 응답과 같은 snake_case)
       stocks = []
       for row in stock_result:
         stocks.append({
           "symbol": row.symbol,
-          "companyName": row.company_name,
-          "companyNameEn": row.company_name_en or ""
+          "company_name": row.company_name,
+          "company_name_en": row.company_name_en or ""
         })
       
       # 증권사 목록 가공
@@ -449,7 +802,7 @@ class TransactionCRUD:
         brokers.append({
           "id": row.id,
           "name": row.broker_name,
-          "displayName": row.display_name
+          "display_name": row.display_name
         })
       
       logger.info(f"실현손익 메타데이터 조회 완료: user_id={user_id}, 종목 수={len(stocks)}, 증권사 수={len(brokers)}")
@@ -1,11 +1,12 @@
+import asyncio
 import httpx
 import logging
-from typing import Dict, Optional, List
-from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, List, Set
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from app.core.exceptions import CustomHTTPException
 from app.config.settings import get_settings
-from app.core.constants import EXIMBANK_CURRENCY_MAP
+from app.core.constants import EXIMBANK_CURRENCY_MAP, EXIMBANK_CURRENCY_UNITS
 
 logger = logging.getLogger(__name__)
 
@@ -33,11 +34,11 @@ class ExchangeRateService:
     if not search_date:
       search_date = datetime.now().strftime("%Y%m%d")
     
-    # 캐시 확인
+    # 캐시 확인 (지난 날짜의 고시 환율은 바뀌지 않으므로 만료 없음)
     cache_key = self._get_cache_key(search_date)
     if cache_key in self.cache:
       cached_data, cached_time = self.cache[cache_key]
-      if self._is_cache_valid(cached_time):
+      if search_date < datetime.now().strftime("%Y%m%d") or self._is_cache_valid(cached_time):
         logger.info(f"환율 정보 캐시 히트: {search_date}")
         return cached_data
     
@@ -77,7 +78,9 @@ class ExchangeRateService:
           recent_date = await self._get_recent_business_date(search_date)
           if recent_date != search_date:
             logger.info(f"주말/공휴일 감지. 최근 영업일 조회: {recent_date}")
-            return await self.get_exchange_rates(recent_date)
+            recent_data = await self.get_exchange_rates(recent_date)
+            self.cache[cache_key] = (recent_data, datetime.now())
+            return recent_data
           else:
             raise CustomHTTPException(
               status_code=404,
@@ -185,6 +188,53 @@ class ExchangeRateService:
       logger.error(f"다중 환율 조회 실패: {e}")
       return {}
 
+  async def get_krw_rates(self, currencies: Iterable[str], search_date: Optional[str] = None) -> Dict[str, float]:
+    """
+    통화별 1단위당 원화 환율 (KRW는 1.0)
+
+    여러 통화를 get_multi_currency_rates 한 번으로 조회하고 고시 단위(JPY 100엔)를 보정한다.
+    환율을 찾지 못한 통화는 결과에서 빠진다.
+    """
+    targets = sorted({currency for currency in currencies if currency and currency != "KRW"})
+    raw_rates = await self.get_multi_currency_rates(targets, search_date) if targets else {}
+
+    rates = {"KRW": 1.0}
+    for currency in targets:
+      rate = raw_rates.get(currency)
+      if rate is not None:
+        rates[currency] = rate / EXIMBANK_CURRENCY_UNITS.get(currency, 1)
+    return rates
+
+  async def get_daily_rates(self, days: Set[date], currencies: Set[str]) -> Dict[date, Dict[str, float]]:
+    """거래일별 통화 환율 (날짜당 1회 동시 조회, 고시가 없는 날은 직전 고시일 환율)"""
+    settings = get_settings()
+    semaphore = asyncio.Semaphore(settings.exchange_rate_fetch_concurrency)
+
+    async def fetch(day: date) -> Dict[str, float]:
+      async with semaphore:
+        try:
+          return await self.get_krw_rates(currencies, day.strftime("%Y%m%d"))
+        except Exception as e:
+          logger.warning(f"환율 조회 실패: {day}, error={str(e)}")
+          return {}
+
+    ordered = sorted(days)
+    fetched = dict(zip(ordered, await asyncio.gather(*[fetch(day) for day in ordered])))
+
+    resolved: Dict[date, Dict[str, float]] = {}
+    for day in ordered:
+      rates = dict(fetched[day])
+      probe = day
+      while currencies - rates.keys() and (day - probe).days < settings.exchange_rate_lookback_days:
+        probe -= timedelta(days=1)
+        if probe not in resolved and probe not in fetched:
+          fetched[probe] = await fetch(probe)
+        rates = {**resolved.get(probe, fetched.get(probe, {})), **rates}
+      resolved[day] = rates
+
+    logger.info(f"거래일별 환율 조회: 거래일={len(ordered)}, 조회={len(fetched)}, 통화={sorted(currencies)}")
+    return resolved
+
   async def convert_to_krw(self, amount: float, from_currency: str, search_date: Optional[str] = None) -> Dict:
     """특정 통화를 원화로 변환 (다국가 지원)"""
     if from_currency == "KRW":
@@ -198,15 +248,9 @@ class ExchangeRateService:
         logger.error(f"환율 정보를 가져올 수 없음: {from_currency}")
         return {"original_amount": amount, "converted_amount": None, "rate": None, "success": False}
       
-      # ✅ JPY 100엔 단위 보정 추가
-      if from_currency == "JPY":
-        # 한국수출입은행: 100엔당 원화 → 1엔당 원화로 변환
-        actual_rate = rate / 100
-        converted = amount * actual_rate
-        logger.debug(f"JPY 환율 보정: {rate} (100엔당) → {actual_rate} (1엔당)")
-      else:
-        actual_rate = rate
-        converted = amount * rate
+      # ✅ 고시 단위 보정 (JPY: 100엔당 원화 → 1엔당 원화)
+      actual_rate = rate / EXIMBANK_CURRENCY_UNITS.get(from_currency, 1)
+      converted = amount * actual_rate
       
       return {
         "original_amount": amount,
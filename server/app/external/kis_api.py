@@ -1,63 +1,211 @@
 import httpx
 import logging
 import asyncio
-from typing import Dict, Optional
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from app.core.exceptions import CustomHTTPException
 from app.config.settings import get_settings
 from app.config.database import get_async_session
+from app.core.constants import KIS_OVERSEAS_EXCHANGE_CODE_MAP, KIS_OVERSEAS_EXCHANGE_CURRENCY
+from app.utils.single_flight import SingleFlight
+from app.utils.rate_limiter import PriorityRateLimiter
+from app.services.market_hours_service import market_hours_service
+from app.external.kis_websocket import realtime_quote_service
 
 logger = logging.getLogger(__name__)
 
+# KIS 호출 우선순위 레인 (앞쪽이 높은 우선순위)
+KIS_PRIORITY_INTERACTIVE = "interactive"  # 포트폴리오, 시세 조회 등 사용자 대기 요청
+KIS_PRIORITY_BATCH = "batch"              # 전략 스캔, 차트 백필 등 배치 요청
+
+# 국내 멀티종목 시세 조회 1회당 최대 종목 수
+KIS_MULTI_PRICE_MAX_SYMBOLS = 30
+
 
 class KISAPIService:
   """한국투자증권 Open API 서비스 - 단순화된 버전"""
   
   def __init__(self):
-    self.access_token: Optional[str] = None
-    self.token_expired_time: Optional[datetime] = None
-  
+    self._client: Optional[httpx.AsyncClient] = None
+    
+    # (user_id, app_key) → (access_token, expires_at)
+    self._token_cache: Dict[Tuple[int, str], Tuple[str, datetime]] = {}
+    self._token_flight = SingleFlight("kis-token")
+    
+    # 사용자와 무관한 동일 시세 요청 합치기 (종목/시장/날짜 단위)
+    self._quote_flight = SingleFlight("kis-quote")
+    self._chart_flight = SingleFlight("kis-chart")
+    
+    # 시세 캐시: quote_key → (price_data, 만료 시각(monotonic), None이면 영구)
+    self._quote_cache: Dict[Tuple, Tuple[Dict, Optional[float]]] = {}
+    self._quote_cache_hits = 0
+    self._quote_cache_misses = 0
+    
+    # App Key 단위 초당 호출 한도를 지키기 위한 토큰 버킷 (모든 KIS 호출이 통과)
+    settings = get_settings()
+    self._rate_limiter = PriorityRateLimiter(
+      rate_per_sec=settings.kis_rate_limit_per_sec,
+      burst=settings.kis_rate_limit_burst,
+      lanes=(KIS_PRIORITY_INTERACTIVE, KIS_PRIORITY_BATCH),
+      name="kis-api"
+    )
+
+  # =========================
+  # 🔌 HTTP 커넥션 풀 관리
+  # =========================
+
+  async def startup(self) -> None:
+    """공유 HTTP 클라이언트 생성 (앱 시작 시 lifespan에서 호출)"""
+    if self._client is None or self._client.is_closed:
+      self._client = self._create_client()
+      logger.info("KIS API HTTP 클라이언트 생성 완료")
+
+  async def shutdown(self) -> None:
+    """공유 HTTP 클라이언트 종료 (앱 종료 시 lifespan에서 호출)"""
+    if self._client is not None and not self._client.is_closed:
+      await self._client.aclose()
+      logger.info("KIS API HTTP 클라이언트 종료 완료")
+    self._client = None
+
+  def _create_client(self) -> httpx.AsyncClient:
+    """커넥션 풀/keep-alive/타임아웃 설정이 적용된 클라이언트 생성"""
+    settings = get_settings()
+
+    limits = httpx.Limits(
+      max_connections=settings.kis_http_max_connections,
+      max_keepalive_connections=settings.kis_http_max_keepalive_connections,
+      keepalive_expiry=settings.kis_http_keepalive_expiry
+    )
+    timeout = httpx.Timeout(
+      connect=settings.kis_http_connect_timeout,
+      read=settings.kis_http_read_timeout,
+      write=settings.kis_http_read_timeout,
+      pool=settings.kis_http_pool_timeout
+    )
+
+    # HTTP/2는 h2 패키지가 설치된 경우에만 활성화
+    http2 = settings.kis_http2
+    if http2:
+      try:
+        import h2  # noqa: F401
+      except ImportError:
+        logger.warning("h2 패키지가 없어 HTTP/1.1로 동작합니다 (pip install 'httpx[http2]')")
+        http2 = False
+
+    return httpx.AsyncClient(
+      limits=limits,
+      timeout=timeout,
+      http2=http2
+    )
+
+  def _get_client(self) -> httpx.AsyncClient:
+    """공유 HTTP 클라이언트 반환 (lifespan 밖에서 호출된 경우 지연 생성)"""
+    if self._client is None or self._client.is_closed:
+      self._client = self._create_client()
+    return self._client
+
+  async def _send(
+    self,
+    method: str,
+    url: str,
+    priority: str = KIS_PRIORITY_INTERACTIVE,
+    **kwargs
+  ) -> httpx.Response:
+    """호출 한도 스케줄러를 거쳐 KIS API 요청 전송"""
+    waited = await self._rate_limiter.acquire(priority)
+    if waited >= 1.0:
+      logger.info(f"KIS 호출 대기: lane={priority}, waited={waited:.2f}s, "
+                  f"queue_depth={self._rate_limiter.queue_depth()}")
+    
+    client = self._get_client()
+    return await client.request(method, url, **kwargs)
+
+  def get_rate_limiter_stats(self) -> Dict:
+    """KIS 호출 스케줄러 현황 (레인별 대기열 길이, 대기 시간)"""
+    return self._rate_limiter.get_stats()
+
+  def get_stats(self) -> Dict:
+    """KIS API 서비스 운영 지표 (호출 스케줄러, 요청 합치기)"""
+    return {
+      "rate_limiter": self.get_rate_limiter_stats(),
+      "quote_cache": {
+        "entries": len(self._quote_cache),
+        "hits": self._quote_cache_hits,
+        "misses": self._quote_cache_misses
+      },
+      "coalescing": {
+        "quote": self._quote_flight.get_stats(),
+        "chart": self._chart_flight.get_stats(),
+        "token": self._token_flight.get_stats()
+      }
+    }
+
+  # =========================
+  # 🔑 접근 토큰 관리 (메모리 캐시 + DB)
+  # =========================
+
+  def _token_cache_key(self, user_id: int) -> Tuple[int, str]:
+    """토큰 캐시 키 (토큰은 사용자 + App Key 단위로 발급/저장)"""
+    return (user_id, get_settings().kis_app_key)
+
+  def _is_token_fresh(self, expires_at: datetime) -> bool:
+    """만료 시각 전 여유시간(refresh margin)을 두고 토큰 유효성 판단"""
+    margin = timedelta(seconds=get_settings().kis_token_refresh_margin_seconds)
+    return expires_at - margin > datetime.now()
+
   async def ensure_valid_token(self, user_id: int) -> str:
-    """사용자의 유효한 토큰 확보 (단순화된 진입점)"""
-    logger.info(f"KIS 토큰 확보 요청: user_id={user_id}")
+    """사용자의 유효한 토큰 확보 (메모리 캐시 → DB → 신규 발급)"""
+    key = self._token_cache_key(user_id)
+    
+    # 1. 메모리 캐시 (정상 상태에서는 DB 조회 없음)
+    cached = self._token_cache.get(key)
+    if cached and self._is_token_fresh(cached[1]):
+      return cached[0]
+    
+    # 2. 캐시 미스/만료 임박: 키당 하나의 갱신 코루틴만 실행하고 나머지는 대기
+    return await self._token_flight.do(key, lambda: self._refresh_token(user_id, key))
+
+  async def _refresh_token(self, user_id: int, key: Tuple[int, str]) -> str:
+    """DB에서 유효한 토큰을 찾고, 없으면 새로 발급하여 캐시에 저장"""
+    logger.info(f"KIS 토큰 갱신 시작: user_id={user_id}")
     
-    # 1. DB에서 유효한 토큰 확인
-    token = await self._get_valid_token_from_db(user_id)
-    if token:
+    # 1. DB에서 유효한 토큰 확인 (다른 프로세스가 발급했을 수 있음)
+    token_record = await self._get_valid_token_from_db(user_id)
+    if token_record:
       logger.info(f"DB에서 유효한 토큰 사용: user_id={user_id}")
-      return token
+      self._token_cache[key] = token_record
+      return token_record[0]
     
     # 2. 유효한 토큰이 없으면 새로 발급
     logger.info(f"새 토큰 발급 시작: user_id={user_id}")
-    new_token = await self._issue_and_save_new_token(user_id)
-    return new_token
+    token_data = await self._issue_and_save_new_token(user_id)
+    self._token_cache[key] = (token_data["access_token"], token_data["expires_at"])
+    return token_data["access_token"]
 
-  async def _get_valid_token_from_db(self, user_id: int) -> Optional[str]:
+  async def _get_valid_token_from_db(self, user_id: int) -> Optional[Tuple[str, datetime]]:
     """DB에서 유효한 토큰 조회 (내부 메서드)"""
     async for db in get_async_session():
       try:
         from app.models.kis_token import KisToken
         
-        # 현재 시간만 체크 (buffer 제거하여 더 정확하게)
+        # 만료 임박 토큰은 제외 (refresh margin 적용)
+        margin = timedelta(seconds=get_settings().kis_token_refresh_margin_seconds)
         now = datetime.now()
-        logger.info(f"토큰 만료 확인: user_id={user_id}, current_time={now}")
         
         query = select(KisToken).where(
           KisToken.user_id == user_id,
-          KisToken.expires_at > now  # buffer_time 대신 현재 시간만 사용
-        ).order_by(KisToken.created_at.desc())
+          KisToken.expires_at > now + margin
+        ).order_by(KisToken.created_at.desc()).limit(1)
         
         result = await db.execute(query)
         token_record = result.scalar_one_or_none()
         
         if token_record:
-          # 메모리에 동기화
-          self.access_token = token_record.access_token
-          self.token_expired_time = token_record.expires_at
           logger.info(f"DB에서 토큰 조회 성공: user_id={user_id}, expires_at={token_record.expires_at}")
-          return token_record.access_token
+          return token_record.access_token, token_record.expires_at
         else:
           logger.info(f"DB에 유효한 토큰 없음: user_id={user_id}")
           
@@ -67,18 +215,32 @@ class KISAPIService:
         logger.error(f"DB 토큰 조회 오류: user_id={user_id}, error={str(e)}")
         return None
 
-  async def _delete_expired_tokens(self, user_id: int) -> None:
-    """만료된 토큰 삭제 (내부 메서드)"""
+  async def _delete_expired_tokens(self, user_id: int, stale_token: Optional[str] = None) -> None:
+    """
+    만료된 토큰 삭제 (내부 메서드)
+    
+    stale_token이 주어지면 해당 토큰이 아직 캐시/DB에 남아 있을 때만 삭제한다.
+    동시에 만료 응답을 받은 요청들이 이미 갱신된 토큰까지 지우지 않도록 하기 위함.
+    """
+    key = self._token_cache_key(user_id)
+    cached = self._token_cache.get(key)
+    
+    if stale_token is not None and cached and cached[0] != stale_token:
+      logger.info(f"이미 갱신된 토큰 존재, 삭제 생략: user_id={user_id}")
+      return
+    
+    self._token_cache.pop(key, None)
+    
     async for db in get_async_session():
       try:
         from app.models.kis_token import KisToken
         
-        await db.execute(delete(KisToken).where(KisToken.user_id == user_id))
-        await db.commit()
+        query = delete(KisToken).where(KisToken.user_id == user_id)
+        if stale_token is not None:
+          query = query.where(KisToken.access_token == stale_token)
         
-        # 메모리도 초기화
-        self.access_token = None
-        self.token_expired_time = None
+        await db.execute(query)
+        await db.commit()
         
         logger.info(f"만료된 토큰 삭제 완료: user_id={user_id}")
         
@@ -86,7 +248,7 @@ class KISAPIService:
         await db.rollback()
         logger.error(f"토큰 삭제 실패: user_id={user_id}, error={str(e)}")
 
-  async def _issue_and_save_new_token(self, user_id: int) -> str:
+  async def _issue_and_save_new_token(self, user_id: int) -> Dict:
     """새 토큰 발급 및 저장 (내부 메서드)"""
     try:
       # 1. KIS API에서 새 토큰 발급
@@ -96,7 +258,7 @@ class KISAPIService:
       await self._save_token_to_db(user_id, token_data)
       
       logger.info(f"새 토큰 발급 완료: user_id={user_id}")
-      return token_data["access_token"]
+      return token_data
       
     except Exception as e:
       logger.error(f"토큰 발급 실패: user_id={user_id}, error={str(e)}")
@@ -115,29 +277,26 @@ class KISAPIService:
     }
     
     try:
-      async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=data, headers=headers)
-        
-        if response.status_code != 200:
-          raise CustomHTTPException(
-            status_code=400,
-            detail=f"KIS API 토큰 발급 실패: {response.text}",
-            error_code="KIS_TOKEN_ERROR"
-          )
-        
-        result = response.json()
-        
-        # 메모리에 저장
-        self.access_token = result.get("access_token")
-        expires_in = result.get("expires_in", 86400)  # 기본 24시간
-        self.token_expired_time = datetime.now() + timedelta(seconds=expires_in)
-        
-        return {
-          "access_token": result.get("access_token"),
-          "expires_in": expires_in,
-          "expires_at": self.token_expired_time
-        }
-        
+      response = await self._send("POST", url, KIS_PRIORITY_INTERACTIVE, json=data, headers=headers)
+      
+      if response.status_code != 200:
+        raise CustomHTTPException(
+          status_code=400,
+          detail=f"KIS API 토큰 발급 실패: {response.text}",
+          error_code="KIS_TOKEN_ERROR"
+        )
+      
+      result = response.json()
+      
+      expires_in = result.get("expires_in", 86400)  # 기본 24시간
+      expires_at = datetime.now() + timedelta(seconds=expires_in)
+      
+      return {
+        "access_token": result.get("access_token"),
+        "expires_in": expires_in,
+        "expires_at": expires_at
+      }
+      
     except httpx.RequestError as e:
       raise CustomHTTPException(
         status_code=500,
@@ -145,6 +304,42 @@ class KISAPIService:
         error_code="KIS_CONNECTION_ERROR"
       )
 
+  async def issue_websocket_approval_key(self) -> str:
+    """실시간 시세 WebSocket 접속키 발급"""
+    settings = get_settings()
+    
+    url = f"{settings.kis_base_url}/oauth2/Approval"
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    data = {
+      "grant_type": "client_credentials",
+      "appkey": settings.kis_app_key,
+      "secretkey": settings.kis_app_secret
+    }
+    
+    try:
+      response = await self._send("POST", url, KIS_PRIORITY_INTERACTIVE, json=data, headers=headers)
+      
+      if response.status_code != 200 or not response.json().get("approval_key"):
+        raise CustomHTTPException(
+          status_code=400,
+          detail=f"KIS WebSocket 접속키 발급 실패: {response.text}",
+          error_code="KIS_TOKEN_ERROR"
+        )
+      
+      return response.json()["approval_key"]
+      
+    except httpx.RequestError:
+      raise CustomHTTPException(
+        status_code=500,
+        detail="KIS API 서버 연결 실패",
+        error_code="KIS_CONNECTION_ERROR"
+      )
+
+  def clear_token_cache(self) -> None:
+    """토큰 메모리 캐시 초기화"""
+    self._token_cache.clear()
+    logger.info("KIS 토큰 캐시 초기화 완료")
+
   async def _save_token_to_db(self, user_id: int, token_data: Dict) -> None:
     """토큰을 DB에 저장 (내부 메서드)"""
     async for db in get_async_session():
@@ -171,21 +366,190 @@ class KISAPIService:
         logger.error(f"토큰 저장 실패: user_id={user_id}, error={str(e)}")
         raise
 
+  async def _kis_get(
+    self,
+    user_id: int,
+    url: str,
+    tr_id: str,
+    params: Dict,
+    priority: str = KIS_PRIORITY_INTERACTIVE,
+    error_code: str = "KIS_PRICE_ERROR",
+    error_label: str = "KIS API 주가 조회 실패"
+  ) -> Dict:
+    """KIS 시세 GET 호출 공통 처리 (토큰 확보, 만료 시 1회 재발급 후 재시도)"""
+    settings = get_settings()
+    
+    # 토큰 확보 (필요시 자동 발급)
+    access_token = await self.ensure_valid_token(user_id)
+    
+    headers = {
+      "Content-Type": "application/json; charset=utf-8",
+      "authorization": f"Bearer {access_token}",
+      "appkey": settings.kis_app_key,
+      "appsecret": settings.kis_app_secret,
+      "tr_id": tr_id
+    }
+    
+    try:
+      response = await self._send("GET", url, priority, headers=headers, params=params)
+      
+      if response.status_code != 200:
+        response_text = response.text
+        
+        # 토큰 만료 에러인 경우 재시도
+        if "기간이 만료된 token" in response_text or "EGW00123" in response_text:
+          logger.warning(f"토큰 만료 감지, 새 토큰으로 재시도: user_id={user_id}, tr_id={tr_id}")
+          
+          # 실패한 토큰만 삭제 후 새 토큰 확보
+          await self._delete_expired_tokens(user_id, access_token)
+          access_token = await self.ensure_valid_token(user_id)
+          headers["authorization"] = f"Bearer {access_token}"
+          
+          # 재시도
+          response = await self._send("GET", url, priority, headers=headers, params=params)
+          
+          if response.status_code != 200:
+            logger.error(f"{error_label} (재시도 후): {response.text}")
+            raise CustomHTTPException(
+              status_code=400,
+              detail=f"{error_label} (재시도 후): {response.text}",
+              error_code=error_code
+            )
+          logger.info(f"토큰 재발급 후 성공: user_id={user_id}, tr_id={tr_id}")
+        else:
+          logger.error(f"{error_label}: {response_text}")
+          raise CustomHTTPException(
+            status_code=400,
+            detail=f"{error_label}: {response_text}",
+            error_code=error_code
+          )
+      
+      return response.json()
+      
+    except httpx.RequestError:
+      raise CustomHTTPException(
+        status_code=500,
+        detail="KIS API 서버 연결 실패",
+        error_code="KIS_CONNECTION_ERROR"
+      )
+
+  def _quote_key(
+    self, symbol: str, market_type: str, date: Optional[str], exchange_code: Optional[str]
+  ) -> Tuple[str, str, Optional[str], Optional[str]]:
+    """시세 요청 합치기 키 (사용자와 무관)"""
+    market_type = market_type.upper()
+    excd = self._get_overseas_exchange_code(exchange_code) if market_type != "DOMESTIC" else None
+    return (symbol, market_type, date, excd)
+
   async def get_stock_price(
     self, 
     user_id: int,
     symbol: str, 
     market_type: str = "DOMESTIC",
-    date: Optional[str] = None
+    date: Optional[str] = None,
+    priority: str = KIS_PRIORITY_INTERACTIVE,
+    exchange_code: Optional[str] = None
   ) -> Dict:
-    """주식 현재가/과거가 조회"""
-    # 토큰 확보 (필요시 자동 발급)
-    access_token = await self.ensure_valid_token(user_id)
-      
+    """
+    주식 현재가/과거가 조회
+    
+    - 실시간 시세 구독 중인 종목은 WebSocket 최신 체결가를 우선 사용
+    - 장중에는 짧은 TTL, 장 마감 후에는 다음 개장까지, 과거 날짜는 영구 캐시
+    - 같은 (종목, 시장, 날짜)에 대한 동시 요청은 사용자와 관계없이 하나의 KIS 호출로 합쳐진다.
+    """
+    if date is None:
+      tick = realtime_quote_service.get_latest_tick(symbol, market_type)
+      if tick is not None:
+        return tick
+    
+    key = self._quote_key(symbol, market_type, date, exchange_code)
+    cached = self._get_cached_quote(key)
+    if cached is not None:
+      return cached
+    
+    price_data = await self._quote_flight.do(
+      key,
+      lambda: self._fetch_and_cache_stock_price(key, user_id, symbol, market_type, date, priority, exchange_code)
+    )
+    # 호출자 간 공유 객체이므로 복사본 반환
+    return dict(price_data)
+
+  async def _fetch_and_cache_stock_price(
+    self,
+    key: Tuple,
+    user_id: int,
+    symbol: str,
+    market_type: str,
+    date: Optional[str],
+    priority: str,
+    exchange_code: Optional[str]
+  ) -> Dict:
+    """KIS 조회 후 시세 캐시에 저장"""
+    price_data = await self._fetch_stock_price(user_id, symbol, market_type, date, priority, exchange_code)
+    self._store_quote(key, price_data, market_type, date, exchange_code)
+    return price_data
+
+  # =========================
+  # 💾 시세 캐시 (장 시간 기반 TTL)
+  # =========================
+
+  def _quote_ttl(self, market_type: str, date: Optional[str], exchange_code: Optional[str]) -> Optional[float]:
+    """시세 캐시 TTL(초) 계산 (None이면 만료 없음)"""
+    exchange = market_hours_service.resolve_exchange(market_type, exchange_code)
+    
+    # 이미 지난 날짜의 시세는 바뀌지 않음
+    if date and date < market_hours_service.local_today(exchange):
+      return None
+    
+    if market_hours_service.is_open(exchange):
+      return get_settings().kis_quote_ttl_open_seconds
+    return market_hours_service.seconds_until_open(exchange)
+
+  def _get_cached_quote(self, key: Tuple) -> Optional[Dict]:
+    """캐시된 시세 조회 (만료 시 None)"""
+    entry = self._quote_cache.get(key)
+    if entry is not None:
+      price_data, expires_at = entry
+      if expires_at is None or expires_at > time.monotonic():
+        self._quote_cache_hits += 1
+        return dict(price_data)
+      del self._quote_cache[key]
+    
+    self._quote_cache_misses += 1
+    return None
+
+  def _store_quote(
+    self, key: Tuple, price_data: Dict, market_type: str, date: Optional[str], exchange_code: Optional[str]
+  ) -> None:
+    """시세 캐시 저장 (최대 개수 초과 시 오래된 항목부터 제거)"""
+    ttl = self._quote_ttl(market_type, date, exchange_code)
+    if ttl is not None and ttl <= 0:
+      return
+    
+    self._quote_cache.pop(key, None)
+    self._quote_cache[key] = (price_data, time.monotonic() + ttl if ttl is not None else None)
+    
+    max_entries = get_settings().kis_quote_cache_max_entries
+    while len(self._quote_cache) > max_entries:
+      self._quote_cache.pop(next(iter(self._quote_cache)))
+
+  def clear_quote_cache(self) -> None:
+    """시세 캐시 초기화"""
+    self._quote_cache.clear()
+
+  async def _fetch_stock_price(
+    self, 
+    user_id: int,
+    symbol: str, 
+    market_type: str = "DOMESTIC",
+    date: Optional[str] = None,
+    priority: str = KIS_PRIORITY_INTERACTIVE,
+    exchange_code: Optional[str] = None
+  ) -> Dict:
+    """주식 현재가/과거가 KIS 호출 (요청 합치기 없이 직접 조회)"""
     settings = get_settings()
     base_url = settings.kis_base_url
     
-    # API 호출 로직 (기존과 동일)
     if market_type.upper() == "DOMESTIC":
       if date:
         url = f"{base_url}/uapi/domestic-stock/v1/quotations/inquire-daily-price"
@@ -205,21 +569,14 @@ class KISAPIService:
           "fid_input_iscd": symbol
         }
       
-      headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "authorization": f"Bearer {access_token}",
-        "appkey": settings.kis_app_key,
-        "appsecret": settings.kis_app_secret,
-        "tr_id": tr_id
-      }
-      
     else:  # OVERSEAS
+      excd = self._get_overseas_exchange_code(exchange_code)
       if date:
         url = f"{base_url}/uapi/overseas-price/v1/quotations/dailyprice"
         tr_id = "HHDFS76240000"
         params = {
           "auth": "",
-          "excd": "NAS",
+          "excd": excd,
           "symb": symbol,
           "gubn": "0",
           "bymd": date,
@@ -230,72 +587,21 @@ class KISAPIService:
         tr_id = "HHDFS00000300"
         params = {
           "auth": "",
-          "excd": "NAS",
+          "excd": excd,
           "symb": symbol
         }
-      
-      headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "authorization": f"Bearer {access_token}",
-        "appkey": settings.kis_app_key,
-        "appsecret": settings.kis_app_secret,
-        "tr_id": tr_id
-      }
     
     try:
-      async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        
-        if response.status_code != 200:
-          response_text = response.text
-          
-          # 토큰 만료 에러인 경우 재시도
-          if "기간이 만료된 token" in response_text or "EGW00123" in response_text:
-            logger.warning(f"토큰 만료 감지, 새 토큰으로 재시도: user_id={user_id}, symbol={symbol}")
-            
-            # DB에서 기존 토큰 삭제
-            await self._delete_expired_tokens(user_id)
-            
-            # 새 토큰 발급
-            access_token = await self.ensure_valid_token(user_id)
-            
-            # 헤더 업데이트
-            headers["authorization"] = f"Bearer {access_token}"
-            
-            # 재시도
-            response = await client.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-              logger.error(f"KIS API 재시도 실패: {response.text}")
-              raise CustomHTTPException(
-                status_code=400,
-                detail=f"KIS API 주가 조회 실패 (재시도 후): {response.text}",
-                error_code="KIS_PRICE_ERROR"
-              )
-            else:
-              logger.info(f"토큰 재발급 후 성공: user_id={user_id}, symbol={symbol}")
-          else:
-            logger.error(f"KIS API 주가 조회 실패: {response_text}")
-            raise CustomHTTPException(
-              status_code=400,
-              detail=f"KIS API 주가 조회 실패: {response_text}",
-              error_code="KIS_PRICE_ERROR"
-            )
-        
-        result = response.json()
-        
-        # 응답 데이터 파싱 (기존 메서드 재사용)
-        if market_type.upper() == "DOMESTIC":
-          return self._parse_domestic_price(result, symbol, date is not None)
-        else:
-          return self._parse_overseas_price(result, symbol, date is not None)
-        
-    except httpx.RequestError:
-      raise CustomHTTPException(
-        status_code=500,
-        detail="KIS API 서버 연결 실패",
-        error_code="KIS_CONNECTION_ERROR"
-      )
+      result = await self._kis_get(user_id, url, tr_id, params, priority)
+      
+      # 응답 데이터 파싱 (기존 메서드 재사용)
+      if market_type.upper() == "DOMESTIC":
+        return self._parse_domestic_price(result, symbol, date is not None)
+      else:
+        return self._parse_overseas_price(result, symbol, date is not None, excd)
+      
+    except CustomHTTPException:
+      raise
     except Exception as e:
       logger.error(f"주가 조회 중 오류: {str(e)}")
       raise CustomHTTPException(
@@ -303,6 +609,12 @@ class KISAPIService:
         detail="주가 조회 중 내부 오류 발생",
         error_code="INTERNAL_ERROR"
       )
+
+  def _get_overseas_exchange_code(self, exchange_code: Optional[str]) -> str:
+    """DB 거래소 코드(NASDAQ, NYSE...)를 KIS 해외 거래소 코드(NAS, NYS...)로 변환"""
+    if not exchange_code:
+      return "NAS"
+    return KIS_OVERSEAS_EXCHANGE_CODE_MAP.get(exchange_code.upper(), exchange_code.upper())
   
   # 기존 파싱 메서드들은 그대로 유지
   def _parse_domestic_price(self, response_data: Dict, symbol: str, is_historical: bool = False) -> Dict:
@@ -349,8 +661,11 @@ class KISAPIService:
         "updated_at": datetime.now().isoformat()
       }
   
-  def _parse_overseas_price(self, response_data: Dict, symbol: str, is_historical: bool = False) -> Dict:
-    """해외주식 응답 데이터 파싱"""
+  def _parse_overseas_price(
+    self, response_data: Dict, symbol: str, is_historical: bool = False, excd: Optional[str] = None
+  ) -> Dict:
+    """해외주식 응답 데이터 파싱 (통화는 KIS 거래소 코드로 판단)"""
+    currency = KIS_OVERSEAS_EXCHANGE_CURRENCY.get(excd or "NAS", "USD")
     
     # 안전한 변환 헬퍼 함수들
     def safe_float(value, default=0.0):
@@ -384,7 +699,7 @@ class KISAPIService:
           "high_price": safe_float(data.get("high"), 0),
           "low_price": safe_float(data.get("low"), 0),
           "open_price": safe_float(data.get("open"), 0),
-          "currency": "USD",
+          "currency": currency,
           "updated_at": datetime.now().isoformat(),
           "query_date": data.get("xymd")
         }
@@ -407,7 +722,7 @@ class KISAPIService:
         "high_price": safe_float(output.get("high"), 0),
         "low_price": safe_float(output.get("low"), 0),
         "open_price": safe_float(output.get("open"), 0),
-        "currency": "USD",
+        "currency": currency,
         "updated_at": datetime.now().isoformat()
       }
     
@@ -417,12 +732,92 @@ class KISAPIService:
     symbol: str,
     start_date: str,  # YYYYMMDD
     end_date: str,    # YYYYMMDD  
-    market_type: str = "DOMESTIC"
+    market_type: str = "DOMESTIC",
+    priority: str = KIS_PRIORITY_BATCH,
+    exchange_code: Optional[str] = None
   ) -> Dict:
-    """일봉 차트 데이터 조회 (기간별)"""
-    # 토큰 확보
-    access_token = await self.ensure_valid_token(user_id)
+    """일봉 차트 데이터 조회 (기간별, 동일 종목/기간 동시 요청은 하나로 합침)"""
+    key = (symbol, market_type.upper(), start_date, end_date,
+           self._get_overseas_exchange_code(exchange_code) if market_type.upper() != "DOMESTIC" else None)
+    chart = await self._chart_flight.do(
+      key,
+      lambda: self._fetch_daily_chart_data(
+        user_id, symbol, start_date, end_date, market_type, priority, exchange_code
+      )
+    )
+    return {**chart, "chart_data": list(chart["chart_data"])}
+
+  async def _fetch_daily_chart_data(
+    self,
+    user_id: int,
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    market_type: str = "DOMESTIC",
+    priority: str = KIS_PRIORITY_BATCH,
+    exchange_code: Optional[str] = None
+  ) -> Dict:
+    """일봉 차트 데이터 KIS 호출 (요청 합치기 없이 직접 조회, 기간 전체를 페이지 단위로 수집)"""
+    bars_by_date: Dict[str, Dict] = {}
+    async for page in self.iter_daily_chart_pages(
+      user_id, symbol, start_date, end_date, market_type, priority, exchange_code
+    ):
+      for bar in page:
+        bars_by_date[bar["date"]] = bar
+    
+    chart_data = [bars_by_date[d] for d in sorted(bars_by_date)]
+    return self._build_chart_result(symbol, market_type, chart_data)
+
+  async def iter_daily_chart_pages(
+    self,
+    user_id: int,
+    symbol: str,
+    start_date: str,  # YYYYMMDD
+    end_date: str,    # YYYYMMDD
+    market_type: str = "DOMESTIC",
+    priority: str = KIS_PRIORITY_BATCH,
+    exchange_code: Optional[str] = None
+  ) -> AsyncIterator[List[Dict]]:
+    """
+    일봉 차트 데이터를 페이지 단위로 조회 (최근 구간부터 과거로)
+    
+    KIS 일봉 API는 1회 최대 약 100봉만 반환하므로, 요청 기간을 다 채울 때까지
+    가장 오래된 봉의 전날을 다음 조회 기준일로 삼아 거슬러 올라간다.
+    각 페이지는 [start_date, end_date] 범위로 잘린 날짜 오름차순 봉 목록이다.
+    """
+    max_pages = get_settings().kis_chart_max_pages
+    page_end = end_date
+    
+    for page_no in range(max_pages):
+      response = await self._request_chart_page(
+        user_id, symbol, start_date, page_end, market_type, priority, exchange_code
+      )
+      bars = self._parse_chart_bars(response, market_type)
+      if not bars:
+        return
+      
+      in_range = [bar for bar in bars if start_date <= bar["date"] <= end_date]
+      if in_range:
+        yield in_range
+      
+      oldest = bars[0]["date"]
+      if oldest <= start_date or oldest >= page_end:
+        return
+      page_end = (datetime.strptime(oldest, "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
     
+    logger.warning(f"{symbol}: 차트 페이지 조회 한도 도달 ({max_pages}페이지), {start_date}~{page_end} 구간 누락")
+
+  async def _request_chart_page(
+    self,
+    user_id: int,
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    market_type: str,
+    priority: str,
+    exchange_code: Optional[str]
+  ) -> Dict:
+    """일봉 차트 1페이지 KIS 호출 (end_date부터 과거로 최대 약 100봉)"""
     settings = get_settings()
     base_url = settings.kis_base_url
     
@@ -437,74 +832,34 @@ class KISAPIService:
         "fid_period_div_code": "D",  # 일봉
         "fid_org_adj_prc": "0"       # 수정주가 적용안함
       }
-    else:  # OVERSEAS
+    else:  # OVERSEAS (시작일 파라미터가 없어 기준일(bymd)부터 과거로 조회)
       url = f"{base_url}/uapi/overseas-price/v1/quotations/dailyprice"
       tr_id = "HHDFS76240000"
       params = {
         "auth": "",
-        "excd": "NAS",  # 나스닥 (추후 동적으로 변경 가능)
+        "excd": self._get_overseas_exchange_code(exchange_code),
         "symb": symbol,
         "gubn": "0",
         "bymd": end_date,
         "modp": "1"
       }
     
-    headers = {
-      "Content-Type": "application/json; charset=utf-8", 
-      "authorization": f"Bearer {access_token}",
-      "appkey": settings.kis_app_key,
-      "appsecret": settings.kis_app_secret,
-      "tr_id": tr_id
-    }
-    
-    try:
-      async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        
-        if response.status_code != 200:
-          response_text = response.text
-          
-          # 토큰 만료 처리
-          if "기간이 만료된 token" in response_text or "EGW00123" in response_text:
-            logger.warning(f"토큰 만료 감지, 새 토큰으로 재시도: user_id={user_id}, symbol={symbol}")
-            
-            await self._delete_expired_tokens(user_id)
-            access_token = await self.ensure_valid_token(user_id)
-            headers["authorization"] = f"Bearer {access_token}"
-            
-            response = await client.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-              raise CustomHTTPException(
-                status_code=400,
-                detail=f"KIS API 차트 데이터 조회 실패 (재시도 후): {response.text}",
-                error_code="KIS_CHART_ERROR"
-              )
-          else:
-            raise CustomHTTPException(
-              status_code=400,
-              detail=f"KIS API 차트 데이터 조회 실패: {response_text}",
-              error_code="KIS_CHART_ERROR"
-            )
-        
-        result = response.json()
-        return self._parse_chart_data(result, symbol, market_type)
-        
-    except httpx.RequestError:
-      raise CustomHTTPException(
-        status_code=500,
-        detail="KIS API 서버 연결 실패",
-        error_code="KIS_CONNECTION_ERROR"
-      )
+    return await self._kis_get(
+      user_id, url, tr_id, params, priority,
+      error_code="KIS_CHART_ERROR",
+      error_label="KIS API 차트 데이터 조회 실패"
+    )
 
-  def _parse_chart_data(self, response_data: Dict, symbol: str, market_type: str) -> Dict:
-    """차트 데이터 파싱"""
+  def _parse_chart_bars(self, response_data: Dict, market_type: str) -> List[Dict]:
+    """차트 응답을 날짜 오름차순 봉 목록으로 변환 (날짜 없는 빈 행 제외)"""
     output_list = response_data.get("output2", []) if market_type == "DOMESTIC" else response_data.get("output", [])
     
     chart_data = []
     
-    for item in output_list:
+    for item in output_list or []:
       if market_type == "DOMESTIC":
+        if not item.get("stck_bsop_date"):
+          continue
         chart_data.append({
           "date": item.get("stck_bsop_date", ""),
           "open_price": float(item.get("stck_oprc", 0)),
@@ -515,6 +870,8 @@ class KISAPIService:
           "change_rate": float(item.get("prdy_ctrt", 0))
         })
       else:  # OVERSEAS
+        if not item.get("xymd"):
+          continue
         chart_data.append({
           "date": item.get("xymd", ""),
           "open_price": float(item.get("open", 0)),
@@ -527,38 +884,282 @@ class KISAPIService:
     
     # 날짜순 정렬 (오름차순)
     chart_data.sort(key=lambda x: x["date"])
-    
+    return chart_data
+
+  def _build_chart_result(self, symbol: str, market_type: str, chart_data: List[Dict]) -> Dict:
+    """차트 조회 결과 형식 구성"""
     return {
       "symbol": symbol,
       "market_type": market_type,
       "period": f"{chart_data[0]['date']} ~ {chart_data[-1]['date']}" if chart_data else "",
       "data_count": len(chart_data),
       "chart_data": chart_data
-    }  
+    }
   
-  async def get_multiple_stock_prices(self, user_id: int, stocks: list) -> Dict[str, Dict]:
-    """여러 주식의 현재가 일괄 조회"""
-    results = {}
+  async def get_multiple_stock_prices(
+    self,
+    user_id: int,
+    stocks: list,
+    priority: str = KIS_PRIORITY_INTERACTIVE
+  ) -> Dict[Tuple[str, str], Dict]:
+    """
+    여러 주식의 현재가 일괄 조회
+    
+    - 국내 현재가: 멀티종목 시세 API로 최대 30종목씩 묶어서 조회
+    - 해외 현재가: 거래소별로 묶어 해당 거래소 코드로 동시 조회
+    - 과거가(date 지정): 종목별 개별 조회
+    
+    Args:
+      stocks: [{"symbol", "market_type", "date"(선택), "exchange_code"(선택)}]
+    
+    Returns:
+      (symbol, market_type) → 시세 (국내/해외에 같은 종목코드가 있어도 섞이지 않음)
+    """
+    results: Dict[Tuple[str, str], Dict] = {}
+    
+    domestic_symbols: List[str] = []
+    domestic_exchanges: Dict[str, Optional[str]] = {}
+    overseas_by_exchange: Dict[str, List[str]] = {}
+    single_requests: List[Dict] = []
     
     for stock_info in stocks:
       symbol = stock_info.get("symbol")
-      market_type = stock_info.get("market_type", "DOMESTIC")
-      date = stock_info.get("date")
+      market_type = (stock_info.get("market_type") or "DOMESTIC").upper()
       
-      try:
-        price_data = await self.get_stock_price(user_id, symbol, market_type, date)
-        results[symbol] = price_data
-      except Exception as e:
-        logger.error(f"주식 {symbol} 가격 조회 실패: {str(e)}")
-        results[symbol] = {
-          "symbol": symbol,
-          "market_type": market_type,
-          "current_price": 0,
-          "previous_close": 0,
-          "error": str(e)
-        }
+      if stock_info.get("date"):
+        single_requests.append(stock_info)
+      elif market_type == "DOMESTIC":
+        if symbol not in domestic_symbols:
+          domestic_symbols.append(symbol)
+          domestic_exchanges[symbol] = stock_info.get("exchange_code")
+      else:
+        excd = self._get_overseas_exchange_code(stock_info.get("exchange_code"))
+        group = overseas_by_exchange.setdefault(excd, [])
+        if symbol not in group:
+          group.append(symbol)
+    
+    # 조회 Task와 각 결과의 market_type (결과 키에 사용)
+    tasks = []
+    task_markets: List[str] = []
+    
+    # 1. 국내: 다른 요청이 조회 중인 종목은 합류, 나머지는 30종목 단위 멀티 시세 조회
+    #    (await 없이 종목별 합치기 키를 먼저 점유해 동시 요청 간 중복 배치를 막음)
+    domestic_flights: Dict[str, asyncio.Future] = {}
+    to_fetch: List[str] = []
+    for symbol in domestic_symbols:
+      cached = (
+        realtime_quote_service.get_latest_tick(symbol, "DOMESTIC")
+        or self._get_cached_quote(self._quote_key(symbol, "DOMESTIC", None, None))
+      )
+      if cached is not None:
+        results[(symbol, "DOMESTIC")] = cached
+        continue
+      flight = self._quote_flight.join(self._quote_key(symbol, "DOMESTIC", None, None))
+      if flight is not None:
+        domestic_flights[symbol] = flight
+      else:
+        to_fetch.append(symbol)
+    
+    for i in range(0, len(to_fetch), KIS_MULTI_PRICE_MAX_SYMBOLS):
+      chunk = to_fetch[i:i + KIS_MULTI_PRICE_MAX_SYMBOLS]
+      batch = asyncio.ensure_future(self._get_domestic_multi_price_safe(user_id, chunk, priority))
+      for symbol in chunk:
+        domestic_flights[symbol] = self._quote_flight.start(
+          self._quote_key(symbol, "DOMESTIC", None, None),
+          lambda symbol=symbol, batch=batch: self._pick_from_batch(batch, symbol, domestic_exchanges.get(symbol))
+        )
+    
+    if domestic_flights:
+      tasks.append(self._collect_domestic_flights(domestic_flights))
+      task_markets.append("DOMESTIC")
+    
+    # 2. 해외: 거래소별 조회
+    for excd, symbols in overseas_by_exchange.items():
+      tasks.append(self._get_overseas_prices_by_exchange(user_id, excd, symbols, priority))
+      task_markets.append("OVERSEAS")
     
+    # 3. 과거가: 개별 조회
+    for stock_info in single_requests:
+      tasks.append(self._get_single_price_safe(user_id, stock_info, priority))
+      task_markets.append((stock_info.get("market_type") or "DOMESTIC").upper())
+    
+    for partial, market_type in zip(await asyncio.gather(*tasks), task_markets):
+      results.update(((symbol, market_type), price_data) for symbol, price_data in partial.items())
+    
+    logger.info(f"일괄 시세 조회 완료: 요청={len(stocks)}개, 국내={len(domestic_symbols)}개, "
+                f"해외={sum(len(v) for v in overseas_by_exchange.values())}개, 과거가={len(single_requests)}개")
     return results
 
+  async def get_domestic_multi_price(
+    self,
+    user_id: int,
+    symbols: List[str],
+    priority: str = KIS_PRIORITY_INTERACTIVE
+  ) -> Dict[str, Dict]:
+    """국내주식 멀티종목 현재가 조회 (1회 호출당 최대 30종목)"""
+    if len(symbols) > KIS_MULTI_PRICE_MAX_SYMBOLS:
+      raise ValueError(f"멀티종목 시세 조회는 최대 {KIS_MULTI_PRICE_MAX_SYMBOLS}종목까지 가능합니다: {len(symbols)}")
+    
+    settings = get_settings()
+    url = f"{settings.kis_base_url}/uapi/domestic-stock/v1/quotations/intstock-multprice"
+    tr_id = "FHKST11300006"
+    
+    params = {}
+    for i, symbol in enumerate(symbols, 1):
+      params[f"FID_COND_MRKT_DIV_CODE_{i}"] = "J"
+      params[f"FID_INPUT_ISCD_{i}"] = symbol
+    
+    result = await self._kis_get(user_id, url, tr_id, params, priority)
+    return self._parse_domestic_multi_price(result, symbols)
+
+  def _parse_domestic_multi_price(self, response_data: Dict, symbols: List[str]) -> Dict[str, Dict]:
+    """멀티종목 시세 응답 파싱 (_parse_domestic_price와 동일한 형태)"""
+    def safe_float(value, default=0.0):
+      try:
+        return float(value) if value not in (None, "", "-") else default
+      except (ValueError, TypeError):
+        return default
+    
+    parsed = {}
+    updated_at = datetime.now().isoformat()
+    
+    for item in response_data.get("output", []) or []:
+      symbol = item.get("inter_shrn_iscd", "").strip()
+      if not symbol:
+        continue
+      
+      current_price = safe_float(item.get("inter2_prpr"))
+      day_change = safe_float(item.get("inter2_prdy_vrss"))
+      previous_close = safe_float(item.get("inter2_prdy_clpr")) or (current_price - day_change)
+      
+      parsed[symbol] = {
+        "symbol": symbol,
+        "market_type": "DOMESTIC",
+        "current_price": current_price,
+        "previous_close": previous_close,
+        "daily_return_rate": safe_float(item.get("prdy_ctrt")),
+        "day_change": day_change,
+        "volume": int(safe_float(item.get("acml_vol"))),
+        "high_price": safe_float(item.get("inter2_hgpr")),
+        "low_price": safe_float(item.get("inter2_lwpr")),
+        "open_price": safe_float(item.get("inter2_oprc")),
+        "currency": "KRW",
+        "updated_at": updated_at
+      }
+    
+    missing = [symbol for symbol in symbols if symbol not in parsed]
+    if missing:
+      logger.warning(f"멀티종목 시세 응답에 누락된 종목: {missing}")
+    
+    return parsed
+
+  async def _pick_from_batch(self, batch: asyncio.Future, symbol: str, exchange_code: Optional[str]) -> Dict:
+    """멀티종목 조회 결과에서 한 종목 시세 추출 후 캐시 저장 (실패 시 예외)"""
+    price_data = (await asyncio.shield(batch)).get(symbol)
+    if not price_data or price_data.get("error"):
+      raise CustomHTTPException(
+        status_code=400,
+        detail=f"KIS API 주가 조회 실패: {price_data.get('error') if price_data else symbol}",
+        error_code="KIS_PRICE_ERROR"
+      )
+    self._store_quote(self._quote_key(symbol, "DOMESTIC", None, None), price_data, "DOMESTIC", None, exchange_code)
+    return price_data
+
+  async def _collect_domestic_flights(self, flights: Dict[str, asyncio.Future]) -> Dict[str, Dict]:
+    """종목별 합치기 Task 결과 수집 (실패 종목은 에러 정보로 반환)"""
+    symbols = list(flights.keys())
+    results = await asyncio.gather(
+      *[asyncio.shield(flights[symbol]) for symbol in symbols],
+      return_exceptions=True
+    )
+    
+    prices = {}
+    for symbol, result in zip(symbols, results):
+      if isinstance(result, BaseException):
+        logger.error(f"주식 {symbol} 가격 조회 실패: {str(result)}")
+        prices[symbol] = self._price_error(symbol, "DOMESTIC", result)
+      else:
+        prices[symbol] = dict(result)
+    return prices
+
+  async def _get_domestic_multi_price_safe(
+    self,
+    user_id: int,
+    symbols: List[str],
+    priority: str
+  ) -> Dict[str, Dict]:
+    """멀티종목 조회 (실패/누락 종목은 개별 조회로 보완)"""
+    try:
+      prices = await self.get_domestic_multi_price(user_id, symbols, priority)
+    except Exception as e:
+      logger.warning(f"멀티종목 시세 조회 실패, 개별 조회로 전환: {str(e)}")
+      prices = {}
+    
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    if missing:
+      # 이 종목들의 합치기 키는 현재 배치가 점유 중이므로 합치기 없이 직접 조회
+      fallbacks = await asyncio.gather(*[
+        self._get_single_price_safe(
+          user_id, {"symbol": symbol, "market_type": "DOMESTIC"}, priority, coalesce=False
+        )
+        for symbol in missing
+      ])
+      for partial in fallbacks:
+        prices.update(partial)
+    
+    return prices
+
+  async def _get_overseas_prices_by_exchange(
+    self,
+    user_id: int,
+    excd: str,
+    symbols: List[str],
+    priority: str
+  ) -> Dict[str, Dict]:
+    """해외주식 거래소 단위 현재가 조회 (KIS 해외 현재가 API는 종목 단위)"""
+    results = await asyncio.gather(*[
+      self._get_single_price_safe(
+        user_id, {"symbol": symbol, "market_type": "OVERSEAS", "exchange_code": excd}, priority
+      )
+      for symbol in symbols
+    ])
+    
+    prices = {}
+    for partial in results:
+      prices.update(partial)
+    return prices
+
+  async def _get_single_price_safe(
+    self,
+    user_id: int,
+    stock_info: Dict,
+    priority: str,
+    coalesce: bool = True
+  ) -> Dict[str, Dict]:
+    """개별 시세 조회 (실패 시 에러 정보를 담은 결과 반환)"""
+    symbol = stock_info.get("symbol")
+    market_type = stock_info.get("market_type", "DOMESTIC")
+    fetch = self.get_stock_price if coalesce else self._fetch_stock_price
+    
+    try:
+      price_data = await fetch(
+        user_id, symbol, market_type, stock_info.get("date"), priority,
+        exchange_code=stock_info.get("exchange_code")
+      )
+      return {symbol: price_data}
+    except Exception as e:
+      logger.error(f"주식 {symbol} 가격 조회 실패: {str(e)}")
+      return {symbol: self._price_error(symbol, market_type, e)}
+
+  def _price_error(self, symbol: str, market_type: str, error: BaseException) -> Dict:
+    """시세 조회 실패 결과"""
+    return {
+      "symbol": symbol,
+      "market_type": market_type,
+      "current_price": 0,
+      "previous_close": 0,
+      "error": str(error)
+    }
+
 # 싱글톤 인스턴스
 kis_api_service = KISAPIService()
\ No newline at end of file
@@ -0,0 +1,518 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from websockets.asyncio.client import connect
+
+from app.config.settings import get_settings
+from app.config.database import get_async_session
+from app.core.constants import KIS_OVERSEAS_EXCHANGE_CODE_MAP, KIS_OVERSEAS_EXCHANGE_CURRENCY
+
+logger = logging.getLogger(__name__)
+
+# 실시간 체결가 TR ID
+KIS_WS_TR_DOMESTIC = "H0STCNT0"   # 국내주식 실시간체결가
+KIS_WS_TR_OVERSEAS = "HDFSCNT0"   # 해외주식 실시간체결가 (지연/실시간)
+
+# 등록/해제 구분
+KIS_WS_SUBSCRIBE = "1"
+KIS_WS_UNSUBSCRIBE = "2"
+
+# 전일 대비 부호 (4: 하한, 5: 하락)
+KIS_WS_NEGATIVE_SIGNS = ("4", "5")
+
+# 실시간 구독 키: (tr_id, tr_key)
+Subscription = Tuple[str, str]
+
+# 파일에 쓰기 전 대기할 수 있는 최대 프레임 수 (넘으면 기록 생략)
+KIS_WS_RECORD_MAX_PENDING = 10000
+
+
+class TickListener:
+  """체결가가 바뀐 종목 알림 수신자 (종목 키를 모아 두었다가 한 번에 전달)"""
+
+  def __init__(self):
+    self._changed: Set[Tuple[str, str]] = set()
+    self._event = asyncio.Event()
+
+  def notify(self, key: Tuple[str, str]) -> None:
+    self._changed.add(key)
+    self._event.set()
+
+  async def wait(self, timeout: Optional[float] = None) -> Set[Tuple[str, str]]:
+    """마지막 호출 이후 체결가가 바뀐 (symbol, market_type) 목록 (timeout 시 빈 집합)"""
+    try:
+      await asyncio.wait_for(self._event.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+      pass
+    self._event.clear()
+    changed, self._changed = self._changed, set()
+    return changed
+
+
+class FrameRecorder:
+  """
+  수신 프레임 파일 기록 (재생 서버 입력용)
+
+  파일은 시작 시 한 번 열고, 수신 루프는 큐에 넣기만 한다.
+  백그라운드 작업이 쌓인 프레임을 모아 스레드에서 한 번에 써서 이벤트 루프를 막지 않는다.
+  """
+
+  def __init__(self, path: str):
+    self.path = path
+    self.dropped = 0
+    self._queue: asyncio.Queue = asyncio.Queue(maxsize=KIS_WS_RECORD_MAX_PENDING)
+    self._file = None
+    self._task: Optional[asyncio.Task] = None
+
+  async def start(self) -> None:
+    self._file = await asyncio.to_thread(open, self.path, "a", encoding="utf-8")
+    self._task = asyncio.create_task(self._run())
+
+  def record(self, message: str) -> None:
+    """프레임 기록 요청 (대기 프레임이 가득 차면 버림)"""
+    try:
+      self._queue.put_nowait(message)
+    except asyncio.QueueFull:
+      self.dropped += 1
+
+  async def stop(self) -> None:
+    """남은 프레임을 모두 쓴 뒤 파일 닫기"""
+    if self._task is not None:
+      await self._queue.put(None)
+      await self._task
+      self._task = None
+    if self._file is not None:
+      await asyncio.to_thread(self._file.close)
+      self._file = None
+    if self.dropped:
+      logger.warning(f"실시간 프레임 기록 생략: {self.dropped}건 (대기 프레임 초과)")
+
+  async def _run(self) -> None:
+    done = False
+    while not done:
+      lines = [await self._queue.get()]
+      while not self._queue.empty():
+        lines.append(self._queue.get_nowait())
+      if None in lines:
+        done = True
+        lines = [line for line in lines if line is not None]
+      if lines:
+        await asyncio.to_thread(self._write, lines)
+
+  def _write(self, lines: List[str]) -> None:
+    try:
+      self._file.write("".join(line + "\n" for line in lines))
+      self._file.flush()
+    except Exception as e:
+      logger.warning(f"실시간 프레임 기록 실패: {self.path}, error={str(e)}")
+
+
+class KISRealtimeQuoteService:
+  """
+  KIS 실시간 시세 WebSocket 수신 서비스
+
+  - 보유 종목 전체(모든 사용자 합산)를 구독하고, 종목별 최신 체결가를 메모리에 유지한다.
+  - KISAPIService.get_stock_price는 REST 호출 전에 최신 체결가를 먼저 조회한다.
+  - 보유 종목 변경 시 request_resync()로 구독 목록을 다시 맞춘다.
+  - KIS_WS_URL / KIS_WS_APPROVAL_KEY로 로컬 재생 서버(kis_ws_replay.py)에 연결할 수 있다.
+  """
+
+  def __init__(self):
+    # (symbol, market_type) → 시세 데이터 (get_stock_price 응답 형식)
+    self._ticks: Dict[Tuple[str, str], Dict] = {}
+    self._tick_received_at: Dict[Tuple[str, str], float] = {}
+
+    # (tr_id, tr_key) → (symbol, market_type)
+    self._desired: Dict[Subscription, Tuple[str, str]] = {}
+    self._subscribed: Dict[Subscription, Tuple[str, str]] = {}
+
+    self._ws = None
+    self._approval_key: Optional[str] = None
+    self._runner: Optional[asyncio.Task] = None
+    self._resync_event = asyncio.Event()
+    self._sync_lock = asyncio.Lock()
+
+    self._listeners: Set[TickListener] = set()
+    self._recorder: Optional[FrameRecorder] = None
+
+    self._frames_received = 0
+    self._ticks_received = 0
+    self._connected_at: Optional[datetime] = None
+
+  # =========================
+  # 🔌 수명 관리
+  # =========================
+
+  async def start(self) -> None:
+    """수신 루프 시작 (KIS_WS_ENABLED일 때만, 앱 시작 시 lifespan에서 호출)"""
+    if not get_settings().kis_ws_enabled:
+      logger.info("KIS 실시간 시세 비활성화 (KIS_WS_ENABLED=false)")
+      return
+    if self._runner is None or self._runner.done():
+      self._runner = asyncio.create_task(self._run())
+
+  async def stop(self) -> None:
+    """수신 루프 종료"""
+    if self._runner is not None:
+      if self._ws is not None:
+        await self._ws.close()
+      self._runner.cancel()
+      try:
+        await self._runner
+      except asyncio.CancelledError:
+        pass
+      self._runner = None
+    self._reset_connection_state()
+
+  def request_resync(self) -> None:
+    """보유 종목 변경 알림 (구독 목록을 곧바로 다시 맞춤)"""
+    self._resync_event.set()
+
+  # =========================
+  # 📈 최신 체결가 조회
+  # =========================
+
+  def get_latest_tick(self, symbol: str, market_type: str) -> Optional[Dict]:
+    """구독 중인 종목의 최신 체결가 (연결이 끊겼거나 오래된 체결이면 None)"""
+    if self._ws is None:
+      return None
+
+    key = (symbol, market_type.upper())
+    tick = self._ticks.get(key)
+    if tick is None:
+      return None
+
+    if time.monotonic() - self._tick_received_at[key] > get_settings().kis_ws_tick_max_age_seconds:
+      return None
+    return dict(tick)
+
+  def is_connected(self) -> bool:
+    return self._ws is not None
+
+  def add_listener(self) -> TickListener:
+    """체결가 변경 알림 등록 (포트폴리오 스트리밍용, 사용 후 remove_listener 필요)"""
+    listener = TickListener()
+    self._listeners.add(listener)
+    return listener
+
+  def remove_listener(self, listener: TickListener) -> None:
+    self._listeners.discard(listener)
+
+  def get_stats(self) -> Dict:
+    """실시간 시세 수신 현황"""
+    return {
+      "enabled": get_settings().kis_ws_enabled,
+      "connected": self._ws is not None,
+      "connected_at": self._connected_at.isoformat() if self._connected_at else None,
+      "desired_subscriptions": len(self._desired),
+      "active_subscriptions": len(self._subscribed),
+      "tick_symbols": len(self._ticks),
+      "listeners": len(self._listeners),
+      "frames_received": self._frames_received,
+      "ticks_received": self._ticks_received
+    }
+
+  # =========================
+  # 🔁 연결 / 구독 관리
+  # =========================
+
+  async def _run(self) -> None:
+    """연결 유지 루프 (끊기면 재접속)"""
+    settings = get_settings()
+    resync_task = asyncio.create_task(self._resync_loop())
+    await self._start_recorder(settings.kis_ws_record_path)
+
+    try:
+      while True:
+        try:
+          approval_key = await self._get_approval_key()
+          async with connect(settings.kis_ws_url, ping_interval=None) as ws:
+            self._ws = ws
+            self._connected_at = datetime.now()
+            logger.info(f"KIS 실시간 시세 연결: {settings.kis_ws_url}")
+
+            await self._sync_subscriptions(approval_key)
+            async for message in ws:
+              await self._handle_message(ws, message)
+
+        except asyncio.CancelledError:
+          raise
+        except Exception as e:
+          logger.warning(f"KIS 실시간 시세 연결 종료: {str(e)}")
+
+        self._reset_connection_state()
+        await asyncio.sleep(settings.kis_ws_reconnect_delay_seconds)
+
+    finally:
+      resync_task.cancel()
+      if self._recorder is not None:
+        await self._recorder.stop()
+        self._recorder = None
+
+  async def _start_recorder(self, record_path: Optional[str]) -> None:
+    """KIS_WS_RECORD_PATH가 있으면 프레임 기록 시작 (파일 열기 실패 시 기록 없이 진행)"""
+    if not record_path:
+      return
+    recorder = FrameRecorder(record_path)
+    try:
+      await recorder.start()
+    except Exception as e:
+      logger.warning(f"실시간 프레임 기록 파일 열기 실패: {record_path}, error={str(e)}")
+      return
+    self._recorder = recorder
+
+  def _reset_connection_state(self) -> None:
+    """연결 종료 시 구독/체결 상태 초기화 (오래된 체결가가 조회되지 않도록)"""
+    self._ws = None
+    self._connected_at = None
+    self._subscribed.clear()
+    self._ticks.clear()
+    self._tick_received_at.clear()
+
+  async def _get_approval_key(self) -> str:
+    """WebSocket 접속키 (설정값 우선, 없으면 KIS에서 발급 후 재사용)"""
+    configured = get_settings().kis_ws_approval_key
+    if configured:
+      return configured
+
+    if self._approval_key is None:
+      from app.external.kis_api import kis_api_service
+      self._approval_key = await kis_api_service.issue_websocket_approval_key()
+    return self._approval_key
+
+  async def _resync_loop(self) -> None:
+    """보유 종목을 주기적으로(또는 변경 알림 시) 다시 읽어 구독 목록 갱신"""
+    settings = get_settings()
+
+    while True:
+      try:
+        await self._load_held_symbols()
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        logger.error(f"실시간 구독 대상 조회 실패 (기존 목록 유지): {str(e)}")
+
+      try:
+        if self._ws is not None:
+          await self._sync_subscriptions(await self._get_approval_key())
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        logger.error(f"실시간 구독 목록 갱신 실패: {str(e)}")
+
+      try:
+        await asyncio.wait_for(self._resync_event.wait(), timeout=settings.kis_ws_resync_interval_seconds)
+      except asyncio.TimeoutError:
+        pass
+      self._resync_event.clear()
+
+  async def _load_held_symbols(self) -> None:
+    """DB의 보유 종목으로 구독 대상 갱신"""
+    from app.crud.holding_crud import holding_crud
+
+    async for db in get_async_session():
+      held = await holding_crud.get_held_symbols(db)
+      self.set_symbols(
+        (item["symbol"], item["market_type"], item["exchange_code"]) for item in held
+      )
+
+  def set_symbols(self, symbols: Iterable[Tuple[str, str, Optional[str]]]) -> None:
+    """구독 대상 종목 지정 (보유자가 많은 순으로 전달, 세션당 최대 구독 수까지)"""
+    max_subscriptions = get_settings().kis_ws_max_subscriptions
+    desired: Dict[Subscription, Tuple[str, str]] = {}
+
+    for symbol, market_type, exchange_code in symbols:
+      market_type = market_type.upper()
+      subscription = self._subscription_for(symbol, market_type, exchange_code)
+      if subscription in desired:
+        continue
+      if len(desired) >= max_subscriptions:
+        logger.warning(f"실시간 구독 한도 초과, 이후 종목은 REST 조회: 한도={max_subscriptions}")
+        break
+      desired[subscription] = (symbol, market_type)
+
+    self._desired = desired
+
+  def _subscription_for(self, symbol: str, market_type: str, exchange_code: Optional[str]) -> Subscription:
+    """종목의 실시간 구독 키 (해외는 D/R + 거래소 + 종목코드)"""
+    if market_type == "DOMESTIC":
+      return (KIS_WS_TR_DOMESTIC, symbol)
+
+    excd = KIS_OVERSEAS_EXCHANGE_CODE_MAP.get((exchange_code or "NASDAQ").upper(), exchange_code or "NAS")
+    prefix = "R" if get_settings().kis_ws_overseas_realtime else "D"
+    return (KIS_WS_TR_OVERSEAS, f"{prefix}{excd}{symbol}")
+
+  async def _sync_subscriptions(self, approval_key: str) -> None:
+    """현재 구독과 목표 구독의 차이만 등록/해제"""
+    async with self._sync_lock:
+      ws = self._ws
+      if ws is None:
+        return
+
+      desired = self._desired
+      to_remove = [subscription for subscription in self._subscribed if subscription not in desired]
+      to_add = [subscription for subscription in desired if subscription not in self._subscribed]
+
+      for subscription in to_remove:
+        await ws.send(self._subscription_message(approval_key, subscription, KIS_WS_UNSUBSCRIBE))
+        key = self._subscribed.pop(subscription)
+        self._ticks.pop(key, None)
+        self._tick_received_at.pop(key, None)
+
+      for subscription in to_add:
+        await ws.send(self._subscription_message(approval_key, subscription, KIS_WS_SUBSCRIBE))
+        self._subscribed[subscription] = desired[subscription]
+
+      if to_add or to_remove:
+        logger.info(f"실시간 구독 갱신: 등록={len(to_add)}, 해제={len(to_remove)}, 현재={len(self._subscribed)}")
+
+  def _subscription_message(self, approval_key: str, subscription: Subscription, tr_type: str) -> str:
+    tr_id, tr_key = subscription
+    return json.dumps({
+      "header": {
+        "approval_key": approval_key,
+        "custtype": "P",
+        "tr_type": tr_type,
+        "content-type": "utf-8"
+      },
+      "body": {
+        "input": {"tr_id": tr_id, "tr_key": tr_key}
+      }
+    })
+
+  # =========================
+  # 📨 메시지 처리
+  # =========================
+
+  async def _handle_message(self, ws, message) -> None:
+    """수신 메시지 처리 (JSON 제어 메시지 또는 '|' 구분 체결 데이터)"""
+    if isinstance(message, bytes):
+      message = message.decode("utf-8")
+
+    if message.startswith("{"):
+      await self._handle_control_message(ws, message)
+      return
+
+    self._frames_received += 1
+    self._record_frame(message)
+
+    # 암호화 여부|TR ID|데이터 건수|데이터
+    parts = message.split("|", 3)
+    if len(parts) != 4:
+      logger.debug(f"알 수 없는 실시간 메시지: {message[:80]}")
+      return
+
+    encrypted, tr_id, count, payload = parts
+    if encrypted != "0":
+      return
+
+    if tr_id == KIS_WS_TR_DOMESTIC:
+      parser = self._parse_domestic_tick
+    elif tr_id == KIS_WS_TR_OVERSEAS:
+      parser = self._parse_overseas_tick
+    else:
+      return
+
+    fields = payload.split("^")
+    record_count = max(int(count or 1), 1)
+    width = len(fields) // record_count
+
+    for i in range(record_count):
+      tick = parser(fields[i * width:(i + 1) * width])
+      if tick is None:
+        continue
+      key = (tick["symbol"], tick["market_type"])
+      previous = self._ticks.get(key)
+      self._ticks[key] = tick
+      self._tick_received_at[key] = time.monotonic()
+      self._ticks_received += 1
+
+      if previous is None or previous["current_price"] != tick["current_price"]:
+        for listener in self._listeners:
+          listener.notify(key)
+
+  async def _handle_control_message(self, ws, message: str) -> None:
+    """PINGPONG 응답 및 구독 결과 로깅"""
+    try:
+      data = json.loads(message)
+    except json.JSONDecodeError:
+      logger.debug(f"실시간 제어 메시지 파싱 실패: {message[:80]}")
+      return
+
+    header = data.get("header", {})
+    if header.get("tr_id") == "PINGPONG":
+      await ws.send(message)
+      return
+
+    body = data.get("body", {})
+    if body.get("rt_cd") not in (None, "0"):
+      logger.warning(f"실시간 구독 오류: tr_key={header.get('tr_key')}, msg={body.get('msg1')}")
+    else:
+      logger.debug(f"실시간 구독 응답: tr_key={header.get('tr_key')}, msg={body.get('msg1')}")
+
+  def _record_frame(self, message: str) -> None:
+    """수신 프레임 기록 (재생 서버 입력용, 파일 쓰기는 FrameRecorder 백그라운드 작업)"""
+    if self._recorder is not None:
+      self._recorder.record(message)
+
+  @staticmethod
+  def _signed(value: str, sign: str) -> float:
+    """전일 대비 부호 적용"""
+    number = abs(float(value or 0))
+    return -number if sign in KIS_WS_NEGATIVE_SIGNS else number
+
+  def _parse_domestic_tick(self, fields: List[str]) -> Optional[Dict]:
+    """H0STCNT0 체결 데이터 파싱"""
+    try:
+      current_price = float(fields[2])
+      day_change = self._signed(fields[4], fields[3])
+      return {
+        "symbol": fields[0],
+        "market_type": "DOMESTIC",
+        "current_price": current_price,
+        "previous_close": current_price - day_change,
+        "daily_return_rate": self._signed(fields[5], fields[3]),
+        "day_change": day_change,
+        "volume": int(fields[13]),
+        "high_price": float(fields[8]),
+        "low_price": float(fields[9]),
+        "open_price": float(fields[7]),
+        "currency": "KRW",
+        "updated_at": datetime.now().isoformat(),
+        "source": "websocket"
+      }
+    except (IndexError, ValueError) as e:
+      logger.debug(f"국내 실시간 체결 파싱 실패: {str(e)}")
+      return None
+
+  def _parse_overseas_tick(self, fields: List[str]) -> Optional[Dict]:
+    """HDFSCNT0 체결 데이터 파싱 (통화는 실시간 종목코드 D/R + 거래소 + 종목코드의 거래소로 판단)"""
+    try:
+      current_price = float(fields[11])
+      day_change = self._signed(fields[13], fields[12])
+      return {
+        "symbol": fields[1],
+        "market_type": "OVERSEAS",
+        "current_price": current_price,
+        "previous_close": current_price - day_change,
+        "daily_return_rate": self._signed(fields[14], fields[12]),
+        "day_change": day_change,
+        "volume": int(float(fields[20])),
+        "high_price": float(fields[9]),
+        "low_price": float(fields[10]),
+        "open_price": float(fields[8]),
+        "currency": KIS_OVERSEAS_EXCHANGE_CURRENCY.get(fields[0][1:4], "USD"),
+        "updated_at": datetime.now().isoformat(),
+        "source": "websocket"
+      }
+    except (IndexError, ValueError) as e:
+      logger.debug(f"해외 실시간 체결 파싱 실패: {str(e)}")
+      return None
+
+
+# 싱글톤 인스턴스
+realtime_quote_service = KISRealtimeQuoteService()
@@ -8,6 +8,11 @@ from .config.database import async_engine, Base
 from .core.middleware import add_middlewares
 from .core.exceptions import add_exception_handlers
 from .api.v1.router import api_router
+from .external.kis_api import kis_api_service
+from .services.market_hours_service import market_hours_service
+from .external.kis_websocket import realtime_quote_service
+from .services.portfolio_snapshot_service import portfolio_snapshot_service
+from .services.fee_schedule_service import fee_schedule_service
 
 settings = get_settings()
 
@@ -21,10 +26,32 @@ async def lifespan(app: FastAPI):
     await conn.run_sync(Base.metadata.create_all)
   
   print("✅ Database tables created")
+  
+  # KIS API 공유 HTTP 클라이언트 (커넥션 풀 재사용)
+  await kis_api_service.startup()
+  print("✅ KIS API HTTP client ready")
+  
+  # 거래소 장 시간 (시세 캐시 TTL 계산용)
+  await market_hours_service.load_from_db()
+  print("✅ Market hours loaded")
+  
+  # 증권사 수수료 설정 메모리 스냅샷 (주기 갱신)
+  await fee_schedule_service.start()
+  print("✅ Fee schedule loaded")
+  
+  # KIS 실시간 시세 수신 (KIS_WS_ENABLED일 때)
+  await realtime_quote_service.start()
+  
+  # 일별 포트폴리오 NAV 스냅샷 작업
+  await portfolio_snapshot_service.start()
   yield
   
   # Shutdown
   print("🛑 Shutting down...")
+  await portfolio_snapshot_service.stop()
+  await fee_schedule_service.stop()
+  await realtime_quote_service.stop()
+  await kis_api_service.shutdown()
   await async_engine.dispose()
   print("✅ Cleanup completed")
 
@@ -13,6 +13,10 @@ from .kis_token import KisToken
 from .broker_fee import BrokerFee
 from .stock_price import StockPrice
 from .token_blacklist import TokenBlacklist
+from .portfolio_snapshot import PortfolioSnapshot
+from .realized_pnl_monthly import RealizedPnlMonthly
+from .tax_lot import TaxLot
+from .tax_lot_disposal import TaxLotDisposal
 
 # Alembic이 감지할 수 있도록 모든 모델 import
 __all__ = [
@@ -27,4 +31,8 @@ __all__ = [
   "BrokerFee",
   "StockPrice",
   "TokenBlacklist",
+  "PortfolioSnapshot",
+  "RealizedPnlMonthly",
+  "TaxLot",
+  "TaxLotDisposal",
 ]
\ No newline at end of file
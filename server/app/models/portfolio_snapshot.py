@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, DECIMAL, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class PortfolioSnapshot(Base):
+  """
+  사용자별 일별 포트폴리오 평가(NAV) 스냅샷
+  
+  장 마감 후 작업이 시장(DOMESTIC/OVERSEAS)별로 하루 한 행씩 기록한다. 금액은 모두 KRW 기준.
+  성과 차트는 (user_id, snapshot_date) 범위 조회 한 번으로 그린다.
+  """
+  __tablename__ = "portfolio_snapshots"
+  
+  id = Column(Integer, primary_key=True, index=True)
+  user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+  snapshot_date = Column(Date, nullable=False, comment="평가 기준일")
+  market_type = Column(String(20), nullable=False, comment="DOMESTIC/OVERSEAS")
+  
+  market_value_krw = Column(DECIMAL(18, 2), nullable=False, default=0, comment="평가금액 (원화)")
+  cost_basis_krw = Column(DECIMAL(18, 2), nullable=False, default=0, comment="보유 원가 (원화)")
+  net_cash_flow_krw = Column(DECIMAL(18, 2), nullable=False, default=0, comment="당일 순투입액 (매수 - 매도, 원화)")
+  realized_gain_krw = Column(DECIMAL(18, 2), nullable=False, default=0, comment="당일 실현손익 (원화)")
+  position_count = Column(Integer, nullable=False, default=0, comment="보유 종목 수")
+  exchange_rate = Column(DECIMAL(10, 4), nullable=False, default=1.0, comment="평가 환율 (USD/KRW, 국내=1.0)")
+  
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
+  updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+  
+  __table_args__ = (
+    UniqueConstraint('user_id', 'snapshot_date', 'market_type', name='unique_user_date_market'),
+    Index('idx_snapshot_date', 'snapshot_date'),
+    {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
+  )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, DECIMAL, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class RealizedPnlMonthly(Base):
+  """
+  월별 실현손익 집계 (사용자 × 연월 × 증권사 × 시장 × 통화)
+  
+  매도 거래 생성 시 같은 DB 트랜잭션에서 증분 갱신하고, 재계산 명령으로 transactions에서 다시 채운다.
+  월/연 단위 리포트는 거래 수가 아닌 월 수만큼만 읽는다.
+  """
+  __tablename__ = "realized_pnl_monthly"
+  
+  id = Column(Integer, primary_key=True, index=True)
+  user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+  year_month = Column(String(7), nullable=False, comment="매도 연월 (YYYY-MM)")
+  broker_id = Column(Integer, ForeignKey("brokers.id"), nullable=False)
+  market_type = Column(String(20), nullable=False, comment="DOMESTIC/OVERSEAS")
+  currency = Column(String(3), nullable=False, comment="거래 통화")
+  
+  sell_count = Column(Integer, nullable=False, default=0, comment="매도 건수")
+  quantity = Column(Integer, nullable=False, default=0, comment="매도 수량")
+  proceeds = Column(DECIMAL(18, 4), nullable=False, default=0, comment="매도 순수익 (수수료/세금 차감, 거래 통화)")
+  cost_basis = Column(DECIMAL(18, 4), nullable=False, default=0, comment="매도 원가 (평균단가 × 수량, 거래 통화)")
+  realized_profit = Column(DECIMAL(18, 4), nullable=False, default=0, comment="실현손익 (거래 통화)")
+  realized_profit_krw = Column(DECIMAL(18, 2), nullable=False, default=0, comment="실현손익 (매도 당시 환율 원화)")
+  commission = Column(DECIMAL(18, 4), nullable=False, default=0, comment="수수료 합계")
+  transaction_tax = Column(DECIMAL(18, 4), nullable=False, default=0, comment="거래세 합계")
+  
+  updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+  
+  __table_args__ = (
+    UniqueConstraint(
+      'user_id', 'year_month', 'broker_id', 'market_type', 'currency', name='unique_user_month_broker_market_currency'
+    ),
+    {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
+  )
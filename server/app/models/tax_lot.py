@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, DateTime, DECIMAL, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class TaxLot(Base):
+  """
+  매수 로트 (매수 거래 1건 = 로트 1개, FIFO 선입선출 소진)
+  
+  holdings의 평균단가 방식과 별도로 유지하며, 매도 시 가장 먼저 취득한 로트부터 remaining_quantity를 차감한다.
+  """
+  __tablename__ = "tax_lots"
+  
+  id = Column(Integer, primary_key=True, index=True)
+  user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+  stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
+  broker_id = Column(Integer, ForeignKey("brokers.id"), nullable=False)
+  buy_transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False, unique=True)
+  
+  acquired_at = Column(DateTime(timezone=True), nullable=False, comment="취득일시 (매수 거래일시)")
+  quantity = Column(Integer, nullable=False, comment="매수 수량")
+  remaining_quantity = Column(Integer, nullable=False, comment="미소진 수량")
+  unit_cost = Column(DECIMAL(15, 6), nullable=False, comment="주당 취득원가 (수수료 포함, 거래 통화)")
+  exchange_rate = Column(DECIMAL(10, 4), nullable=False, default=1.0, comment="취득 당시 환율 (국내주식=1.0)")
+  
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
+  updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+  
+  __table_args__ = (
+    # 매도 시 FIFO 순서로 미소진 로트 조회
+    Index('idx_lot_user_stock_broker_acquired', 'user_id', 'stock_id', 'broker_id', 'acquired_at'),
+    # 사용자별 보유 로트 조회
+    Index('idx_lot_user_remaining', 'user_id', 'remaining_quantity'),
+    {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
+  )
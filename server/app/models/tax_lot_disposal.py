@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, DateTime, DECIMAL, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.config.database import Base
+
+class TaxLotDisposal(Base):
+  """
+  로트 처분 내역 (매도 거래 × 소진된 매수 로트)
+  
+  원화 손익은 매도금액 × 매도 당시 환율 - 취득원가 × 취득 당시 환율 (해외주식 양도소득 계산 기준).
+  """
+  __tablename__ = "tax_lot_disposals"
+  
+  id = Column(Integer, primary_key=True, index=True)
+  user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+  stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
+  broker_id = Column(Integer, ForeignKey("brokers.id"), nullable=False)
+  buy_transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False)
+  sell_transaction_id = Column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False)
+  
+  acquired_at = Column(DateTime(timezone=True), nullable=False, comment="취득일시")
+  disposed_at = Column(DateTime(timezone=True), nullable=False, comment="처분일시 (매도 거래일시)")
+  quantity = Column(Integer, nullable=False, comment="처분 수량")
+  
+  cost_basis = Column(DECIMAL(18, 4), nullable=False, comment="취득원가 (수수료 포함, 거래 통화)")
+  proceeds = Column(DECIMAL(18, 4), nullable=False, comment="매도 순수익 (수수료/세금 차감, 거래 통화)")
+  realized_profit = Column(DECIMAL(18, 4), nullable=False, comment="실현손익 (거래 통화)")
+  buy_exchange_rate = Column(DECIMAL(10, 4), nullable=False, default=1.0, comment="취득 당시 환율")
+  sell_exchange_rate = Column(DECIMAL(10, 4), nullable=False, default=1.0, comment="처분 당시 환율")
+  realized_profit_krw = Column(DECIMAL(18, 2), nullable=False, comment="실현손익 (원화, 취득/처분 당시 환율)")
+  
+  created_at = Column(DateTime(timezone=True), server_default=func.now())
+  
+  __table_args__ = (
+    UniqueConstraint('sell_transaction_id', 'buy_transaction_id', name='unique_disposal_sell_buy'),
+    Index('idx_disposal_user_date', 'user_id', 'disposed_at'),
+    Index('idx_disposal_user_stock_broker_date', 'user_id', 'stock_id', 'broker_id', 'disposed_at'),
+    {"mysql_engine": "InnoDB", "mysql_charset": "utf8mb4"},
+  )
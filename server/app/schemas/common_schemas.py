@@ -90,6 +90,17 @@ class TransactionResponse(BaseModel):
   class Config:
     from_attributes = True
 
+class TransactionBatchRequest(BaseModel):
+  """일괄 주문 요청 스키마 (전부 성공 또는 전부 취소)"""
+  orders: List[TransactionCreateRequest] = Field(..., min_length=1, description="주문 목록")
+
+class TransactionBatchResponse(BaseModel):
+  """일괄 주문 응답 (요청 순서대로 생성된 거래)"""
+  success: bool
+  data: List[TransactionResponse]
+  total_count: int = Field(..., description="생성된 거래 수")
+  position_count: int = Field(..., description="반영된 종목 × 증권사 수")
+
 class TransactionHistoryItem(BaseModel):
   """거래 내역 개별 항목"""
   id: int
@@ -115,11 +126,21 @@ class TransactionHistoryResponse(BaseModel):
   """거래 내역 목록 응답"""
   success: bool
   data: List[TransactionHistoryItem]
-  total_count: int
+  total_count: Optional[int] = Field(None, description="전체 거래 수 (첫 페이지에만 포함, cursor 요청은 null)")
+  next_cursor: Optional[str] = Field(None, description="다음 페이지 커서 (없으면 마지막 페이지)")
+  has_more: bool = Field(False, description="다음 페이지 존재 여부")
   
   class Config:
     from_attributes = True
 
+class TradeImportResponse(BaseModel):
+  """거래 내역 가져오기 응답"""
+  success: bool
+  imported_count: int = Field(..., description="저장된 거래 수")
+  buy_count: int = Field(..., description="매수 거래 수")
+  sell_count: int = Field(..., description="매도 거래 수")
+  position_count: int = Field(..., description="재계산된 종목 수")
+
 # ========== Broker 관련 ==========
 
 class BrokerResponse(BaseModel):
@@ -146,6 +167,7 @@ class StockDataResponse(BaseModel):
   """포트폴리오 종목별 데이터 응답"""
   symbol: str = Field(..., description="종목코드")
   company_name: str = Field(..., description="종목명")
+  currency: str = Field("KRW", description="거래 통화 (행 금액 기준)")
   shares: int = Field(..., description="보유 수량")
   avg_cost: float = Field(..., description="평균 매입단가")
   current_price: float = Field(..., description="현재가")
@@ -179,12 +201,13 @@ class CompletePortfolioResponse(BaseModel):
   total_total_gain_percent: float = Field(..., description="총 누적 수익률 (%)")
   
   domestic_summary: PortfolioSummaryData = Field(..., description="국내주식 요약")
-  overseas_summary: PortfolioSummaryData = Field(..., description="해외주식 요약")
+  overseas_summary: PortfolioSummaryData = Field(..., description="해외주식 요약 (USD 환산)")
   
   domestic_stocks: List[StockDataResponse] = Field(..., description="국내주식 목록")
   overseas_stocks: List[StockDataResponse] = Field(..., description="해외주식 목록")
   
   exchange_rate: float = Field(..., description="USD/KRW 환율")
+  exchange_rates: Dict[str, float] = Field(default_factory=dict, description="보유 통화별 1단위당 원화 환율")
   updated_at: str = Field(..., description="업데이트 시간")
   
   class Config:
@@ -239,6 +262,112 @@ class PortfolioStocksResponse(BaseModel):
   class Config:
     from_attributes = True
 
+class PortfolioHistoryPoint(BaseModel):
+  """일별 포트폴리오 평가 (KRW)"""
+  date: str = Field(..., description="평가 기준일")
+  market_value_krw: float = Field(..., description="평가금액")
+  cost_basis_krw: float = Field(..., description="보유 원가")
+  net_cash_flow_krw: float = Field(..., description="당일 순투입액 (매수 - 매도)")
+  realized_gain_krw: float = Field(..., description="당일 실현손익")
+  position_count: int = Field(..., description="보유 종목 수")
+
+class PortfolioHistoryResponse(BaseModel):
+  """포트폴리오 NAV 시계열 응답"""
+  success: bool
+  data: List[PortfolioHistoryPoint]
+  total_count: int
+
+class RollingVolatilityPoint(BaseModel):
+  """이동 변동성 (구간 마지막 날 기준)"""
+  date: str = Field(..., description="기준일")
+  volatility: float = Field(..., description="연율화 변동성 (%)")
+
+class BenchmarkBeta(BaseModel):
+  """벤치마크 대비 베타"""
+  benchmark: str = Field(..., description="벤치마크 (KOSPI, SP500)")
+  symbol: str = Field(..., description="벤치마크 추종 종목")
+  beta: Optional[float] = Field(None, description="베타")
+  correlation: Optional[float] = Field(None, description="상관계수")
+
+class PortfolioRiskData(BaseModel):
+  """포트폴리오 리스크 지표 (현재 보유 수량 기준, KRW 환산)"""
+  start_date: Optional[str] = Field(None, description="첫 수익률 관측일")
+  end_date: Optional[str] = Field(None, description="마지막 수익률 관측일")
+  observation_count: int = Field(..., description="일간 수익률 관측 수")
+  annualized_return: Optional[float] = Field(None, description="연율화 수익률 (%)")
+  volatility: Optional[float] = Field(None, description="연율화 변동성 (%)")
+  sharpe_ratio: Optional[float] = Field(None, description="샤프 비율")
+  max_drawdown: Optional[float] = Field(None, description="최대 낙폭 (%)")
+  max_drawdown_peak_date: Optional[str] = Field(None, description="최대 낙폭 고점일")
+  max_drawdown_trough_date: Optional[str] = Field(None, description="최대 낙폭 저점일")
+  rolling_window: int = Field(..., description="이동 변동성 구간 (거래일)")
+  rolling_volatility: List[RollingVolatilityPoint] = Field(default_factory=list)
+  betas: List[BenchmarkBeta] = Field(default_factory=list)
+  excluded_symbols: List[str] = Field(default_factory=list, description="종가가 없어 제외된 종목")
+
+class PortfolioRiskResponse(BaseModel):
+  """포트폴리오 리스크 지표 응답"""
+  success: bool
+  data: PortfolioRiskData
+
+class RebalanceTarget(BaseModel):
+  """종목별 목표 비중"""
+  symbol: str = Field(..., description="종목코드 (보유 종목)")
+  weight: float = Field(..., ge=0, le=100, description="목표 비중 (%, 전체 평가금액 + 추가 현금 기준)")
+
+class RebalanceSimulateRequest(BaseModel):
+  """리밸런싱 시뮬레이션 요청"""
+  targets: List[RebalanceTarget] = Field(..., min_length=1, description="목표 비중 (합계 100% 이하, 나머지는 현금)")
+  broker_id: Optional[int] = Field(None, description="주문 증권사 ID (수수료 기준, 미지정 시 기본 수수료율)")
+  cash_krw: float = Field(0, ge=0, description="추가 투입 현금 (KRW)")
+  liquidate_unlisted: bool = Field(False, description="목표에 없는 보유 종목 전량 매도 여부 (False면 현재 수량 유지)")
+
+class RebalanceOrder(BaseModel):
+  """리밸런싱 주문"""
+  symbol: str = Field(..., description="종목코드")
+  company_name: str = Field(..., description="종목명")
+  market_type: str = Field(..., description="시장구분")
+  currency: str = Field(..., description="통화")
+  transaction_type: str = Field(..., description="BUY/SELL")
+  quantity: int = Field(..., description="주문 수량")
+  price: float = Field(..., description="기준 가격 (현재가, 거래 통화)")
+  gross_amount: float = Field(..., description="거래금액 (거래 통화)")
+  commission: float = Field(..., description="수수료 (거래 통화)")
+  transaction_tax: float = Field(..., description="거래세 (거래 통화)")
+  net_amount_krw: float = Field(..., description="현금 변동 (KRW, 매수는 음수)")
+  realized_profit: Optional[float] = Field(None, description="예상 실현손익 (매도, 거래 통화, 평균단가 기준)")
+  realized_profit_krw: Optional[float] = Field(None, description="예상 실현손익 (매도, KRW)")
+
+class RebalanceAllocation(BaseModel):
+  """종목별 비중 변화"""
+  symbol: str = Field(..., description="종목코드")
+  current_quantity: int = Field(..., description="현재 수량")
+  target_quantity: int = Field(..., description="주문 후 수량")
+  current_weight: float = Field(..., description="현재 비중 (%)")
+  target_weight: Optional[float] = Field(None, description="목표 비중 (%, 목표에 없으면 None)")
+  post_trade_weight: float = Field(..., description="주문 후 비중 (%)")
+  post_trade_value_krw: float = Field(..., description="주문 후 평가금액 (KRW)")
+
+class RebalanceSimulationData(BaseModel):
+  """리밸런싱 시뮬레이션 결과"""
+  orders: List[RebalanceOrder]
+  allocations: List[RebalanceAllocation]
+  total_value_krw: float = Field(..., description="현재 평가금액 + 추가 현금 (KRW)")
+  cash_after_krw: float = Field(..., description="주문 후 남는 현금 (KRW, 음수면 부족)")
+  cash_weight: float = Field(..., description="주문 후 현금 비중 (%)")
+  total_buy_krw: float = Field(..., description="매수 금액 합계 (KRW, 수수료 포함)")
+  total_sell_krw: float = Field(..., description="매도 순수익 합계 (KRW, 수수료/세금 차감)")
+  total_commission_krw: float = Field(..., description="수수료 합계 (KRW)")
+  total_tax_krw: float = Field(..., description="거래세 합계 (KRW)")
+  realized_profit_krw: float = Field(..., description="예상 실현손익 합계 (KRW)")
+  excluded_symbols: List[str] = Field(default_factory=list, description="현재가/환율이 없어 제외된 보유 종목")
+  exchange_rates: Dict[str, float] = Field(default_factory=dict, description="적용 환율")
+
+class RebalanceSimulateResponse(BaseModel):
+  """리밸런싱 시뮬레이션 응답"""
+  success: bool
+  data: RebalanceSimulationData
+
 # ========== Realized Profit 관련 ==========
 
 class RealizedProfitResponse(BaseModel):
@@ -276,11 +405,18 @@ class RealizedProfitMetadata(BaseModel):
 class RealizedProfitData(BaseModel):
   """실현손익 전체 데이터"""
   transactions: List[RealizedProfitResponse] = Field(..., description="실현손익 거래 목록")
-  metadata: RealizedProfitMetadata = Field(..., description="메타데이터")
+  metadata: Optional[RealizedProfitMetadata] = Field(None, description="메타데이터 (첫 페이지에서만 포함)")
+  next_cursor: Optional[str] = Field(None, description="다음 페이지 커서")
+  has_more: bool = Field(False, description="다음 페이지 존재 여부")
   
   class Config:
     from_attributes = True
 
+class SortOrder(str, Enum):
+  """정렬 방향"""
+  DESC = "desc"
+  ASC = "asc"
+
 class RealizedProfitListResponse(BaseModel):
   """실현손익 목록 응답 스키마"""
   success: bool = Field(..., description="성공 여부")
@@ -289,6 +425,98 @@ class RealizedProfitListResponse(BaseModel):
   class Config:
     from_attributes = True
 
+class SummaryPeriod(str, Enum):
+  """실현손익 집계 단위"""
+  MONTHLY = "monthly"
+  YEARLY = "yearly"
+
+class RealizedProfitSummaryItem(BaseModel):
+  """기간 × 증권사 × 시장 × 통화별 실현손익 집계"""
+  period: str = Field(..., description="기간 (월별 YYYY-MM, 연도별 YYYY)")
+  broker_id: int = Field(..., description="증권사 ID")
+  broker_name: str = Field(..., description="증권사명")
+  market_type: str = Field(..., description="시장구분")
+  currency: str = Field(..., description="통화")
+  sell_count: int = Field(..., description="매도 건수")
+  quantity: int = Field(..., description="매도 수량")
+  proceeds: float = Field(..., description="매도 순수익 (거래 통화)")
+  cost_basis: float = Field(..., description="매도 원가 (거래 통화)")
+  realized_profit: float = Field(..., description="실현손익 (거래 통화)")
+  realized_profit_krw: float = Field(..., description="실현손익 (KRW)")
+  commission: float = Field(..., description="수수료")
+  transaction_tax: float = Field(..., description="거래세")
+
+class RealizedProfitSummaryResponse(BaseModel):
+  """실현손익 기간별 집계 응답"""
+  success: bool
+  data: List[RealizedProfitSummaryItem]
+  total_realized_profit_krw: float = Field(..., description="조회 범위 실현손익 합계 (KRW)")
+  total_count: int
+
+# ========== Tax Lot 관련 ==========
+
+class TaxLotItem(BaseModel):
+  """FIFO 매수 로트 (미실현 손익 포함)"""
+  lot_id: int = Field(..., description="로트 ID (매수 거래 ID)")
+  symbol: str = Field(..., description="종목코드")
+  company_name: str = Field(..., description="회사명")
+  broker_id: int = Field(..., description="증권사 ID")
+  broker: str = Field(..., description="증권사명")
+  market_type: str = Field(..., description="시장구분")
+  currency: str = Field(..., description="통화")
+  acquired_at: str = Field(..., description="취득일시")
+  holding_days: int = Field(..., description="보유 일수")
+  quantity: int = Field(..., description="매수 수량")
+  remaining_quantity: int = Field(..., description="미소진 수량")
+  unit_cost: float = Field(..., description="주당 취득원가 (수수료 포함)")
+  cost_basis: float = Field(..., description="미소진분 취득원가 (거래 통화)")
+  cost_basis_krw: float = Field(..., description="미소진분 취득원가 (취득 당시 환율 KRW)")
+  acquisition_exchange_rate: float = Field(..., description="취득 당시 환율")
+  current_price: Optional[float] = Field(None, description="현재가")
+  market_value: Optional[float] = Field(None, description="평가금액 (거래 통화)")
+  market_value_krw: Optional[float] = Field(None, description="평가금액 (현재 환율 KRW)")
+  unrealized_profit: Optional[float] = Field(None, description="미실현 손익 (거래 통화)")
+  unrealized_profit_percent: Optional[float] = Field(None, description="미실현 수익률 (%)")
+  unrealized_profit_krw: Optional[float] = Field(None, description="미실현 손익 (KRW, 환차손익 포함)")
+
+class TaxLotListResponse(BaseModel):
+  """FIFO 로트 목록 응답"""
+  success: bool
+  data: List[TaxLotItem]
+  total_cost_krw: float = Field(..., description="평가 가능한 로트 취득원가 합계 (KRW)")
+  total_market_value_krw: float = Field(..., description="평가 가능한 로트 평가금액 합계 (KRW)")
+  total_unrealized_profit_krw: float = Field(..., description="평가 가능한 로트 미실현 손익 합계 (KRW)")
+  total_count: int
+
+class TaxLotDisposalItem(BaseModel):
+  """로트별 실현손익 (매도 거래 × 소진된 매수 로트)"""
+  lot_id: int = Field(..., description="로트 ID (매수 거래 ID)")
+  sell_transaction_id: int = Field(..., description="매도 거래 ID")
+  symbol: str = Field(..., description="종목코드")
+  company_name: str = Field(..., description="회사명")
+  broker_id: int = Field(..., description="증권사 ID")
+  broker: str = Field(..., description="증권사명")
+  market_type: str = Field(..., description="시장구분")
+  currency: str = Field(..., description="통화")
+  acquired_at: str = Field(..., description="취득일시")
+  disposed_at: str = Field(..., description="처분일시")
+  holding_days: int = Field(..., description="보유 일수")
+  quantity: int = Field(..., description="처분 수량")
+  cost_basis: float = Field(..., description="취득원가 (거래 통화)")
+  proceeds: float = Field(..., description="매도 순수익 (거래 통화)")
+  realized_profit: float = Field(..., description="실현손익 (거래 통화)")
+  realized_profit_percent: float = Field(..., description="실현 수익률 (%)")
+  buy_exchange_rate: float = Field(..., description="취득 당시 환율")
+  sell_exchange_rate: float = Field(..., description="처분 당시 환율")
+  realized_profit_krw: float = Field(..., description="실현손익 (KRW, 취득/처분 당시 환율)")
+
+class TaxLotDisposalListResponse(BaseModel):
+  """로트별 실현손익 응답"""
+  success: bool
+  data: List[TaxLotDisposalItem]
+  total_realized_profit_krw: float = Field(..., description="조회 범위 실현손익 합계 (KRW)")
+  total_count: int
+
 # ========== Exchange Rate 관련 ========== 
 
 class ExchangeRateResponse(BaseModel):
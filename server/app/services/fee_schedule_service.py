@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config.database import AsyncSessionLocal
+from app.config.settings import get_settings
+from app.models.broker import Broker
+from app.models.broker_fee import BrokerFee
+
+logger = logging.getLogger(__name__)
+
+# (broker_id, market_type, transaction_type)
+FeeKey = Tuple[int, str, str]
+
+
+@dataclass(frozen=True)
+class FeeRule:
+  """broker_fees 활성 행의 불변 사본 (FeeTaxCRUD 계산 함수가 BrokerFee 대신 받음)"""
+  fee_rate: Decimal
+  transaction_tax_rate: Decimal
+  min_commission: Optional[Decimal] = None
+  max_commission: Optional[Decimal] = None
+
+
+class FeeScheduleService:
+  """
+  증권사 수수료 설정 메모리 스냅샷
+
+  - broker_fees 활성 행 전체와 활성 증권사 표시명을 한 번에 읽어 불변 dict로 만들고, 갱신 시 통째로 교체한다.
+  - 앱 시작 시 로드하고 FEE_SCHEDULE_REFRESH_SECONDS마다 다시 읽는다. broker_fees를 수정한 쪽은 refresh()를 호출한다.
+  - 조회는 DB 없이 dict 조회만 한다 (시작 시 로드에 실패했으면 첫 조회에서 다시 읽음).
+  """
+
+  def __init__(self):
+    self._rules: Mapping[FeeKey, FeeRule] = MappingProxyType({})
+    self._by_broker: Mapping[int, Mapping[Tuple[str, str], FeeRule]] = MappingProxyType({})
+    self._broker_names: Mapping[int, str] = MappingProxyType({})
+    self._loaded_at: Optional[datetime] = None
+    self._runner: Optional[asyncio.Task] = None
+    self._refresh_lock = asyncio.Lock()
+
+  # =========================
+  # 🔌 스케줄러
+  # =========================
+
+  async def start(self) -> None:
+    """최초 로드 후 주기 갱신 시작 (앱 시작 시 lifespan에서 호출)"""
+    try:
+      await self.refresh()
+    except Exception as e:
+      logger.error(f"수수료 설정 로드 실패 (첫 조회 시 재시도): {str(e)}")
+
+    if get_settings().fee_schedule_refresh_seconds > 0 and (self._runner is None or self._runner.done()):
+      self._runner = asyncio.create_task(self._run())
+
+  async def stop(self) -> None:
+    if self._runner is not None:
+      self._runner.cancel()
+      try:
+        await self._runner
+      except asyncio.CancelledError:
+        pass
+      self._runner = None
+
+  async def _run(self) -> None:
+    while True:
+      await asyncio.sleep(get_settings().fee_schedule_refresh_seconds)
+      try:
+        await self.refresh()
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        logger.error(f"수수료 설정 갱신 실패 (이전 설정 유지): {str(e)}")
+
+  # =========================
+  # 💾 로드
+  # =========================
+
+  async def refresh(self) -> int:
+    """broker_fees/brokers를 다시 읽어 스냅샷 교체 (Returns: 수수료 설정 수)"""
+    async with self._refresh_lock:
+      return await self._load()
+
+  async def ensure_loaded(self) -> None:
+    """아직 로드되지 않았으면 한 번 읽음 (동시 호출은 한 번만 조회)"""
+    if self._loaded_at is None:
+      async with self._refresh_lock:
+        if self._loaded_at is None:
+          await self._load()
+
+  async def _load(self) -> int:
+    async with AsyncSessionLocal() as db:
+      fees = (await db.execute(select(BrokerFee).filter(BrokerFee.is_active == True))).scalars().all()
+      brokers = (await db.execute(
+        select(Broker.id, Broker.display_name).filter(Broker.is_active == True)
+      )).all()
+
+    rules: Dict[FeeKey, FeeRule] = {}
+    by_broker: Dict[int, Dict[Tuple[str, str], FeeRule]] = {}
+    for fee in fees:
+      rule = FeeRule(
+        fee_rate=Decimal(fee.fee_rate),
+        transaction_tax_rate=Decimal(fee.transaction_tax_rate or 0),
+        min_commission=getattr(fee, "min_commission", None),
+        max_commission=getattr(fee, "max_commission", None)
+      )
+      market_type, transaction_type = fee.market_type.upper(), fee.transaction_type.upper()
+      rules[(fee.broker_id, market_type, transaction_type)] = rule
+      by_broker.setdefault(fee.broker_id, {})[(market_type, transaction_type)] = rule
+
+    # 참조 교체만 하므로 조회 중인 요청은 이전/새 스냅샷 중 하나를 온전히 봄
+    self._rules = MappingProxyType(rules)
+    self._by_broker = MappingProxyType({broker_id: MappingProxyType(m) for broker_id, m in by_broker.items()})
+    self._broker_names = MappingProxyType({row.id: row.display_name for row in brokers})
+    self._loaded_at = datetime.now()
+
+    logger.info(f"수수료 설정 로드 완료: 설정={len(rules)}건, 증권사={len(brokers)}개")
+    return len(rules)
+
+  # =========================
+  # 🔍 조회 (메모리)
+  # =========================
+
+  def get(self, broker_id: int, market_type: str, transaction_type: str) -> Optional[FeeRule]:
+    """증권사 × 시장 × 거래구분 수수료 설정 (없으면 None → 기본 수수료율)"""
+    return self._rules.get((broker_id, market_type.upper(), transaction_type.upper()))
+
+  def broker_rules(self, broker_id: int) -> Mapping[Tuple[str, str], FeeRule]:
+    """증권사의 (시장, 거래구분) → 수수료 설정"""
+    return self._by_broker.get(broker_id, MappingProxyType({}))
+
+  def broker_name(self, broker_id: int) -> Optional[str]:
+    """활성 증권사 표시명 (없으면 None)"""
+    return self._broker_names.get(broker_id)
+
+  def get_stats(self) -> Dict[str, Any]:
+    """스냅샷 현황"""
+    return {
+      "rules": len(self._rules),
+      "brokers": len(self._broker_names),
+      "loaded_at": self._loaded_at.isoformat() if self._loaded_at else None
+    }
+
+
+# 싱글톤 인스턴스
+fee_schedule_service = FeeScheduleService()
@@ -0,0 +1,196 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.holding_crud import holding_crud
+from app.models.holding import Holding
+from app.utils.kst import to_naive_kst
+
+logger = logging.getLogger(__name__)
+
+# DB 컬럼 소수 자릿수 (거래마다 저장 후 다시 읽는 증분 갱신과 같은 값이 나오도록 매 단계 반올림)
+SCALE_6 = Decimal("0.000001")
+SCALE_2 = Decimal("0.01")
+
+
+def _quantize(value: Decimal, scale: Decimal) -> Decimal:
+  """MySQL DECIMAL 저장과 같은 반올림"""
+  return value.quantize(scale, rounding=ROUND_HALF_UP)
+
+
+@dataclass
+class PositionState:
+  """(사용자, 종목, 증권사) 평균단가 보유 상태 - holding_crud.update_holding_for_buy/sell과 같은 규칙"""
+  quantity: int = 0
+  average_cost: Decimal = Decimal("0")
+  total_cost: Decimal = Decimal("0")
+  total_cost_krw: Decimal = Decimal("0")
+  realized_gain: Decimal = Decimal("0")
+  realized_gain_krw: Decimal = Decimal("0")
+  first_purchase_date: Optional[date] = None
+  last_transaction_date: Optional[datetime] = None
+
+  @classmethod
+  def from_holding(cls, holding: Holding) -> "PositionState":
+    """현재 holdings 행에서 이어서 계산할 상태"""
+    return cls(
+      quantity=holding.quantity,
+      average_cost=Decimal(holding.average_cost or 0),
+      total_cost=Decimal(holding.total_cost or 0),
+      total_cost_krw=Decimal(holding.total_cost_krw or 0),
+      realized_gain=Decimal(holding.realized_gain or 0),
+      realized_gain_krw=Decimal(holding.realized_gain_krw or 0),
+      first_purchase_date=holding.first_purchase_date if holding.quantity > 0 else None,
+      last_transaction_date=holding.last_transaction_date
+    )
+
+  def buy(self, tx: Dict) -> None:
+    quantity = tx["quantity"]
+    buy_cost = quantity * tx["price"] + tx["commission"] + tx["transaction_tax"]
+    buy_cost_krw = buy_cost * tx["exchange_rate"]
+
+    if self.quantity == 0:
+      self.average_cost = tx["price"] + (tx["commission"] + tx["transaction_tax"]) / quantity
+      self.total_cost = buy_cost
+      self.total_cost_krw = buy_cost_krw
+      self.first_purchase_date = tx["transaction_date"].date()
+    else:
+      self.total_cost += buy_cost
+      self.total_cost_krw += buy_cost_krw
+      self.average_cost = self.total_cost / (self.quantity + quantity)
+
+    self.quantity += quantity
+    self.last_transaction_date = tx["transaction_date"]
+    self._round()
+
+  def sell(self, tx: Dict) -> Tuple[Decimal, Decimal, Decimal]:
+    """
+    매도 반영
+
+    Returns:
+      (매도 시점 평균단가, 주당 실현손익, 총 실현손익) - 거래 행에 기록되는 값
+    """
+    quantity = tx["quantity"]
+    if self.quantity < quantity:
+      raise ValueError(
+        f"보유 수량 부족: 거래일시={tx['transaction_date']}, 보유={self.quantity}, 매도시도={quantity}"
+      )
+
+    fees = tx["commission"] + tx["transaction_tax"]
+    avg_cost_at_transaction = self.average_cost
+    realized_profit_per_share = tx["price"] - fees / quantity - avg_cost_at_transaction
+    total_realized_profit = _quantize(realized_profit_per_share * quantity, SCALE_2)
+    realized_profit_per_share = _quantize(realized_profit_per_share, SCALE_6)
+
+    realized_gain = quantity * tx["price"] - fees - self.average_cost * quantity
+    sold_cost_krw = self.total_cost_krw * Decimal(quantity) / Decimal(self.quantity)
+
+    self.quantity -= quantity
+    self.total_cost -= self.average_cost * quantity
+    self.total_cost_krw -= sold_cost_krw
+    self.realized_gain += realized_gain
+    self.realized_gain_krw += realized_gain * tx["exchange_rate"]
+    self.last_transaction_date = tx["transaction_date"]
+
+    if self.quantity == 0:
+      self.average_cost = Decimal("0")
+      self.total_cost = Decimal("0")
+    self._round()
+
+    return avg_cost_at_transaction, realized_profit_per_share, total_realized_profit
+
+  def apply_to(self, holding: Holding) -> None:
+    """재계산 결과를 holdings 행에 반영 (거래가 하나도 없으면 날짜는 유지)"""
+    holding.quantity = self.quantity
+    holding.average_cost = self.average_cost
+    holding.total_cost = self.total_cost
+    holding.total_cost_krw = self.total_cost_krw
+    holding.realized_gain = self.realized_gain
+    holding.realized_gain_krw = self.realized_gain_krw
+    holding.is_active = self.quantity > 0
+    if self.first_purchase_date is not None:
+      holding.first_purchase_date = self.first_purchase_date
+    if self.last_transaction_date is not None:
+      holding.last_transaction_date = self.last_transaction_date
+
+  def _round(self) -> None:
+    self.average_cost = _quantize(self.average_cost, SCALE_6)
+    self.total_cost = _quantize(self.total_cost, SCALE_6)
+    self.total_cost_krw = _quantize(self.total_cost_krw, SCALE_2)
+    self.realized_gain = _quantize(self.realized_gain, SCALE_6)
+    self.realized_gain_krw = _quantize(self.realized_gain_krw, SCALE_2)
+
+
+class HoldingReplayService:
+  """
+  소급 거래 재계산 엔진
+
+  (사용자, 종목, 증권사)의 거래를 거래일시 순으로 스트리밍하며 평균단가/실현손익을 한 번에 다시 계산하고,
+  값이 바뀐 매도 거래만 모아 일괄 UPDATE 한 뒤 holdings 행을 최종 상태로 맞춘다.
+  since 이전 거래는 상태 계산에만 쓰고 다시 쓰지 않는다. commit은 호출자 (하나의 DB 트랜잭션).
+
+  거래를 읽기 전에 holdings 행을 잠가(SELECT ... FOR UPDATE) 같은 보유의 거래 저장과 프로세스 간에도 직렬화한다.
+  같은 트랜잭션에서 앞서 일반 조회를 했다면 호출자가 먼저 잠그고 holding으로 넘긴다 (holding_crud.lock_holdings).
+  """
+
+  async def replay(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: int,
+    broker_id: int,
+    since: Optional[datetime] = None,
+    holding: Optional[Holding] = None
+  ) -> Dict[str, int]:
+    """
+    Args:
+      holding: 호출자가 이미 잠근 보유 행 (없으면 거래를 읽기 전에 잠금 조회)
+
+    Returns:
+      {"transactions": 읽은 거래 수, "updated": 다시 쓴 매도 거래 수, "quantity": 최종 보유 수량}
+    """
+    from app.crud.transaction_crud import transaction_crud
+
+    if holding is None:
+      holding = await holding_crud.get_or_create_holding(db, user_id, stock_id, broker_id, for_update=True)
+
+    state = PositionState()
+    updates = []
+    count = 0
+    since_naive = to_naive_kst(since) if since else None
+
+    async for tx in transaction_crud.stream_position_transactions(db, user_id, stock_id, broker_id):
+      count += 1
+      if tx["transaction_type"] == "BUY":
+        state.buy(tx)
+        continue
+
+      avg_cost, per_share, total = state.sell(tx)
+      if since_naive and to_naive_kst(tx["transaction_date"]) < since_naive:
+        continue
+      if (tx["avg_cost_at_transaction"], tx["realized_profit_per_share"], tx["total_realized_profit"]) != (
+        avg_cost, per_share, total
+      ):
+        updates.append({
+          "id": tx["id"],
+          "avg_cost_at_transaction": avg_cost,
+          "realized_profit_per_share": per_share,
+          "total_realized_profit": total
+        })
+
+    await transaction_crud.bulk_update_sell_results(db, updates)
+    state.apply_to(holding)
+
+    logger.info(
+      f"보유 재계산 완료: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}, "
+      f"since={since}, 거래={count}, 매도 갱신={len(updates)}, 보유={state.quantity}"
+    )
+    return {"transactions": count, "updated": len(updates), "quantity": state.quantity}
+
+
+# 싱글톤 인스턴스
+holding_replay_service = HoldingReplayService()
@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app.config.database import get_async_session
+from app.core.constants import EXCHANGE_MARKET_HOURS
+from app.models.exchange import Exchange
+
+logger = logging.getLogger(__name__)
+
+# 거래소 코드를 알 수 없을 때 사용하는 시장별 기본 거래소
+DEFAULT_EXCHANGE_BY_MARKET = {
+  "DOMESTIC": "KOSPI",
+  "OVERSEAS": "NASDAQ"
+}
+
+
+class MarketHoursService:
+  """거래소별 정규장 시간 관리 (개장 여부, 다음 개장 시각 계산)"""
+
+  def __init__(self):
+    # exchange_code → (timezone, 개장 시각, 폐장 시각)
+    self._hours: Dict[str, Tuple[ZoneInfo, time, time]] = {}
+    for exchange_code, (tz_name, open_time, close_time) in EXCHANGE_MARKET_HOURS.items():
+      self._hours[exchange_code] = (
+        ZoneInfo(tz_name), time.fromisoformat(open_time), time.fromisoformat(close_time)
+      )
+
+  async def load_from_db(self) -> None:
+    """exchanges 테이블의 개장/폐장 시간으로 기본값 갱신 (앱 시작 시 호출)"""
+    async for db in get_async_session():
+      try:
+        query = (
+          select(Exchange)
+          .options(joinedload(Exchange.country))
+          .filter(Exchange.is_active == True)
+        )
+        result = await db.execute(query)
+        exchanges = result.scalars().all()
+
+        loaded = 0
+        for exchange in exchanges:
+          if not exchange.market_open_time or not exchange.market_close_time:
+            continue
+
+          default = self._hours.get(exchange.exchange_code)
+          tz_name = exchange.country.timezone if exchange.country else None
+          try:
+            tz = ZoneInfo(tz_name) if tz_name else (default[0] if default else None)
+            if tz is None:
+              continue
+            self._hours[exchange.exchange_code] = (
+              tz,
+              time.fromisoformat(exchange.market_open_time),
+              time.fromisoformat(exchange.market_close_time)
+            )
+            loaded += 1
+          except (ValueError, KeyError) as e:
+            logger.warning(f"거래소 시간 정보 오류: exchange={exchange.exchange_code}, error={str(e)}")
+
+        logger.info(f"거래소 장 시간 로드 완료: DB={loaded}개, 전체={len(self._hours)}개")
+
+      except Exception as e:
+        logger.error(f"거래소 장 시간 로드 실패 (기본값 사용): {str(e)}")
+
+  def resolve_exchange(self, market_type: str, exchange_code: Optional[str] = None) -> str:
+    """장 시간 조회에 사용할 거래소 코드"""
+    if exchange_code and exchange_code in self._hours:
+      return exchange_code
+    return DEFAULT_EXCHANGE_BY_MARKET.get(market_type.upper(), "KOSPI")
+
+  def is_open(self, exchange_code: str, now: Optional[datetime] = None) -> bool:
+    """정규장 개장 여부 (주말 제외, 공휴일은 고려하지 않음)"""
+    tz, open_time, close_time = self._hours[exchange_code]
+    local_now = (now or datetime.now(tz)).astimezone(tz)
+
+    if local_now.weekday() >= 5:
+      return False
+    return open_time <= local_now.time() < close_time
+
+  def is_after_close(self, exchange_code: str, now: Optional[datetime] = None) -> bool:
+    """오늘(평일) 정규장이 이미 마감되었는지 여부"""
+    tz, _, close_time = self._hours[exchange_code]
+    local_now = (now or datetime.now(tz)).astimezone(tz)
+    return local_now.weekday() < 5 and local_now.time() >= close_time
+
+  def next_open(self, exchange_code: str, now: Optional[datetime] = None) -> datetime:
+    """다음 정규장 개장 시각 (장중이면 다음 거래일 개장)"""
+    tz, open_time, _ = self._hours[exchange_code]
+    local_now = (now or datetime.now(tz)).astimezone(tz)
+
+    candidate = datetime.combine(local_now.date(), open_time, tzinfo=tz)
+    if candidate <= local_now:
+      candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+      candidate += timedelta(days=1)
+    return candidate
+
+  def seconds_until_open(self, exchange_code: str, now: Optional[datetime] = None) -> float:
+    """다음 개장까지 남은 시간(초)"""
+    tz = self._hours[exchange_code][0]
+    local_now = (now or datetime.now(tz)).astimezone(tz)
+    return (self.next_open(exchange_code, local_now) - local_now).total_seconds()
+
+  def local_today(self, exchange_code: str) -> str:
+    """거래소 현지 기준 오늘 날짜 (YYYYMMDD)"""
+    tz = self._hours[exchange_code][0]
+    return datetime.now(tz).strftime("%Y%m%d")
+
+
+# 싱글톤 인스턴스
+market_hours_service = MarketHoursService()
@@ -0,0 +1,337 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import end_read_transaction
+from app.config.settings import get_settings
+from app.crud.broker_crud import broker_crud
+from app.crud.fee_tax_crud import fee_tax_crud
+from app.crud.holding_crud import holding_crud
+from app.crud.realized_pnl_crud import RollupScope, realized_pnl_crud
+from app.crud.stock_crud import stock_crud
+from app.crud.transaction_crud import transaction_crud, holding_locks
+from app.external.exchange_rate_api import exchange_rate_service
+from app.models.transaction import Transaction
+from app.schemas.common_schemas import TransactionCreateRequest
+from app.services.holding_replay_service import PositionState, holding_replay_service
+from app.services.portfolio_cache import portfolio_cache
+from app.services.tax_lot_service import tax_lot_service
+from app.utils.kst import to_naive_kst
+
+logger = logging.getLogger(__name__)
+
+# 오류 응답에 담는 최대 주문 수
+ORDER_BATCH_MAX_REPORTED_ERRORS = 50
+# transactions 컬럼 소수 자릿수 (저장 값과 메모리 계산 값을 맞춤)
+PRICE_SCALE = Decimal("0.000001")
+FEE_SCALE = Decimal("0.01")
+RATE_SCALE = Decimal("0.0001")
+
+# (stock_id, broker_id)
+PositionKey = Tuple[int, int]
+
+
+class OrderBatchError(ValueError):
+  """일괄 주문 검증/반영 실패 (주문 번호별 오류 목록, 전체 취소)"""
+
+  def __init__(self, errors: List[str]):
+    self.errors = errors[:ORDER_BATCH_MAX_REPORTED_ERRORS]
+    self.total = len(errors)
+    super().__init__(f"일괄 주문 오류 {self.total}건")
+
+
+class OrderBatchService:
+  """
+  여러 주문을 하나의 DB 트랜잭션으로 저장 (전부 성공 또는 전부 취소)
+
+  - 종목은 한 번에 조회하고, 수수료는 메모리 수수료 설정으로, 환율은 거래일별 1회 조회로 계산한다.
+  - 주문을 (종목, 증권사)별로 묶어 보유 키 잠금과 holdings 행 잠금을 정렬된 순서로 잡는다.
+  - 보유/매도 실현손익은 메모리에서 거래일시 순으로 적용하고, 거래/보유/로트/월별 집계를 한 번에 커밋한다.
+  - 기존 거래보다 이른 주문이 있는 종목 × 증권사는 단건 주문과 같이 재계산 경로를 탄다.
+  """
+
+  async def execute(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    orders: List[TransactionCreateRequest]
+  ) -> Dict[str, Any]:
+    max_items = get_settings().order_batch_max_items
+    if len(orders) > max_items:
+      raise OrderBatchError([f"한 번에 최대 {max_items}건까지 주문할 수 있습니다: {len(orders)}건"])
+
+    items = [
+      {
+        "index": i,
+        "request": order,
+        "market_type": order.market_type.value,
+        "transaction_type": order.transaction_type.value
+      }
+      for i, order in enumerate(orders)
+    ]
+    brokers = await self._prepare(db, items)
+    items.sort(key=lambda item: (item["request"].transaction_date, item["index"]))
+
+    groups: Dict[PositionKey, List[Dict]] = defaultdict(list)
+    for item in items:
+      groups[(item["stock"].id, item["request"].broker_id)].append(item)
+    keys = sorted(groups)
+
+    # 조회로 열린 읽기 트랜잭션을 닫고 (스냅샷 고정/커넥션 점유 방지) 정렬된 순서로 잠금
+    await end_read_transaction(db)
+
+    async with holding_locks.hold_many((user_id, stock_id, broker_id) for stock_id, broker_id in keys):
+      try:
+        transactions, backdated = await self._apply(db, user_id, keys, groups)
+        await db.commit()
+      except ValueError as e:
+        await db.rollback()
+        raise OrderBatchError([str(e)])
+      except Exception:
+        await db.rollback()
+        raise
+
+    portfolio_cache.invalidate_holdings(user_id)
+
+    logger.info(
+      f"일괄 주문 완료: user_id={user_id}, 주문={len(items)}, 종목×증권사={len(keys)}, 재계산={len(backdated)}"
+    )
+    return {
+      "success": True,
+      "data": [
+        self._to_response(transactions[item["index"]], item["stock"], brokers[item["request"].broker_id])
+        for item in sorted(items, key=lambda item: item["index"])
+      ],
+      "total_count": len(items),
+      "position_count": len(keys)
+    }
+
+  # =========================
+  # 🔗 종목/수수료/환율
+  # =========================
+
+  async def _prepare(self, db: AsyncSession, items: List[Dict]) -> Dict[int, Any]:
+    """종목/증권사 확인 후 수수료/환율/소수 자릿수 확정 (오류는 모아서 OrderBatchError)"""
+    errors: List[str] = []
+
+    brokers = {}
+    for broker_id in sorted({item["request"].broker_id for item in items}):
+      brokers[broker_id] = await broker_crud.get_broker_by_id(db, broker_id)
+
+    stock_map = await stock_crud.get_stocks_by_symbols(db, sorted({item["request"].symbol for item in items}))
+    for item in items:
+      request = item["request"]
+      label = f"{item['index'] + 1}번째 주문"
+      candidates = [
+        stock for stock in stock_map.get(request.symbol, [])
+        if (stock.country_code == "KR") == (item["market_type"] == "DOMESTIC")
+      ]
+      if not brokers[request.broker_id]:
+        errors.append(f"{label}: 증권사를 찾을 수 없습니다: broker_id={request.broker_id}")
+      elif len(candidates) == 1:
+        item["stock"] = candidates[0]
+      elif not candidates:
+        errors.append(f"{label}: 종목을 찾을 수 없습니다: {request.symbol}")
+      else:
+        errors.append(f"{label}: 여러 거래소에 있는 종목입니다: {request.symbol}")
+    if errors:
+      raise OrderBatchError(errors)
+
+    fee_maps = {broker_id: await fee_tax_crud.get_broker_fee_map(broker_id) for broker_id in brokers}
+    for item in items:
+      request = item["request"]
+      price = Decimal(str(request.price)).quantize(PRICE_SCALE)
+      item["price"] = price
+      if request.commission is None or request.transaction_tax is None:
+        # 단건 주문과 같이 둘 중 하나라도 없으면 수수료 설정으로 모두 계산
+        fee_info = fee_maps[request.broker_id].get((item["market_type"], item["transaction_type"]))
+        amount = price * request.quantity
+        item["commission"] = fee_tax_crud.commission_for(fee_info, amount)
+        item["transaction_tax"] = fee_tax_crud.tax_for(fee_info, item["market_type"], item["transaction_type"], amount)
+      else:
+        item["commission"] = Decimal(str(request.commission)).quantize(FEE_SCALE)
+        item["transaction_tax"] = Decimal(str(request.transaction_tax)).quantize(FEE_SCALE)
+
+    overseas = [item for item in items if item["market_type"] == "OVERSEAS"]
+    for item in items:
+      item["exchange_rate"] = Decimal("1.0")
+    if overseas:
+      rates = await exchange_rate_service.get_daily_rates(
+        {item["request"].transaction_date.date() for item in overseas},
+        {item["stock"].currency for item in overseas}
+      )
+      for item in overseas:
+        day = item["request"].transaction_date.date()
+        rate = rates[day].get(item["stock"].currency)
+        if rate is None:
+          errors.append(f"{item['index'] + 1}번째 주문: {day} {item['stock'].currency} 환율을 찾을 수 없습니다")
+        else:
+          item["exchange_rate"] = Decimal(str(rate)).quantize(RATE_SCALE)
+    if errors:
+      raise OrderBatchError(errors)
+
+    return brokers
+
+  # =========================
+  # 💾 반영
+  # =========================
+
+  async def _apply(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    keys: List[PositionKey],
+    groups: Dict[PositionKey, List[Dict]]
+  ) -> Tuple[Dict[int, Transaction], List[PositionKey]]:
+    """
+    잠금을 잡은 상태에서 거래/보유/로트/월별 집계 반영 (commit은 호출자)
+
+    Returns:
+      (주문 번호 → 생성된 거래, 재계산한 종목 × 증권사)
+    """
+    states = {}
+    backdated: List[PositionKey] = []
+
+    # 일반 조회보다 먼저 모든 holdings 행을 잠가, 이후 조회가 잠금 이후의 스냅샷을 보도록 함
+    holdings = await holding_crud.lock_holdings(db, user_id, keys)
+
+    for stock_id, broker_id in keys:
+      key = (stock_id, broker_id)
+      first_date = groups[key][0]["request"].transaction_date
+      if await transaction_crud.has_later_transactions(db, user_id, stock_id, broker_id, first_date):
+        backdated.append(key)
+        continue
+
+      # 거래일시 순으로 메모리에서 적용 (매도 행의 평균단가/실현손익도 여기서 확정)
+      state = states[key] = PositionState.from_holding(holdings[key])
+      for item in groups[key]:
+        tx = self._tx(item)
+        if item["transaction_type"] == "BUY":
+          state.buy(tx)
+          continue
+        try:
+          item["sell_result"] = state.sell(tx)
+        except ValueError as e:
+          raise ValueError(f"{item['index'] + 1}번째 주문: {e}")
+
+    transactions: Dict[int, Transaction] = {}
+    for key in keys:
+      for item in groups[key]:
+        request = item["request"]
+        avg_cost, per_share, total = item.get("sell_result", (None, None, None))
+        transactions[item["index"]] = Transaction(
+          user_id=user_id,
+          broker_id=request.broker_id,
+          stock_id=item["stock"].id,
+          transaction_type=item["transaction_type"],
+          quantity=request.quantity,
+          price=item["price"],
+          commission=item["commission"],
+          transaction_tax=item["transaction_tax"],
+          exchange_rate=item["exchange_rate"],
+          transaction_date=request.transaction_date,
+          notes=request.notes,
+          avg_cost_at_transaction=avg_cost,
+          realized_profit_per_share=per_share,
+          total_realized_profit=total
+        )
+    db.add_all(list(transactions.values()))
+    await db.flush()
+
+    for key in keys:
+      stock_id, broker_id = key
+      created = [transactions[item["index"]] for item in groups[key]]
+      if key in states:
+        states[key].apply_to(holdings[key])
+      else:
+        # 이후 매도 거래의 평균단가/실현손익과 보유 정보를 거래일시 순으로 다시 계산 (수량 부족 시 ValueError)
+        await holding_replay_service.replay(
+          db, user_id, stock_id, broker_id, since=groups[key][0]["request"].transaction_date, holding=holdings[key]
+        )
+      await tax_lot_service.record_transactions(db, created)
+
+    for key in keys:
+      for item in groups[key]:
+        if "sell_result" in item:
+          await self._add_sell(db, user_id, item)
+
+    # 재계산한 종목의 (증권사, 시장, 통화) 집계 행만 가장 이른 주문월부터 재작성 (위 증분 갱신분도 다시 계산됨)
+    scopes: Dict[RollupScope, datetime] = {}
+    for key in backdated:
+      first = groups[key][0]
+      scope = (key[1], first["market_type"], first["stock"].currency)
+      since = to_naive_kst(first["request"].transaction_date)
+      scopes[scope] = min(scopes.get(scope, since), since)
+    if scopes:
+      await realized_pnl_crud.rebuild_scopes(db, user_id, scopes)
+
+    # 저장된 값(created_at 등 DB 기본값 포함)으로 응답하도록 한 번에 다시 읽음
+    await db.execute(
+      select(Transaction)
+      .where(Transaction.id.in_([transaction.id for transaction in transactions.values()]))
+      .execution_options(populate_existing=True)
+    )
+    return transactions, backdated
+
+  async def _add_sell(self, db: AsyncSession, user_id: int, item: Dict) -> None:
+    """월별 실현손익 집계 증분 갱신 (단건 주문과 같은 값)"""
+    request = item["request"]
+    avg_cost, _, total = item["sell_result"]
+    fees = item["commission"] + item["transaction_tax"]
+    await realized_pnl_crud.add_sell(
+      db,
+      user_id=user_id,
+      broker_id=request.broker_id,
+      market_type=item["market_type"],
+      currency=item["stock"].currency,
+      transaction_date=request.transaction_date,
+      quantity=request.quantity,
+      proceeds=request.quantity * item["price"] - fees,
+      cost_basis=avg_cost * request.quantity,
+      realized_profit=total,
+      exchange_rate=item["exchange_rate"],
+      commission=item["commission"],
+      transaction_tax=item["transaction_tax"]
+    )
+
+  @staticmethod
+  def _tx(item: Dict) -> Dict[str, Any]:
+    """PositionState 입력 형식"""
+    return {
+      "quantity": item["request"].quantity,
+      "price": item["price"],
+      "commission": item["commission"],
+      "transaction_tax": item["transaction_tax"],
+      "exchange_rate": item["exchange_rate"],
+      "transaction_date": item["request"].transaction_date
+    }
+
+  @staticmethod
+  def _to_response(transaction: Transaction, stock: Any, broker: Any) -> Dict[str, Any]:
+    return {
+      "id": transaction.id,
+      "user_id": transaction.user_id,
+      "broker_id": transaction.broker_id,
+      "stock_id": transaction.stock_id,
+      "transaction_type": transaction.transaction_type,
+      "quantity": transaction.quantity,
+      "price": transaction.price,
+      "commission": transaction.commission,
+      "transaction_tax": transaction.transaction_tax,
+      "exchange_rate": transaction.exchange_rate,
+      "transaction_date": transaction.transaction_date,
+      "notes": transaction.notes,
+      "created_at": transaction.created_at,
+      "broker_name": broker.display_name,
+      "stock_symbol": stock.symbol,
+      "company_name": stock.company_name
+    }
+
+
+# 싱글톤 인스턴스
+order_batch_service = OrderBatchService()
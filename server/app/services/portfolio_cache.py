@@ -0,0 +1,84 @@
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioCache:
+  """
+  사용자별 포트폴리오 캐시
+
+  - 보유 종목 집계(holdings SQL 결과): 거래 생성 시 invalidate_holdings로 무효화
+  - 완성된 포트폴리오 응답: 보유 버전 + 보유 집계 값 + 시세 + 환율이 같으면 그대로 재사용하고 같은 ETag 반환
+    (보유 집계 값을 포함하므로 다른 프로세스의 보유 변경도 집계 캐시 만료 후 응답에 반영됨)
+  """
+
+  def __init__(self):
+    # user_id → 보유 종목 버전 (무효화될 때마다 증가)
+    self._versions: Dict[int, int] = {}
+    # user_id → (버전, 저장 시각(monotonic), 보유 종목 집계)
+    self._holdings: Dict[int, Tuple[int, float, List[Dict]]] = {}
+    # user_id → (입력 지문, ETag, 응답)
+    self._snapshots: Dict[int, Tuple[str, str, object]] = {}
+
+  def holdings_version(self, user_id: int) -> int:
+    """현재 보유 종목 버전"""
+    return self._versions.get(user_id, 0)
+
+  def get_holdings(self, user_id: int) -> Optional[List[Dict]]:
+    """캐시된 보유 종목 집계 (무효화/만료 시 None)"""
+    entry = self._holdings.get(user_id)
+    if entry is None:
+      return None
+
+    version, stored_at, holdings = entry
+    ttl = get_settings().portfolio_holdings_cache_ttl_seconds
+    if version != self.holdings_version(user_id) or time.monotonic() - stored_at > ttl:
+      self._holdings.pop(user_id, None)
+      return None
+    return holdings
+
+  def set_holdings(self, user_id: int, version: int, holdings: List[Dict]) -> None:
+    """보유 종목 집계 저장 (조회 중 무효화되었다면 저장하지 않음)"""
+    if version != self.holdings_version(user_id):
+      return
+    self._holdings[user_id] = (version, time.monotonic(), holdings)
+
+  def invalidate_holdings(self, user_id: int) -> None:
+    """거래 등으로 보유 종목이 바뀌었을 때 호출"""
+    self._versions[user_id] = self.holdings_version(user_id) + 1
+    self._holdings.pop(user_id, None)
+    self._snapshots.pop(user_id, None)
+    logger.debug(f"포트폴리오 캐시 무효화: user_id={user_id}")
+
+  def get_snapshot(self, user_id: int, fingerprint: str) -> Optional[Tuple[object, str]]:
+    """입력이 같을 때의 응답과 ETag"""
+    entry = self._snapshots.get(user_id)
+    if entry is None or entry[0] != fingerprint:
+      return None
+    return entry[2], entry[1]
+
+  def set_snapshot(self, user_id: int, fingerprint: str, response: object) -> str:
+    """응답 저장 후 ETag 반환"""
+    etag = f'"{fingerprint[:32]}"'
+    self._snapshots[user_id] = (fingerprint, etag, response)
+    return etag
+
+  def get_etag(self, user_id: int) -> Optional[str]:
+    """마지막으로 계산한 응답의 ETag"""
+    entry = self._snapshots.get(user_id)
+    return entry[1] if entry else None
+
+  @staticmethod
+  def make_fingerprint(version: int, rows: List[Tuple], exchange_rates: Dict[str, float]) -> str:
+    """보유 버전 + 종목별 보유 집계/시세 + 통화별 환율로 응답 입력 지문 생성"""
+    raw = repr((version, rows, sorted(exchange_rates.items()))).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+# 싱글톤 인스턴스
+portfolio_cache = PortfolioCache()
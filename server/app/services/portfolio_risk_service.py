@@ -0,0 +1,262 @@
+import logging
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config.settings import get_settings
+from app.core.constants import RISK_BENCHMARKS, RISK_MAX_WINDOW_DAYS, RISK_TRADING_DAYS_PER_YEAR
+from app.services.portfolio_cache import portfolio_cache
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_snapshot_service import portfolio_snapshot_service
+from app.services.price_history_service import CloseSeries, price_history_service
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 최대 기간(거래일)을 덮는 달력 일수 + 휴장 여유
+MATRIX_CALENDAR_DAYS = math.ceil(RISK_MAX_WINDOW_DAYS * 365 / RISK_TRADING_DAYS_PER_YEAR) + 7
+# 첫 날 직전 종가 탐색 범위
+MATRIX_LOOKBACK_DAYS = 14
+
+
+@dataclass
+class ReturnMatrix:
+  """
+  종목 조합의 일별 종가/수익률 행렬 (보유 수량과 무관 → 같은 조합이면 기간만 달리해 재사용)
+
+  날짜 축은 보유 종목 거래일의 합집합이며, 휴장일은 직전 종가, 상장 전은 NaN이다.
+  """
+  symbols: Tuple[str, ...]
+  dates: np.ndarray     # datetime64[D]
+  closes: np.ndarray    # (날짜 × 종목)
+  returns: np.ndarray   # (날짜-1 × 종목), 계산 불가 시 NaN
+
+  def columns(self, symbols: List[str]) -> np.ndarray:
+    index = {symbol: i for i, symbol in enumerate(self.symbols)}
+    return np.array([index[symbol] for symbol in symbols], dtype=np.intp)
+
+
+class PortfolioRiskService:
+  """
+  포트폴리오 리스크 지표 (변동성, 샤프 비율, 최대 낙폭, 이동 변동성, 벤치마크 베타)
+
+  - 현재 보유 수량(거래 내역 집계)을 고정하고 stock_prices의 일별 종가로 과거 수익률을 계산한다.
+  - 해외 종목은 종목 통화의 현재 원화 환율로 환산한다 (환율 변동은 반영하지 않음).
+  - 수익률 행렬은 종목 조합 + 기준일 단위로 캐시하여 기간만 바뀐 조회는 다시 계산하지 않는다.
+  """
+
+  def __init__(self):
+    # (종목 조합, 기준일) → 수익률 행렬 (LRU)
+    self._matrices: "OrderedDict[Tuple[Tuple[str, ...], date], ReturnMatrix]" = OrderedDict()
+    self._flight = SingleFlight("risk-matrix")
+
+  async def get_portfolio_risk(self, user_id: int, days: int, rolling_window: int) -> Dict:
+    """최근 days 거래일 수익률 기준 리스크 지표"""
+    version = portfolio_cache.holdings_version(user_id)
+    holdings = [
+      h for h in await PortfolioService.get_portfolio_holdings(user_id, version)
+      if h["total_quantity"] > 0
+    ]
+    result = self._empty_result(rolling_window)
+    if not holdings:
+      return result
+
+    exchange_rates = await PortfolioService.get_exchange_rates(holdings)
+
+    # 같은 종목을 여러 증권사에서 보유해도 수량은 합산되어 있음 (환율 없는 통화 종목은 제외)
+    units: Dict[str, float] = {}
+    for h in holdings:
+      fx = exchange_rates.get(h.get("currency") or "USD") if h["market_type"] == "OVERSEAS" else 1.0
+      if fx is not None:
+        units[h["stock_symbol"]] = units.get(h["stock_symbol"], 0.0) + float(h["total_quantity"]) * fx
+    if not units:
+      return result
+
+    matrix = await self._get_matrix(user_id, holdings)
+    result["excluded_symbols"] = [
+      h["stock_symbol"] for h in holdings
+      if h["stock_symbol"] not in units or np.isnan(matrix.closes[:, matrix.columns([h["stock_symbol"]])[0]]).all()
+    ]
+
+    symbols = list(units)
+    portfolio_returns = self._portfolio_returns(
+      matrix, matrix.columns(symbols), np.array([units[symbol] for symbol in symbols])
+    )
+
+    # 보유 종목 중 하나라도 수익률이 있는 날부터, 최근 days 관측
+    observed = np.flatnonzero(~np.isnan(portfolio_returns))[-days:]
+    if observed.size < 2:
+      return result
+
+    returns = portfolio_returns[observed]
+    return_dates = matrix.dates[1:][observed]
+    result.update(self._summary_metrics(returns, return_dates))
+    result["rolling_volatility"] = self._rolling_volatility(returns, return_dates, rolling_window)
+    result["betas"] = [
+      self._beta(name, symbol, returns, matrix.returns[observed, matrix.columns([symbol])[0]])
+      for name, (symbol, _, _) in RISK_BENCHMARKS.items()
+    ]
+    return result
+
+  # =========================
+  # 🧮 수익률 행렬
+  # =========================
+
+  async def _get_matrix(self, user_id: int, holdings: List[Dict]) -> ReturnMatrix:
+    """종목 조합의 수익률 행렬 (캐시 → 없으면 종가 조회 후 생성)"""
+    symbol_info = price_history_service.symbol_info({**h, "user_id": user_id} for h in holdings)
+    holding_symbols = tuple(sorted(symbol_info))
+    for symbol, market_type, exchange_code in RISK_BENCHMARKS.values():
+      symbol_info.setdefault(symbol, (market_type, exchange_code, user_id))
+
+    # 장 마감 후 작업과 같은 기준 (보유 거래소의 마지막 완결 거래일)
+    end = await portfolio_snapshot_service.get_snapshot_date({**h, "user_id": user_id} for h in holdings)
+    key = (holding_symbols, end)
+
+    matrix = self._matrices.get(key)
+    if matrix is not None:
+      self._matrices.move_to_end(key)
+      return matrix
+
+    matrix = await self._flight.do(key, lambda: self._load_matrix(symbol_info, holding_symbols, end))
+    self._matrices[key] = matrix
+    self._matrices.move_to_end(key)
+    while len(self._matrices) > get_settings().portfolio_risk_matrix_cache_size:
+      self._matrices.popitem(last=False)
+    return matrix
+
+  async def _load_matrix(self, symbol_info, holding_symbols: Tuple[str, ...], end: date) -> ReturnMatrix:
+    """최대 기간 종가를 한 번에 읽어 행렬 생성 (이후 조회는 기간만 잘라 사용)"""
+    start = end - timedelta(days=MATRIX_CALENDAR_DAYS)
+    closes = await price_history_service.get_closes(symbol_info, start, end, MATRIX_LOOKBACK_DAYS)
+    matrix = self._build_matrix(closes, holding_symbols, start)
+    logger.info(
+      f"수익률 행렬 생성: 종목={len(holding_symbols)}, 거래일={len(matrix.dates)}, 기준일={end}"
+    )
+    return matrix
+
+  @staticmethod
+  def _build_matrix(closes: CloseSeries, holding_symbols: Tuple[str, ...], start: date) -> ReturnMatrix:
+    """종목별 종가 시계열을 공통 날짜 축에 맞춰 행렬로 변환"""
+    symbols = holding_symbols + tuple(symbol for symbol in closes if symbol not in holding_symbols)
+    series = {
+      symbol: (np.array(dates, dtype="datetime64[D]"), np.array(values, dtype=float))
+      for symbol, (dates, values) in closes.items()
+      if dates
+    }
+
+    # 날짜 축: 보유 종목 거래일 합집합 (벤치마크는 그 날짜에 맞춰 직전 종가 사용)
+    axis_sources = [series[symbol][0] for symbol in holding_symbols if symbol in series]
+    if not axis_sources:
+      axis_sources = [dates for dates, _ in series.values()]
+    dates = np.unique(np.concatenate(axis_sources)) if axis_sources else np.array([], dtype="datetime64[D]")
+    dates = dates[dates >= np.datetime64(start)]
+
+    matrix = np.full((len(dates), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+      if symbol not in series:
+        continue
+      symbol_dates, values = series[symbol]
+      index = np.searchsorted(symbol_dates, dates, side="right") - 1
+      matrix[:, j] = np.where(index >= 0, values[np.maximum(index, 0)], np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+      returns = matrix[1:] / matrix[:-1] - 1
+
+    return ReturnMatrix(symbols=symbols, dates=dates, closes=matrix, returns=returns)
+
+  @staticmethod
+  def _portfolio_returns(matrix: ReturnMatrix, columns: np.ndarray, units: np.ndarray) -> np.ndarray:
+    """전일 평가금액 가중 일간 수익률 (종가가 없는 종목은 그날 가중치에서 제외, 전부 없으면 NaN)"""
+    asset_returns = matrix.returns[:, columns]
+    valid = ~np.isnan(asset_returns)
+    exposure = np.where(valid, matrix.closes[:-1, columns] * units, 0.0)
+    weighted = (np.where(valid, asset_returns, 0.0) * exposure).sum(axis=1)
+    total = exposure.sum(axis=1)
+
+    returns = np.full(len(total), np.nan)
+    np.divide(weighted, total, out=returns, where=total > 0)
+    return returns
+
+  # =========================
+  # 📐 지표
+  # =========================
+
+  @staticmethod
+  def _summary_metrics(returns: np.ndarray, dates: np.ndarray) -> Dict:
+    """연율화 수익률/변동성, 샤프 비율, 최대 낙폭"""
+    annual_return = float(returns.mean()) * RISK_TRADING_DAYS_PER_YEAR
+    volatility = float(returns.std(ddof=1)) * math.sqrt(RISK_TRADING_DAYS_PER_YEAR)
+    risk_free_rate = get_settings().portfolio_risk_free_rate
+
+    wealth = np.cumprod(1 + returns)
+    peaks = np.maximum.accumulate(wealth)
+    drawdowns = wealth / peaks - 1
+    trough = int(drawdowns.argmin())
+    peak = int(wealth[:trough + 1].argmax())
+
+    return {
+      "start_date": str(dates[0]),
+      "end_date": str(dates[-1]),
+      "observation_count": int(returns.size),
+      "annualized_return": annual_return * 100,
+      "volatility": volatility * 100,
+      "sharpe_ratio": (annual_return - risk_free_rate) / volatility if volatility > 0 else None,
+      "max_drawdown": float(drawdowns[trough]) * 100,
+      "max_drawdown_peak_date": str(dates[peak]) if drawdowns[trough] < 0 else None,
+      "max_drawdown_trough_date": str(dates[trough]) if drawdowns[trough] < 0 else None
+    }
+
+  @staticmethod
+  def _rolling_volatility(returns: np.ndarray, dates: np.ndarray, window: int) -> List[Dict]:
+    """window 거래일 이동 변동성 (연율화 %)"""
+    if returns.size < window:
+      return []
+    windows = np.lib.stride_tricks.sliding_window_view(returns, window)
+    volatility = windows.std(axis=1, ddof=1) * math.sqrt(RISK_TRADING_DAYS_PER_YEAR) * 100
+    return [
+      {"date": day, "volatility": value}
+      for day, value in zip(dates[window - 1:].astype(str).tolist(), volatility.tolist())
+    ]
+
+  @staticmethod
+  def _beta(name: str, symbol: str, returns: np.ndarray, benchmark_returns: np.ndarray) -> Dict:
+    """벤치마크 수익률이 있는 날만으로 베타/상관계수"""
+    mask = ~np.isnan(benchmark_returns)
+    beta = correlation = None
+
+    if mask.sum() >= 2:
+      portfolio, benchmark = returns[mask], benchmark_returns[mask]
+      covariance = np.cov(portfolio, benchmark, ddof=1)
+      if covariance[1, 1] > 0:
+        beta = float(covariance[0, 1] / covariance[1, 1])
+      if covariance[0, 0] > 0 and covariance[1, 1] > 0:
+        correlation = float(covariance[0, 1] / math.sqrt(covariance[0, 0] * covariance[1, 1]))
+
+    return {"benchmark": name, "symbol": symbol, "beta": beta, "correlation": correlation}
+
+  @staticmethod
+  def _empty_result(rolling_window: int) -> Dict:
+    return {
+      "start_date": None,
+      "end_date": None,
+      "observation_count": 0,
+      "annualized_return": None,
+      "volatility": None,
+      "sharpe_ratio": None,
+      "max_drawdown": None,
+      "max_drawdown_peak_date": None,
+      "max_drawdown_trough_date": None,
+      "rolling_window": rolling_window,
+      "rolling_volatility": [],
+      "betas": [],
+      "excluded_symbols": []
+    }
+
+
+# 싱글톤 인스턴스
+portfolio_risk_service = PortfolioRiskService()
@@ -1,18 +1,23 @@
 import asyncio
 import logging
-from typing import Dict, List
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, time
 
+import numpy as np
 from sqlalchemy import select
 
 from app.crud.holding_crud import holding_crud
 from app.crud.stock_crud import stock_crud
 from app.external.kis_api import kis_api_service
 from app.external.exchange_rate_api import exchange_rate_service
+from app.services.trading_calendar_service import trading_calendar_service
+from app.services.portfolio_cache import portfolio_cache
+from app.services.portfolio_valuation import PortfolioValuation, valuate_holdings
 from app.schemas.common_schemas import (
   StockDataResponse, CompletePortfolioResponse,  PortfolioSummaryData
 )
 from app.core.exceptions import CustomHTTPException
+from app.utils.keyset import decode_cursor, encode_cursor
 from app.config.database import get_async_session
 from app.config.database import AsyncSessionLocal
 
@@ -24,90 +29,48 @@ class PortfolioService:
   @staticmethod
   async def get_complete_portfolio(user_id: int) -> CompletePortfolioResponse:
     """완전한 포트폴리오 정보 조회 (Holdings 기반)"""
-    db_gen = get_async_session()
-    db = await db_gen.__anext__()
+    response, _ = await PortfolioService.get_complete_portfolio_with_etag(user_id)
+    return response
+  
+  @staticmethod
+  async def get_complete_portfolio_with_etag(user_id: int) -> Tuple[CompletePortfolioResponse, str]:
+    """
+    완전한 포트폴리오 정보와 ETag 조회
     
+    - 보유 종목 집계는 거래 생성 전까지 캐시 재사용
+    - 시세는 KIS 시세 캐시/실시간 체결가에서 다시 읽고, 보유 집계·시세·환율이 모두 같으면 이전 응답을 그대로 반환
+    """
     try:
-      # 1. Holdings 기반 포트폴리오 데이터와 환율 병렬 조회
-      portfolio_task = holding_crud.get_user_portfolio_by_stocks(db, user_id)
-      exchange_task = exchange_rate_service.get_usd_krw_rate()
-      
-      portfolio_data, exchange_data = await asyncio.gather(portfolio_task, exchange_task)
-      exchange_rate = exchange_data["currency"]["exchange_rate"]
-      
-      if not portfolio_data:
-        return PortfolioService._empty_response(exchange_rate)
-      
-      logger.info(f"Holdings 기반 포트폴리오 데이터: {len(portfolio_data)}개 종목")
-      
-      # 2. 각 Symbol의 현재가 조회 (병렬)
-      price_tasks = [
-        PortfolioService._get_price_safe(user_id, holding["stock_symbol"], holding["market_type"])
-        for holding in portfolio_data
-      ]
-      price_results = await asyncio.gather(*price_tasks, return_exceptions=True)
-      
-      # 3. StockData 변환 및 국내/해외 분류
-      domestic_stocks = []
-      overseas_stocks = []
-      
-      for i, holding in enumerate(portfolio_data):
-        price_data = price_results[i]
-        
-        # API 조회 실패한 종목은 건너뛰기
-        if isinstance(price_data, Exception) or price_data is None:
-          logger.warning(f"종목 {holding['stock_symbol']} 가격 조회 실패, 포트폴리오에서 제외")
-          continue
-        
-        current_price = price_data["current_price"]
-        previous_close = price_data["previous_close"] 
-        
-        # StockData 계산 (Holdings 기반)
-        stock_data = PortfolioService._calculate_stock_data_from_holdings(
-          holding, previous_close, current_price, exchange_rate
-        )
-        
-        # 국내/해외 분류
-        if holding["market_type"] == "DOMESTIC":
-          domestic_stocks.append(stock_data)
-        else:
-          overseas_stocks.append(stock_data)
-      
-      # 4. 전체 합계 계산 (KRW 기준)
-      totals = PortfolioService._calculate_totals(domestic_stocks, overseas_stocks, exchange_rate, portfolio_data)
-      
-      # 5. 국내/해외 요약 데이터 계산
-      domestic_summary = PortfolioService._calculate_domestic_summary(domestic_stocks)
-      overseas_summary = PortfolioService._calculate_overseas_summary(overseas_stocks)
-      
-      # 6. 전체 수익률 계산
-      domestic_cost_krw = sum(stock.avg_cost * stock.shares for stock in domestic_stocks)
-      overseas_cost_krw = sum(holding["total_investment_krw"] for holding in portfolio_data if holding.get("market_type") == "OVERSEAS")
-      total_cost_krw = domestic_cost_krw + overseas_cost_krw
-
-      total_gain_percent = (totals["total_total_gain"] / total_cost_krw * 100) if total_cost_krw > 0 else 0.0
-      total_day_gain_percent = (totals["total_day_gain"] / totals["total_portfolio"] * 100) if totals["total_portfolio"] > 0 else 0.0
-      
-      return CompletePortfolioResponse(
-        # 전체 포트폴리오 카드
-        total_portfolio_value_krw=totals["total_portfolio"],
-        total_day_gain_krw=totals["total_day_gain"],
-        total_day_gain_percent=total_day_gain_percent,
-        total_total_gain_krw=totals["total_total_gain"],
-        total_total_gain_percent=total_gain_percent,
-        
-        # 요약 카드
-        domestic_summary=domestic_summary,
-        overseas_summary=overseas_summary,
-        
-        # 테이블 데이터
-        domestic_stocks=domestic_stocks,
-        overseas_stocks=overseas_stocks,
-        
-        # 메타 데이터
-        exchange_rate=exchange_rate,
-        updated_at=datetime.now().isoformat()
+      # 1. 보유 종목 집계(캐시) → 보유 통화 환율 한 번에 조회
+      version = portfolio_cache.holdings_version(user_id)
+      portfolio_data = await PortfolioService.get_portfolio_holdings(user_id, version)
+      exchange_rates = await PortfolioService.get_exchange_rates(portfolio_data)
+      
+      # 2. 전체 Symbol 현재가 일괄 조회 (시세 캐시 우선, 국내 30종목 단위 멀티 시세)
+      price_results = await PortfolioService._get_prices_batch(user_id, portfolio_data) if portfolio_data else []
+      
+      # 입력이 이전과 같으면 계산 생략 (보유 집계 값 포함 - 다른 프로세스의 보유 변경은 버전이 바뀌지 않음)
+      fingerprint = portfolio_cache.make_fingerprint(
+        version,
+        [
+          (
+            holding["stock_symbol"],
+            holding["total_quantity"],
+            holding["total_investment"],
+            holding["total_investment_krw"],
+            (price["current_price"], price["previous_close"]) if price else None
+          )
+          for holding, price in zip(portfolio_data, price_results)
+        ],
+        exchange_rates
       )
+      snapshot = portfolio_cache.get_snapshot(user_id, fingerprint)
+      if snapshot is not None:
+        return snapshot
+      
+      response = PortfolioService._build_complete_portfolio(portfolio_data, price_results, exchange_rates)
+      etag = portfolio_cache.set_snapshot(user_id, fingerprint, response)
+      return response, etag
       
     except Exception as e:
       logger.error(f"포트폴리오 조회 오류: user_id={user_id}, error={str(e)}")
@@ -116,8 +79,99 @@ class PortfolioService:
         detail="포트폴리오 데이터를 불러올 수 없습니다.",
         error_code="PORTFOLIO_ERROR"
       )
-    finally:
-      await db.close()
+  
+  @staticmethod
+  async def get_portfolio_holdings(user_id: int, version: int) -> List[Dict]:
+    """종목별 보유 집계 (캐시 우선, 없으면 DB 조회 후 캐시)"""
+    portfolio_data = portfolio_cache.get_holdings(user_id)
+    if portfolio_data is not None:
+      return portfolio_data
+    
+    portfolio_data = await PortfolioService._load_portfolio_holdings(user_id)
+    portfolio_cache.set_holdings(user_id, version, portfolio_data)
+    logger.info(f"Holdings 기반 포트폴리오 데이터: {len(portfolio_data)}개 종목")
+    return portfolio_data
+  
+  @staticmethod
+  async def _load_portfolio_holdings(user_id: int) -> List[Dict]:
+    """종목별 보유 집계 DB 조회"""
+    async with AsyncSessionLocal() as db:
+      return await holding_crud.get_user_portfolio_by_stocks(db, user_id)
+  
+  @staticmethod
+  async def get_exchange_rates(portfolio_data: List[Dict]) -> Dict[str, float]:
+    """보유 종목 통화(+ 표시용 USD)의 1단위당 원화 환율 - 통화 수와 관계없이 환율 조회 1회"""
+    currencies = {"USD"} | {
+      holding.get("currency") or "USD" for holding in portfolio_data if holding.get("market_type") == "OVERSEAS"
+    }
+    exchange_rates = await exchange_rate_service.get_krw_rates(currencies)
+    
+    if "USD" not in exchange_rates:
+      raise CustomHTTPException(
+        status_code=500,
+        detail="환율 정보를 불러올 수 없습니다.",
+        error_code="EXCHANGE_RATE_ERROR"
+      )
+    for currency in currencies - exchange_rates.keys():
+      logger.warning(f"환율 정보 없음: {currency}, 해당 통화 종목은 평가에서 제외")
+    return exchange_rates
+  
+  @staticmethod
+  def _build_complete_portfolio(
+    portfolio_data: List[Dict], price_results: List[Optional[Dict]], exchange_rates: Dict[str, float]
+  ) -> CompletePortfolioResponse:
+    """보유 종목 집계 + 시세 + 통화별 환율로 포트폴리오 응답 계산"""
+    if not portfolio_data:
+      return PortfolioService._empty_response(exchange_rates)
+    
+    # 3. 전체 종목 일괄 평가 (배열 연산, 종목마다 자기 통화 환율)
+    valuation = valuate_holdings(portfolio_data, price_results, exchange_rates)
+    return PortfolioService._response_from_valuation(valuation, exchange_rates)
+  
+  @staticmethod
+  def _response_from_valuation(
+    valuation: PortfolioValuation, exchange_rates: Dict[str, float]
+  ) -> CompletePortfolioResponse:
+    """평가 결과 → 포트폴리오 응답 (실시간 스트림 스냅샷과 공용)"""
+    portfolio_data = valuation.holdings
+    
+    for i in np.flatnonzero(~valuation.valid):
+      # 시세/환율 조회 실패한 종목은 건너뛰기
+      logger.warning(f"종목 {portfolio_data[i]['stock_symbol']} 시세/환율 조회 실패, 포트폴리오에서 제외")
+    
+    # 4. StockData 변환 및 국내/해외 분류 (응답 모델은 여기서만 생성)
+    domestic_stocks = []
+    overseas_stocks = []
+    
+    for i, row in valuation.rows():
+      holding = portfolio_data[i]
+      stocks = overseas_stocks if holding.get("market_type") == "OVERSEAS" else domestic_stocks
+      stocks.append(PortfolioService._stock_response(holding, row))
+    
+    # 5. 전체 합계(KRW) 및 국내/해외 요약
+    totals = valuation.totals()
+    
+    return CompletePortfolioResponse(
+      # 전체 포트폴리오 카드
+      total_portfolio_value_krw=totals["total_portfolio"],
+      total_day_gain_krw=totals["total_day_gain"],
+      total_day_gain_percent=totals["total_day_gain_percent"],
+      total_total_gain_krw=totals["total_total_gain"],
+      total_total_gain_percent=totals["total_total_gain_percent"],
+      
+      # 요약 카드
+      domestic_summary=PortfolioSummaryData(**valuation.summary(overseas=False)),
+      overseas_summary=PortfolioSummaryData(**valuation.summary(overseas=True)),
+      
+      # 테이블 데이터
+      domestic_stocks=domestic_stocks,
+      overseas_stocks=overseas_stocks,
+      
+      # 메타 데이터
+      exchange_rate=exchange_rates["USD"],
+      exchange_rates=exchange_rates,
+      updated_at=datetime.now().isoformat()
+    )
   
   @staticmethod
   async def get_stock_holdings_detail(user_id: int, stock_id: int):
@@ -166,7 +220,7 @@ class PortfolioService:
       await db.close()
   
   @staticmethod
-  def _empty_response(exchange_rate: float) -> CompletePortfolioResponse:
+  def _empty_response(exchange_rates: Dict[str, float]) -> CompletePortfolioResponse:
     """빈 포트폴리오 응답"""
     return CompletePortfolioResponse(
       # 전체 포트폴리오 카드
@@ -197,10 +251,43 @@ class PortfolioService:
       overseas_stocks=[],
       
       # 메타 데이터
-      exchange_rate=exchange_rate,
+      exchange_rate=exchange_rates["USD"],
+      exchange_rates=exchange_rates,
       updated_at=datetime.now().isoformat()
     )
   
+  @staticmethod
+  async def _get_prices_batch(user_id: int, portfolio_data: List[Dict]) -> List[Optional[Dict]]:
+    """보유 종목 현재가 일괄 조회 (portfolio_data 순서대로, 실패 종목은 None)"""
+    stocks = [
+      {
+        "symbol": holding["stock_symbol"],
+        "market_type": holding["market_type"],
+        "exchange_code": holding.get("exchange_code")
+      }
+      for holding in portfolio_data
+    ]
+    price_map = await kis_api_service.get_multiple_stock_prices(user_id, stocks)
+    
+    # 휴장 종목은 완전한 거래 데이터로 보정 (병렬)
+    results: List[Optional[Dict]] = [None] * len(stocks)
+    pending = []
+    for i, stock in enumerate(stocks):
+      current_data = price_map.get((stock["symbol"], stock["market_type"]))
+      if not current_data or current_data.get("error"):
+        logger.error(f"주가 조회 실패: {stock['symbol']}, "
+                     f"{current_data.get('error') if current_data else '응답 없음'}")
+        continue
+      pending.append((i, PortfolioService._resolve_market_closed(
+        user_id, stock["symbol"], stock["market_type"], current_data, stock["exchange_code"]
+      )))
+    
+    resolved = await asyncio.gather(*[task for _, task in pending])
+    for (i, _), price_data in zip(pending, resolved):
+      results[i] = price_data
+    
+    return results
+
   @staticmethod
   async def _get_price_safe(user_id: int, symbol: str, market_type: str) -> Dict:
     """안전한 주가 조회 - 완전한 거래 데이터가 있는 날짜 찾기"""
@@ -209,6 +296,19 @@ class PortfolioService:
       current_data = await kis_api_service.get_stock_price(user_id, symbol, market_type)
       logger.info(f"현재가 조회: {symbol} = {current_data}")
       
+      return await PortfolioService._resolve_market_closed(user_id, symbol, market_type, current_data)
+      
+    except Exception as e:
+      logger.error(f"주가 조회 실패: {symbol}, {str(e)}")
+      # API 실패 시 None 반환하여 에러 상황 명확히 표시
+      return None
+
+  @staticmethod
+  async def _resolve_market_closed(
+    user_id: int, symbol: str, market_type: str, current_data: Dict, exchange_code: Optional[str] = None
+  ) -> Dict:
+    """휴장으로 판단되면 완전한 거래 데이터가 있는 과거 날짜 시세로 대체"""
+    try:
       # 2. 휴장 상태 확인
       current_price = current_data.get("current_price", 0)
       previous_close = current_data.get("previous_close", 0) 
@@ -224,7 +324,7 @@ class PortfolioService:
         
         # 4. 완전한 거래 데이터가 있는 과거 날짜 찾기
         complete_data = await PortfolioService._find_complete_trading_data(
-          user_id, symbol, market_type, max_days=10
+          user_id, symbol, market_type, exchange_code=exchange_code
         )
         
         if complete_data:
@@ -240,203 +340,45 @@ class PortfolioService:
       return current_data
       
     except Exception as e:
-      logger.error(f"주가 조회 실패: {symbol}, {str(e)}")
-      # API 실패 시 None 반환하여 에러 상황 명확히 표시
-      return None
-
-  @staticmethod
-  async def _find_complete_trading_data(user_id: int, symbol: str, market_type: str, max_days: int = 10) -> Dict:
-    """완전한 거래 데이터가 있는 날짜 찾기"""
-    current_date = datetime.now()
-    days_checked = 0
-    
-    while days_checked < max_days:
-      days_checked += 1
-      check_date = current_date - timedelta(days=days_checked)
-      
-      # 주말 건너뛰기
-      if check_date.weekday() >= 5:  # 토/일요일
-        continue
-      
-      date_str = check_date.strftime("%Y%m%d")
-      
-      try:
-        logger.info(f"완전한 거래 데이터 검색: {symbol}, 날짜={date_str}")
-        
-        # 과거 날짜 데이터 조회
-        historical_data = await kis_api_service.get_stock_price(
-          user_id, symbol, market_type, date_str
-        )
-        
-        # 완전한 거래 데이터 조건 확인
-        current_price = historical_data.get("current_price", 0)
-        previous_close = historical_data.get("previous_close", 0)
-        day_change = historical_data.get("day_change", 0)
-        volume = historical_data.get("volume", 0)
-        daily_return_rate = historical_data.get("daily_return_rate", 0)
-        
-        # 완전한 데이터 조건: 거래량이 있고, 변동률이 계산되어 있음
-        if (current_price > 0 and 
-            volume > 0 and 
-            not (current_price == previous_close and day_change == 0.0 and daily_return_rate == 0.0)):
-          
-          logger.info(f"완전한 거래 데이터 발견: {symbol}, 날짜={date_str}, "
-                     f"거래량={volume:,}, 변동률={daily_return_rate}%")
-          return historical_data
-        
-        logger.info(f"불완전한 데이터: {symbol}, 날짜={date_str}, 계속 검색...")
-        
-      except Exception as e:
-        logger.warning(f"과거 데이터 조회 실패: {symbol}, 날짜={date_str}, {str(e)}")
-        continue
-    
-    logger.warning(f"완전한 거래 데이터 찾기 실패: {symbol}, {max_days}일 내 데이터 없음")
-    return None
+      logger.warning(f"휴장 보정 실패, 현재 데이터 사용: {symbol}, {str(e)}")
+      return current_data
 
   @staticmethod
-  def _calculate_stock_data_from_holdings(
-      holding: Dict, previous_close: float, current_price: float, exchange_rate: float = 1.0
-    ) -> StockDataResponse:
-    """Holdings 데이터로부터 StockData 계산"""
-    shares = holding["total_quantity"]
-    avg_cost = holding["overall_average_cost"]
-    market_value = shares * current_price
-    
-    # 해외주식과 국내주식 구분하여 손익 계산
-    market_type = holding.get("market_type", "DOMESTIC")
-    if market_type == "OVERSEAS":
-      # 해외주식: USD 기준으로 계산
-      total_cost = holding["total_investment"]  # USD 원가
-      total_gain = market_value - total_cost    # USD 손익
-      total_gain_percent = (total_gain / total_cost * 100) if total_cost > 0 else 0.0
-    else:
-      # 국내주식: KRW 기준
-      total_cost = holding["total_investment"]
-      total_gain = market_value - total_cost
-      total_gain_percent = (total_gain / total_cost * 100) if total_cost > 0 else 0.0
-    
-    # 전일 대비 손익
-    day_gain = shares * (current_price - previous_close)
-    day_gain_percent = (day_gain / market_value * 100) if market_value > 0 else 0.0
-
-    # 시장 타입에 따른 회사명 선택
-    market_type = holding.get("market_type", "DOMESTIC")
-    if market_type == "OVERSEAS":
-      # 해외주식: 영문 회사명 사용 (없으면 한글명)
-      company_name = holding.get("company_name_en") or holding["company_name"]
-      day_gain = round(day_gain, 2)
-      total_gain = round(total_gain, 2)
-      market_value = round(market_value, 2)
-      avg_cost = round(avg_cost, 2)
-      current_price = round(current_price, 2)
-    else:
-      # 국내주식: 한글 회사명 사용
-      company_name = holding["company_name"]
-      day_gain = round(day_gain)
-      total_gain = round(total_gain)
-      market_value = round(market_value)
-      avg_cost = round(avg_cost)
-      current_price = round(current_price)
-    
-    return StockDataResponse(
-      symbol=holding["stock_symbol"],
-      company_name=company_name,
-      shares=shares,
-      avg_cost=avg_cost,
-      current_price=current_price,
-      market_value=market_value,
-      day_gain=day_gain,
-      day_gain_percent=day_gain_percent,
-      total_gain=total_gain,
-      total_gain_percent=total_gain_percent
+  async def _find_complete_trading_data(
+    user_id: int, symbol: str, market_type: str, exchange_code: Optional[str] = None
+  ) -> Optional[Dict]:
+    """거래소의 마지막 완결 거래일 시세 조회 (거래일 달력 기준, 과거 시세는 영구 캐시)"""
+    session_date = await trading_calendar_service.get_last_complete_session(
+      user_id, market_type, exchange_code
     )
-  
-  @staticmethod
-  def _calculate_totals(domestic_stocks: List[StockDataResponse], overseas_stocks: List[StockDataResponse], exchange_rate: float, portfolio_data: List[Dict]) -> Dict:
-    """전체 합계 계산 (KRW 기준)"""
-    # 국내 합계 (KRW)
-    domestic_total = sum(stock.market_value for stock in domestic_stocks)
-    domestic_day_gain = sum(stock.day_gain for stock in domestic_stocks)
-    domestic_total_gain = sum(stock.total_gain for stock in domestic_stocks)
-    
-    # 해외 합계 (USD → KRW)
-    overseas_total_usd = sum(stock.market_value for stock in overseas_stocks)
-    overseas_day_gain_usd = sum(stock.day_gain for stock in overseas_stocks)
-    
-    # 해외주식 KRW 기준 Total Gain 별도 계산
-    overseas_total_gain_krw = 0
-    for stock in overseas_stocks:
-      # portfolio_data에서 해당 종목의 holding 정보 찾기
-      holding = next((h for h in portfolio_data if h["stock_symbol"] == stock.symbol and h.get("market_type") == "OVERSEAS"), None)
-      if holding:
-        total_cost_krw = holding["total_investment_krw"]
-        market_value_krw = stock.market_value * exchange_rate
-        overseas_total_gain_krw += (market_value_krw - total_cost_krw)
-    
-    overseas_total_krw = overseas_total_usd * exchange_rate
-    overseas_day_gain_krw = overseas_day_gain_usd * exchange_rate
+    if session_date is None:
+      logger.warning(f"마지막 거래일 확인 불가: {symbol}")
+      return None
     
-    return {
-      "total_portfolio": domestic_total + overseas_total_krw,
-      "total_day_gain": domestic_day_gain + overseas_day_gain_krw,
-      "total_total_gain": domestic_total_gain + overseas_total_gain_krw
-    }
-  
-  @staticmethod
-  def _calculate_domestic_summary(stocks: List[StockDataResponse]) -> PortfolioSummaryData:
-    """국내주식 요약 계산"""
-    if not stocks:
-      return PortfolioSummaryData(
-        market_value=0.0,
-        day_gain=0.0,
-        day_gain_percent=0.0,
-        total_gain=0.0,
-        total_gain_percent=0.0
+    try:
+      historical_data = await kis_api_service.get_stock_price(
+        user_id, symbol, market_type, session_date, exchange_code=exchange_code
       )
+    except Exception as e:
+      logger.warning(f"과거 데이터 조회 실패: {symbol}, 날짜={session_date}, {str(e)}")
+      return None
     
-    market_value = sum(stock.market_value for stock in stocks)
-    day_gain = sum(stock.day_gain for stock in stocks)
-    total_gain = sum(stock.total_gain for stock in stocks)
-    total_cost = sum(stock.avg_cost * stock.shares for stock in stocks)
-    
-    day_gain_percent = (day_gain / market_value * 100) if market_value > 0 else 0.0
-    total_gain_percent = (total_gain / total_cost * 100) if total_cost > 0 else 0.0
+    if historical_data.get("current_price", 0) > 0:
+      return historical_data
     
-    return PortfolioSummaryData(
-      market_value=market_value,
-      day_gain=day_gain,
-      day_gain_percent=day_gain_percent,
-      total_gain=total_gain,
-      total_gain_percent=total_gain_percent
-    )
+    logger.warning(f"거래 데이터 없음 (거래정지 등): {symbol}, 날짜={session_date}")
+    return None
 
   @staticmethod
-  def _calculate_overseas_summary(stocks: List[StockDataResponse]) -> PortfolioSummaryData:
-    """해외주식 요약 계산 (USD 기준)"""
-    if not stocks:
-      return PortfolioSummaryData(
-        market_value=0.0,
-        day_gain=0.0,
-        day_gain_percent=0.0,
-        total_gain=0.0,
-        total_gain_percent=0.0
+  def _stock_response(holding: Dict, row: Dict) -> StockDataResponse:
+    """평가 행(PortfolioValuation.rows) → 종목 행 응답"""
+    if holding.get("market_type") == "OVERSEAS":
+      # 해외주식: 영문 회사명 사용 (없으면 한글명)
+      company_name = holding.get("company_name_en") or holding["company_name"]
+      return StockDataResponse(
+        symbol=holding["stock_symbol"], company_name=company_name, currency=holding.get("currency") or "USD", **row
       )
-    
-    market_value = sum(stock.market_value for stock in stocks)
-    day_gain = sum(stock.day_gain for stock in stocks)
-    total_gain = sum(stock.total_gain for stock in stocks)
-    total_cost = sum(stock.avg_cost * stock.shares for stock in stocks)
-    
-    day_gain_percent = (day_gain / market_value * 100) if market_value > 0 else 0.0
-    total_gain_percent = (total_gain / total_cost * 100) if total_cost > 0 else 0.0
-    
-    return PortfolioSummaryData(
-      market_value=market_value,
-      day_gain=day_gain,
-      day_gain_percent=day_gain_percent,
-      total_gain=total_gain,
-      total_gain_percent=total_gain_percent
-    )
+    return StockDataResponse(symbol=holding["stock_symbol"], company_name=holding["company_name"], **row)
   
   async def get_lots_by_broker(self, user_id: int, stock_symbol: str):
     """특정 종목의 브로커별 상세 보유현황 """
@@ -507,133 +449,117 @@ class PortfolioService:
     return enhanced_details
 
   @staticmethod
-  async def get_realized_profits(user_id: int) -> Dict:
+  async def get_realized_profits(
+    user_id: int,
+    market_type: Optional[str] = None,
+    broker_id: Optional[int] = None,
+    stock_symbol: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = 50
+  ) -> Dict:
     """
-    실현손익 내역 조회 (클라이언트 필터링 방식)
-    - 모든 데이터를 한번에 가져와서 클라이언트에서 필터링
+    실현손익 내역 조회 (서버 필터링 + 키셋 페이지네이션)
+    - 필터: 시장/증권사/종목/매도일 범위
+    - 정렬: 매도일시(+id) 내림/오름차순, cursor 이후 limit건
+    - metadata(종목/증권사 목록)는 첫 페이지(cursor 없음)에서만 별도 쿼리로 조회
     """
-    from app.config.database import get_async_session
     from app.crud.transaction_crud import transaction_crud
     
-    db_gen = get_async_session()
-    db = await db_gen.__anext__()
+    after = decode_cursor(cursor) if cursor else None
     
-    try:
-      # 1. 현재 환율 조회와 실현손익 데이터 조회를 병렬로 처리
-      exchange_task = exchange_rate_service.get_usd_krw_rate()
-      raw_data_task = transaction_crud.get_realized_profits_db(db=db, user_id=user_id)
-      
-      # 병렬 실행 (메타데이터는 raw_data에서 추출)
-      exchange_data, raw_data = await asyncio.gather(
-        exchange_task, raw_data_task
+    async with AsyncSessionLocal() as db:
+      # 1. 다음 페이지 여부 확인을 위해 limit + 1건 조회
+      rows = await transaction_crud.get_realized_profits_db(
+        db=db,
+        user_id=user_id,
+        market_type=market_type,
+        broker_id=broker_id,
+        stock_symbol=stock_symbol,
+        start_date=datetime.combine(start_date, time.min) if start_date else None,
+        end_date=datetime.combine(end_date, time.max) if end_date else None,
+        descending=sort_order == "desc",
+        after=after,
+        limit=limit + 1
       )
       
-      exchange_rate = exchange_data["currency"]["exchange_rate"]
-      
-      # 2. 메타데이터 수집 (실제 데이터에서 직접 추출)
-      unique_stocks = {}
-      unique_brokers = {}
-      transactions = []
-      
-      # 3. 각 거래 데이터를 프론트엔드 형식으로 변환하면서 메타데이터도 수집
-      for row in raw_data:
-        # 시장 구분 결정
-        market_type_value = "DOMESTIC" if row["country_code"] == "KR" else "OVERSEAS"
-        
-        # 회사명 결정 (해외주식은 영문명 우선)
-        if market_type_value == "OVERSEAS":
-          company_name = row.get("company_name_en") or row["company_name"]
-          company_name_en = row.get("company_name_en", "")
-        else:
-          company_name = row["company_name"]
-          company_name_en = ""
-        
-        # 수익률 계산
-        realized_profit_percent = 0.0
-        if row["avg_cost_at_transaction"] and row["avg_cost_at_transaction"] > 0:
-          profit_per_share = float(row["price"] - row["avg_cost_at_transaction"])
-          realized_profit_percent = profit_per_share / float(row["avg_cost_at_transaction"]) * 100
-        
-        # 원화 실현손익 계산 (매도 당시 환율 적용)
-        realized_profit_krw = 0.0
-        if row["total_realized_profit"]:
-          if market_type_value == "OVERSEAS":
-            # 해외주식: USD 실현손익 × 매도 당시 환율
-            usd_profit = float(row["total_realized_profit"])
-            sell_exchange_rate = float(row["exchange_rate"]) if row["exchange_rate"] else exchange_rate
-            realized_profit_krw = usd_profit * sell_exchange_rate
-          else:
-            # 국내주식: 이미 KRW
-            realized_profit_krw = float(row["total_realized_profit"])
-            # 국내주식 계산 검증 로그
-            logger.info(f"국내주식 실현손익: {row['symbol']} - KRW손익: {realized_profit_krw}")
-
-            # 해외주식 계산 검증 로그
-            logger.info(f"해외주식 실현손익 계산: {row['symbol']} - USD손익: {usd_profit}, 환율: {sell_exchange_rate}, KRW손익: {realized_profit_krw}")
-        
-        # 수익률 계산 검증 로그
-        logger.info(f"수익률 계산: {row['symbol']} - 매도가: {row['price']}, 평단가: {row['avg_cost_at_transaction']}, 수익률: {realized_profit_percent}%")
-        # 프론트엔드 형식으로 변환
-        profit_item = {
-          "id": str(row["id"]),
-          "symbol": row["symbol"],
-          "company_name": company_name,           
-          "company_name_en": company_name_en,     
-          "broker": row["broker_name"],
-          "broker_id": row["broker_id"],          
-          "market_type": market_type_value,       
-          "sell_date": row["transaction_date"].isoformat(),  
-          "shares": int(row["quantity"]),
-          "sell_price": float(row["price"]),      
-          "avg_cost": float(row["avg_cost_at_transaction"]) if row["avg_cost_at_transaction"] else 0.0,  
-          "realized_profit": float(row["total_realized_profit"]) if row["total_realized_profit"] else 0.0,  
-          "realized_profit_percent": round(realized_profit_percent, 2),  
-          "realized_profit_krw": round(realized_profit_krw, 0),  
-          "currency": row["currency"],
-          "exchange_rate": float(row["exchange_rate"]) if row["exchange_rate"] else exchange_rate,  
-          "commission": float(row["commission"]) if row["commission"] else 0.0,
-          "transaction_tax": float(row["transaction_tax"]) if row["transaction_tax"] else 0.0  
-        }
-        transactions.append(profit_item)
-        
-        # 메타데이터 수집 (중복 제거)
-        symbol = row["symbol"]
-        if symbol not in unique_stocks:
-          unique_stocks[symbol] = {
-            "symbol": symbol,
-            "company_name": row["company_name"],
-            "company_name_en": row.get("company_name_en", "") or ""
-          }
-        
-        broker_id = row["broker_id"]
-        if broker_id not in unique_brokers:
-          unique_brokers[broker_id] = {
-            "id": broker_id,
-            "name": row["broker_name"],
-            "display_name": row["broker_name"]
-          }
-      
-      # 4. 메타데이터 정렬
-      available_stocks = sorted(unique_stocks.values(), key=lambda x: x["symbol"])
-      available_brokers = sorted(unique_brokers.values(), key=lambda x: x["display_name"])
-      
-      # 5. 응답 데이터 구성
-      response_data = {
-        "success": True,
-        "data": {
-          "transactions": transactions,
-          "metadata": {
-            "available_stocks": available_stocks,
-            "available_brokers": available_brokers
-          }
+      # 2. 메타데이터 (필터와 무관한 전체 종목/증권사 목록)
+      metadata = None
+      if cursor is None:
+        raw_metadata = await transaction_crud.get_realized_profits_metadata(db, user_id)
+        metadata = {
+          "available_stocks": raw_metadata["stocks"],
+          "available_brokers": raw_metadata["brokers"]
         }
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    # 3. 매도 당시 환율이 없는 해외 거래만 현재 환율로 보완 (통화별 1회 조회)
+    missing_currencies = {
+      row["currency"] for row in rows if row["country_code"] != "KR" and not row["exchange_rate"]
+    }
+    fallback_rates = await exchange_rate_service.get_krw_rates(missing_currencies) if missing_currencies else {}
+    
+    transactions = [PortfolioService._to_realized_profit_item(row, fallback_rates) for row in rows]
+    
+    logger.info(f"실현손익 처리 완료: user_id={user_id}, 건수={len(transactions)}, has_more={has_more}")
+    return {
+      "success": True,
+      "data": {
+        "transactions": transactions,
+        "metadata": metadata,
+        "next_cursor": encode_cursor(rows[-1]["transaction_date"], rows[-1]["id"]) if has_more else None,
+        "has_more": has_more
       }
-      
-      logger.info(f"실현손익 처리 완료: user_id={user_id}, 건수={len(transactions)}")
-      return response_data
-      
-    finally:
-      await db.close()
+    }
+  
+  @staticmethod
+  def _to_realized_profit_item(row: Dict, fallback_rates: Dict[str, float]) -> Dict:
+    """실현손익 Raw 행 → 응답 형식 (해외 원화 손익은 매도 당시 환율 적용)"""
+    market_type_value = "DOMESTIC" if row["country_code"] == "KR" else "OVERSEAS"
+    
+    # 회사명 결정 (해외주식은 영문명 우선)
+    if market_type_value == "OVERSEAS":
+      company_name = row.get("company_name_en") or row["company_name"]
+      company_name_en = row.get("company_name_en") or ""
+      exchange_rate = float(row["exchange_rate"]) if row["exchange_rate"] else fallback_rates.get(row["currency"], 0.0)
+    else:
+      company_name = row["company_name"]
+      company_name_en = ""
+      exchange_rate = float(row["exchange_rate"]) if row["exchange_rate"] else 1.0
+    
+    avg_cost = float(row["avg_cost_at_transaction"]) if row["avg_cost_at_transaction"] else 0.0
+    realized_profit = float(row["total_realized_profit"]) if row["total_realized_profit"] else 0.0
+    
+    # 수익률 계산
+    realized_profit_percent = (float(row["price"]) - avg_cost) / avg_cost * 100 if avg_cost > 0 else 0.0
+    
+    # 원화 실현손익 (국내는 이미 KRW)
+    realized_profit_krw = realized_profit * exchange_rate if market_type_value == "OVERSEAS" else realized_profit
+    
+    return {
+      "id": str(row["id"]),
+      "symbol": row["symbol"],
+      "company_name": company_name,
+      "company_name_en": company_name_en,
+      "broker": row["broker_name"],
+      "broker_id": row["broker_id"],
+      "market_type": market_type_value,
+      "sell_date": row["transaction_date"].isoformat(),
+      "shares": int(row["quantity"]),
+      "sell_price": float(row["price"]),
+      "avg_cost": avg_cost,
+      "realized_profit": realized_profit,
+      "realized_profit_percent": round(realized_profit_percent, 2),
+      "realized_profit_krw": round(realized_profit_krw, 0),
+      "currency": row["currency"],
+      "exchange_rate": exchange_rate,
+      "commission": float(row["commission"]) if row["commission"] else 0.0,
+      "transaction_tax": float(row["transaction_tax"]) if row["transaction_tax"] else 0.0
+    }
 
 
 # 싱글톤 인스턴스
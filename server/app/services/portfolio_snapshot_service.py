@@ -0,0 +1,459 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.config.settings import get_settings
+from app.config.database import AsyncSessionLocal
+from app.crud.holding_crud import holding_crud
+from app.crud.portfolio_snapshot_crud import portfolio_snapshot_crud
+from app.crud.transaction_crud import transaction_crud
+from app.external.exchange_rate_api import exchange_rate_service
+from app.services.portfolio_valuation import valuate_holdings
+from app.services.price_history_service import price_history_service
+from app.services.trading_calendar_service import trading_calendar_service
+
+logger = logging.getLogger(__name__)
+
+KST = ZoneInfo("Asia/Seoul")
+MARKET_TYPES = ("DOMESTIC", "OVERSEAS")
+
+# 스냅샷 일괄 저장 단위
+SNAPSHOT_INSERT_CHUNK = 1000
+
+# (user_id, 날짜, market_type) → [순투입액, 실현손익] (원화)
+FlowMap = Dict[Tuple[int, date, str], List[float]]
+
+
+class PortfolioSnapshotService:
+  """
+  일별 포트폴리오 NAV 스냅샷 작성
+
+  - 장 마감 후(PORTFOLIO_SNAPSHOT_RUN_TIME, KST) 전체 사용자의 보유 집계를 종목별로 한 번씩 저장된 종가로 평가해 기록한다.
+  - 마지막 작성 이후 과거 일자 거래가 등록된 사용자는 가장 이른 변경일부터 다시 기록한다 (거래 재생).
+  - 종가는 stock_prices에서 읽고, 없는 종목만 KIS 일봉으로 채워 저장한다.
+  """
+
+  def __init__(self):
+    self._runner: Optional[asyncio.Task] = None
+    self._lock = asyncio.Lock()  # EOD/백필 동시 실행 방지
+
+  # =========================
+  # 🔌 스케줄러
+  # =========================
+
+  async def start(self) -> None:
+    """일별 작업 스케줄 시작 (앱 시작 시 lifespan에서 호출)"""
+    if not get_settings().portfolio_snapshot_enabled:
+      logger.info("포트폴리오 스냅샷 작업 비활성화 (PORTFOLIO_SNAPSHOT_ENABLED=false)")
+      return
+    if self._runner is None or self._runner.done():
+      self._runner = asyncio.create_task(self._run())
+
+  async def stop(self) -> None:
+    if self._runner is not None:
+      self._runner.cancel()
+      try:
+        await self._runner
+      except asyncio.CancelledError:
+        pass
+      self._runner = None
+
+  async def _run(self) -> None:
+    while True:
+      await asyncio.sleep(self._seconds_until_next_run())
+      try:
+        await self.run_end_of_day()
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        logger.error(f"포트폴리오 스냅샷 작업 실패: {str(e)}")
+
+  def _seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+    run_time = time.fromisoformat(get_settings().portfolio_snapshot_run_time)
+    local_now = (now or datetime.now(KST)).astimezone(KST)
+    candidate = datetime.combine(local_now.date(), run_time, tzinfo=KST)
+    if candidate <= local_now:
+      candidate += timedelta(days=1)
+    return (candidate - local_now).total_seconds()
+
+  async def get_snapshot_date(self, positions: Iterable[Dict]) -> date:
+    """
+    보유 종목 거래소별 마지막 완결 거래일 중 가장 최근 날짜 (거래일 달력 기준)
+
+    휴장한 거래소의 종목은 close_on으로 직전 종가가 쓰인다. 달력을 학습하지 못하면 직전 평일.
+    """
+    exchanges = {(p["market_type"], p.get("exchange_code")): p["user_id"] for p in positions}
+    sessions = await asyncio.gather(*[
+      trading_calendar_service.get_last_complete_session(user_id, market_type, exchange_code)
+      for (market_type, exchange_code), user_id in exchanges.items()
+    ])
+    learned = [datetime.strptime(session, "%Y%m%d").date() for session in sessions if session]
+    return max(learned) if learned else self._previous_weekday()
+
+  async def get_user_snapshot_date(self, user_id: int) -> date:
+    """사용자 기준일 (국내/해외 기본 거래소의 마지막 완결 거래일 중 최근 날짜)"""
+    return await self.get_snapshot_date({"user_id": user_id, "market_type": market_type} for market_type in MARKET_TYPES)
+
+  @staticmethod
+  def _previous_weekday(now: Optional[datetime] = None) -> date:
+    """직전 평일 (KST 기준 - 국내는 전일 마감, 미국은 당일 새벽 마감분)"""
+    day = (now or datetime.now(KST)).astimezone(KST).date() - timedelta(days=1)
+    while day.weekday() >= 5:
+      day -= timedelta(days=1)
+    return day
+
+  # =========================
+  # 📸 장 마감 스냅샷
+  # =========================
+
+  async def run_end_of_day(self, snapshot_date: Optional[date] = None) -> Dict:
+    """과거 일자 거래 반영 후 기준일 스냅샷 기록 (기본 기준일: 보유 거래소의 마지막 완결 거래일)"""
+    async with self._lock:
+      # 1. 현재 보유 집계 (전체 사용자)
+      async with AsyncSessionLocal() as db:
+        positions = await holding_crud.get_all_positions(db)
+      snapshot_date = snapshot_date or await self.get_snapshot_date(positions)
+
+      # 2. 마지막 작성 이후 등록된 과거 일자 거래(스냅샷이 없는 사용자는 기준일 이전 거래) → 변경일부터 재계산
+      async with AsyncSessionLocal() as db:
+        changes = await portfolio_snapshot_crud.get_backdated_changes(db, snapshot_date)
+
+      for user_id, change in changes.items():
+        try:
+          await self._backfill_user(user_id, change["from_date"], change["to_date"])
+        except Exception as e:
+          logger.error(f"스냅샷 재계산 실패: user_id={user_id}, error={str(e)}")
+
+      async with AsyncSessionLocal() as db:
+        flows = await self._load_flows(db, snapshot_date, snapshot_date)
+
+      # 3. 종목별 종가 한 번씩 조회
+      closes = await price_history_service.get_closes(
+        price_history_service.symbol_info(positions), snapshot_date, snapshot_date,
+        get_settings().portfolio_snapshot_price_lookback_days
+      )
+      prices = {symbol: price_history_service.close_on(series, snapshot_date) for symbol, series in closes.items()}
+
+      exchange_rates = (await self._get_rates([snapshot_date], self._currencies(positions)))[snapshot_date]
+      rows = self._build_rows(positions, prices, exchange_rates, flows, snapshot_date)
+
+      async with AsyncSessionLocal() as db:
+        try:
+          for i in range(0, len(rows), SNAPSHOT_INSERT_CHUNK):
+            await portfolio_snapshot_crud.upsert_snapshots(db, rows[i:i + SNAPSHOT_INSERT_CHUNK])
+          await db.commit()
+        except Exception:
+          await db.rollback()
+          raise
+
+    logger.info(
+      f"포트폴리오 스냅샷 작성 완료: 기준일={snapshot_date}, {len(rows)}행, "
+      f"종목={len(prices)}개, 재계산 사용자={len(changes)}명"
+    )
+    return {
+      "snapshot_date": snapshot_date.isoformat(),
+      "rows": len(rows),
+      "symbols": len(prices),
+      "backfilled_users": len(changes)
+    }
+
+  # =========================
+  # 🔁 거래 재생 백필
+  # =========================
+
+  async def backfill_user(
+    self,
+    user_id: int,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None
+  ) -> int:
+    """거래를 재생해 from_date~to_date 스냅샷 다시 기록 (기본: 첫 거래일 ~ 마지막 완결 거래일)"""
+    async with self._lock:
+      return await self._backfill_user(user_id, from_date, to_date or await self.get_user_snapshot_date(user_id))
+
+  async def _backfill_user(self, user_id: int, from_date: Optional[date], to_date: date) -> int:
+    async with AsyncSessionLocal() as db:
+      transactions = await transaction_crud.get_transactions_for_replay(
+        db, user_id, until=datetime.combine(to_date + timedelta(days=1), time.min)
+      )
+
+    if not transactions:
+      return 0
+
+    first_date = transactions[0]["transaction_date"].date()
+    from_date = max(from_date or first_date, first_date)
+
+    # 보유 수량/원가는 처음부터 재생해야 하므로 메모리에서 재생하고, 평가/저장은 from_date부터만 수행
+    stock_info: Dict[int, Dict] = {}
+    for tx in transactions:
+      stock_info.setdefault(tx["stock_id"], {
+        "user_id": user_id,
+        "stock_id": tx["stock_id"],
+        "stock_symbol": tx["stock_symbol"],
+        "market_type": "DOMESTIC" if tx["country_code"] == "KR" else "OVERSEAS",
+        "exchange_code": tx["exchange_code"],
+        "currency": tx["currency"]
+      })
+
+    # 평가일 (평일 + 주말 거래일) - 종가와 환율은 평가일 전체를 한 번에 조회
+    traded_days = {tx["transaction_date"].date() for tx in transactions}
+    calendar_days = (from_date + timedelta(days=n) for n in range((to_date - from_date).days + 1))
+    valuation_days = [day for day in calendar_days if day.weekday() < 5 or day in traded_days]
+
+    closes, rate_table = await asyncio.gather(
+      price_history_service.get_closes(
+        price_history_service.symbol_info(stock_info.values()), from_date, to_date,
+        get_settings().portfolio_snapshot_price_lookback_days
+      ),
+      self._get_rates(valuation_days, self._currencies(stock_info.values()))
+    )
+
+    # (stock_id, broker_id) → [수량, 원가, 원화 원가]
+    lots: Dict[Tuple[int, int], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    flows: FlowMap = defaultdict(lambda: [0.0, 0.0])
+    rows: List[Dict] = []
+
+    i = 0
+    day = first_date
+    while day <= to_date:
+      while i < len(transactions) and transactions[i]["transaction_date"].date() <= day:
+        self._apply_transaction(transactions[i], stock_info, lots, flows, user_id, day)
+        i += 1
+
+      if day in rate_table:
+        positions = self._positions_from_lots(lots, stock_info)
+        prices = {symbol: price_history_service.close_on(series, day) for symbol, series in closes.items()}
+        rows.extend(self._build_rows(positions, prices, rate_table[day], flows, day, user_ids=[user_id]))
+
+      day += timedelta(days=1)
+
+    async with AsyncSessionLocal() as db:
+      try:
+        await portfolio_snapshot_crud.delete_user_snapshots(db, user_id, from_date, to_date)
+        for j in range(0, len(rows), SNAPSHOT_INSERT_CHUNK):
+          await portfolio_snapshot_crud.upsert_snapshots(db, rows[j:j + SNAPSHOT_INSERT_CHUNK])
+        await db.commit()
+      except Exception:
+        await db.rollback()
+        raise
+
+    logger.info(f"포트폴리오 스냅샷 재계산 완료: user_id={user_id}, {from_date}~{to_date}, {len(rows)}행")
+    return len(rows)
+
+  @staticmethod
+  def _apply_transaction(
+    tx: Dict,
+    stock_info: Dict[int, Dict],
+    lots: Dict[Tuple[int, int], List[float]],
+    flows: FlowMap,
+    user_id: int,
+    day: date
+  ) -> None:
+    """거래 한 건 반영 (holding_crud의 평균단가 방식과 동일)"""
+    lot = lots[(tx["stock_id"], tx["broker_id"])]
+    market_type = stock_info[tx["stock_id"]]["market_type"]
+    quantity = int(tx["quantity"])
+    price = float(tx["price"])
+    fees = float(tx["commission"]) + float(tx["transaction_tax"])
+    exchange_rate = float(tx["exchange_rate"])
+    flow = flows[(user_id, day, market_type)]
+
+    if tx["transaction_type"] == "BUY":
+      buy_cost = quantity * price + fees
+      lot[0] += quantity
+      lot[1] += buy_cost
+      lot[2] += buy_cost * exchange_rate
+      flow[0] += buy_cost * exchange_rate
+      return
+
+    if lot[0] <= 0:
+      logger.warning(f"보유 없는 매도 거래 무시: transaction_id={tx['id']}")
+      return
+
+    quantity = min(quantity, lot[0])
+    sell_proceeds = quantity * price - fees
+    sold_cost = lot[1] / lot[0] * quantity
+    sold_cost_krw = lot[2] * quantity / lot[0]
+
+    lot[0] -= quantity
+    lot[1] = lot[1] - sold_cost if lot[0] > 0 else 0.0
+    lot[2] = lot[2] - sold_cost_krw if lot[0] > 0 else 0.0
+    flow[0] -= sell_proceeds * exchange_rate
+    flow[1] += (sell_proceeds - sold_cost) * exchange_rate
+
+  @staticmethod
+  def _positions_from_lots(
+    lots: Dict[Tuple[int, int], List[float]], stock_info: Dict[int, Dict]
+  ) -> List[Dict]:
+    """broker별 재생 결과를 종목별 보유 집계로 합산 (get_all_positions와 같은 형식)"""
+    merged: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    for (stock_id, _), (quantity, cost, cost_krw) in lots.items():
+      if quantity > 0:
+        total = merged[stock_id]
+        total[0] += quantity
+        total[1] += cost
+        total[2] += cost_krw
+
+    return [
+      {
+        **stock_info[stock_id],
+        "total_quantity": quantity,
+        "total_investment": cost,
+        "total_investment_krw": cost_krw,
+        "overall_average_cost": cost / quantity
+      }
+      for stock_id, (quantity, cost, cost_krw) in merged.items()
+    ]
+
+  # =========================
+  # 🧮 평가
+  # =========================
+
+  @staticmethod
+  def _build_rows(
+    positions: List[Dict],
+    prices: Dict[str, Optional[float]],
+    exchange_rates: Dict[str, float],
+    flows: FlowMap,
+    snapshot_date: date,
+    user_ids: Optional[List[int]] = None
+  ) -> List[Dict]:
+    """보유 집계를 한 번에 평가해 사용자/시장별 스냅샷 행 생성 (종가 없는 종목은 원가로 평가)"""
+    if user_ids is None:
+      user_ids = sorted(
+        {position["user_id"] for position in positions}
+        | {user_id for user_id, day, _ in flows if day == snapshot_date}
+      )
+    user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+    group_count = len(user_ids) * len(MARKET_TYPES)
+
+    market_value = np.zeros(group_count)
+    cost_basis = np.zeros(group_count)
+    position_count = np.zeros(group_count, dtype=int)
+
+    if positions:
+      price_results = []
+      for position in positions:
+        price = prices.get(position["stock_symbol"]) or position["overall_average_cost"]
+        price_results.append({"current_price": price, "previous_close": price})
+
+      valuation = valuate_holdings(positions, price_results, exchange_rates)
+      group_index = np.fromiter(
+        (
+          user_index[position["user_id"]] * len(MARKET_TYPES) + (1 if position["market_type"] == "OVERSEAS" else 0)
+          for position in positions
+        ),
+        dtype=np.intp,
+        count=len(positions)
+      )
+      market_value = np.bincount(group_index, valuation.market_value_krw, group_count)
+      cost_basis = np.bincount(group_index, valuation.total_investment_krw, group_count)
+      position_count = np.bincount(group_index, minlength=group_count)
+
+    rows = []
+    for user_id, i in user_index.items():
+      for m, market_type in enumerate(MARKET_TYPES):
+        g = i * len(MARKET_TYPES) + m
+        net_cash_flow, realized_gain = flows.get((user_id, snapshot_date, market_type), (0.0, 0.0))
+        if position_count[g] == 0 and not net_cash_flow and not realized_gain:
+          continue
+
+        rows.append({
+          "user_id": user_id,
+          "snapshot_date": snapshot_date,
+          "market_type": market_type,
+          "market_value_krw": round(float(market_value[g]), 2),
+          "cost_basis_krw": round(float(cost_basis[g]), 2),
+          "net_cash_flow_krw": round(net_cash_flow, 2),
+          "realized_gain_krw": round(realized_gain, 2),
+          "position_count": int(position_count[g]),
+          "exchange_rate": exchange_rates.get("USD", 1.0) if market_type == "OVERSEAS" else 1.0
+        })
+    return rows
+
+  async def _load_flows(self, db, start: date, end: date) -> FlowMap:
+    """기간 내 사용자/일자/시장별 순투입액과 실현손익"""
+    records = await transaction_crud.get_daily_flows(
+      db, datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+    )
+
+    flows: FlowMap = defaultdict(lambda: [0.0, 0.0])
+    for record in records:
+      market_type = "DOMESTIC" if record["country_code"] == "KR" else "OVERSEAS"
+      flow = flows[(record["user_id"], record["trade_date"], market_type)]
+      flow[0] += float(record["buy_amount_krw"] or 0) - float(record["sell_amount_krw"] or 0)
+      flow[1] += float(record["realized_gain_krw"] or 0)
+    return flows
+
+  # =========================
+  # 💹 종가 / 환율
+  # =========================
+
+  @staticmethod
+  def _currencies(positions: Iterable[Dict]) -> Set[str]:
+    """평가에 필요한 통화 (해외 종목 통화 + 기록용 USD)"""
+    currencies = {
+      position.get("currency") or "USD" for position in positions if position["market_type"] == "OVERSEAS"
+    }
+    return currencies | {"USD"} if currencies else currencies
+
+  async def _get_rates(self, days: List[date], currencies: Set[str]) -> Dict[date, Dict[str, float]]:
+    """평가일별 통화별 1단위당 원화 환율 (날짜별 동시 조회, 고시 없는 통화는 직전 평가일 환율)"""
+    if not currencies:
+      return {day: {"KRW": 1.0} for day in days}
+
+    fetched = await exchange_rate_service.get_daily_rates(set(days), currencies)
+    table: Dict[date, Dict[str, float]] = {}
+    previous: Optional[Dict[str, float]] = None
+    for day in sorted(days):
+      rates = {"KRW": 1.0, **fetched.get(day, {})}
+      missing = currencies - rates.keys()
+      if missing:
+        if previous is None:
+          previous = await exchange_rate_service.get_krw_rates(missing)
+        rates = {**previous, **rates}
+        logger.warning(f"환율 없음, 직전 환율 사용: {day}, 통화={sorted(missing)}")
+      table[day] = previous = rates
+    return table
+
+  # =========================
+  # 📈 조회
+  # =========================
+
+  async def get_history(
+    self,
+    user_id: int,
+    start: date,
+    end: date,
+    market_type: Optional[str] = None
+  ) -> List[Dict]:
+    """일별 NAV 시계열 (시장 미지정 시 국내+해외 합산)"""
+    async with AsyncSessionLocal() as db:
+      snapshots = await portfolio_snapshot_crud.get_user_snapshots(db, user_id, start, end, market_type)
+
+    points: Dict[date, Dict] = {}
+    for snapshot in snapshots:
+      point = points.setdefault(snapshot.snapshot_date, {
+        "date": snapshot.snapshot_date.isoformat(),
+        "market_value_krw": 0.0,
+        "cost_basis_krw": 0.0,
+        "net_cash_flow_krw": 0.0,
+        "realized_gain_krw": 0.0,
+        "position_count": 0
+      })
+      point["market_value_krw"] += float(snapshot.market_value_krw)
+      point["cost_basis_krw"] += float(snapshot.cost_basis_krw)
+      point["net_cash_flow_krw"] += float(snapshot.net_cash_flow_krw)
+      point["realized_gain_krw"] += float(snapshot.realized_gain_krw)
+      point["position_count"] += snapshot.position_count
+
+    return list(points.values())
+
+
+# 싱글톤 인스턴스
+portfolio_snapshot_service = PortfolioSnapshotService()
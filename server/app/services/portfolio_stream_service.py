@@ -0,0 +1,216 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.settings import get_settings
+from app.external.kis_websocket import realtime_quote_service
+from app.schemas.common_schemas import PortfolioSummaryData, StockDataResponse
+from app.services.portfolio_cache import portfolio_cache
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_valuation import CONTRIBUTION_FIELDS, summary_from_sums, totals_from_sums, valuate_holdings
+
+logger = logging.getLogger(__name__)
+
+# 종목 키: (symbol, market_type)
+RowKey = Tuple[str, str]
+
+
+class PortfolioStream:
+  """
+  사용자 한 명의 실시간 포트폴리오 스트림
+
+  - 연결 시 전체 스냅샷(GET /portfolio와 같은 형식)을 한 번 보내고,
+    이후에는 가격이 바뀐 종목의 행과 합계만 delta로 보낸다.
+  - 행 값과 합계 기여분은 GET /portfolio와 같은 valuate_holdings로 계산하고,
+    합계는 바뀐 행의 이전 기여분을 빼고 새 기여분을 더해 갱신한다 (전체 재계산 없음).
+  - 실시간 체결이 없는 종목은 PORTFOLIO_STREAM_REFRESH_SECONDS 주기로 시세 캐시에서 다시 읽는다.
+  - 거래로 보유 종목이 바뀌면(보유 버전 변경) 스냅샷을 다시 보낸다.
+  """
+
+  def __init__(self, user_id: int):
+    self.user_id = user_id
+    self._version = -1
+    self._exchange_rates: Dict[str, float] = {}
+    self._holdings: Dict[RowKey, Dict] = {}
+    self._rows: Dict[RowKey, StockDataResponse] = {}
+    self._prices: Dict[RowKey, Tuple[float, float]] = {}
+    self._contributions: Dict[RowKey, np.ndarray] = {}
+    self._sums = np.zeros(len(CONTRIBUTION_FIELDS))
+
+  async def events(self) -> AsyncIterator[str]:
+    """SSE 이벤트 스트림 (snapshot 1회 → delta 반복)"""
+    settings = get_settings()
+    listener = realtime_quote_service.add_listener()
+    logger.info(f"포트폴리오 스트림 시작: user_id={self.user_id}")
+
+    try:
+      yield self._event("snapshot", await self._load_snapshot())
+      last_refresh = time.monotonic()
+
+      while True:
+        timeout = max(settings.portfolio_stream_refresh_seconds - (time.monotonic() - last_refresh), 0)
+        changed = await listener.wait(timeout=timeout)
+
+        if portfolio_cache.holdings_version(self.user_id) != self._version:
+          yield self._event("snapshot", await self._load_snapshot())
+          last_refresh = time.monotonic()
+          continue
+
+        updated = self._apply_ticks(changed)
+        if time.monotonic() - last_refresh >= settings.portfolio_stream_refresh_seconds:
+          for key in await self._refresh_prices():
+            if key not in updated:
+              updated.append(key)
+          last_refresh = time.monotonic()
+
+          if not updated:
+            yield ": keep-alive\n\n"
+            continue
+
+        if updated:
+          yield self._event("delta", self._delta(updated))
+
+    except Exception as e:
+      logger.error(f"포트폴리오 스트림 오류: user_id={self.user_id}, error={str(e)}")
+      yield self._event("error", {"detail": "포트폴리오 데이터를 불러올 수 없습니다."})
+
+    finally:
+      realtime_quote_service.remove_listener(listener)
+      logger.info(f"포트폴리오 스트림 종료: user_id={self.user_id}")
+
+  # =========================
+  # 📸 스냅샷
+  # =========================
+
+  async def _load_snapshot(self) -> Dict:
+    """보유 종목/시세/환율로 전체 스냅샷 계산 후 행별 상태 초기화"""
+    self._version = portfolio_cache.holdings_version(self.user_id)
+    holdings = await PortfolioService.get_portfolio_holdings(self.user_id, self._version)
+    self._exchange_rates = await PortfolioService.get_exchange_rates(holdings)
+
+    price_results = await PortfolioService._get_prices_batch(self.user_id, holdings) if holdings else []
+    valuation = valuate_holdings(holdings, price_results, self._exchange_rates)
+    response = (
+      PortfolioService._response_from_valuation(valuation, self._exchange_rates) if holdings
+      else PortfolioService._empty_response(self._exchange_rates)
+    )
+
+    contributions = valuation.contributions()
+    self._sums = contributions.sum(axis=0)
+    self._holdings.clear()
+    self._rows.clear()
+    self._prices.clear()
+    self._contributions.clear()
+
+    # 환율이 없는 통화의 종목은 스냅샷과 같이 제외 (해외 원가 기여분은 합계에 남음)
+    for i, (holding, price_data) in enumerate(zip(holdings, price_results)):
+      if self._rate(holding) is None:
+        continue
+      key = (holding["stock_symbol"], holding["market_type"])
+      self._holdings[key] = holding
+      self._contributions[key] = contributions[i]
+      if price_data is not None:
+        self._prices[key] = (price_data["current_price"], price_data["previous_close"])
+    for i, row in valuation.rows():
+      holding = holdings[i]
+      self._rows[(holding["stock_symbol"], holding["market_type"])] = PortfolioService._stock_response(holding, row)
+
+    return response.model_dump()
+
+  # =========================
+  # 🔄 행 단위 갱신
+  # =========================
+
+  def _apply_ticks(self, changed) -> List[RowKey]:
+    """실시간 체결가가 바뀐 보유 종목만 행 재계산"""
+    updated = []
+    for key in changed:
+      if key not in self._holdings:
+        continue
+      tick = realtime_quote_service.get_latest_tick(*key)
+      if tick and self._update_row(key, tick["current_price"], tick["previous_close"]):
+        updated.append(key)
+    return updated
+
+  async def _refresh_prices(self) -> List[RowKey]:
+    """전체 보유 종목 시세 재조회 (시세 캐시/실시간 체결가 우선) 후 바뀐 행만 재계산"""
+    holdings = list(self._holdings.values())
+    if not holdings:
+      return []
+
+    price_results = await PortfolioService._get_prices_batch(self.user_id, holdings)
+    updated = []
+    for holding, price_data in zip(holdings, price_results):
+      if price_data is None:
+        continue
+      key = (holding["stock_symbol"], holding["market_type"])
+      if self._update_row(key, price_data["current_price"], price_data["previous_close"]):
+        updated.append(key)
+    return updated
+
+  def _update_row(self, key: RowKey, current_price: float, previous_close: float) -> bool:
+    """가격이 바뀌었으면 행을 다시 평가하고 합계의 기여분을 교체"""
+    if self._prices.get(key) == (current_price, previous_close):
+      return False
+
+    holding = self._holdings[key]
+    valuation = valuate_holdings(
+      [holding], [{"current_price": current_price, "previous_close": previous_close}], self._exchange_rates
+    )
+    contribution = valuation.contributions()[0]
+    self._sums += contribution - self._contributions[key]
+    self._contributions[key] = contribution
+
+    _, row = next(valuation.rows())
+    self._rows[key] = PortfolioService._stock_response(holding, row)
+    self._prices[key] = (current_price, previous_close)
+    return True
+
+  def _rate(self, holding: Dict) -> Optional[float]:
+    """종목 통화의 1단위당 원화 환율 (국내 1.0, 환율 없음 None)"""
+    if holding.get("market_type") != "OVERSEAS":
+      return 1.0
+    return self._exchange_rates.get(holding.get("currency") or "USD")
+
+  # =========================
+  # 📨 이벤트 구성
+  # =========================
+
+  def _delta(self, keys: List[RowKey]) -> Dict:
+    """바뀐 행 + 합계"""
+    rows = []
+    for key in keys:
+      row = self._rows[key].model_dump()
+      row["market_type"] = key[1]
+      rows.append(row)
+
+    return {
+      "rows": rows,
+      "totals": self._totals(),
+      "updated_at": datetime.now().isoformat()
+    }
+
+  def _totals(self) -> Dict:
+    """전체 카드 + 국내/해외 요약 (KRW 기준, GET /portfolio와 같은 합계 함수)"""
+    totals = totals_from_sums(self._sums)
+
+    return {
+      "total_portfolio_value_krw": float(totals["total_portfolio"]),
+      "total_day_gain_krw": float(totals["total_day_gain"]),
+      "total_day_gain_percent": float(totals["total_day_gain_percent"]),
+      "total_total_gain_krw": float(totals["total_total_gain"]),
+      "total_total_gain_percent": float(totals["total_total_gain_percent"]),
+      "domestic_summary": PortfolioSummaryData(**summary_from_sums(self._sums, overseas=False)).model_dump(),
+      "overseas_summary": PortfolioSummaryData(**summary_from_sums(self._sums, overseas=True)).model_dump(),
+      "exchange_rate": self._exchange_rates["USD"],
+      "exchange_rates": self._exchange_rates
+    }
+
+  @staticmethod
+  def _event(event: str, data: Optional[Dict]) -> str:
+    """SSE 메시지 형식"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# 행 하나가 합계/요약에 기여하는 항목 (PortfolioValuation.contributions 열 순서)
+CONTRIBUTION_FIELDS = (
+  "domestic_market_value", "domestic_day_gain", "domestic_total_gain", "domestic_cost",
+  "overseas_market_value", "overseas_day_gain", "overseas_total_gain", "overseas_cost",
+  "market_value_krw", "day_gain_krw", "total_gain_krw", "cost_krw"
+)
+_FIELD = {field: i for i, field in enumerate(CONTRIBUTION_FIELDS)}
+
+
+@dataclass
+class PortfolioValuation:
+  """
+  보유 종목 평가 결과 (행 순서 = 입력 holdings 순서)
+
+  행 금액은 종목 통화 기준(국내 KRW, 해외는 Stock.currency)이며, 국내는 원 단위, 해외는 소수 둘째 자리로 반올림한다.
+  원화 합계는 행마다 자기 통화 환율로 환산하고, 해외 요약 카드는 USD로 환산해 더한다.
+  """
+  holdings: List[Dict]
+  exchange_rate: np.ndarray    # 행별 1단위당 원화 환율 (국내 1.0, 환율 없음 0.0)
+  usd_rate: float              # 해외 요약 카드 기준 USD/KRW
+  valid: np.ndarray            # 시세 조회 성공 여부
+  overseas: np.ndarray
+  shares: np.ndarray
+  avg_cost: np.ndarray
+  current_price: np.ndarray
+  market_value: np.ndarray
+  day_gain: np.ndarray
+  day_gain_percent: np.ndarray
+  total_gain: np.ndarray
+  total_gain_percent: np.ndarray
+  cost: np.ndarray             # 평균단가 × 수량 (요약 수익률 기준)
+  total_investment_krw: np.ndarray
+
+  @property
+  def market_value_krw(self) -> np.ndarray:
+    return self.market_value * self.exchange_rate
+
+  @property
+  def day_gain_krw(self) -> np.ndarray:
+    return self.day_gain * self.exchange_rate
+
+  @property
+  def total_gain_krw(self) -> np.ndarray:
+    """해외는 원화 원가 기준 (환차손익 포함)"""
+    return np.where(
+      self.overseas, self.market_value * self.exchange_rate - self.total_investment_krw, self.total_gain
+    )
+
+  def rows(self) -> Iterator[Tuple[int, Dict]]:
+    """시세가 있는 행의 (입력 인덱스, 행 값)"""
+    index = np.flatnonzero(self.valid)
+    columns = zip(
+      index.tolist(),
+      self.shares[index].astype(int).tolist(),
+      self.avg_cost[index].tolist(),
+      self.current_price[index].tolist(),
+      self.market_value[index].tolist(),
+      self.day_gain[index].tolist(),
+      self.day_gain_percent[index].tolist(),
+      self.total_gain[index].tolist(),
+      self.total_gain_percent[index].tolist()
+    )
+    for i, shares, avg_cost, current_price, market_value, day_gain, day_gain_percent, total_gain, total_gain_percent in columns:
+      yield i, {
+        "shares": shares,
+        "avg_cost": avg_cost,
+        "current_price": current_price,
+        "market_value": market_value,
+        "day_gain": day_gain,
+        "day_gain_percent": day_gain_percent,
+        "total_gain": total_gain,
+        "total_gain_percent": total_gain_percent
+      }
+
+  def contributions(self) -> np.ndarray:
+    """
+    행별 합계 기여분 (행 × CONTRIBUTION_FIELDS) - 요약/합계는 모두 이 값의 합으로 계산한다
+
+    요약 카드는 국내 KRW, 해외 USD 환산(USD 종목은 그대로), 전체 카드는 종목 통화 환율로 원화 환산한다.
+    해외 원가는 시세 조회 실패 종목도 포함한다 (기존 전체 수익률 계산 기준).
+    """
+    valid = self.valid.astype(float)
+    domestic = valid * ~self.overseas
+    overseas = valid * self.overseas
+    factor = self.exchange_rate / self.usd_rate if self.usd_rate > 0 else np.ones_like(self.exchange_rate)
+
+    return np.column_stack([
+      self.market_value * domestic,
+      self.day_gain * domestic,
+      self.total_gain * domestic,
+      self.cost * domestic,
+      self.market_value * factor * overseas,
+      self.day_gain * factor * overseas,
+      self.total_gain * factor * overseas,
+      self.cost * factor * overseas,
+      self.market_value_krw * valid,
+      self.day_gain_krw * valid,
+      self.total_gain_krw * valid,
+      np.where(self.overseas, self.total_investment_krw, self.cost * valid)
+    ]).reshape(-1, len(CONTRIBUTION_FIELDS))
+
+  def summary(self, overseas: bool) -> Dict:
+    """국내/해외 요약 카드 (국내 KRW, 해외 USD 기준 - USD 종목은 환산 없이 그대로)"""
+    return summary_from_sums(self.contributions().sum(axis=0), overseas)
+
+  def totals(self) -> Dict:
+    """전체 포트폴리오 카드 (KRW 기준)"""
+    return {key: float(value) for key, value in totals_from_sums(self.contributions().sum(axis=0)).items()}
+
+  def group_totals(self, group_index: np.ndarray, group_count: int) -> Dict[str, np.ndarray]:
+    """그룹(사용자 등)별 KRW 합계 - 여러 사용자의 보유 종목을 한 번에 평가할 때 사용"""
+    contributions = self.contributions()
+    sums = np.column_stack([
+      np.bincount(group_index, contributions[:, i], group_count) for i in range(len(CONTRIBUTION_FIELDS))
+    ])
+    return totals_from_sums(sums)
+
+
+def summary_from_sums(sums: np.ndarray, overseas: bool) -> Dict:
+  """기여분 합계(CONTRIBUTION_FIELDS 순서) → 국내/해외 요약 카드"""
+  prefix = "overseas" if overseas else "domestic"
+  market_value = float(sums[_FIELD[f"{prefix}_market_value"]])
+  day_gain = float(sums[_FIELD[f"{prefix}_day_gain"]])
+  total_gain = float(sums[_FIELD[f"{prefix}_total_gain"]])
+  total_cost = float(sums[_FIELD[f"{prefix}_cost"]])
+
+  return {
+    "market_value": market_value,
+    "day_gain": day_gain,
+    "day_gain_percent": _percent(day_gain, market_value),
+    "total_gain": total_gain,
+    "total_gain_percent": _percent(total_gain, total_cost)
+  }
+
+
+def totals_from_sums(sums: np.ndarray) -> Dict[str, np.ndarray]:
+  """기여분 합계(마지막 축이 CONTRIBUTION_FIELDS) → 전체 카드 KRW 합계/수익률"""
+  total_portfolio = sums[..., _FIELD["market_value_krw"]]
+  total_day_gain = sums[..., _FIELD["day_gain_krw"]]
+  total_total_gain = sums[..., _FIELD["total_gain_krw"]]
+  total_cost = sums[..., _FIELD["cost_krw"]]
+
+  return {
+    "total_portfolio": total_portfolio,
+    "total_day_gain": total_day_gain,
+    "total_total_gain": total_total_gain,
+    "total_cost": total_cost,
+    "total_day_gain_percent": _percent_array(total_day_gain, total_portfolio),
+    "total_total_gain_percent": _percent_array(total_total_gain, total_cost)
+  }
+
+
+def valuate_holdings(
+  holdings: List[Dict], price_results: List[Optional[Dict]], exchange_rates: Dict[str, float]
+) -> PortfolioValuation:
+  """
+  보유 종목 집계 + 시세 + 통화별 환율을 배열로 모아 한 번에 평가
+
+  exchange_rates는 통화별 1단위당 원화 환율(exchange_rate_service.get_krw_rates)이며,
+  해외 종목은 holding["currency"](없으면 USD) 환율로 환산한다. 환율이 없는 종목은 시세 실패와 같이 제외한다.
+  """
+  count = len(holdings)
+  overseas = np.fromiter((h.get("market_type") == "OVERSEAS" for h in holdings), dtype=bool, count=count)
+  exchange_rate = np.fromiter(
+    (
+      exchange_rates.get(h.get("currency") or "USD", np.nan) if h.get("market_type") == "OVERSEAS" else 1.0
+      for h in holdings
+    ),
+    dtype=float,
+    count=count
+  )
+  valid = np.fromiter((price is not None for price in price_results), dtype=bool, count=count)
+  valid &= ~np.isnan(exchange_rate)
+  exchange_rate = np.nan_to_num(exchange_rate, nan=0.0)
+  shares = np.fromiter((h["total_quantity"] for h in holdings), dtype=float, count=count)
+  avg_cost = np.fromiter((h["overall_average_cost"] for h in holdings), dtype=float, count=count)
+  total_investment = np.fromiter((h["total_investment"] for h in holdings), dtype=float, count=count)
+  total_investment_krw = np.fromiter((h["total_investment_krw"] for h in holdings), dtype=float, count=count)
+  current_price = np.fromiter(
+    (price["current_price"] if price else 0.0 for price in price_results), dtype=float, count=count
+  )
+  previous_close = np.fromiter(
+    (price["previous_close"] if price else 0.0 for price in price_results), dtype=float, count=count
+  )
+
+  market_value = shares * current_price
+  total_gain = market_value - total_investment
+  day_gain = shares * (current_price - previous_close)
+
+  # 수익률은 반올림 전 값 기준
+  total_gain_percent = _percent_array(total_gain, total_investment)
+  day_gain_percent = _percent_array(day_gain, market_value)
+
+  rounded_avg_cost = _round_by_market(avg_cost, overseas)
+
+  return PortfolioValuation(
+    holdings=holdings,
+    exchange_rate=exchange_rate,
+    usd_rate=exchange_rates.get("USD", 0.0),
+    valid=valid,
+    overseas=overseas,
+    shares=shares,
+    avg_cost=rounded_avg_cost,
+    current_price=_round_by_market(current_price, overseas),
+    market_value=_round_by_market(market_value, overseas),
+    day_gain=_round_by_market(day_gain, overseas),
+    day_gain_percent=day_gain_percent,
+    total_gain=_round_by_market(total_gain, overseas),
+    total_gain_percent=total_gain_percent,
+    cost=rounded_avg_cost * shares,
+    total_investment_krw=total_investment_krw
+  )
+
+
+def _round_by_market(values: np.ndarray, overseas: np.ndarray) -> np.ndarray:
+  """국내는 원 단위, 해외는 소수 둘째 자리 반올림"""
+  return np.where(overseas, np.round(values, 2), np.round(values))
+
+
+def _percent_array(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+  """분모가 0 이하이면 0%"""
+  result = np.zeros_like(numerator, dtype=float)
+  np.divide(numerator * 100, denominator, out=result, where=denominator > 0)
+  return result
+
+
+def _percent(numerator: float, denominator: float) -> float:
+  return (numerator / denominator * 100) if denominator > 0 else 0.0
@@ -0,0 +1,140 @@
+import asyncio
+import bisect
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.config.database import AsyncSessionLocal
+from app.crud.stock_price_crud import stock_price_crud
+from app.external.kis_api import kis_api_service, KIS_PRIORITY_BATCH
+from app.services.trading_calendar_service import trading_calendar_service
+
+logger = logging.getLogger(__name__)
+
+# symbol → (날짜 목록, 종가 목록) 오름차순
+CloseSeries = Dict[str, Tuple[List[date], List[float]]]
+# symbol → (market_type, exchange_code, 조회에 사용할 user_id)
+SymbolInfo = Dict[str, Tuple[str, Optional[str], int]]
+
+
+class PriceHistoryService:
+  """
+  일별 종가 시계열 (스냅샷/리스크 계산 공용)
+
+  stock_prices에 저장된 종가를 읽고, 요청 구간을 덮지 못하는 종목만 KIS 일봉으로 채워 저장한다.
+  구간 끝은 거래소의 마지막 완결 거래일까지만 확인한다 (휴장일 종가를 찾아 매번 다시 조회하지 않도록).
+  """
+
+  @staticmethod
+  def symbol_info(positions) -> SymbolInfo:
+    """종목별 (market_type, exchange_code, 조회에 사용할 user_id) - 여러 사용자가 보유해도 한 번만"""
+    symbols: SymbolInfo = {}
+    for position in positions:
+      symbols.setdefault(
+        position["stock_symbol"],
+        (position["market_type"], position.get("exchange_code"), position["user_id"])
+      )
+    return symbols
+
+  async def get_closes(
+    self,
+    symbols: SymbolInfo,
+    start: date,
+    end: date,
+    lookback_days: int = 0
+  ) -> CloseSeries:
+    """start~end 종가 (start 이전 lookback_days 만큼 함께 읽어 첫 날 직전 종가도 찾을 수 있게 함)"""
+    since = start - timedelta(days=lookback_days)
+
+    async with AsyncSessionLocal() as db:
+      stored = await stock_price_crud.get_closes(db, list(symbols), since, end)
+    covered_until = await self._covered_until(symbols, end)
+
+    missing = [
+      symbol for symbol, series in stored.items()
+      if not series or series[0][0] > start or series[-1][0] < covered_until[symbol]
+    ]
+
+    if missing:
+      fetched = await asyncio.gather(
+        *[self._fetch_closes(symbol, *symbols[symbol], since, end) for symbol in missing]
+      )
+      rows = []
+      for symbol, bars in zip(missing, fetched):
+        if bars:
+          merged = dict(stored[symbol])
+          merged.update((row["date"], row["close_price"]) for row in bars)
+          stored[symbol] = sorted(merged.items())
+          rows.extend(bars)
+
+      if rows:
+        try:
+          async with AsyncSessionLocal() as db:
+            await stock_price_crud.upsert_daily_prices(db, rows)
+        except Exception as e:
+          logger.warning(f"종가 저장 실패 (메모리 값 사용): {len(rows)}건, error={str(e)}")
+
+    return {
+      symbol: ([day for day, _ in series], [close for _, close in series])
+      for symbol, series in stored.items()
+    }
+
+  @staticmethod
+  async def _covered_until(symbols: SymbolInfo, end: date) -> Dict[str, date]:
+    """종목별로 저장돼 있어야 하는 마지막 종가일 (end와 거래소 마지막 완결 거래일 중 이른 날, 달력 학습 실패 시 end)"""
+    exchanges = {(market_type, exchange_code): user_id for market_type, exchange_code, user_id in symbols.values()}
+    sessions = dict(zip(exchanges, await asyncio.gather(*[
+      trading_calendar_service.get_last_complete_session(user_id, market_type, exchange_code)
+      for (market_type, exchange_code), user_id in exchanges.items()
+    ])))
+
+    covered = {}
+    for symbol, (market_type, exchange_code, _) in symbols.items():
+      session = sessions[(market_type, exchange_code)]
+      covered[symbol] = min(end, datetime.strptime(session, "%Y%m%d").date()) if session else end
+    return covered
+
+  async def _fetch_closes(
+    self,
+    symbol: str,
+    market_type: str,
+    exchange_code: Optional[str],
+    user_id: int,
+    start: date,
+    end: date
+  ) -> List[Dict]:
+    """KIS 일봉 → stock_prices 저장 형식 (거래량 있는 날만)"""
+    try:
+      chart = await kis_api_service.get_daily_chart_data(
+        user_id, symbol, start.strftime("%Y%m%d"), end.strftime("%Y%m%d"), market_type,
+        priority=KIS_PRIORITY_BATCH, exchange_code=exchange_code
+      )
+    except Exception as e:
+      logger.warning(f"종가 조회 실패: symbol={symbol}, error={str(e)}")
+      return []
+
+    return [
+      {
+        "symbol": symbol,
+        "date": datetime.strptime(bar["date"], "%Y%m%d").date(),
+        "close_price": bar["close_price"],
+        "open_price": bar["open_price"],
+        "high_price": bar["high_price"],
+        "low_price": bar["low_price"],
+        "volume": bar["volume"],
+        "is_trading_day": True
+      }
+      for bar in chart["chart_data"]
+      if bar["volume"] > 0
+    ]
+
+  @staticmethod
+  def close_on(series: Tuple[List[date], List[float]], day: date) -> Optional[float]:
+    """day 이전 마지막 거래일 종가"""
+    dates, closes = series
+    i = bisect.bisect_right(dates, day)
+    return closes[i - 1] if i > 0 else None
+
+
+# 싱글톤 인스턴스
+price_history_service = PriceHistoryService()
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from app.crud.fee_tax_crud import fee_tax_crud
+from app.services.fee_schedule_service import fee_schedule_service
+from app.services.portfolio_cache import portfolio_cache
+from app.services.portfolio_service import PortfolioService
+
+logger = logging.getLogger(__name__)
+
+# 목표 비중 합계 허용 오차 (%)
+WEIGHT_TOLERANCE = 1e-6
+
+
+class RebalanceService:
+  """
+  보유 종목 리밸런싱 시뮬레이션 (주문 없이 계산만)
+
+  - 보유 집계/시세/환율은 포트폴리오 조회와 같은 캐시를 쓰고, 증권사 수수료 설정은 메모리 스냅샷을 쓴다.
+  - 목표 수량, 주문, 수수료/거래세, 실현손익, 주문 후 비중을 종목 축 numpy 배열로 한 번에 계산한다.
+  - 수수료 규칙은 FeeTaxCRUD.calculate_total_fees와 같다 (fee_rates, 0.01 단위 반올림).
+  - 실현손익은 증권사 합산 평균단가(수수료 포함) 기준 추정치다.
+  """
+
+  async def simulate(
+    self,
+    user_id: int,
+    targets: Dict[str, float],
+    broker_id: Optional[int] = None,
+    cash_krw: float = 0.0,
+    liquidate_unlisted: bool = False
+  ) -> Dict:
+    """
+    Args:
+      targets: 종목코드 → 목표 비중(%) - 현재 평가금액 + 추가 현금 기준, 합계 100 이하 (나머지는 현금)
+        liquidate_unlisted=False면 목표에 없는 보유 종목의 현재 비중을 뺀 만큼이 한도
+    """
+    if sum(targets.values()) > 100 + WEIGHT_TOLERANCE:
+      raise ValueError(f"목표 비중 합계가 100%를 넘습니다: {sum(targets.values()):.4f}%")
+
+    version = portfolio_cache.holdings_version(user_id)
+    holdings = [
+      h for h in await PortfolioService.get_portfolio_holdings(user_id, version)
+      if h["total_quantity"] > 0
+    ]
+    unknown = sorted(set(targets) - {h["stock_symbol"] for h in holdings})
+    if unknown:
+      raise ValueError(f"보유하지 않은 종목은 시뮬레이션할 수 없습니다: {', '.join(unknown)}")
+
+    price_results, exchange_rates, fee_map = await asyncio.gather(
+      PortfolioService._get_prices_batch(user_id, holdings),
+      PortfolioService.get_exchange_rates(holdings),
+      self._get_fee_map(broker_id)
+    )
+
+    result = self._simulate(holdings, price_results, exchange_rates, fee_map, targets, cash_krw, liquidate_unlisted)
+    result["exchange_rates"] = exchange_rates
+    return result
+
+  # =========================
+  # 🧮 시뮬레이션
+  # =========================
+
+  def _simulate(
+    self,
+    holdings: List[Dict],
+    price_results: List[Optional[Dict]],
+    exchange_rates: Dict[str, float],
+    fee_map: Mapping,
+    targets: Dict[str, float],
+    cash_krw: float,
+    liquidate_unlisted: bool
+  ) -> Dict:
+    symbols = [h["stock_symbol"] for h in holdings]
+    markets = np.array([h["market_type"] for h in holdings])
+    overseas = markets == "OVERSEAS"
+
+    quantity = np.array([h["total_quantity"] for h in holdings], dtype=np.int64)
+    avg_cost = np.array([h["overall_average_cost"] for h in holdings], dtype=float)
+    price = np.array([
+      float(p["current_price"]) if p and p.get("current_price") else np.nan for p in price_results
+    ])
+    fx = np.array([
+      exchange_rates.get(h.get("currency") or "USD", np.nan) if h["market_type"] == "OVERSEAS" else 1.0
+      for h in holdings
+    ], dtype=float)
+
+    valid = np.isfinite(price) & (price > 0) & np.isfinite(fx)
+    unpriced = [symbol for symbol, ok in zip(symbols, valid) if not ok and symbol in targets]
+    if unpriced:
+      raise ValueError(f"현재가/환율이 없어 시뮬레이션할 수 없는 종목: {', '.join(unpriced)}")
+
+    unit_krw = np.where(valid, price * fx, 0.0)
+    value = quantity * unit_krw
+    total_value = float(value.sum()) + cash_krw
+
+    # 목표 비중 (목표에 없는 종목은 전량 매도 또는 현재 수량 유지)
+    target_weight = np.array([targets.get(symbol, np.nan) for symbol in symbols], dtype=float) / 100
+    has_target = ~np.isnan(target_weight)
+    if liquidate_unlisted:
+      target_weight = np.where(has_target, target_weight, 0.0)
+    adjustable = valid & ~np.isnan(target_weight)
+
+    # 목표에 없는 종목을 유지하면 그 비중만큼 목표 비중 한도가 줄어듦 (현금 없이 매수하는 계획 방지)
+    kept_weight = float(value[valid & ~has_target].sum()) / total_value * 100 if total_value > 0 else 0.0
+    if not liquidate_unlisted and sum(targets.values()) > 100 - kept_weight + WEIGHT_TOLERANCE:
+      raise ValueError(
+        f"목표 비중 합계 {sum(targets.values()):.4f}%가 한도를 넘습니다: "
+        f"목표에 없는 보유 종목 비중 {kept_weight:.4f}%를 유지하므로 최대 {100 - kept_weight:.4f}%"
+      )
+
+    buy_rate, buy_min, buy_max, _ = self._fee_arrays(fee_map, markets, "BUY")
+    sell_rate, sell_min, sell_max, sell_tax_rate = self._fee_arrays(fee_map, markets, "SELL")
+
+    # 목표 수량: 매수는 수수료만큼 여유를 두고 내림, 매도는 목표 금액 이하로 내림
+    desired = np.nan_to_num(target_weight) * total_value
+    safe_unit = np.where(valid, unit_krw, 1.0)
+    with np.errstate(invalid="ignore"):
+      buy_target = np.maximum(np.floor(desired / (safe_unit * (1 + buy_rate))), quantity)
+      sell_target = np.floor(desired / safe_unit)
+    target_quantity = np.where(
+      adjustable, np.where(desired > value, buy_target, np.minimum(sell_target, quantity)), quantity
+    ).astype(np.int64)
+
+    delta = target_quantity - quantity
+    sell_quantity = np.clip(-delta, 0, None)
+    safe_price = np.where(valid, price, 0.0)
+    safe_fx = np.where(valid, fx, 0.0)
+
+    sell_gross = sell_quantity * safe_price
+    sell_commission = np.where(sell_quantity > 0, self._commission(sell_gross, sell_rate, sell_min, sell_max), 0.0)
+    sell_tax = np.where(sell_quantity > 0, np.round(sell_gross * sell_tax_rate, 2), 0.0)
+    sell_net = sell_gross - sell_commission - sell_tax
+    sell_net_krw = sell_net * safe_fx
+
+    # 매수는 추가 현금 + 매도 순수령액 안에서만 (매도 수수료/거래세로 모자라면 매수 수량을 줄임)
+    buy_quantity = self._fit_buys(
+      np.clip(delta, 0, None), safe_price, safe_fx, buy_rate, buy_min, buy_max,
+      cash_krw + float(sell_net_krw.sum())
+    )
+    target_quantity = quantity + buy_quantity - sell_quantity
+    delta = target_quantity - quantity
+
+    buy_gross = buy_quantity * safe_price
+    buy_commission = np.where(buy_quantity > 0, self._commission(buy_gross, buy_rate, buy_min, buy_max), 0.0)
+    buy_cost_krw = (buy_gross + buy_commission) * safe_fx
+    realized = sell_net - avg_cost * sell_quantity
+    realized_krw = realized * safe_fx
+
+    cash_after = cash_krw + float(sell_net_krw.sum()) - float(buy_cost_krw.sum())
+    post_value = target_quantity * unit_krw
+    total_after = float(post_value.sum()) + cash_after
+
+    def weights(values: np.ndarray, total: float) -> np.ndarray:
+      return values / total * 100 if total > 0 else np.zeros_like(values)
+
+    current_weight = weights(value, total_value)
+    post_weight = weights(post_value, total_after)
+
+    orders = []
+    for i in np.flatnonzero(delta):
+      selling = bool(delta[i] < 0)
+      holding = holdings[i]
+      orders.append({
+        "symbol": symbols[i],
+        "company_name": (holding.get("company_name_en") if overseas[i] else None) or holding["company_name"],
+        "market_type": holding["market_type"],
+        "currency": holding.get("currency") or "KRW",
+        "transaction_type": "SELL" if selling else "BUY",
+        "quantity": int(abs(delta[i])),
+        "price": float(price[i]),
+        "gross_amount": float(sell_gross[i] if selling else buy_gross[i]),
+        "commission": float(sell_commission[i] if selling else buy_commission[i]),
+        "transaction_tax": float(sell_tax[i]),
+        "net_amount_krw": float(sell_net_krw[i] if selling else -buy_cost_krw[i]),
+        "realized_profit": float(realized[i]) if selling else None,
+        "realized_profit_krw": float(realized_krw[i]) if selling else None
+      })
+    # 매도로 현금을 먼저 확보한 뒤 매수 (금액 큰 순)
+    orders.sort(key=lambda order: (order["transaction_type"] != "SELL", -abs(order["net_amount_krw"])))
+
+    allocations = [
+      {
+        "symbol": symbols[i],
+        "current_quantity": int(quantity[i]),
+        "target_quantity": int(target_quantity[i]),
+        "current_weight": float(current_weight[i]),
+        "target_weight": float(target_weight[i] * 100) if not np.isnan(target_weight[i]) else None,
+        "post_trade_weight": float(post_weight[i]),
+        "post_trade_value_krw": float(post_value[i])
+      }
+      for i in range(len(holdings))
+      if valid[i]
+    ]
+
+    return {
+      "orders": orders,
+      "allocations": allocations,
+      "total_value_krw": total_value,
+      "cash_after_krw": cash_after,
+      "cash_weight": cash_after / total_after * 100 if total_after > 0 else 0.0,
+      "total_buy_krw": float(buy_cost_krw.sum()),
+      "total_sell_krw": float(sell_net_krw.sum()),
+      "total_commission_krw": float(((buy_commission + sell_commission) * safe_fx).sum()),
+      "total_tax_krw": float((sell_tax * safe_fx).sum()),
+      "realized_profit_krw": float(realized_krw.sum()),
+      "excluded_symbols": [symbol for symbol, ok in zip(symbols, valid) if not ok]
+    }
+
+  @staticmethod
+  def _fee_arrays(fee_map: Mapping, markets: np.ndarray, transaction_type: str):
+    """시장별 (수수료율, 최소 수수료, 최대 수수료, 거래세율) 배열 - 최소/최대가 없으면 NaN"""
+    params = {}
+    for market in set(markets.tolist()):
+      fee_info = fee_map.get((market, transaction_type))
+      commission_rate, tax_rate = fee_tax_crud.fee_rates(fee_info, market, transaction_type)
+      min_commission = getattr(fee_info, "min_commission", None)
+      max_commission = getattr(fee_info, "max_commission", None)
+      params[market] = (
+        float(commission_rate),
+        float(min_commission) if min_commission else np.nan,
+        float(max_commission) if max_commission else np.nan,
+        float(tax_rate)
+      )
+
+    table = np.array([params[market] for market in markets.tolist()], dtype=float).reshape(-1, 4)
+    return table[:, 0], table[:, 1], table[:, 2], table[:, 3]
+
+  @classmethod
+  def _fit_buys(
+    cls,
+    buy_quantity: np.ndarray,
+    price: np.ndarray,
+    fx: np.ndarray,
+    rate: np.ndarray,
+    minimum: np.ndarray,
+    maximum: np.ndarray,
+    available_krw: float
+  ) -> np.ndarray:
+    """매수 비용(수수료 포함, 원화)이 가용 현금을 넘으면 비율대로 줄이고, 남는 초과분은 비용 큰 종목부터 1주씩 뺌"""
+    def cost(q: np.ndarray) -> np.ndarray:
+      gross = q * price
+      return (gross + np.where(q > 0, cls._commission(gross, rate, minimum, maximum), 0.0)) * fx
+
+    total = float(cost(buy_quantity).sum())
+    if total <= available_krw:
+      return buy_quantity
+
+    fitted = np.floor(buy_quantity * max(available_krw, 0.0) / total).astype(np.int64)
+    costs = cost(fitted)
+    while costs.sum() > available_krw and fitted.any():
+      fitted[int(np.argmax(costs))] -= 1
+      costs = cost(fitted)
+    return fitted
+
+  @staticmethod
+  def _commission(gross: np.ndarray, rate: np.ndarray, minimum: np.ndarray, maximum: np.ndarray) -> np.ndarray:
+    """FeeTaxCRUD.commission_for와 같은 규칙 (NaN인 최소/최대는 무시)"""
+    return np.round(np.fmin(np.fmax(gross * rate, minimum), maximum), 2)
+
+  # =========================
+  # 💾 수수료 설정
+  # =========================
+
+  async def _get_fee_map(self, broker_id: Optional[int]) -> Mapping:
+    """증권사 수수료 설정 (메모리 스냅샷, 미지정 시 기본 수수료율)"""
+    if broker_id is None:
+      return {}
+
+    fee_map = await fee_tax_crud.get_broker_fee_map(broker_id)
+    if not fee_schedule_service.broker_name(broker_id):
+      raise ValueError(f"증권사를 찾을 수 없습니다: broker_id={broker_id}")
+    return fee_map
+
+
+# 싱글톤 인스턴스
+rebalance_service = RebalanceService()
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta, date
 import asyncio
 from dataclasses import dataclass
 
-from app.external.kis_api import kis_api_service
+from app.external.kis_api import kis_api_service, KIS_PRIORITY_BATCH
 from app.crud.strategy_crud import strategy_crud
 
 logger = logging.getLogger(__name__)
@@ -62,23 +62,26 @@ class StrategyService:
       logger.warning(f"분석 대상 종목이 없습니다: {country}-{market}")
       return []
     
-    # 2. 각 종목별로 패턴 분석
+    # 2. 각 종목별로 패턴 분석 (동시 실행, 호출 속도는 KIS 스케줄러의 batch 레인이 조절)
+    pattern_results = await asyncio.gather(*[
+      self._analyze_stock_patterns(
+        user_id=user_id,
+        stock_info=stock_info,
+        start_date=start_date,
+        end_date=end_date,
+        decline_days=decline_days,
+        decline_rate=decline_rate,
+        recovery_days=recovery_days,
+        recovery_rate=recovery_rate,
+        market_type=stock_info["market_type"]
+      )
+      for stock_info in target_stocks
+    ])
+    
     analysis_results = []
     
-    for stock_info in target_stocks:
+    for stock_info, patterns in zip(target_stocks, pattern_results):
       try:
-        patterns = await self._analyze_stock_patterns(
-          user_id=user_id,
-          stock_info=stock_info,
-          start_date=start_date,
-          end_date=end_date,
-          decline_days=decline_days,
-          decline_rate=decline_rate,
-          recovery_days=recovery_days,
-          recovery_rate=recovery_rate,
-          market_type=stock_info["market_type"]
-        )
-        
         if patterns:
           # 가장 최근 패턴 찾기
           latest_pattern = max(patterns, key=lambda p: p.recovery_end_date)
@@ -116,8 +119,6 @@ class StrategyService:
             # 차트용 패턴 구간
             "pattern_periods": pattern_periods
           })
-          
-        await asyncio.sleep(0.2)  # API 호출 간격 조절
         
       except Exception as e:
         logger.error(f"종목 {stock_info['symbol']} 분석 실패: {str(e)}")
@@ -160,30 +161,47 @@ class StrategyService:
     stock_name = stock_info["company_name"]
     
     try:
-      # 1. KIS API에서 일봉 데이터 조회 (실제 주가 데이터)
-      chart_data = await kis_api_service.get_daily_chart_data(
+      # 1. KIS API에서 일봉 데이터를 최근 구간부터 페이지 단위로 받아 도착하는 대로 패턴 탐지
+      #    (패턴은 시작점 이후 최대 decline_days + recovery_days 봉만 참조하므로
+      #     각 페이지 뒤에 이미 받은 이후 구간 앞부분을 이어 붙여 탐지)
+      lookahead = decline_days + recovery_days
+      following: List[Dict] = []
+      patterns: List[VolatilityPattern] = []
+      total_days = 0
+      
+      async for page in kis_api_service.iter_daily_chart_pages(
         user_id=user_id,
         symbol=symbol,
         start_date=start_date.strftime("%Y%m%d"),
         end_date=end_date.strftime("%Y%m%d"),
-        market_type=market_type
-      )
+        market_type=market_type,
+        priority=KIS_PRIORITY_BATCH,  # 호출 간격은 KIS 스케줄러가 조절 (대화형 요청 우선)
+        exchange_code=stock_info.get("exchange_code")
+      ):
+        total_days += len(page)
+        segment = page + following
+        page_last_date = page[-1]["date"]
+        
+        # 2. 변동성 패턴 탐지 (시작점이 이번 페이지에 속한 패턴만 채택)
+        patterns.extend(
+          pattern for pattern in self._find_volatility_patterns(
+            daily_prices=segment,
+            decline_days=decline_days,
+            decline_rate=decline_rate,
+            recovery_days=recovery_days,
+            recovery_rate=recovery_rate,
+            symbol=symbol,
+            stock_name=stock_name
+          )
+          if pattern.decline_start_date <= page_last_date
+        )
+        following = segment[:lookahead]
       
-      daily_prices = chart_data.get("chart_data", [])
-      if len(daily_prices) < decline_days + recovery_days:
-        logger.warning(f"{symbol}: 데이터 부족 ({len(daily_prices)}일)")
+      if total_days < lookahead:
+        logger.warning(f"{symbol}: 데이터 부족 ({total_days}일)")
         return []
       
-      # 2. 변동성 패턴 탐지
-      patterns = self._find_volatility_patterns(
-        daily_prices=daily_prices,
-        decline_days=decline_days,
-        decline_rate=decline_rate,
-        recovery_days=recovery_days,
-        recovery_rate=recovery_rate,
-        symbol=symbol,
-        stock_name=stock_name
-      )
+      patterns.sort(key=lambda p: p.decline_start_date)
       
       logger.debug(f"{symbol}: {len(patterns)}개 패턴 발견")
       return patterns
@@ -0,0 +1,370 @@
+import logging
+from collections import defaultdict, deque
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import AsyncSessionLocal
+from app.crud.tax_lot_crud import tax_lot_crud
+from app.models.transaction import Transaction
+from app.utils.kst import to_naive_kst
+
+logger = logging.getLogger(__name__)
+
+# (user_id, stock_id, broker_id)
+LotKey = Tuple[int, int, int]
+
+UNIT_COST_PRECISION = Decimal("0.000001")
+
+
+class FifoLotBook:
+  """
+  (사용자, 종목, 증권사)별 미소진 로트 deque
+
+  매수는 deque 뒤에 로트를 추가하고, 매도는 앞(가장 먼저 취득한 로트)부터 소진한다.
+  로트는 dict로 유지하며 소진 시 remaining_quantity를 제자리에서 갱신한다.
+  """
+
+  def __init__(self):
+    self._open: Dict[LotKey, Deque[Dict]] = defaultdict(deque)
+
+  @staticmethod
+  def key(tx: Dict) -> LotKey:
+    return tx["user_id"], tx["stock_id"], tx["broker_id"]
+
+  def load(self, key: LotKey, lots: List[Dict]) -> None:
+    """DB의 미소진 로트를 FIFO 순서대로 적재"""
+    self._open[key].extend(lots)
+
+  def buy(self, tx: Dict) -> Dict:
+    """매수 거래 → 새 로트 (주당 취득원가는 매수 수수료/세금 포함)"""
+    quantity = tx["quantity"]
+    lot = {
+      "user_id": tx["user_id"],
+      "stock_id": tx["stock_id"],
+      "broker_id": tx["broker_id"],
+      "buy_transaction_id": tx["id"],
+      "acquired_at": tx["transaction_date"],
+      "quantity": quantity,
+      "remaining_quantity": quantity,
+      "unit_cost": (tx["price"] + (tx["commission"] + tx["transaction_tax"]) / quantity).quantize(UNIT_COST_PRECISION),
+      "exchange_rate": tx["exchange_rate"] or Decimal(1)
+    }
+    self._open[self.key(tx)].append(lot)
+    return lot
+
+  def sell(self, tx: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """
+    매도 거래 → 먼저 취득한 로트부터 소진
+
+    Returns:
+      (처분 내역, 잔량이 바뀐 로트)
+    """
+    key = self.key(tx)
+    lots = self._open[key]
+    quantity = tx["quantity"]
+    unit_proceeds = tx["price"] - (tx["commission"] + tx["transaction_tax"]) / quantity
+    sell_rate = tx["exchange_rate"] or Decimal(1)
+
+    disposals: List[Dict] = []
+    touched: List[Dict] = []
+    remaining = quantity
+    while remaining > 0 and lots:
+      lot = lots[0]
+      taken = min(remaining, lot["remaining_quantity"])
+      lot["remaining_quantity"] -= taken
+      remaining -= taken
+
+      cost_basis = lot["unit_cost"] * taken
+      proceeds = unit_proceeds * taken
+      disposals.append({
+        "user_id": tx["user_id"],
+        "stock_id": tx["stock_id"],
+        "broker_id": tx["broker_id"],
+        "buy_transaction_id": lot["buy_transaction_id"],
+        "sell_transaction_id": tx["id"],
+        "acquired_at": lot["acquired_at"],
+        "disposed_at": tx["transaction_date"],
+        "quantity": taken,
+        "cost_basis": cost_basis,
+        "proceeds": proceeds,
+        "realized_profit": proceeds - cost_basis,
+        "buy_exchange_rate": lot["exchange_rate"],
+        "sell_exchange_rate": sell_rate,
+        "realized_profit_krw": proceeds * sell_rate - cost_basis * lot["exchange_rate"]
+      })
+      touched.append(lot)
+      if lot["remaining_quantity"] == 0:
+        lots.popleft()
+
+    if remaining > 0:
+      logger.warning(f"매도 수량이 로트 잔량 초과: key={key}, sell_transaction_id={tx['id']}, 부족={remaining}")
+    return disposals, touched
+
+
+class TaxLotService:
+  """
+  FIFO 로트 장부 (holdings 평균단가 방식과 병행)
+
+  - 거래 생성 시 같은 DB 트랜잭션에서 로트를 추가/소진한다 (매도는 해당 종목 × 증권사의 미소진 로트만 읽음).
+  - 장부의 마지막 거래보다 이른 거래(소급 입력)는 해당 종목 × 증권사만 거래 내역에서 다시 계산한다.
+  - 재계산은 거래를 시간순으로 한 번 훑으며 메모리 deque로 소진한 뒤 대량 INSERT 한다.
+  """
+
+  async def record_transaction(self, db: AsyncSession, transaction: Transaction) -> None:
+    """생성된 거래(flush 완료)를 로트 장부에 반영 (commit은 호출자)"""
+    await self.record_transactions(db, [transaction])
+
+  async def record_transactions(self, db: AsyncSession, transactions: List[Transaction]) -> None:
+    """
+    같은 종목 × 증권사의 새 거래들(flush 완료, 거래일시 순)을 로트 장부에 한 번에 반영 (commit은 호출자)
+
+    미소진 로트는 매도가 있을 때만 한 번 읽고, 새 로트/처분 내역/잔량 변경은 마지막에 모아서 쓴다.
+    """
+    txs = [
+      {
+        "id": transaction.id,
+        "user_id": transaction.user_id,
+        "stock_id": transaction.stock_id,
+        "broker_id": transaction.broker_id,
+        "transaction_type": transaction.transaction_type,
+        "quantity": transaction.quantity,
+        "price": Decimal(transaction.price),
+        "commission": Decimal(transaction.commission or 0),
+        "transaction_tax": Decimal(transaction.transaction_tax or 0),
+        "exchange_rate": Decimal(transaction.exchange_rate or 1),
+        # 로트 취득/처분 일시도 DB 거래 일시와 같은 KST naive로 기록
+        "transaction_date": to_naive_kst(transaction.transaction_date)
+      }
+      for transaction in transactions
+    ]
+    if not txs:
+      return
+    key = FifoLotBook.key(txs[0])
+
+    last_activity = await tax_lot_crud.get_last_activity(db, *key)
+    if last_activity is not None and self._naive(txs[0]["transaction_date"]) < self._naive(last_activity):
+      logger.info(f"소급 거래 → 로트 재계산: key={key}, transaction_id={txs[0]['id']}")
+      await self.rebuild(db, *key)
+      return
+
+    book = FifoLotBook()
+    existing = set()
+    if any(tx["transaction_type"] == "SELL" for tx in txs):
+      open_lots = await tax_lot_crud.get_open_lots(db, *key)
+      existing = {lot["buy_transaction_id"] for lot in open_lots}
+      book.load(key, open_lots)
+
+    new_lots: List[Dict] = []
+    disposals: List[Dict] = []
+    touched: Dict[int, Dict] = {}
+    for tx in txs:
+      if tx["transaction_type"] == "BUY":
+        new_lots.append(book.buy(tx))
+        continue
+      sold, lots = book.sell(tx)
+      disposals.extend(sold)
+      # 새 로트는 INSERT 시점의 잔량이 최종값이므로 기존 로트만 UPDATE
+      touched.update({lot["buy_transaction_id"]: lot for lot in lots if lot["buy_transaction_id"] in existing})
+
+    await tax_lot_crud.insert_lots(db, new_lots)
+    await tax_lot_crud.update_remaining(db, list(touched.values()))
+    await tax_lot_crud.insert_disposals(db, disposals)
+
+  async def rebuild(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    stock_id: Optional[int] = None,
+    broker_id: Optional[int] = None
+  ) -> Tuple[int, int]:
+    """
+    거래 내역으로 로트/처분 내역 재작성 (commit은 호출자)
+
+    Returns:
+      (로트 수, 처분 내역 수)
+    """
+    await tax_lot_crud.delete_lots(db, user_id, stock_id, broker_id)
+    transactions = await tax_lot_crud.get_lot_transactions(db, user_id, stock_id, broker_id)
+
+    book = FifoLotBook()
+    lots: List[Dict] = []
+    disposals: List[Dict] = []
+    for tx in transactions:
+      if tx["transaction_type"] == "BUY":
+        lots.append(book.buy(tx))
+      elif tx["transaction_type"] == "SELL":
+        disposals.extend(book.sell(tx)[0])
+
+    await tax_lot_crud.insert_lots(db, lots)
+    await tax_lot_crud.insert_disposals(db, disposals)
+
+    logger.info(
+      f"로트 재계산: user_id={user_id}, stock_id={stock_id}, broker_id={broker_id}, "
+      f"거래={len(transactions)}, 로트={len(lots)}, 처분={len(disposals)}"
+    )
+    return len(lots), len(disposals)
+
+  # =========================
+  # 🔍 조회
+  # =========================
+
+  async def get_lots(
+    self,
+    user_id: int,
+    stock_symbol: Optional[str] = None,
+    include_closed: bool = False
+  ) -> Dict:
+    """로트별 미실현 손익 (현재가/환율은 미소진 로트 종목만 종목당 1회 조회)"""
+    from app.services.portfolio_service import PortfolioService
+
+    async with AsyncSessionLocal() as db:
+      rows = await tax_lot_crud.get_user_lots(db, user_id, stock_symbol, include_closed)
+
+    symbols: Dict[str, Dict] = {}
+    for row in rows:
+      if row["remaining_quantity"] > 0:
+        symbols.setdefault(row["stock_symbol"], {
+          "stock_symbol": row["stock_symbol"],
+          "market_type": self._market_type(row),
+          "exchange_code": row["exchange_code"],
+          "currency": row["currency"]
+        })
+
+    prices: Dict[str, float] = {}
+    exchange_rates: Dict[str, float] = {}
+    if symbols:
+      holdings = list(symbols.values())
+      price_results = await PortfolioService._get_prices_batch(user_id, holdings)
+      prices = {
+        holding["stock_symbol"]: float(price["current_price"])
+        for holding, price in zip(holdings, price_results)
+        if price and price.get("current_price")
+      }
+      exchange_rates = await PortfolioService.get_exchange_rates(holdings)
+
+    today = date.today()
+    lots = [self._to_lot_item(row, prices, exchange_rates, today) for row in rows]
+    valued = [lot for lot in lots if lot["unrealized_profit_krw"] is not None]
+
+    return {
+      "success": True,
+      "data": lots,
+      "total_cost_krw": sum(lot["cost_basis_krw"] for lot in valued),
+      "total_market_value_krw": sum(lot["market_value_krw"] for lot in valued),
+      "total_unrealized_profit_krw": sum(lot["unrealized_profit_krw"] for lot in valued),
+      "total_count": len(lots)
+    }
+
+  async def get_realized_lots(
+    self,
+    user_id: int,
+    stock_symbol: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+  ) -> Dict:
+    """로트별 실현손익 (처분일 범위)"""
+    async with AsyncSessionLocal() as db:
+      rows = await tax_lot_crud.get_disposals(
+        db,
+        user_id,
+        stock_symbol,
+        datetime.combine(start_date, time.min) if start_date else None,
+        datetime.combine(end_date, time.max) if end_date else None
+      )
+
+    disposals = [
+      {
+        "lot_id": row["buy_transaction_id"],
+        "sell_transaction_id": row["sell_transaction_id"],
+        "symbol": row["stock_symbol"],
+        "company_name": self._company_name(row),
+        "broker_id": row["broker_id"],
+        "broker": row["broker_name"],
+        "market_type": self._market_type(row),
+        "currency": row["currency"],
+        "acquired_at": row["acquired_at"].isoformat(),
+        "disposed_at": row["disposed_at"].isoformat(),
+        "holding_days": (row["disposed_at"].date() - row["acquired_at"].date()).days,
+        "quantity": int(row["quantity"]),
+        "cost_basis": float(row["cost_basis"]),
+        "proceeds": float(row["proceeds"]),
+        "realized_profit": float(row["realized_profit"]),
+        "realized_profit_percent": round(
+          float(row["realized_profit"] / row["cost_basis"] * 100), 2
+        ) if row["cost_basis"] else 0.0,
+        "buy_exchange_rate": float(row["buy_exchange_rate"]),
+        "sell_exchange_rate": float(row["sell_exchange_rate"]),
+        "realized_profit_krw": round(float(row["realized_profit_krw"]), 0)
+      }
+      for row in rows
+    ]
+
+    return {
+      "success": True,
+      "data": disposals,
+      "total_realized_profit_krw": sum(item["realized_profit_krw"] for item in disposals),
+      "total_count": len(disposals)
+    }
+
+  def _to_lot_item(self, row: Dict, prices: Dict[str, float], exchange_rates: Dict[str, float], today: date) -> Dict:
+    """로트 행 → 응답 형식 (현재가/환율이 없으면 평가 항목은 None)"""
+    market_type = self._market_type(row)
+    remaining = int(row["remaining_quantity"])
+    unit_cost = float(row["unit_cost"])
+    buy_rate = float(row["exchange_rate"])
+    cost_basis = remaining * unit_cost
+
+    current_price = prices.get(row["stock_symbol"])
+    current_rate = exchange_rates.get(row["currency"]) if market_type == "OVERSEAS" else 1.0
+    valued = remaining > 0 and current_price is not None and current_rate is not None
+
+    market_value = remaining * current_price if valued else None
+    unrealized_profit = market_value - cost_basis if valued else None
+
+    return {
+      "lot_id": row["buy_transaction_id"],
+      "symbol": row["stock_symbol"],
+      "company_name": self._company_name(row),
+      "broker_id": row["broker_id"],
+      "broker": row["broker_name"],
+      "market_type": market_type,
+      "currency": row["currency"],
+      "acquired_at": row["acquired_at"].isoformat(),
+      "holding_days": (today - row["acquired_at"].date()).days,
+      "quantity": int(row["quantity"]),
+      "remaining_quantity": remaining,
+      "unit_cost": unit_cost,
+      "cost_basis": cost_basis,
+      "cost_basis_krw": cost_basis * buy_rate,
+      "acquisition_exchange_rate": buy_rate,
+      "current_price": current_price if remaining > 0 else None,
+      "market_value": market_value,
+      "market_value_krw": market_value * current_rate if valued else None,
+      "unrealized_profit": unrealized_profit,
+      "unrealized_profit_percent": round(unrealized_profit / cost_basis * 100, 2) if valued and cost_basis > 0 else None,
+      # 원화 손익은 환차손익 포함 (현재 환율 평가액 - 취득 당시 환율 원가)
+      "unrealized_profit_krw": market_value * current_rate - cost_basis * buy_rate if valued else None
+    }
+
+  @staticmethod
+  def _market_type(row: Dict) -> str:
+    return "DOMESTIC" if row["country_code"] == "KR" else "OVERSEAS"
+
+  @staticmethod
+  def _company_name(row: Dict) -> str:
+    """해외주식은 영문명 우선"""
+    if row["country_code"] != "KR":
+      return row.get("company_name_en") or row["company_name"]
+    return row["company_name"]
+
+  @staticmethod
+  def _naive(value: datetime) -> datetime:
+    """DB(KST naive)와 요청(aware) 일시 비교용 - aware는 KST로 변환 후 비교"""
+    return to_naive_kst(value)
+
+
+# 싱글톤 인스턴스
+tax_lot_service = TaxLotService()
@@ -0,0 +1,366 @@
+import asyncio
+import codecs
+import csv
+import io
+import logging
+from contextlib import closing
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import end_read_transaction
+from app.config.settings import get_settings
+from app.core.constants import TRADE_IMPORT_COLUMNS, TRADE_IMPORT_REQUIRED_COLUMNS, TRADE_IMPORT_TYPE_ALIASES
+from app.crud.broker_crud import broker_crud
+from app.crud.fee_tax_crud import fee_tax_crud
+from app.crud.holding_crud import holding_crud
+from app.crud.realized_pnl_crud import RollupScope, realized_pnl_crud
+from app.crud.stock_crud import stock_crud
+from app.crud.transaction_crud import transaction_crud, holding_locks
+from app.external.exchange_rate_api import exchange_rate_service
+from app.services.holding_replay_service import holding_replay_service
+from app.services.portfolio_cache import portfolio_cache
+from app.services.tax_lot_service import tax_lot_service
+from app.utils.kst import to_naive_kst
+
+logger = logging.getLogger(__name__)
+
+# 오류 응답에 담는 최대 행 수
+IMPORT_MAX_REPORTED_ERRORS = 50
+# CSV 인코딩 판별 시 읽는 청크 크기
+CSV_PROBE_CHUNK_SIZE = 1 << 16
+# 헤더 별칭 → 표준 컬럼명
+_HEADER_ALIASES = {
+  alias.replace(" ", "").lower(): column
+  for column, aliases in TRADE_IMPORT_COLUMNS.items()
+  for alias in aliases
+}
+
+
+class TradeImportError(ValueError):
+  """가져오기 파일 검증 실패 (행 번호별 오류 목록, 전체 취소)"""
+
+  def __init__(self, errors: List[str]):
+    self.errors = errors[:IMPORT_MAX_REPORTED_ERRORS]
+    self.total = len(errors)
+    super().__init__(f"가져오기 파일 오류 {self.total}건")
+
+
+class TradeImportService:
+  """
+  증권사 거래 내역(CSV/XLSX) 일괄 가져오기
+
+  - 파일은 행 단위로 읽어 검증하고, 오류가 하나라도 있으면 아무것도 저장하지 않는다.
+  - 종목은 파일의 심볼을 한 번에 조회한 메모리 맵으로, 수수료는 증권사 수수료 설정 1회 조회로 계산한다.
+  - 환율이 없는 해외 거래는 거래일별로 한 번씩만 조회한다 (휴일은 직전 고시 환율).
+  - 거래는 executemany로 저장하고, 영향을 받은 종목 × 증권사마다 보유/로트를 한 번씩 재계산한 뒤 한 번에 커밋한다.
+  - 저장부터 커밋까지 영향을 받는 보유의 키 잠금과 holdings 행 잠금을 잡아 단건/일괄 주문과 직렬화한다.
+  """
+
+  async def import_statement(
+    self,
+    db: AsyncSession,
+    user_id: int,
+    broker_id: int,
+    filename: str,
+    file: BinaryIO
+  ) -> Dict[str, Any]:
+    broker = await broker_crud.get_broker_by_id(db, broker_id)
+    if not broker:
+      raise ValueError(f"증권사를 찾을 수 없습니다: broker_id={broker_id}")
+
+    records = await asyncio.to_thread(self._parse_file, filename, file)
+    if not records:
+      raise TradeImportError(["가져올 거래가 없습니다."])
+
+    errors: List[str] = []
+    self._resolve_stocks(records, await stock_crud.get_stocks_by_symbols(db, sorted({r["symbol"] for r in records})), errors)
+    if errors:
+      raise TradeImportError(errors)
+
+    self._apply_fees(records, await fee_tax_crud.get_broker_fee_map(broker_id))
+    await self._apply_exchange_rates(records, errors)
+    if errors:
+      raise TradeImportError(errors)
+
+    # 같은 일시의 거래는 파일 순서대로 id가 증가하도록 정렬 후 저장
+    records.sort(key=lambda r: (r["transaction_date"], r["line"]))
+    rows = [
+      {
+        "user_id": user_id,
+        "broker_id": broker_id,
+        "stock_id": r["stock"].id,
+        "transaction_type": r["transaction_type"],
+        "quantity": r["quantity"],
+        "price": r["price"],
+        "commission": r["commission"],
+        "transaction_tax": r["transaction_tax"],
+        "exchange_rate": r["exchange_rate"],
+        "transaction_date": r["transaction_date"],
+        "notes": r["notes"]
+      }
+      for r in records
+    ]
+    positions = sorted({row["stock_id"] for row in rows})
+
+    # 조회로 열린 읽기 트랜잭션을 닫고 (스냅샷 고정/커넥션 점유 방지) 정렬된 순서로 잠금
+    await end_read_transaction(db)
+
+    async with holding_locks.hold_many((user_id, stock_id, broker_id) for stock_id in positions):
+      try:
+        # 일반 조회보다 먼저 holdings 행을 잠가, 재계산이 잠금 이후의 스냅샷을 보도록 함
+        holdings = await holding_crud.lock_holdings(db, user_id, ((stock_id, broker_id) for stock_id in positions))
+        await transaction_crud.bulk_insert_transactions(db, rows)
+        for stock_id in positions:
+          await holding_replay_service.replay(db, user_id, stock_id, broker_id, holding=holdings[(stock_id, broker_id)])
+          await tax_lot_service.rebuild(db, user_id, stock_id, broker_id)
+        await realized_pnl_crud.rebuild_scopes(db, user_id, self._rollup_scopes(broker_id, records))
+        await db.commit()
+      except ValueError as e:
+        # 기존 거래와 합쳐 매도 수량이 보유를 넘는 경우 등
+        await db.rollback()
+        raise TradeImportError([str(e)])
+      except Exception:
+        await db.rollback()
+        raise
+
+    portfolio_cache.invalidate_holdings(user_id)
+
+    buy_count = sum(1 for row in rows if row["transaction_type"] == "BUY")
+    logger.info(
+      f"거래 내역 가져오기 완료: user_id={user_id}, broker_id={broker_id}, 파일={filename}, "
+      f"거래={len(rows)}, 종목={len(positions)}"
+    )
+    return {
+      "success": True,
+      "imported_count": len(rows),
+      "buy_count": buy_count,
+      "sell_count": len(rows) - buy_count,
+      "position_count": len(positions)
+    }
+
+  @staticmethod
+  def _rollup_scopes(broker_id: int, records: List[Dict[str, Any]]) -> Dict[RollupScope, datetime]:
+    """가져온 거래가 닿는 월별 집계 범위: (증권사, 시장, 통화) → 가장 이른 거래일시"""
+    scopes: Dict[RollupScope, datetime] = {}
+    for r in records:
+      stock = r["stock"]
+      scope = (broker_id, "DOMESTIC" if stock.country_code == "KR" else "OVERSEAS", stock.currency)
+      scopes[scope] = min(scopes.get(scope, r["transaction_date"]), r["transaction_date"])
+    return scopes
+
+  # =========================
+  # 📄 파일 파싱
+  # =========================
+
+  def _parse_file(self, filename: str, file: BinaryIO) -> List[Dict[str, Any]]:
+    """파일 → 검증된 거래 목록 (오류가 있으면 TradeImportError)"""
+    max_rows = get_settings().trade_import_max_rows
+    records: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    # 중간에 멈춰도 파일이 닫히기 전에 리더를 정리 (CSV TextIOWrapper detach, XLSX workbook close)
+    with closing(self._iter_rows(filename, file)) as rows:
+      for line, values in rows:
+        if len(records) + len(errors) >= max_rows:
+          raise TradeImportError([f"한 번에 가져올 수 있는 거래는 최대 {max_rows}건입니다."])
+        try:
+          records.append(self._parse_row(line, values))
+        except ValueError as e:
+          errors.append(f"{line}행: {e}")
+
+    if errors:
+      raise TradeImportError(errors)
+    return records
+
+  def _iter_rows(self, filename: str, file: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(행 번호, 표준 컬럼명 → 값) - 빈 행은 건너뜀"""
+    extension = filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else ""
+    if extension == "csv":
+      rows = self._iter_csv(file)
+    elif extension == "xlsx":
+      rows = self._iter_xlsx(file)
+    else:
+      raise ValueError("CSV 또는 XLSX 파일만 가져올 수 있습니다.")
+
+    header: Optional[List[Optional[str]]] = None
+    with closing(rows):
+      for line, row in enumerate(rows, start=1):
+        if header is None:
+          header = [_HEADER_ALIASES.get(str(cell or "").replace(" ", "").lower()) for cell in row]
+          missing = [column for column in TRADE_IMPORT_REQUIRED_COLUMNS if column not in header]
+          if missing:
+            raise TradeImportError([f"필수 컬럼 없음: {', '.join(missing)}"])
+          continue
+
+        values = {column: cell for column, cell in zip(header, row) if column and cell not in (None, "")}
+        if values:
+          yield line, values
+
+  @staticmethod
+  def _iter_csv(file: BinaryIO) -> Iterator[List[str]]:
+    """CSV 행 스트리밍 (UTF-8이 아니면 국내 증권사 기본 인코딩 CP949)"""
+    # 인코딩 판별은 청크 단위 디코딩만 (내용은 보관하지 않음)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    encoding = "utf-8-sig"
+    file.seek(0)
+    try:
+      for chunk in iter(lambda: file.read(CSV_PROBE_CHUNK_SIZE), b""):
+        decoder.decode(chunk)
+      decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+      encoding = "cp949"
+    file.seek(0)
+
+    text = io.TextIOWrapper(file, encoding=encoding, newline="")
+    try:
+      yield from csv.reader(text)
+    except UnicodeDecodeError:
+      raise ValueError("파일 인코딩을 읽을 수 없습니다 (UTF-8 또는 CP949).")
+    finally:
+      text.detach()
+
+  @staticmethod
+  def _iter_xlsx(file: BinaryIO) -> Iterator[Tuple[Any, ...]]:
+    """XLSX 첫 시트 행 스트리밍 (read-only 모드)"""
+    try:
+      from openpyxl import load_workbook
+    except ImportError:
+      raise ValueError("XLSX 가져오기에는 openpyxl 패키지가 필요합니다.")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+      yield from workbook.active.iter_rows(values_only=True)
+    finally:
+      workbook.close()
+
+  def _parse_row(self, line: int, values: Dict[str, Any]) -> Dict[str, Any]:
+    for column in TRADE_IMPORT_REQUIRED_COLUMNS:
+      if column not in values:
+        raise ValueError(f"{column} 값이 없습니다")
+
+    transaction_type = TRADE_IMPORT_TYPE_ALIASES.get(str(values["transaction_type"]).strip().upper())
+    if not transaction_type:
+      raise ValueError(f"거래 구분을 알 수 없습니다: {values['transaction_type']}")
+
+    quantity = self._decimal(values["quantity"], "quantity")
+    if quantity <= 0 or quantity != quantity.to_integral_value():
+      raise ValueError(f"수량은 양의 정수여야 합니다: {values['quantity']}")
+
+    price = self._decimal(values["price"], "price")
+    if price <= 0:
+      raise ValueError(f"가격은 0보다 커야 합니다: {values['price']}")
+
+    commission = self._optional_decimal(values.get("commission"), "commission")
+    transaction_tax = self._optional_decimal(values.get("transaction_tax"), "transaction_tax")
+    exchange_rate = self._optional_decimal(values.get("exchange_rate"), "exchange_rate")
+    for name, value in (("commission", commission), ("transaction_tax", transaction_tax)):
+      if value is not None and value < 0:
+        raise ValueError(f"{name}는 음수일 수 없습니다")
+    if exchange_rate is not None and exchange_rate <= 0:
+      raise ValueError("환율은 0보다 커야 합니다")
+
+    return {
+      "line": line,
+      "transaction_date": self._datetime(values["transaction_date"]),
+      "symbol": str(values["symbol"]).strip().upper(),
+      "exchange_code": str(values["exchange_code"]).strip().upper() if values.get("exchange_code") else None,
+      "transaction_type": transaction_type,
+      "quantity": int(quantity),
+      "price": price,
+      "commission": commission,
+      "transaction_tax": transaction_tax,
+      "exchange_rate": exchange_rate,
+      "notes": str(values["notes"]) if values.get("notes") else None
+    }
+
+  @staticmethod
+  def _decimal(value: Any, name: str) -> Decimal:
+    try:
+      return Decimal(str(value).replace(",", "").strip())
+    except InvalidOperation:
+      raise ValueError(f"{name} 숫자 형식이 아닙니다: {value}")
+
+  def _optional_decimal(self, value: Any, name: str) -> Optional[Decimal]:
+    return None if value is None or str(value).strip() == "" else self._decimal(value, name)
+
+  @staticmethod
+  def _datetime(value: Any) -> datetime:
+    """
+    datetime/date 셀 또는 YYYY-MM-DD[ HH:MM[:SS[.ffffff]]][±HH:MM], YYYY.MM.DD, YYYY/MM/DD, YYYYMMDD 문자열
+
+    오프셋이 있으면 KST로 바꾼 naive datetime (DB 컬럼과 정렬 키가 모두 naive KST)
+    """
+    if isinstance(value, datetime):
+      return to_naive_kst(value)
+    if isinstance(value, date):
+      return datetime.combine(value, datetime.min.time())
+
+    text = str(value).strip()
+    try:
+      if len(text) == 8 and text.isdigit():
+        return datetime.strptime(text, "%Y%m%d")
+      # 구분자 치환은 날짜 부분만 (시각의 소수점 초는 그대로)
+      return to_naive_kst(datetime.fromisoformat(text[:10].replace(".", "-").replace("/", "-") + text[10:]))
+    except ValueError:
+      raise ValueError(f"거래일시 형식이 아닙니다: {value}")
+
+  # =========================
+  # 🔗 종목/수수료/환율
+  # =========================
+
+  @staticmethod
+  def _resolve_stocks(records: List[Dict], stock_map: Dict[str, List], errors: List[str]) -> None:
+    """심볼 → 종목 (여러 거래소에 같은 심볼이 있으면 exchange_code 컬럼 필요)"""
+    for record in records:
+      candidates = stock_map.get(record["symbol"], [])
+      if record["exchange_code"]:
+        candidates = [stock for stock in candidates if stock.exchange_code == record["exchange_code"]]
+
+      if len(candidates) == 1:
+        record["stock"] = candidates[0]
+        record["market_type"] = "DOMESTIC" if candidates[0].country_code == "KR" else "OVERSEAS"
+      elif not candidates:
+        errors.append(f"{record['line']}행: 종목을 찾을 수 없습니다: {record['symbol']}")
+      else:
+        errors.append(f"{record['line']}행: 여러 거래소에 있는 종목입니다, exchange_code를 지정하세요: {record['symbol']}")
+
+  @staticmethod
+  def _apply_fees(records: List[Dict], fee_map: Dict[Tuple[str, str], Any]) -> None:
+    """수수료/거래세가 비어 있는 거래만 증권사 수수료 설정으로 계산"""
+    for record in records:
+      fee_info = fee_map.get((record["market_type"], record["transaction_type"]))
+      amount = record["price"] * record["quantity"]
+      if record["commission"] is None:
+        record["commission"] = fee_tax_crud.commission_for(fee_info, amount)
+      if record["transaction_tax"] is None:
+        record["transaction_tax"] = fee_tax_crud.tax_for(fee_info, record["market_type"], record["transaction_type"], amount)
+
+  async def _apply_exchange_rates(self, records: List[Dict], errors: List[str]) -> None:
+    """환율이 비어 있는 해외 거래에 거래일 고시 환율 적용 (국내는 1.0)"""
+    pending = []
+    for record in records:
+      if record["market_type"] == "DOMESTIC":
+        record["exchange_rate"] = Decimal("1.0")
+      elif record["exchange_rate"] is None:
+        pending.append(record)
+
+    if not pending:
+      return
+
+    currencies = {record["stock"].currency for record in pending}
+    rates = await exchange_rate_service.get_daily_rates({record["transaction_date"].date() for record in pending}, currencies)
+    for record in pending:
+      rate = rates[record["transaction_date"].date()].get(record["stock"].currency)
+      if rate is None:
+        errors.append(
+          f"{record['line']}행: {record['transaction_date'].date()} {record['stock'].currency} 환율을 찾을 수 없습니다"
+        )
+      else:
+        record["exchange_rate"] = Decimal(str(rate)).quantize(Decimal("0.0001"))
+
+
+# 싱글톤 인스턴스
+trade_import_service = TradeImportService()
@@ -0,0 +1,161 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.config.database import get_async_session
+from app.core.constants import EXCHANGE_TRADING_CALENDAR, TRADING_CALENDAR_REFERENCE_SYMBOLS
+from app.crud.stock_price_crud import stock_price_crud
+from app.external.kis_api import kis_api_service, KIS_PRIORITY_INTERACTIVE
+from app.services.market_hours_service import market_hours_service
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 마지막 거래일 탐색 범위 (연휴 대비)
+CALENDAR_LOOKBACK_DAYS = 14
+
+
+class TradingCalendarService:
+  """
+  거래소별 거래일 달력
+
+  기준 종목의 일봉으로 최근 거래일을 하루 한 번(장 마감 후 한 번 더) 학습하고 stock_prices.is_trading_day에 저장한다.
+  휴장 시 종목마다 날짜를 거슬러 조회하는 대신 마지막 완결 거래일 한 번만 조회하면 된다.
+  장중의 당일 일봉은 종가가 확정되지 않았으므로 저장하지 않는다.
+  """
+
+  def __init__(self):
+    # calendar → (학습한 현지 날짜, 장 마감 후 학습 여부, 마지막 완결 거래일 YYYYMMDD)
+    self._sessions: Dict[str, Tuple[str, bool, Optional[str]]] = {}
+    self._flight = SingleFlight("trading-calendar")
+
+  async def get_last_complete_session(
+    self,
+    user_id: int,
+    market_type: str,
+    exchange_code: Optional[str] = None
+  ) -> Optional[str]:
+    """해당 거래소의 마지막 완결 거래일 (YYYYMMDD, 학습 실패 시 None)"""
+    exchange = market_hours_service.resolve_exchange(market_type, exchange_code)
+    calendar = EXCHANGE_TRADING_CALENDAR.get(exchange, exchange)
+    today = market_hours_service.local_today(exchange)
+    include_today = market_hours_service.is_after_close(exchange)
+
+    cached = self._sessions.get(calendar)
+    if cached is not None and cached[:2] == (today, include_today):
+      return cached[2]
+
+    return await self._flight.do(
+      (calendar, today, include_today), lambda: self._learn(user_id, calendar, today, include_today)
+    )
+
+  async def _learn(self, user_id: int, calendar: str, today: str, include_today: bool) -> Optional[str]:
+    """오늘 학습한 거래일을 DB에서 찾고, 없으면 기준 종목 일봉으로 학습"""
+    reference = TRADING_CALENDAR_REFERENCE_SYMBOLS.get(calendar)
+    if reference is None:
+      logger.warning(f"거래일 달력 기준 종목 없음: calendar={calendar}")
+      return None
+
+    symbol, market_type, exchange_code = reference
+    since = datetime.strptime(today, "%Y%m%d") - timedelta(days=CALENDAR_LOOKBACK_DAYS)
+
+    try:
+      trading_days = await self._load_trading_days(symbol, since)
+    except Exception as e:
+      logger.warning(f"저장된 거래일 조회 실패: calendar={calendar}, error={str(e)}")
+      trading_days = []
+
+    try:
+      # 장 마감 후에는 장중에 저장하지 않은 당일 일봉을 다시 확인
+      if not trading_days or (include_today and trading_days[-1] < today):
+        trading_days = await self._fetch_trading_days(
+          user_id, symbol, market_type, exchange_code, since.strftime("%Y%m%d"), today, include_today
+        )
+    except Exception as e:
+      logger.error(f"거래일 달력 학습 실패: calendar={calendar}, error={str(e)}")
+      return None
+
+    completed = [day for day in trading_days if day < today or (include_today and day == today)]
+    session = completed[-1] if completed else None
+
+    self._sessions[calendar] = (today, include_today, session)
+    logger.info(f"거래일 달력 학습 완료: calendar={calendar}, 마지막 완결 거래일={session}")
+    return session
+
+  async def _load_trading_days(self, symbol: str, since: datetime) -> List[str]:
+    """오늘 이미 학습해 저장한 거래일 목록"""
+    learned_after = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    async for db in get_async_session():
+      days = await stock_price_crud.get_recent_trading_days(db, symbol, since.date(), learned_after)
+      return [day.strftime("%Y%m%d") for day in days]
+    return []
+
+  async def _fetch_trading_days(
+    self,
+    user_id: int,
+    symbol: str,
+    market_type: str,
+    exchange_code: str,
+    start_date: str,
+    end_date: str,
+    end_complete: bool
+  ) -> List[str]:
+    """
+    기준 종목 일봉으로 거래일 판별 후 저장 (거래량 있는 날 = 거래일, 나머지 평일 = 휴장일)
+
+    end_complete가 False면(end_date 장중) end_date 일봉은 종가 미확정이므로 저장하지 않는다.
+    """
+    chart = await kis_api_service.get_daily_chart_data(
+      user_id, symbol, start_date, end_date, market_type,
+      priority=KIS_PRIORITY_INTERACTIVE, exchange_code=exchange_code
+    )
+    bars = {bar["date"]: bar for bar in chart["chart_data"] if bar["volume"] > 0}
+
+    rows = []
+    last_close = None
+    day = datetime.strptime(start_date, "%Y%m%d")
+    end = datetime.strptime(end_date, "%Y%m%d")
+    while day <= end:
+      date_str = day.strftime("%Y%m%d")
+      bar = bars.get(date_str)
+      if bar is not None and date_str == end_date and not end_complete:
+        # 장중 일봉 (종가 미확정) - 가격 이력 조회가 종가로 쓰지 않도록 저장하지 않음
+        pass
+      elif bar is not None:
+        last_close = bar["close_price"]
+        rows.append({
+          "symbol": symbol,
+          "date": day.date(),
+          "close_price": bar["close_price"],
+          "open_price": bar["open_price"],
+          "high_price": bar["high_price"],
+          "low_price": bar["low_price"],
+          "volume": bar["volume"],
+          "is_trading_day": True
+        })
+      elif day.weekday() < 5 and last_close is not None and date_str != end_date:
+        # 평일 휴장일 (당일은 아직 체결 전일 수 있으므로 기록하지 않음)
+        rows.append({
+          "symbol": symbol,
+          "date": day.date(),
+          "close_price": last_close,
+          "open_price": None,
+          "high_price": None,
+          "low_price": None,
+          "volume": 0,
+          "is_trading_day": False
+        })
+      day += timedelta(days=1)
+
+    try:
+      async for db in get_async_session():
+        await stock_price_crud.upsert_daily_prices(db, rows)
+    except Exception as e:
+      logger.warning(f"거래일 달력 저장 실패 (메모리 값 사용): symbol={symbol}, error={str(e)}")
+
+    return sorted(bars)
+
+
+# 싱글톤 인스턴스
+trading_calendar_service = TradingCalendarService()
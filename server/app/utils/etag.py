@@ -0,0 +1,17 @@
+import re
+from typing import Optional
+
+# entity-tag = [ "W/" ] DQUOTE *etagc DQUOTE (etagc에는 쉼표가 올 수 있으므로 따옴표 단위로 추출)
+_ENTITY_TAG = re.compile(r'(?:W/)?"([^"]*)"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+  """If-None-Match가 ETag와 일치하는지 (RFC 9110 약한 비교: W/ 무시, 쉼표로 구분된 목록, *)"""
+  if not if_none_match:
+    return False
+  if if_none_match.strip() == "*":
+    return True
+
+  current = _ENTITY_TAG.fullmatch(etag.strip())
+  opaque = current.group(1) if current else etag.strip()
+  return any(match.group(1) == opaque for match in _ENTITY_TAG.finditer(if_none_match))
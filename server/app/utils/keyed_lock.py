@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+  __slots__ = ("lock", "users")
+
+  def __init__(self):
+    self.lock = asyncio.Lock()
+    self.users = 0
+
+
+class KeyedLock:
+  """
+  키 단위 프로세스 내 asyncio 잠금
+
+  같은 키의 작업은 도착 순서대로 하나씩 실행하고, 다른 키는 서로 기다리지 않는다.
+  사용 중인 키만 보관하며 마지막 사용자가 나가면 항목을 지운다.
+  """
+
+  def __init__(self, name: str = "keyed-lock"):
+    self.name = name
+    self._entries: Dict[Hashable, _Entry] = {}
+    self._acquired = 0
+    self._contended = 0
+
+  @asynccontextmanager
+  async def hold(self, key: Hashable) -> AsyncIterator[None]:
+    """key 잠금을 잡은 동안 블록 실행"""
+    entry = self._entries.get(key)
+    if entry is None:
+      entry = self._entries[key] = _Entry()
+    entry.users += 1
+
+    try:
+      if entry.lock.locked():
+        self._contended += 1
+        logger.debug(f"{self.name}: 잠금 대기 key={key}")
+      async with entry.lock:
+        self._acquired += 1
+        yield
+    finally:
+      entry.users -= 1
+      if entry.users == 0 and self._entries.get(key) is entry:
+        del self._entries[key]
+
+  @asynccontextmanager
+  async def hold_many(self, keys: Iterable[Hashable]) -> AsyncIterator[None]:
+    """여러 키를 정렬된 순서로 잡음 (호출자끼리 교착 방지, 중복 키는 한 번만)"""
+    async with AsyncExitStack() as stack:
+      for key in sorted(set(keys)):
+        await stack.enter_async_context(self.hold(key))
+      yield
+
+  def is_locked(self, key: Hashable) -> bool:
+    """해당 키를 누군가 잡고 있는지 여부"""
+    entry = self._entries.get(key)
+    return entry is not None and entry.lock.locked()
+
+  def get_stats(self) -> Dict[str, Any]:
+    """잠금 사용 현황"""
+    return {
+      "name": self.name,
+      "active_keys": len(self._entries),
+      "acquired": self._acquired,
+      "contended": self._contended
+    }
@@ -0,0 +1,19 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(transaction_date: datetime, row_id: int) -> str:
+  """(거래일시, id) 키셋 커서 → URL 안전 문자열"""
+  raw = f"{transaction_date.isoformat()}|{row_id}".encode("utf-8")
+  return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+  """encode_cursor 역변환 (형식이 잘못되면 ValueError)"""
+  try:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    date_part, id_part = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+    return datetime.fromisoformat(date_part), int(id_part)
+  except (ValueError, UnicodeDecodeError) as e:
+    raise ValueError(f"잘못된 커서: {cursor}") from e
@@ -0,0 +1,12 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+# 거래/집계 일시 기준 시간대 (DB 일시 컬럼은 KST naive로 저장)
+KST = ZoneInfo("Asia/Seoul")
+
+
+def to_naive_kst(value: datetime) -> datetime:
+  """DB(KST naive) 저장/비교용 일시 - aware면 KST로 변환 후 tzinfo 제거, naive는 KST로 간주"""
+  if value.tzinfo is None:
+    return value
+  return value.astimezone(KST).replace(tzinfo=None)
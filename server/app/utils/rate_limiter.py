@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PriorityRateLimiter:
+  """
+  우선순위 레인을 가진 토큰 버킷 스케줄러
+
+  - 초당 rate개의 토큰이 최대 burst개까지 충전된다.
+  - 요청은 레인(lane)별 FIFO 큐에서 대기하며, 토큰이 생기면 앞쪽 레인(높은 우선순위)부터 배정된다.
+  - 대기 중인 요청이 없고 토큰이 남아 있으면 큐를 거치지 않고 바로 통과한다.
+  """
+
+  def __init__(
+    self,
+    rate_per_sec: float,
+    burst: Optional[float] = None,
+    lanes: Sequence[str] = ("interactive", "batch"),
+    name: str = "rate-limiter"
+  ):
+    if rate_per_sec <= 0:
+      raise ValueError(f"rate_per_sec는 0보다 커야 합니다: {rate_per_sec}")
+
+    self.name = name
+    self.rate = float(rate_per_sec)
+    self.burst = float(burst) if burst else float(rate_per_sec)
+    self.lanes: Tuple[str, ...] = tuple(lanes)
+
+    self._tokens = self.burst
+    self._last_refill = time.monotonic()
+    self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {lane: deque() for lane in self.lanes}
+    self._dispatcher: Optional[asyncio.Task] = None
+
+    # 레인별 통계
+    self._stats: Dict[str, Dict[str, float]] = {
+      lane: {"granted": 0, "total_wait": 0.0, "max_wait": 0.0}
+      for lane in self.lanes
+    }
+
+  async def acquire(self, lane: Optional[str] = None) -> float:
+    """토큰 1개 확보 (대기한 시간(초) 반환)"""
+    lane = lane or self.lanes[0]
+    if lane not in self._queues:
+      raise ValueError(f"알 수 없는 레인: {lane} (사용 가능: {', '.join(self.lanes)})")
+
+    # 대기열이 비어 있고 토큰이 있으면 즉시 통과
+    self._refill()
+    if self._tokens >= 1 and not self._has_waiters():
+      self._tokens -= 1
+      self._record(lane, 0.0)
+      return 0.0
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    enqueued_at = time.monotonic()
+    self._queues[lane].append((future, enqueued_at))
+    self._ensure_dispatcher()
+
+    try:
+      await future
+    except asyncio.CancelledError:
+      # 토큰을 이미 배정받은 뒤 취소되었다면 반납
+      if future.done() and not future.cancelled():
+        self._tokens = min(self.burst, self._tokens + 1)
+      raise
+
+    waited = time.monotonic() - enqueued_at
+    self._record(lane, waited)
+    return waited
+
+  def _refill(self) -> None:
+    """경과 시간만큼 토큰 충전"""
+    now = time.monotonic()
+    elapsed = now - self._last_refill
+    if elapsed > 0:
+      self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+      self._last_refill = now
+
+  def _has_waiters(self) -> bool:
+    return any(self._queues[lane] for lane in self.lanes)
+
+  def _pop_next(self) -> Optional[asyncio.Future]:
+    """우선순위 순서대로 다음 대기 요청 꺼내기 (취소된 요청은 건너뜀)"""
+    for lane in self.lanes:
+      queue = self._queues[lane]
+      while queue:
+        future, _ = queue.popleft()
+        if not future.done():
+          return future
+    return None
+
+  def _ensure_dispatcher(self) -> None:
+    if self._dispatcher is None or self._dispatcher.done():
+      self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+  async def _dispatch(self) -> None:
+    """토큰이 충전되는 대로 대기 요청에 배정"""
+    try:
+      while self._has_waiters():
+        self._refill()
+        if self._tokens >= 1:
+          future = self._pop_next()
+          if future is None:
+            continue
+          self._tokens -= 1
+          future.set_result(None)
+        else:
+          await asyncio.sleep((1 - self._tokens) / self.rate)
+    finally:
+      self._dispatcher = None
+
+  def _record(self, lane: str, waited: float) -> None:
+    stats = self._stats[lane]
+    stats["granted"] += 1
+    stats["total_wait"] += waited
+    if waited > stats["max_wait"]:
+      stats["max_wait"] = waited
+
+  def queue_depth(self, lane: Optional[str] = None) -> int:
+    """대기 중인 요청 수 (lane 미지정 시 전체)"""
+    if lane is not None:
+      return sum(1 for future, _ in self._queues[lane] if not future.done())
+    return sum(self.queue_depth(name) for name in self.lanes)
+
+  def get_stats(self) -> Dict[str, Any]:
+    """레인별 대기열 길이 및 대기 시간 통계"""
+    self._refill()
+    now = time.monotonic()
+    lanes = {}
+    for lane in self.lanes:
+      stats = self._stats[lane]
+      pending = [enqueued_at for future, enqueued_at in self._queues[lane] if not future.done()]
+      granted = int(stats["granted"])
+      lanes[lane] = {
+        "queue_depth": len(pending),
+        "oldest_wait_ms": round((now - min(pending)) * 1000, 1) if pending else 0.0,
+        "granted": granted,
+        "avg_wait_ms": round(stats["total_wait"] / granted * 1000, 1) if granted else 0.0,
+        "max_wait_ms": round(stats["max_wait"] * 1000, 1)
+      }
+
+    return {
+      "name": self.name,
+      "rate_per_sec": self.rate,
+      "burst": self.burst,
+      "available_tokens": round(self._tokens, 2),
+      "lanes": lanes
+    }
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+  """
+  같은 키에 대한 동시 호출을 하나의 코루틴 실행으로 합치는 유틸리티
+
+  첫 호출자가 작업을 Task로 시작하고, 진행 중에 들어온 같은 키의 호출자들은
+  새 작업을 만들지 않고 그 Task의 결과(또는 예외)를 함께 기다린다.
+  대기 중인 호출자 하나가 취소되어도 공유 Task는 취소되지 않는다.
+  """
+
+  def __init__(self, name: str = "single-flight"):
+    self.name = name
+    self._inflight: Dict[Hashable, asyncio.Task] = {}
+    self._started = 0
+    self._joined = 0
+
+  async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+    """key 단위로 func 실행을 합쳐서 결과 반환"""
+    return await asyncio.shield(self.start(key, func))
+
+  def start(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+    """
+    key의 작업을 즉시 등록하고 공유 Task 반환 (이미 진행 중이면 기존 Task)
+
+    await 없이 등록되므로 여러 키를 한 번에 점유할 때 사용한다.
+    반환된 Task를 기다릴 때는 asyncio.shield로 감싸야 한다.
+    """
+    task = self._inflight.get(key)
+
+    if task is None:
+      task = asyncio.ensure_future(func())
+      self._inflight[key] = task
+      task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+      self._started += 1
+    else:
+      self._joined += 1
+      logger.debug(f"{self.name}: 진행 중인 요청에 합류 key={key}")
+
+    return task
+
+  def join(self, key: Hashable) -> Optional[asyncio.Future]:
+    """진행 중인 key의 공유 Task 반환 (없으면 None, 기다릴 때는 asyncio.shield 사용)"""
+    task = self._inflight.get(key)
+    if task is not None:
+      self._joined += 1
+    return task
+
+  def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+    """완료된 Task 정리 (모든 대기자가 취소된 경우의 미회수 예외 방지)"""
+    if self._inflight.get(key) is task:
+      del self._inflight[key]
+    if not task.cancelled():
+      task.exception()
+
+  def is_inflight(self, key: Hashable) -> bool:
+    """해당 키의 작업이 진행 중인지 여부"""
+    return key in self._inflight
+
+  @property
+  def inflight_count(self) -> int:
+    """현재 진행 중인 작업 수"""
+    return len(self._inflight)
+
+  def get_stats(self) -> Dict[str, Any]:
+    """진행 중인 작업 현황"""
+    return {
+      "name": self.name,
+      "inflight": self.inflight_count,
+      "started": self._started,
+      "joined": self._joined
+    }
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+보유 정보(holdings) 및 매도 실현손익 재계산 (독립 실행)
+
+사용법:
+    python3 holding_replay_job.py --user-id 3                            # 사용자의 모든 종목 × 증권사
+    python3 holding_replay_job.py --user-id 3 --stock-id 12 --broker-id 1  # 특정 종목 × 증권사
+
+거래 생성 시 소급 거래는 자동으로 재계산되며, 거래를 직접 수정/삭제한 뒤 실행한다.
+사용자 단위로 하나의 DB 트랜잭션에서 재계산하고 월별 실현손익 집계도 다시 작성한다.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="보유 정보 및 매도 실현손익 재계산")
+    parser.add_argument("--user-id", type=int, required=True, help="재계산할 사용자 ID")
+    parser.add_argument("--stock-id", type=int, help="종목 ID (--broker-id와 함께 지정)")
+    parser.add_argument("--broker-id", type=int, help="증권사 ID (--stock-id와 함께 지정)")
+    args = parser.parse_args()
+
+    if (args.stock_id is None) != (args.broker_id is None):
+        parser.error("--stock-id와 --broker-id는 함께 지정해야 합니다")
+
+    from app.config.database import AsyncSessionLocal, async_engine, end_read_transaction
+    from app.crud.holding_crud import holding_crud
+    from app.crud.transaction_crud import transaction_crud
+    from app.crud.realized_pnl_crud import realized_pnl_crud
+    from app.services.holding_replay_service import holding_replay_service
+
+    try:
+        async with AsyncSessionLocal() as db:
+            try:
+                if args.stock_id is not None:
+                    keys = [(args.stock_id, args.broker_id)]
+                else:
+                    keys = await transaction_crud.get_position_keys(db, args.user_id)
+                    await end_read_transaction(db)
+
+                # 거래를 읽기 전에 모든 holdings 행을 잠가 API 서버의 주문 저장과 직렬화
+                holdings = await holding_crud.lock_holdings(db, args.user_id, keys)
+
+                updated = 0
+                for stock_id, broker_id in keys:
+                    result = await holding_replay_service.replay(
+                        db, args.user_id, stock_id, broker_id, holding=holdings[(stock_id, broker_id)]
+                    )
+                    updated += result["updated"]
+
+                await realized_pnl_crud.rebuild(db, args.user_id)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        print(f"✅ 보유 재계산 완료 (user_id={args.user_id}): 종목×증권사 {len(keys)}건, 매도 갱신 {updated}건")
+    except Exception as e:
+        print(f"❌ 보유 재계산 실패: {e}")
+        sys.exit(1)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+KIS 실시간 시세 WebSocket 재생 서버 (독립 실행)
+
+기록된 체결 프레임을 KIS WebSocket과 같은 형식으로 재생해
+실시간 시세 수신 서비스(app/external/kis_websocket.py)를 로컬에서 확인한다.
+
+사용법:
+    python3 kis_ws_replay.py ticks.txt --port 8765 --interval 0.2 --loop
+
+서버 연결 설정 (.env):
+    KIS_WS_ENABLED=true
+    KIS_WS_URL=ws://localhost:8765
+    KIS_WS_APPROVAL_KEY=replay
+
+ticks.txt는 한 줄에 프레임 하나 ("0|H0STCNT0|001|005930^..." 형식)이며,
+KIS_WS_RECORD_PATH를 지정하면 실제 수신 프레임이 같은 형식으로 기록된다.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+
+def load_frames(path):
+    """기록 파일에서 체결 프레임 읽기 (빈 줄, # 주석 제외)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")]
+
+
+def frame_key(frame):
+    """프레임의 (tr_id, tr_key) - 국내는 종목코드, 해외는 첫 필드(RSYM)"""
+    parts = frame.split("|", 3)
+    if len(parts) != 4:
+        return None
+    return parts[1], parts[3].split("^", 1)[0]
+
+
+def subscription_ack(tr_id, tr_key, tr_type):
+    """KIS 구독 응답 형식"""
+    return json.dumps({
+        "header": {"tr_id": tr_id, "tr_key": tr_key, "encrypt": "N"},
+        "body": {
+            "rt_cd": "0",
+            "msg_cd": "OPSP0000",
+            "msg1": "SUBSCRIBE SUCCESS" if tr_type == "1" else "UNSUBSCRIBE SUCCESS"
+        }
+    })
+
+
+async def handle_client(ws, frames, interval, loop_forever):
+    """클라이언트 하나에 구독 중인 종목 프레임만 재생"""
+    subscriptions = set()
+    print(f"🔌 연결: {ws.remote_address}")
+
+    async def receive():
+        async for message in ws:
+            data = json.loads(message)
+            header = data.get("header", {})
+            if header.get("tr_id") == "PINGPONG":
+                continue
+            tr = data["body"]["input"]
+            key = (tr["tr_id"], tr["tr_key"])
+            if header.get("tr_type") == "1":
+                subscriptions.add(key)
+            else:
+                subscriptions.discard(key)
+            await ws.send(subscription_ack(tr["tr_id"], tr["tr_key"], header.get("tr_type")))
+            print(f"   구독 {'등록' if header.get('tr_type') == '1' else '해제'}: {key}")
+
+    async def replay():
+        while True:
+            for i, frame in enumerate(frames):
+                await asyncio.sleep(interval)
+                if frame_key(frame) in subscriptions:
+                    await ws.send(frame)
+                if i % 50 == 0:
+                    await ws.send(json.dumps({"header": {"tr_id": "PINGPONG", "datetime": "replay"}}))
+            if not loop_forever:
+                break
+
+    receiver = asyncio.create_task(receive())
+    try:
+        await replay()
+        await receiver
+    except ConnectionClosed:
+        pass
+    finally:
+        receiver.cancel()
+        print(f"🔌 종료: {ws.remote_address}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="KIS 실시간 시세 WebSocket 재생 서버")
+    parser.add_argument("frames", help="기록된 체결 프레임 파일")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.2, help="프레임 간격(초)")
+    parser.add_argument("--loop", action="store_true", help="끝까지 재생하면 처음부터 반복")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    if not frames:
+        print(f"❌ 재생할 프레임이 없습니다: {args.frames}")
+        sys.exit(1)
+
+    print(f"▶️  {len(frames)}개 프레임 재생: ws://{args.host}:{args.port}")
+    async with serve(
+        lambda ws: handle_client(ws, frames, args.interval, args.loop),
+        args.host,
+        args.port
+    ):
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+주문 저장 동시성 벤치마크 (독립 실행)
+
+사용법:
+    python3 order_ingest_benchmark.py --user-id 3 --broker-id 1 --symbols 005930 --yes
+    python3 order_ingest_benchmark.py --user-id 3 --broker-id 1 --symbols 005930,000660,035420 \\
+        --orders 1000 --concurrency 32 --yes
+
+transaction_crud.create_transaction으로 1주 매수 주문을 동시에 저장하면서 초당 처리 건수와 지연 시간을 잰다.
+주문은 종목들에 번갈아 배정되므로 종목 수가 적을수록 같은 보유(사용자, 종목, 증권사)에 경합이 몰린다.
+끝나면 종목별 보유 수량 증가분이 성공한 주문 수와 같은지 확인한다 (갱신 유실 검사).
+
+⚠️ 실제 거래/보유 데이터를 기록하므로 개발/테스트 DB에서만 실행한다 (--yes 필요).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+
+# 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def get_quantities(AsyncSessionLocal, holding_crud, user_id, broker_id, stocks):
+    """종목별 현재 보유 수량"""
+    quantities = {}
+    async with AsyncSessionLocal() as db:
+        for symbol, stock in stocks.items():
+            holding = await holding_crud.get_or_create_holding(db, user_id, stock.id, broker_id)
+            quantities[symbol] = holding.quantity
+        await db.commit()
+    return quantities
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="주문 저장 동시성 벤치마크")
+    parser.add_argument("--user-id", type=int, required=True, help="주문을 기록할 사용자 ID")
+    parser.add_argument("--broker-id", type=int, required=True, help="증권사 ID")
+    parser.add_argument("--symbols", required=True, help="종목코드 (쉼표 구분, 적을수록 경합 증가)")
+    parser.add_argument("--orders", type=int, default=500, help="전체 주문 수 (기본 500)")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 주문 수 (기본 16)")
+    parser.add_argument("--price", type=Decimal, default=Decimal("1000"), help="매수 가격 (기본 1000)")
+    parser.add_argument("--yes", action="store_true", help="DB에 거래가 기록됨을 확인")
+    args = parser.parse_args()
+
+    if not args.yes:
+        parser.error("실제 거래가 기록됩니다. 개발/테스트 DB라면 --yes를 붙여 실행하세요")
+
+    from app.config.database import AsyncSessionLocal, async_engine
+    from app.crud.holding_crud import holding_crud
+    from app.crud.transaction_crud import transaction_crud, holding_locks
+
+    symbols = [symbol.strip() for symbol in args.symbols.split(",") if symbol.strip()]
+
+    try:
+        async with AsyncSessionLocal() as db:
+            stocks = {symbol: await transaction_crud.get_stock_by_symbol(db, symbol) for symbol in symbols}
+        missing = [symbol for symbol, stock in stocks.items() if stock is None]
+        if missing:
+            print(f"❌ 종목을 찾을 수 없습니다: {', '.join(missing)}")
+            sys.exit(1)
+
+        before = await get_quantities(AsyncSessionLocal, holding_crud, args.user_id, args.broker_id, stocks)
+
+        queue = asyncio.Queue()
+        for i in range(args.orders):
+            queue.put_nowait(symbols[i % len(symbols)])
+
+        latencies = []
+        succeeded = Counter()
+        errors = Counter()
+
+        async def worker():
+            async with AsyncSessionLocal() as db:
+                while True:
+                    try:
+                        symbol = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    stock = stocks[symbol]
+                    started = time.perf_counter()
+                    try:
+                        await transaction_crud.create_transaction(
+                            db=db,
+                            user_id=args.user_id,
+                            stock_id=stock.id,
+                            broker_id=args.broker_id,
+                            transaction_type="BUY",
+                            quantity=1,
+                            price=args.price,
+                            commission=Decimal("0"),
+                            transaction_tax=Decimal("0"),
+                            exchange_rate=Decimal("1"),
+                            transaction_date=datetime.now(),
+                            notes="order_ingest_benchmark"
+                        )
+                        succeeded[symbol] += 1
+                    except Exception as e:
+                        errors[type(e).__name__] += 1
+                    latencies.append(time.perf_counter() - started)
+
+        print(
+            f"=== 주문 저장 벤치마크: 주문 {args.orders}건, 동시 {args.concurrency}, "
+            f"종목 {len(symbols)}개 (종목당 약 {args.orders // len(symbols)}건) ==="
+        )
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        after = await get_quantities(AsyncSessionLocal, holding_crud, args.user_id, args.broker_id, stocks)
+
+        total_ok = sum(succeeded.values())
+        latencies.sort()
+        print(f"⏱️  소요 {elapsed:.2f}s, 성공 {total_ok}건, 실패 {sum(errors.values())}건 {dict(errors) or ''}")
+        print(f"🚀 처리량 {total_ok / elapsed:.1f} orders/s")
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(
+                f"📊 지연 p50={statistics.median(latencies) * 1000:.1f}ms, "
+                f"p95={p95 * 1000:.1f}ms, max={latencies[-1] * 1000:.1f}ms"
+            )
+        print(f"🔒 잠금 {holding_locks.get_stats()}")
+
+        lost = 0
+        for symbol in symbols:
+            increased = after[symbol] - before[symbol]
+            ok = increased == succeeded[symbol]
+            lost += succeeded[symbol] - increased
+            print(f"  {'✅' if ok else '❌'} {symbol}: 보유 {before[symbol]} → {after[symbol]} (성공 주문 {succeeded[symbol]}건)")
+
+        if lost:
+            print(f"❌ 갱신 유실 {lost}건")
+            sys.exit(1)
+        print("✅ 갱신 유실 없음")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
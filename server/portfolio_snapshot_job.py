@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+일별 포트폴리오 NAV 스냅샷 작업 (독립 실행)
+
+사용법:
+    python3 portfolio_snapshot_job.py                          # 마지막 완결 거래일 장 마감 스냅샷
+    python3 portfolio_snapshot_job.py --date 2026-10-15        # 지정일 스냅샷
+    python3 portfolio_snapshot_job.py --backfill --user-id 3   # 첫 거래일부터 재계산
+    python3 portfolio_snapshot_job.py --backfill --from 2025-01-01 --to 2025-12-31
+
+--backfill에서 --user-id를 생략하면 거래 내역이 있는 모든 사용자를 재계산한다.
+서버가 실행 중이면 같은 작업이 PORTFOLIO_SNAPSHOT_RUN_TIME(KST)에 자동으로 실행된다.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date
+
+# 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="일별 포트폴리오 NAV 스냅샷 작업")
+    parser.add_argument("--date", help="스냅샷 기준일 (YYYY-MM-DD, 기본: 보유 거래소의 마지막 완결 거래일)")
+    parser.add_argument("--backfill", action="store_true", help="거래를 재생해 기간 스냅샷 재계산")
+    parser.add_argument("--user-id", type=int, help="재계산할 사용자 ID")
+    parser.add_argument("--from", dest="from_date", help="재계산 시작일 (기본: 첫 거래일)")
+    parser.add_argument("--to", dest="to_date", help="재계산 종료일 (기본: 마지막 완결 거래일)")
+    args = parser.parse_args()
+
+    from app.config.database import AsyncSessionLocal, async_engine
+    from app.crud.transaction_crud import transaction_crud
+    from app.external.kis_api import kis_api_service
+    from app.services.portfolio_snapshot_service import portfolio_snapshot_service
+
+    await kis_api_service.startup()
+    try:
+        if not args.backfill:
+            result = await portfolio_snapshot_service.run_end_of_day(parse_date(args.date))
+            print(f"✅ 스냅샷 작성: {result}")
+            return
+
+        if args.user_id:
+            user_ids = [args.user_id]
+        else:
+            async with AsyncSessionLocal() as db:
+                user_ids = await transaction_crud.get_user_ids_with_transactions(db)
+
+        print(f"🔁 재계산 대상: {len(user_ids)}명")
+        for user_id in user_ids:
+            try:
+                count = await portfolio_snapshot_service.backfill_user(
+                    user_id, parse_date(args.from_date), parse_date(args.to_date)
+                )
+                print(f"  ✅ user_id={user_id}: {count}행")
+            except Exception as e:
+                print(f"  ❌ user_id={user_id}: {e}")
+    finally:
+        await kis_api_service.shutdown()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
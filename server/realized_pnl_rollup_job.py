@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+월별 실현손익 집계(realized_pnl_monthly) 재작성 (독립 실행)
+
+사용법:
+    python3 realized_pnl_rollup_job.py              # 전체 사용자
+    python3 realized_pnl_rollup_job.py --user-id 3  # 특정 사용자
+
+평소에는 매도 거래 생성 시 증분 갱신되며, 테이블 최초 생성 후나 거래를 직접 수정/삭제한 뒤 실행한다.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="월별 실현손익 집계 재작성")
+    parser.add_argument("--user-id", type=int, help="재작성할 사용자 ID (생략 시 전체)")
+    args = parser.parse_args()
+
+    from app.config.database import AsyncSessionLocal, async_engine
+    from app.crud.realized_pnl_crud import realized_pnl_crud
+
+    try:
+        async with AsyncSessionLocal() as db:
+            try:
+                count = await realized_pnl_crud.rebuild(db, args.user_id)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        target = f"user_id={args.user_id}" if args.user_id else "전체 사용자"
+        print(f"✅ 실현손익 집계 재작성 완료 ({target}): {count}행")
+    except Exception as e:
+        print(f"❌ 실현손익 집계 재작성 실패: {e}")
+        sys.exit(1)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
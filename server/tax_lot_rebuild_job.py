@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+FIFO 로트 장부(tax_lots, tax_lot_disposals) 재작성 (독립 실행)
+
+사용법:
+    python3 tax_lot_rebuild_job.py              # 전체 사용자
+    python3 tax_lot_rebuild_job.py --user-id 3  # 특정 사용자
+
+평소에는 거래 생성 시 증분 갱신되며, 테이블 최초 생성 후나 거래를 직접 수정/삭제한 뒤 실행한다.
+사용자 단위로 거래 내역을 한 번 훑어 재계산하고 사용자마다 커밋한다.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# 경로 설정
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="FIFO 로트 장부 재작성")
+    parser.add_argument("--user-id", type=int, help="재작성할 사용자 ID (생략 시 전체)")
+    args = parser.parse_args()
+
+    from app.config.database import AsyncSessionLocal, async_engine
+    from app.crud.tax_lot_crud import tax_lot_crud
+    from app.services.tax_lot_service import tax_lot_service
+
+    try:
+        if args.user_id:
+            user_ids = [args.user_id]
+        else:
+            async with AsyncSessionLocal() as db:
+                user_ids = await tax_lot_crud.get_transaction_user_ids(db)
+
+        total_lots = total_disposals = 0
+        for user_id in user_ids:
+            async with AsyncSessionLocal() as db:
+                try:
+                    lots, disposals = await tax_lot_service.rebuild(db, user_id)
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+            total_lots += lots
+            total_disposals += disposals
+
+        print(f"✅ 로트 장부 재작성 완료 (사용자 {len(user_ids)}명): 로트 {total_lots}건, 처분 {total_disposals}건")
+    except Exception as e:
+        print(f"❌ 로트 장부 재작성 실패: {e}")
+        sys.exit(1)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
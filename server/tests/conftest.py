@@ -0,0 +1,64 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+# 설정 필수값 (.env 없이 단위 테스트를 돌릴 때만 사용, DB/KIS에는 접속하지 않음)
+for name, value in {
+  "MYSQL_HOST": "localhost",
+  "MYSQL_USER": "test",
+  "MYSQL_PASSWORD": "test",
+  "MYSQL_DATABASE": "test",
+  "KIS_APP_KEY": "test",
+  "KIS_APP_SECRET": "test",
+  "OPENAI_API_KEY": "test",
+  "SECRET_KEY": "test",
+}.items():
+  os.environ.setdefault(name, value)
+
+
+class SQLiteSession:
+  """CRUD가 쓰는 AsyncSession.execute/stream만 동기 SQLite 연결로 실행 (쿼리 조건/정렬/일괄 UPDATE 확인용)"""
+
+  def __init__(self, connection):
+    self.connection = connection
+
+  async def execute(self, statement, params=None):
+    return self.connection.execute(statement, params)
+
+  async def stream(self, statement):
+    return _AsyncRows(self.connection.execute(statement))
+
+
+class _AsyncRows:
+  def __init__(self, result):
+    self._rows = iter(result)
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    try:
+      return next(self._rows)
+    except StopIteration:
+      raise StopAsyncIteration
+
+
+@pytest.fixture
+def sqlite_db():
+  """증권사 1개(id=1), 종목 2개(1: 005930 국내, 2: AAPL 해외)와 빈 거래 테이블이 있는 메모리 SQLite"""
+  from app.models.broker import Broker
+  from app.models.stock import Stock
+  from app.models.transaction import Transaction
+
+  engine = create_engine("sqlite://")
+  Transaction.metadata.create_all(engine, tables=[Broker.__table__, Stock.__table__, Transaction.__table__])
+
+  with engine.connect() as connection:
+    connection.execute(Broker.__table__.insert(), [{"id": 1, "broker_name": "kis", "display_name": "KIS"}])
+    connection.execute(Stock.__table__.insert(), [
+      {"id": 1, "symbol": "005930", "company_name": "삼성전자", "country_code": "KR", "exchange_code": "KOSPI", "currency": "KRW"},
+      {"id": 2, "symbol": "AAPL", "company_name": "Apple", "country_code": "US", "exchange_code": "NASDAQ", "currency": "USD"},
+    ])
+    yield SQLiteSession(connection)
+  engine.dispose()
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from websockets.asyncio.server import serve
+
+import kis_ws_replay
+from app.config.settings import get_settings
+from app.external.kis_websocket import KISRealtimeQuoteService
+
+
+def _domestic_frame(symbol, price, change, sign="2"):
+  fields = [""] * 15
+  fields[0], fields[2], fields[3], fields[4], fields[5] = symbol, str(price), sign, str(change), "1.00"
+  fields[7], fields[8], fields[9], fields[13] = str(price - 500), str(price + 500), str(price - 1000), "1200"
+  return "0|H0STCNT0|001|" + "^".join(fields)
+
+
+def _overseas_frame(rsym, symbol, price, change, sign="2"):
+  fields = [""] * 21
+  fields[0], fields[1] = rsym, symbol
+  fields[8], fields[9], fields[10], fields[11] = str(price - 1), str(price + 2), str(price - 2), str(price)
+  fields[12], fields[13], fields[14], fields[20] = sign, str(change), "0.50", "3400"
+  return "0|HDFSCNT0|001|" + "^".join(fields)
+
+
+FRAMES = [
+  _domestic_frame("005930", 72000, 1000),
+  _domestic_frame("000660", 180000, 2000, sign="5"),
+  _overseas_frame("DNASAAPL", "AAPL", 190.5, 1.5),
+]
+
+
+async def _until(predicate, timeout=3.0):
+  """predicate가 참이 될 때까지 대기 (재생 간격 단위 폴링)"""
+  deadline = asyncio.get_running_loop().time() + timeout
+  while not predicate():
+    assert asyncio.get_running_loop().time() < deadline, "timeout"
+    await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def replay_url():
+  """프레임을 0.01초 간격으로 반복 재생하는 로컬 서버"""
+  async with serve(lambda ws: kis_ws_replay.handle_client(ws, FRAMES, 0.01, True), "127.0.0.1", 0) as server:
+    port = server.sockets[0].getsockname()[1]
+    yield f"ws://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def settings(monkeypatch, replay_url):
+  settings = get_settings()
+  monkeypatch.setattr(settings, "kis_ws_enabled", True)
+  monkeypatch.setattr(settings, "kis_ws_url", replay_url)
+  monkeypatch.setattr(settings, "kis_ws_approval_key", "replay")
+  monkeypatch.setattr(settings, "kis_ws_overseas_realtime", False)
+  monkeypatch.setattr(settings, "kis_ws_record_path", None)
+  return settings
+
+
+def test_frame_key():
+  assert kis_ws_replay.frame_key(FRAMES[0]) == ("H0STCNT0", "005930")
+  assert kis_ws_replay.frame_key(FRAMES[2]) == ("HDFSCNT0", "DNASAAPL")
+  assert kis_ws_replay.frame_key('{"header": {}}') is None
+
+
+@pytest.mark.asyncio
+async def test_ticks_follow_subscriptions(settings):
+  held = [("005930", "DOMESTIC", "KOSPI"), ("AAPL", "OVERSEAS", "NASDAQ")]
+  service = KISRealtimeQuoteService()
+
+  async def load_held_symbols():
+    service.set_symbols(held)
+
+  service._load_held_symbols = load_held_symbols
+  await service.start()
+  try:
+    await _until(lambda: service.get_latest_tick("005930", "DOMESTIC") and service.get_latest_tick("AAPL", "OVERSEAS"))
+
+    domestic = service.get_latest_tick("005930", "domestic")
+    assert (domestic["current_price"], domestic["previous_close"], domestic["volume"]) == (72000, 71000, 1200)
+    overseas = service.get_latest_tick("AAPL", "OVERSEAS")
+    assert (overseas["current_price"], overseas["day_change"], overseas["currency"]) == (190.5, 1.5, "USD")
+    # 구독하지 않은 종목은 서버가 보내지 않음
+    assert service.get_latest_tick("000660", "DOMESTIC") is None
+    assert service.get_stats()["active_subscriptions"] == 2
+
+    # 보유 종목 변경 → 005930 해제, 000660 등록
+    held[:] = [("000660", "DOMESTIC", "KOSPI"), ("AAPL", "OVERSEAS", "NASDAQ")]
+    service.request_resync()
+    await _until(lambda: service.get_latest_tick("000660", "DOMESTIC"))
+
+    assert service.get_latest_tick("000660", "DOMESTIC")["day_change"] == -2000
+    # 해제한 종목은 체결가가 지워지고 이후 프레임도 오지 않음 (재생 몇 바퀴 대기)
+    await asyncio.sleep(0.2)
+    assert service.get_latest_tick("005930", "DOMESTIC") is None
+    assert service.get_stats()["active_subscriptions"] == 2
+  finally:
+    await service.stop()
+
+  assert not service.is_connected()
+  assert service.get_latest_tick("AAPL", "OVERSEAS") is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_service_does_not_connect(settings, monkeypatch):
+  monkeypatch.setattr(settings, "kis_ws_enabled", False)
+  service = KISRealtimeQuoteService()
+
+  await service.start()
+
+  assert service._runner is None
+  assert service.get_latest_tick("005930", "DOMESTIC") is None
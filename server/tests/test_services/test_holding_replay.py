@@ -0,0 +1,151 @@
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.models.holding import Holding
+from app.models.transaction import Transaction
+from app.services.holding_replay_service import PositionState, holding_replay_service
+
+
+def _tx(transaction_type, quantity, price, fees="0", day=1, exchange_rate="1"):
+  return {
+    "transaction_type": transaction_type,
+    "quantity": quantity,
+    "price": Decimal(price),
+    "commission": Decimal(fees),
+    "transaction_tax": Decimal("0"),
+    "exchange_rate": Decimal(exchange_rate),
+    "transaction_date": datetime(2024, 1, day, 10, 0)
+  }
+
+
+SELL_RESULTS = {"avg_cost_at_transaction": None, "realized_profit_per_share": None, "total_realized_profit": None}
+
+
+def _insert(db, rows):
+  # executemany는 첫 행의 컬럼만 쓰므로 매도 결과 컬럼을 모든 행에 채운다
+  db.connection.execute(Transaction.__table__.insert(), [
+    {"id": i, "user_id": 1, "stock_id": 1, "broker_id": 1, **SELL_RESULTS, **row}
+    for i, row in enumerate(rows, start=1)
+  ])
+
+
+def _sell_results(db):
+  rows = db.connection.execute(
+    select(Transaction.id, Transaction.avg_cost_at_transaction, Transaction.realized_profit_per_share, Transaction.total_realized_profit)
+    .filter(Transaction.transaction_type == "SELL")
+    .order_by(Transaction.id)
+  )
+  return {row.id: (row.avg_cost_at_transaction, row.realized_profit_per_share, row.total_realized_profit) for row in rows}
+
+
+def test_average_cost_and_realized_profit():
+  state = PositionState()
+  state.buy(_tx("BUY", 10, "100", fees="10", day=1))
+  assert state.average_cost == Decimal("101")
+
+  state.buy(_tx("BUY", 10, "200", day=2))
+  assert state.average_cost == Decimal("150.5")
+
+  avg_cost, per_share, total = state.sell(_tx("SELL", 5, "300", fees="15", day=3))
+
+  assert avg_cost == Decimal("150.5")
+  assert per_share == Decimal("146.5")
+  assert total == Decimal("732.5")
+  assert state.quantity == 15
+  assert state.first_purchase_date == datetime(2024, 1, 1).date()
+
+
+def test_oversell_raises():
+  state = PositionState()
+  state.buy(_tx("BUY", 3, "100"))
+
+  with pytest.raises(ValueError):
+    state.sell(_tx("SELL", 4, "100", day=2))
+
+
+def test_full_sell_resets_position():
+  state = PositionState()
+  state.buy(_tx("BUY", 10, "100", exchange_rate="1300"))
+  state.sell(_tx("SELL", 10, "120", day=2, exchange_rate="1300"))
+
+  assert state.quantity == 0
+  assert state.average_cost == 0
+  assert state.total_cost == 0
+  assert state.total_cost_krw == 0
+  assert state.realized_gain == Decimal("200")
+  assert state.realized_gain_krw == Decimal("260000")
+
+  # 전량 매도 후 재매수는 새 평균단가/최초 매수일로 시작
+  state.buy(_tx("BUY", 5, "90", day=3))
+  assert state.average_cost == Decimal("90")
+  assert state.first_purchase_date == datetime(2024, 1, 3).date()
+
+
+@pytest.mark.asyncio
+async def test_replay_rewrites_only_changed_sells(sqlite_db):
+  # 3번 매도는 이미 맞는 값, 5번 매도는 2일자 매수가 소급 입력되어 값이 틀어진 상태
+  _insert(sqlite_db, [
+    _tx("BUY", 10, "100", day=1),
+    _tx("BUY", 10, "200", day=2),
+    {**_tx("SELL", 5, "300", day=3), "avg_cost_at_transaction": Decimal("150"),
+     "realized_profit_per_share": Decimal("150"), "total_realized_profit": Decimal("750")},
+    _tx("BUY", 5, "150", day=4),
+    {**_tx("SELL", 10, "100", day=5), "avg_cost_at_transaction": Decimal("100"),
+     "realized_profit_per_share": Decimal("0"), "total_realized_profit": Decimal("0")},
+  ])
+  holding = Holding(user_id=1, stock_id=1, broker_id=1, quantity=0)
+
+  result = await holding_replay_service.replay(sqlite_db, 1, 1, 1, holding=holding)
+
+  assert result == {"transactions": 5, "updated": 1, "quantity": 10}
+  assert _sell_results(sqlite_db) == {
+    3: (Decimal("150"), Decimal("150"), Decimal("750")),
+    5: (Decimal("150"), Decimal("-50"), Decimal("-500")),
+  }
+  assert holding.quantity == 10
+  assert holding.average_cost == Decimal("150")
+  assert holding.is_active
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_sells_before_since(sqlite_db):
+  _insert(sqlite_db, [
+    _tx("BUY", 10, "100", day=1),
+    _tx("SELL", 5, "120", day=2),
+    _tx("SELL", 5, "130", day=3),
+  ])
+  holding = Holding(user_id=1, stock_id=1, broker_id=1, quantity=0)
+
+  # 2024-01-03 00:00 KST (aware UTC로 전달)
+  since = datetime(2024, 1, 2, 15, 0, tzinfo=timezone.utc)
+  result = await holding_replay_service.replay(sqlite_db, 1, 1, 1, since=since, holding=holding)
+
+  assert result["updated"] == 1
+  results = _sell_results(sqlite_db)
+  assert results[2] == (None, None, None)
+  assert results[3] == (Decimal("100"), Decimal("30"), Decimal("150"))
+  assert not holding.is_active
+
+
+@pytest.mark.asyncio
+async def test_replay_10k_trades_under_a_second(sqlite_db):
+  """백로그 목표: 거래 1만 건 재계산이 1초 이내 (메모리 SQLite 기준, 스트리밍 + 일괄 UPDATE 포함)"""
+  base = datetime(2020, 1, 1, 9, 0)
+  rows = []
+  for i in range(10_000):
+    row = _tx("BUY" if i % 2 == 0 else "SELL", 1 if i % 2 else 2, str(100 + i % 50), fees="1")
+    row["transaction_date"] = base + timedelta(minutes=i)
+    rows.append(row)
+  _insert(sqlite_db, rows)
+  holding = Holding(user_id=1, stock_id=1, broker_id=1, quantity=0)
+
+  started = time.perf_counter()
+  result = await holding_replay_service.replay(sqlite_db, 1, 1, 1, holding=holding)
+  elapsed = time.perf_counter() - started
+
+  assert result == {"transactions": 10_000, "updated": 5_000, "quantity": 5_000}
+  assert elapsed < 1.0, f"10k 거래 재계산 {elapsed:.3f}s"
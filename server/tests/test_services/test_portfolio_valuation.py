@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from app.services.portfolio_valuation import valuate_holdings
+
+RATES = {"USD": 1300.0, "JPY": 9.0}
+
+
+def _holding(market_type, quantity, avg_cost, investment, investment_krw, currency=None):
+  return {
+    "market_type": market_type,
+    "currency": currency,
+    "total_quantity": quantity,
+    "overall_average_cost": avg_cost,
+    "total_investment": investment,
+    "total_investment_krw": investment_krw
+  }
+
+
+def _price(current, previous):
+  return {"current_price": current, "previous_close": previous}
+
+
+HOLDINGS = [
+  _holding("DOMESTIC", 10, 70000, 700000, 700000, "KRW"),
+  _holding("OVERSEAS", 5, 150.12, 750.6, 1000000, "USD"),
+  _holding("OVERSEAS", 100, 1000, 100000, 900000, "JPY"),
+  _holding("DOMESTIC", 3, 50000, 150000, 150000, "KRW"),   # 시세 없음
+  _holding("OVERSEAS", 20, 30, 600, 500000, "HKD"),        # 환율 없음
+]
+PRICES = [_price(72000, 71000), _price(160, 158), _price(1100, 1050), None, _price(35, 34)]
+
+
+def test_rows_skip_missing_price_or_rate():
+  valuation = valuate_holdings(HOLDINGS, PRICES, RATES)
+
+  rows = dict(valuation.rows())
+
+  assert sorted(rows) == [0, 1, 2]
+  assert rows[0] == {
+    "shares": 10,
+    "avg_cost": 70000,
+    "current_price": 72000,
+    "market_value": 720000,
+    "day_gain": 10000,
+    "day_gain_percent": pytest.approx(10000 / 720000 * 100),
+    "total_gain": 20000,
+    "total_gain_percent": pytest.approx(20000 / 700000 * 100)
+  }
+  assert rows[1]["market_value"] == 800
+  assert rows[1]["total_gain"] == pytest.approx(49.4)
+  assert rows[2]["day_gain"] == 5000
+
+
+def test_overseas_rows_use_their_own_currency_rate():
+  valuation = valuate_holdings(HOLDINGS, PRICES, RATES)
+
+  assert valuation.market_value_krw[:3].tolist() == [720000, 800 * 1300, 110000 * 9]
+  # 해외 평가손익(원화)은 원화 원가 기준 - 환차손익 포함
+  assert valuation.total_gain_krw[1:3].tolist() == pytest.approx([40000, 90000])
+
+
+def test_summary_cards():
+  valuation = valuate_holdings(HOLDINGS, PRICES, RATES)
+
+  domestic = valuation.summary(overseas=False)
+  overseas = valuation.summary(overseas=True)
+
+  assert domestic["market_value"] == 720000
+  assert domestic["total_gain_percent"] == pytest.approx(20000 / 700000 * 100)
+  # 해외 카드는 USD 기준 (JPY 종목은 USD로 환산)
+  assert overseas["market_value"] == pytest.approx(800 + 110000 * 9 / 1300)
+  assert overseas["day_gain"] == pytest.approx(10 + 5000 * 9 / 1300)
+
+
+def test_totals():
+  totals = valuate_holdings(HOLDINGS, PRICES, RATES).totals()
+
+  assert totals["total_portfolio"] == pytest.approx(2750000)
+  assert totals["total_day_gain"] == pytest.approx(10000 + 2 * 5 * 1300 + 50 * 100 * 9)
+  assert totals["total_total_gain"] == pytest.approx(20000 + 40000 + 90000)
+  # 해외 원가는 시세/환율이 없는 종목도 포함
+  assert totals["total_cost"] == pytest.approx(700000 + 1000000 + 900000 + 500000)
+  assert totals["total_total_gain_percent"] == pytest.approx(150000 / 3100000 * 100)
+
+
+def test_group_totals_match_per_group_valuation():
+  groups = np.array([0, 1, 0, 1, 1])
+
+  grouped = valuate_holdings(HOLDINGS, PRICES, RATES).group_totals(groups, 3)
+
+  for group in range(2):
+    index = np.flatnonzero(groups == group).tolist()
+    expected = valuate_holdings([HOLDINGS[i] for i in index], [PRICES[i] for i in index], RATES).totals()
+    for key, value in expected.items():
+      assert grouped[key][group] == pytest.approx(value)
+  # 보유 종목이 없는 그룹은 0
+  assert grouped["total_portfolio"][2] == 0
+  assert grouped["total_total_gain_percent"][2] == 0
+
+
+def test_empty_portfolio():
+  totals = valuate_holdings([], [], RATES).totals()
+
+  assert totals == {
+    "total_portfolio": 0.0,
+    "total_day_gain": 0.0,
+    "total_total_gain": 0.0,
+    "total_cost": 0.0,
+    "total_day_gain_percent": 0.0,
+    "total_total_gain_percent": 0.0
+  }
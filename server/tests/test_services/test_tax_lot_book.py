@@ -0,0 +1,95 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.services.tax_lot_service import FifoLotBook
+
+
+def _tx(tx_id, transaction_type, quantity, price, fees="0", exchange_rate="1", day=1):
+  return {
+    "id": tx_id,
+    "user_id": 1,
+    "stock_id": 10,
+    "broker_id": 2,
+    "transaction_type": transaction_type,
+    "quantity": quantity,
+    "price": Decimal(price),
+    "commission": Decimal(fees),
+    "transaction_tax": Decimal("0"),
+    "exchange_rate": Decimal(exchange_rate),
+    "transaction_date": datetime(2024, 1, day, 10, 0)
+  }
+
+
+def test_buy_includes_fees_in_unit_cost():
+  book = FifoLotBook()
+
+  lot = book.buy(_tx(1, "BUY", 10, "100", fees="5"))
+
+  assert lot["unit_cost"] == Decimal("100.5")
+  assert lot["remaining_quantity"] == 10
+
+
+def test_sell_consumes_oldest_lots_first():
+  book = FifoLotBook()
+  book.buy(_tx(1, "BUY", 10, "100", day=1))
+  book.buy(_tx(2, "BUY", 10, "200", day=2))
+
+  disposals, touched = book.sell(_tx(3, "SELL", 15, "300", day=3))
+
+  assert [(d["buy_transaction_id"], d["quantity"]) for d in disposals] == [(1, 10), (2, 5)]
+  assert [d["cost_basis"] for d in disposals] == [Decimal("1000"), Decimal("1000")]
+  assert [d["realized_profit"] for d in disposals] == [Decimal("2000"), Decimal("500")]
+  assert [lot["remaining_quantity"] for lot in touched] == [0, 5]
+
+  # 남은 로트는 두 번째 매수분 5주
+  disposals, _ = book.sell(_tx(4, "SELL", 5, "300", day=4))
+  assert [(d["buy_transaction_id"], d["quantity"]) for d in disposals] == [(2, 5)]
+
+
+def test_sell_fees_reduce_proceeds():
+  book = FifoLotBook()
+  book.buy(_tx(1, "BUY", 10, "100"))
+
+  disposals, _ = book.sell(_tx(2, "SELL", 10, "110", fees="20"))
+
+  assert disposals[0]["proceeds"] == Decimal("1080")
+  assert disposals[0]["realized_profit"] == Decimal("80")
+
+
+def test_krw_profit_uses_buy_and_sell_exchange_rates():
+  book = FifoLotBook()
+  book.buy(_tx(1, "BUY", 10, "100", exchange_rate="1300"))
+
+  disposals, _ = book.sell(_tx(2, "SELL", 10, "100", exchange_rate="1400"))
+
+  # 현지 통화 손익은 0이지만 환율 상승분만큼 원화 이익
+  assert disposals[0]["realized_profit"] == 0
+  assert disposals[0]["realized_profit_krw"] == Decimal("100000")
+
+
+def test_oversell_consumes_what_is_available():
+  book = FifoLotBook()
+  book.buy(_tx(1, "BUY", 3, "100"))
+
+  disposals, _ = book.sell(_tx(2, "SELL", 5, "100"))
+
+  assert sum(d["quantity"] for d in disposals) == 3
+  assert book.sell(_tx(3, "SELL", 1, "100")) == ([], [])
+
+
+def test_loaded_lots_are_consumed_before_new_buys():
+  book = FifoLotBook()
+  key = (1, 10, 2)
+  book.load(key, [{
+    "buy_transaction_id": 99,
+    "acquired_at": datetime(2023, 12, 1),
+    "quantity": 4,
+    "remaining_quantity": 2,
+    "unit_cost": Decimal("50"),
+    "exchange_rate": Decimal("1")
+  }])
+  book.buy(_tx(1, "BUY", 10, "100"))
+
+  disposals, _ = book.sell(_tx(2, "SELL", 3, "100"))
+
+  assert [(d["buy_transaction_id"], d["quantity"]) for d in disposals] == [(99, 2), (1, 1)]
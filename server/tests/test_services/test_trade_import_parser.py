@@ -0,0 +1,123 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.services.trade_import_service import TradeImportError, trade_import_service
+
+
+def _csv(text: str, encoding: str = "utf-8") -> io.BytesIO:
+  return io.BytesIO(text.encode(encoding))
+
+
+def test_csv_with_english_headers():
+  file = _csv(
+    "date,ticker,exchange,side,qty,price,fee,tax,fx,memo\n"
+    "2024-03-04 09:30:00,aapl,nasdaq,B,\"1,000\",170.5,1.2,,1350.5,첫 매수\n"
+    "\n"
+    "20240305,AAPL,,sell,10,180,,,,\n"
+  )
+
+  records = trade_import_service._parse_file("trades.CSV", file)
+
+  assert records[0] == {
+    "line": 2,
+    "transaction_date": datetime(2024, 3, 4, 9, 30),
+    "symbol": "AAPL",
+    "exchange_code": "NASDAQ",
+    "transaction_type": "BUY",
+    "quantity": 1000,
+    "price": Decimal("170.5"),
+    "commission": Decimal("1.2"),
+    "transaction_tax": None,
+    "exchange_rate": Decimal("1350.5"),
+    "notes": "첫 매수"
+  }
+  # 빈 행은 건너뛰어도 행 번호는 파일 기준
+  assert records[1]["line"] == 4
+  assert records[1]["transaction_type"] == "SELL"
+  assert records[1]["transaction_date"] == datetime(2024, 3, 5)
+  assert records[1]["exchange_code"] is None
+
+
+@pytest.mark.parametrize("encoding", ["utf-8-sig", "cp949"])
+def test_csv_with_korean_headers(encoding):
+  file = _csv("거래일시,종목코드,구분,수량,단가\n2024.03.04,005930,매수,10,\"72,000\"\n", encoding)
+
+  records = trade_import_service._parse_file("거래내역.csv", file)
+
+  assert [(r["symbol"], r["transaction_type"], r["quantity"], r["price"]) for r in records] == [
+    ("005930", "BUY", 10, Decimal("72000"))
+  ]
+
+
+def test_missing_required_column():
+  with pytest.raises(TradeImportError) as exc:
+    trade_import_service._parse_file("trades.csv", _csv("date,symbol,type,quantity\n2024-03-04,AAPL,BUY,1\n"))
+
+  assert exc.value.errors == ["필수 컬럼 없음: price"]
+
+
+def test_row_errors_are_reported_with_line_numbers():
+  file = _csv(
+    "date,symbol,type,quantity,price,fee\n"
+    "2024-03-04,AAPL,BUY,1,100,\n"
+    "2024-03-04,AAPL,HOLD,1,100,\n"
+    "2024-03-04,AAPL,BUY,1.5,100,\n"
+    "2024-03-04,AAPL,BUY,1,0,\n"
+    "2024-03-04,AAPL,BUY,1,100,-1\n"
+    "03/04/2024,AAPL,BUY,1,100,\n"
+    ",AAPL,BUY,1,100,\n"
+  )
+
+  with pytest.raises(TradeImportError) as exc:
+    trade_import_service._parse_file("trades.csv", file)
+
+  assert exc.value.total == 6
+  assert [error.split(":")[0] for error in exc.value.errors] == ["3행", "4행", "5행", "6행", "7행", "8행"]
+
+
+def test_unsupported_extension():
+  with pytest.raises(ValueError):
+    trade_import_service._parse_file("trades.txt", _csv("date,symbol,type,quantity,price\n"))
+
+
+def test_row_limit(monkeypatch):
+  from app.config.settings import get_settings
+
+  monkeypatch.setattr(get_settings(), "trade_import_max_rows", 2)
+  rows = "".join(f"2024-03-0{i},AAPL,BUY,1,100\n" for i in range(1, 4))
+
+  with pytest.raises(TradeImportError) as exc:
+    trade_import_service._parse_file("trades.csv", _csv("date,symbol,type,quantity,price\n" + rows))
+
+  assert exc.value.total == 1
+
+
+@pytest.mark.parametrize("value, expected", [
+  ("2024-03-04", datetime(2024, 3, 4)),
+  ("2024/03/04 09:30", datetime(2024, 3, 4, 9, 30)),
+  ("2024.03.04 09:30:15.250", datetime(2024, 3, 4, 9, 30, 15, 250000)),
+  ("2024-03-04T00:30:00+00:00", datetime(2024, 3, 4, 9, 30)),
+  ("2024-03-04 09:30:00-05:00", datetime(2024, 3, 4, 23, 30)),
+  ("20240304", datetime(2024, 3, 4)),
+])
+def test_datetime_formats_are_naive_kst(value, expected):
+  assert trade_import_service._datetime(value) == expected
+
+
+def test_xlsx():
+  openpyxl = pytest.importorskip("openpyxl")
+  workbook = openpyxl.Workbook()
+  workbook.active.append(["거래일시", "종목코드", "구분", "수량", "단가"])
+  workbook.active.append([datetime(2024, 3, 4, 9, 30), "005930", "매도", 3, 71000])
+  file = io.BytesIO()
+  workbook.save(file)
+  file.seek(0)
+
+  records = trade_import_service._parse_file("trades.xlsx", file)
+
+  assert [(r["transaction_date"], r["transaction_type"], r["quantity"], r["price"]) for r in records] == [
+    (datetime(2024, 3, 4, 9, 30), "SELL", 3, Decimal("71000"))
+  ]
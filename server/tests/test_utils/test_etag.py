@@ -0,0 +1,21 @@
+import pytest
+
+from app.utils.etag import etag_matches
+
+ETAG = '"3f2a9c"'
+
+
+@pytest.mark.parametrize("header", [
+  '"3f2a9c"',
+  'W/"3f2a9c"',
+  '"other", W/"3f2a9c"',
+  '"a,b",  "3f2a9c"',
+  "*",
+])
+def test_matching_headers(header):
+  assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [None, "", '"3f2a9"', "3f2a9c", '"other"'])
+def test_non_matching_headers(header):
+  assert not etag_matches(header, ETAG)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.utils.keyed_lock import KeyedLock
+
+
+@pytest.mark.asyncio
+async def test_same_key_runs_one_at_a_time_in_arrival_order():
+  lock = KeyedLock("test")
+  running = 0
+  max_running = 0
+  order = []
+
+  async def work(i: int):
+    nonlocal running, max_running
+    async with lock.hold("A"):
+      running += 1
+      max_running = max(max_running, running)
+      order.append(i)
+      await asyncio.sleep(0.01)
+      running -= 1
+
+  await asyncio.gather(*[work(i) for i in range(5)])
+
+  assert max_running == 1
+  assert order == [0, 1, 2, 3, 4]
+  assert lock.get_stats()["contended"] == 4
+
+
+@pytest.mark.asyncio
+async def test_different_keys_do_not_wait_for_each_other():
+  lock = KeyedLock("test")
+  entered = asyncio.Event()
+  release = asyncio.Event()
+
+  async def hold_a():
+    async with lock.hold("A"):
+      entered.set()
+      await release.wait()
+
+  holder = asyncio.create_task(hold_a())
+  await entered.wait()
+
+  async with lock.hold("B"):
+    assert lock.is_locked("A")
+    assert lock.is_locked("B")
+
+  release.set()
+  await holder
+
+
+@pytest.mark.asyncio
+async def test_entries_are_removed_after_last_user():
+  lock = KeyedLock("test")
+
+  async with lock.hold("A"):
+    assert lock.get_stats()["active_keys"] == 1
+
+  assert lock.get_stats()["active_keys"] == 0
+  assert not lock.is_locked("A")
+
+
+@pytest.mark.asyncio
+async def test_entry_is_released_when_block_raises():
+  lock = KeyedLock("test")
+
+  with pytest.raises(RuntimeError):
+    async with lock.hold("A"):
+      raise RuntimeError("boom")
+
+  assert lock.get_stats()["active_keys"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hold_many_in_opposite_order_does_not_deadlock():
+  lock = KeyedLock("test")
+
+  async def work(keys):
+    async with lock.hold_many(keys):
+      await asyncio.sleep(0.01)
+
+  await asyncio.wait_for(asyncio.gather(work(["A", "B"]), work(["B", "A"]), work(["A", "A", "B"])), timeout=1)
+  assert lock.get_stats()["active_keys"] == 0
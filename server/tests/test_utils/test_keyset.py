@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from app.crud.transaction_crud import transaction_crud
+from app.models.transaction import Transaction
+from app.utils.keyset import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def db(sqlite_db):
+  # 같은 거래일시가 여러 건인 경우를 포함 (id로 순서 결정), id 13은 다른 사용자
+  base = datetime(2024, 1, 1, 9, 0)
+  sqlite_db.connection.execute(Transaction.__table__.insert(), [
+    {
+      "id": i,
+      "user_id": 1 if i != 13 else 2,
+      "broker_id": 1,
+      "stock_id": 1 if i % 2 else 2,
+      "transaction_type": "SELL" if i % 3 else "BUY",
+      "quantity": 1,
+      "price": Decimal("100"),
+      "commission": Decimal("0"),
+      "transaction_tax": Decimal("0"),
+      "exchange_rate": Decimal("1"),
+      "total_realized_profit": Decimal("1") if i % 3 else None,
+      "transaction_date": base + timedelta(hours=i // 4)
+    }
+    for i in range(1, 26)
+  ])
+  return sqlite_db
+
+
+def test_cursor_round_trip():
+  moment = datetime(2024, 3, 1, 15, 30, 12, 500000)
+
+  cursor = encode_cursor(moment, 1234)
+
+  assert "=" not in cursor
+  assert decode_cursor(cursor) == (moment, 1234)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_invalid_cursor_raises_value_error(cursor):
+  with pytest.raises(ValueError):
+    decode_cursor(cursor)
+
+
+async def _pages(fetch, limit):
+  """next_cursor를 따라 끝까지 읽은 페이지 목록 (엔드포인트와 같은 limit + 1 조회)"""
+  pages, after = [], None
+  while True:
+    rows = await fetch(limit + 1, after)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    pages.append([row["id"] for row in rows])
+    if not has_more:
+      return pages
+    after = decode_cursor(encode_cursor(rows[-1]["transaction_date"], rows[-1]["id"]))
+
+
+@pytest.mark.asyncio
+async def test_history_pages_cover_every_row_once_in_order(db):
+  everything = await transaction_crud.get_user_transactions(db, 1, limit=100)
+  expected = [row["id"] for row in everything]
+
+  pages = await _pages(lambda limit, after: transaction_crud.get_user_transactions(db, 1, limit, after), 7)
+
+  assert [row_id for page in pages for row_id in page] == expected
+  assert len(expected) == 24
+  assert all(len(page) == 7 for page in pages[:-1])
+  keys = [(row["transaction_date"], row["id"]) for row in everything]
+  assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("descending", [True, False])
+async def test_realized_profit_pages_follow_sort_order(db, descending):
+  def fetch(limit, after):
+    return transaction_crud.get_realized_profits_db(db, 1, descending=descending, after=after, limit=limit)
+
+  everything = await fetch(100, None)
+  pages = await _pages(fetch, 4)
+
+  assert [row_id for page in pages for row_id in page] == [row["id"] for row in everything]
+  keys = [(row["transaction_date"], row["id"]) for row in everything]
+  assert keys == sorted(keys, reverse=descending)
+
+
+@pytest.mark.asyncio
+async def test_realized_profit_filters_apply_with_cursor(db):
+  def fetch(limit, after):
+    return transaction_crud.get_realized_profits_db(db, 1, market_type="OVERSEAS", after=after, limit=limit)
+
+  pages = await _pages(fetch, 3)
+  ids = [row_id for page in pages for row_id in page]
+
+  assert ids
+  assert all(row_id % 2 == 0 and row_id % 3 for row_id in ids)
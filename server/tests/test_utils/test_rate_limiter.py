@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.utils.rate_limiter import PriorityRateLimiter
+
+
+def test_rate_must_be_positive():
+  with pytest.raises(ValueError):
+    PriorityRateLimiter(0)
+
+
+@pytest.mark.asyncio
+async def test_unknown_lane_is_rejected():
+  limiter = PriorityRateLimiter(10, lanes=("interactive", "batch"))
+
+  with pytest.raises(ValueError):
+    await limiter.acquire("bulk")
+
+
+@pytest.mark.asyncio
+async def test_burst_passes_without_waiting():
+  limiter = PriorityRateLimiter(5, burst=3)
+
+  waits = [await limiter.acquire() for _ in range(3)]
+
+  assert waits == [0.0, 0.0, 0.0]
+  assert limiter.get_stats()["lanes"]["interactive"]["granted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_lane_is_served_first():
+  limiter = PriorityRateLimiter(50, burst=1, lanes=("interactive", "batch"))
+  await limiter.acquire("batch")  # 토큰 소진
+
+  order = []
+
+  async def request(lane: str, i: int):
+    await limiter.acquire(lane)
+    order.append((lane, i))
+
+  tasks = [asyncio.create_task(request("batch", i)) for i in range(3)]
+  await asyncio.sleep(0)
+  tasks += [asyncio.create_task(request("interactive", i)) for i in range(2)]
+  await asyncio.sleep(0)
+  assert limiter.queue_depth() == 5
+
+  await asyncio.wait_for(asyncio.gather(*tasks), timeout=2)
+
+  assert order[:2] == [("interactive", 0), ("interactive", 1)]
+  assert order[2:] == [("batch", 0), ("batch", 1), ("batch", 2)]
+
+
+@pytest.mark.asyncio
+async def test_tokens_refill_at_configured_rate():
+  limiter = PriorityRateLimiter(20, burst=1)
+  loop = asyncio.get_running_loop()
+
+  started = loop.time()
+  for _ in range(5):
+    await limiter.acquire()
+  elapsed = loop.time() - started
+
+  # 첫 요청은 버스트, 나머지 4건은 초당 20건 → 약 0.2초
+  assert 0.15 <= elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+  limiter = PriorityRateLimiter(20, burst=1)
+  await limiter.acquire()
+
+  cancelled = asyncio.create_task(limiter.acquire())
+  waiting = asyncio.create_task(limiter.acquire())
+  await asyncio.sleep(0)
+  cancelled.cancel()
+
+  await asyncio.wait_for(waiting, timeout=1)
+  assert limiter.queue_depth() == 0
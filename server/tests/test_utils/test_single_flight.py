@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+  flight = SingleFlight("test")
+  calls = 0
+
+  async def fetch():
+    nonlocal calls
+    calls += 1
+    await asyncio.sleep(0.01)
+    return "value"
+
+  results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(10)])
+
+  assert results == ["value"] * 10
+  assert calls == 1
+  assert flight.get_stats()["joined"] == 9
+  assert flight.inflight_count == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+  flight = SingleFlight("test")
+
+  async def fetch(value):
+    await asyncio.sleep(0.01)
+    return value
+
+  results = await asyncio.gather(flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2)))
+
+  assert results == [1, 2]
+  assert flight.get_stats()["started"] == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_waiter_and_next_call_retries():
+  flight = SingleFlight("test")
+  calls = 0
+
+  async def failing():
+    nonlocal calls
+    calls += 1
+    await asyncio.sleep(0.01)
+    raise ValueError("boom")
+
+  results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+  assert all(isinstance(result, ValueError) for result in results)
+  assert calls == 1
+
+  with pytest.raises(ValueError):
+    await flight.do("key", failing)
+  assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_task():
+  flight = SingleFlight("test")
+  release = asyncio.Event()
+
+  async def slow():
+    await release.wait()
+    return "done"
+
+  first = asyncio.create_task(flight.do("key", slow))
+  second = asyncio.create_task(flight.do("key", slow))
+  await asyncio.sleep(0)
+
+  first.cancel()
+  with pytest.raises(asyncio.CancelledError):
+    await first
+
+  release.set()
+  assert await second == "done"
+
+
+@pytest.mark.asyncio
+async def test_start_registers_key_without_await():
+  flight = SingleFlight("test")
+
+  async def fetch():
+    return 42
+
+  task = flight.start("key", fetch)
+  assert flight.is_inflight("key")
+  assert flight.join("key") is task
+  assert await asyncio.shield(task) == 42
+  assert flight.join("key") is None